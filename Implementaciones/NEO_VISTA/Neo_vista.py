@@ -2,9 +2,12 @@
 import mss
 import mss.tools
 from PIL import Image
-import subprocess
+import base64
+import json
 import os
 import time
+import urllib.error
+import urllib.request
 
 print("=" * 60)
 print("📸 SISTEMA DE CAPTURA Y DESCRIPCIÓN DE PANTALLA")
@@ -73,29 +76,42 @@ OBSERVACIONES:
 
 Sé muy específico. Si ves código, menciona el lenguaje. Si ves un navegador, di qué sitios. Si ves texto, menciona de qué trata."""
     
-    # Comando completo
-    comando = f'ollama run llava:7b "Analiza esta imagen: {archivo}. {prompt}"'
+    # Enviar la imagen en el campo "images" de la API de Ollama
+    # (antes solo se mencionaba la ruta en el prompt y Llava no veía nada)
+    with open(archivo, 'rb') as f:
+        imagen_base64 = base64.b64encode(f.read()).decode('ascii')
+    
+    peticion = urllib.request.Request(
+        "http://127.0.0.1:11434/api/generate",
+        data=json.dumps({
+            "model": "llava:7b",
+            "prompt": prompt,
+            "images": [imagen_base64],
+            "stream": True
+        }).encode('utf-8'),
+        headers={'Content-Type': 'application/json'}
+    )
     
     try:
-        # Ejecutar Ollama
-        resultado = subprocess.run(
-            comando,
-            shell=True,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            timeout=60
-        )
+        partes = []
+        with urllib.request.urlopen(peticion, timeout=60) as respuesta:
+            # Una línea JSON por fragmento de texto
+            for linea in respuesta:
+                fragmento = json.loads(linea)
+                partes.append(fragmento.get('response', ''))
+                if fragmento.get('done'):
+                    break
         
-        if resultado.stdout:
-            descripcion = resultado.stdout.strip()
+        descripcion = ''.join(partes).strip()
+        if descripcion:
             return descripcion
         else:
             return "No se pudo obtener descripción"
             
-    except subprocess.TimeoutExpired:
+    except TimeoutError:
         return "Timeout: La IA tardó demasiado"
+    except urllib.error.URLError as e:
+        return f"Error: Ollama no responde ({e.reason})"
     except Exception as e:
         return f"Error: {e}"
 
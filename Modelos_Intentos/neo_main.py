@@ -1,19 +1,30 @@
 # ==========================================
 # NEO v1.0 - SISTEMA COMPLETO
 # Asistente de voz inteligente con visión
+#
+# Uso (desde la raíz del proyecto o desde esta carpeta):
+#   python Modelos_Intentos/neo_main.py
 # ==========================================
 
-import whisper
-import pyaudio
-import wave
-import numpy as np
 import os
+import sys
 import time
 from datetime import datetime
 
+# neo_audio, neo_vad, neo_activacion y neo_stt viven en la carpeta padre.
+# Se añade al final de sys.path para que neo_cerebro y neo_control de esta
+# carpeta sigan teniendo prioridad sobre los de la raíz
+_RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _RAIZ_PROYECTO not in sys.path:
+    sys.path.append(_RAIZ_PROYECTO)
+
 # Importar nuestros módulos
 import neo_cerebro
 import neo_control
+import neo_audio
+import neo_vad
+import neo_activacion
+import neo_stt
 
 print("=" * 60)
 print("🤖 NEO v1.0 - Asistente Inteligente")
@@ -27,15 +38,10 @@ print("=" * 60)
 # CONFIGURACIÓN DE AUDIO MEJORADA
 # ==========================================
 
-# Parámetros básicos
-CHUNK = 1024
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
-RATE = 16000
+# Parámetros básicos (el micrófono lo abre neo_audio una sola vez)
+RATE = neo_audio.RATE
 
-# Detección de voz (ajustables)
-SILENCE_THRESHOLD = 400        # Bajado de 500 (más sensible)
-SILENCE_DURATION = 2.5         # Aumentado de 2 (espera más antes de cortar)
+# Detección de voz (el umbral y el silencio de corte los adapta neo_vad)
 MIN_AUDIO_LENGTH = 0.5         # Mínimo 0.5 segundos de audio
 
 # Grabación
@@ -52,27 +58,20 @@ PALABRAS_ACTIVACION = [
 ]
 
 # ==========================================
-# Whisper
+# Whisper (el motor - faster-whisper int8, whisper.cpp u openai-whisper - lo elige neo_stt)
 MODELO_WHISPER = "base"          # Modelo principal (rápido)
-MODELO_WHISPER_PRECISO = "small" # Modelo de respaldo (más preciso)
-usar_modelo_preciso = False       # Se activa si hay errores
+MODELO_WHISPER_PRECISO = "small" # Solo para los tramos dudosos (se carga al primer uso)
 
-# Archivos temporales
-TEMP_AUDIO = "temp_neo_audio.wav"
+# Archivos temporales (el audio va a Whisper en memoria; WAV solo con NEO_AUDIO_DEBUG=1)
 
 # ==========================================
 # CARGAR MODELOS
 # ==========================================
 
-print("\n[1/2] Cargando Whisper...")
-try:
-    modelo_whisper = whisper.load_model(MODELO_WHISPER)
-    print("✓ Whisper cargado correctamente")
-except Exception as e:
-    print(f"❌ Error al cargar Whisper: {e}")
-    exit(1)
+# Whisper no se carga al importar: se precarga en segundo plano al elegir
+# el modo voz (neo_stt.precargar) y el modo texto no lo carga nunca
 
-print("[2/2] Verificando Ollama...")
+print("\n[1/1] Verificando Ollama...")
 import subprocess
 try:
     result = subprocess.run(["ollama", "list"], capture_output=True, timeout=5)
@@ -91,7 +90,7 @@ print("=" * 60)
 # FUNCIÓN: ESCUCHAR AUDIO MEJORADA
 # ==========================================
 
-def escuchar_audio(timeout=None, esperar_activacion=False):
+def escuchar_audio(timeout=None, esperar_activacion=False, lector=None):
     """
     Escucha audio del micrófono con detección inteligente de silencio
     
@@ -101,164 +100,106 @@ def escuchar_audio(timeout=None, esperar_activacion=False):
     - Validación de longitud mínima
     - Mejor manejo de errores
     
+    MEJORAS v3:
+    - El micrófono queda abierto entre frases (neo_audio): no hay que
+      reabrir el dispositivo y el principio de la frase no se pierde
+    - Detección de voz adaptativa (neo_vad): el umbral sigue al ruido
+      de fondo y el silencio de corte se ajusta a las pausas del hablante
+    - Devuelve el audio en memoria: sin WAV temporal ni ffmpeg en Whisper
+    
     Args:
         timeout (int): Tiempo máximo de grabación (None = usar MAX_RECORDING_TIME)
         esperar_activacion (bool): Si True, espera sonido antes de grabar
+        lector (LectorAudio): Seguir leyendo desde aquí (ej: tras la palabra de activación)
     
     Returns:
-        str: Ruta del archivo de audio, o None si falló
+        np.ndarray: Audio float32 a 16 kHz, o None si falló
     """
     if timeout is None:
         timeout = MAX_RECORDING_TIME
     
-    audio = pyaudio.PyAudio()
-    
     try:
-        stream = audio.open(
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=RATE,
-            input=True,
-            frames_per_buffer=CHUNK
-        )
-        
-        # CALIBRACIÓN: Medir ruido de fondo durante 0.5 segundos
-        if esperar_activacion:
-            print("🎤 Calibrando micrófono...")
-            calibration_frames = int(0.5 * RATE / CHUNK)
-            noise_samples = []
-            
-            for _ in range(calibration_frames):
-                data = stream.read(CHUNK)
-                audio_data = np.frombuffer(data, dtype=np.int16)
-                noise_samples.append(np.abs(audio_data).mean())
-            
-            # Calcular umbral dinámico (ruido promedio + margen)
-            avg_noise = np.mean(noise_samples)
-            dynamic_threshold = max(avg_noise * 2, SILENCE_THRESHOLD)
-            
-            print(f"📊 Ruido ambiente: {avg_noise:.0f} | Umbral: {dynamic_threshold:.0f}")
-        else:
-            dynamic_threshold = SILENCE_THRESHOLD
-        
-        frames = []
-        silent_chunks = 0
-        max_silent_chunks = int(SILENCE_DURATION * RATE / CHUNK)
-        recording = False
-        chunks_grabados = 0
-        max_chunks = int(timeout * RATE / CHUNK)
+        neo_audio.obtener_captura()
+        detector = neo_vad.obtener_detector()
         
         if esperar_activacion:
+            if detector.ruido_db is not None:
+                print(f"📊 Ruido ambiente: {detector.ruido_db:.0f} dBFS | "
+                      f"Corte tras {detector.hangover():.1f}s de silencio")
             print("🎤 Listo. Esperando que hables...")
         
-        # LOOP DE GRABACIÓN
-        while chunks_grabados < max_chunks:
-            try:
-                data = stream.read(CHUNK, exception_on_overflow=False)
-            except IOError as e:
-                print(f"⚠️ Error de audio: {e}")
-                continue
-            
-            audio_data = np.frombuffer(data, dtype=np.int16)
-            volume = np.abs(audio_data).mean()
-            
-            # Detectar si hay sonido (voz)
-            if volume > dynamic_threshold:
-                if not recording:
-                    if esperar_activacion:
-                        print("🎤 Grabando...")
-                    recording = True
-                
-                silent_chunks = 0
-                frames.append(data)
-            else:
-                # Hay silencio
-                if recording:
-                    silent_chunks += 1
-                    frames.append(data)
-                    
-                    # Si hay silencio prolongado, parar
-                    if silent_chunks > max_silent_chunks:
-                        break
-            
-            chunks_grabados += 1
-        
-        # LIMPIEZA
-        stream.stop_stream()
-        stream.close()
-        audio.terminate()
+        muestras = neo_vad.grabar_frase(
+            timeout=timeout,
+            lector=lector,
+            detector=detector,
+            al_empezar=(lambda: print("🎤 Grabando...")) if esperar_activacion else None
+        )
         
         # VALIDACIÓN: Verificar longitud mínima
-        if len(frames) == 0:
+        if muestras is None:
             return None
         
-        duracion = len(frames) * CHUNK / RATE
+        duracion = neo_audio.duracion(muestras)
         
         if duracion < MIN_AUDIO_LENGTH:
             print(f"⚠️ Audio muy corto ({duracion:.1f}s), descartando...")
             return None
         
-        # GUARDAR AUDIO
-        wf = wave.open(TEMP_AUDIO, 'wb')
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(audio.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(frames))
-        wf.close()
+        # GUARDAR AUDIO (solo para depurar)
+        neo_audio.guardar_depuracion(muestras, "neo_main")
         
         print(f"✓ Audio capturado ({duracion:.1f}s)")
-        return TEMP_AUDIO
+        return neo_audio.a_float32(muestras)
         
     except Exception as e:
         print(f"❌ Error en grabación: {e}")
-        try:
-            audio.terminate()
-        except:
-            pass
         return None
 
 # ==========================================
 # FUNCIÓN: TRANSCRIBIR AUDIO MEJORADA
 # ==========================================
 
-def transcribir_audio(archivo_audio, intentar_preciso=False):
+def transcribir_audio(audio):
     """
-    Transcribe audio a texto con sistema de respaldo
-    
-    MEJORAS v2:
-    - Intenta con modelo base primero (rápido)
-    - Si falla o está vacío, usa modelo preciso (lento pero mejor)
+    Transcribe audio a texto con re-transcripción selectiva
+    
+    MEJORAS v3:
+    - Siempre empieza con el modelo base (rápido)
+    - Solo los segmentos con poca confianza (avg_logprob / no_speech_prob)
+      se vuelven a decodificar con el modelo preciso y búsqueda en haz;
+      si la frase sale vacía o base falla, se repite entera
+    - El modelo preciso se carga la primera vez que hace falta y la
+      siguiente frase vuelve al modelo base
     - Filtrado de ruido en texto
     
     Args:
-        archivo_audio (str): Ruta del archivo
-        intentar_preciso (bool): Forzar uso de modelo preciso
+        audio (np.ndarray): Audio float32 a 16 kHz (o ruta de un archivo)
     
     Returns:
         str: Texto transcrito, o None si falló
     """
-    global usar_modelo_preciso
-    
-    # Decidir qué modelo usar
-    if intentar_preciso or usar_modelo_preciso:
-        modelo_actual = MODELO_WHISPER_PRECISO
-        print("🔍 Usando modelo preciso...")
-    else:
-        modelo_actual = MODELO_WHISPER
-    
     try:
-        # Transcribir
-        result = modelo_whisper.transcribe(
-            archivo_audio, 
-            language="es",
-            fp16=False,  # Forzar FP32 en CPU
+        result = neo_stt.transcribir_selectivo(
+            audio,
+            motor=neo_stt.obtener_motor(modelo=MODELO_WHISPER),
+            modelo_preciso=MODELO_WHISPER_PRECISO,
+            idioma="es",
             temperature=0.0,  # Más determinista
             compression_ratio_threshold=2.4,
             logprob_threshold=-1.0,
             no_speech_threshold=0.6
         )
+        if result is None:
+            print("❌ No hay ningún motor de Whisper instalado")
+            return None
         
-        texto = result['text'].strip()
+        if result['redecodificados']:
+            stats = neo_stt.estadisticas_selectivo()
+            print(f"🔍 {result['redecodificados']} tramo(s) dudoso(s) con {result['modelo_preciso']}: "
+                  f"+{result['segundos_extra']:.2f}s "
+                  f"(media {stats['extra_por_frase']:.2f}s por comando)")
+        
+        texto = result['texto']
         
         # FILTRADO: Remover artefactos comunes
         texto = texto.replace('[música]', '')
@@ -268,9 +209,6 @@ def transcribir_audio(archivo_audio, intentar_preciso=False):
         
         # VALIDACIÓN: ¿El texto está vacío o es muy corto?
         if len(texto) < 2:
-            if not intentar_preciso and not usar_modelo_preciso:
-                print("⚠️ Texto vacío, reintentando con modelo preciso...")
-                return transcribir_audio(archivo_audio, intentar_preciso=True)
             return None
         
         # VALIDACIÓN: ¿Solo tiene puntuación o números?
@@ -281,13 +219,6 @@ def transcribir_audio(archivo_audio, intentar_preciso=False):
         
     except Exception as e:
         print(f"❌ Error en transcripción: {e}")
-        
-        # Si falló con base, intentar con preciso
-        if not intentar_preciso and not usar_modelo_preciso:
-            print("💡 Activando modelo preciso para futuros comandos...")
-            usar_modelo_preciso = True
-            return transcribir_audio(archivo_audio, intentar_preciso=True)
-        
         return None
 # ==========================================
 # FUNCIÓN: DETECTAR ACTIVACIÓN MEJORADA
@@ -339,24 +270,13 @@ def detectar_activacion(texto):
 # FUNCIÓN: CAPTURAR PANTALLA (OPCIONAL)
 # ==========================================
 
-def necesita_contexto_visual(comando):
-    """
-    Determina si el comando necesita ver la pantalla
-    
-    Args:
-        comando (str): Comando del usuario
-    
-    Returns:
-        bool: True si necesita contexto visual
-    """
-    palabras_visuales = [
-        'esto', 'esta', 'eso', 'aquí', 'ahí',
-        'ventana', 'pantalla', 'esto que veo',
-        'lo que está abierto', 'lo que hay'
-    ]
-    
-    comando_lower = comando.lower()
-    return any(palabra in comando_lower for palabra in palabras_visuales)
+# Las palabras clave son las de neo_vigilante (una sola lista para todo NEO)
+try:
+    from neo_vigilante import necesita_contexto_visual
+except ImportError:
+    # Sin neo_vision (mss/numpy) tampoco hay forma de ver la pantalla
+    def necesita_contexto_visual(comando):
+        return False
 
 def obtener_contexto_pantalla():
     """
@@ -365,6 +285,15 @@ def obtener_contexto_pantalla():
     Returns:
         str: Descripción de lo que hay en pantalla, o None
     """
+    # Resumen del vigilante en segundo plano (instantáneo si está fresco)
+    try:
+        import neo_vigilante
+        contexto = neo_vigilante.obtener_resumen()
+        if contexto:
+            return contexto
+    except ImportError:
+        pass
+    
     print("👁️ Analizando pantalla...")
     
     try:
@@ -467,16 +396,28 @@ def loop_principal():
     
     intentos_fallidos = 0
     
+    # Detector de "NEO" sobre el audio: Whisper solo corre tras la activación
+    escucha = neo_activacion.obtener_escucha()
+    if escucha:
+        print(f"💡 Detector de activación: {escucha.detector.nombre} "
+              f"(sensibilidad {escucha.sensibilidad})\n")
+    
     while True:
         try:
             # Escuchar audio
-            archivo_audio = escuchar_audio(timeout=10, esperar_activacion=True)
+            if escucha:
+                if escucha.esperar(timeout=ACTIVATION_TIMEOUT) is None:
+                    continue
+                print("✓ NEO activado, te escucho...")
+                audio = escuchar_audio(timeout=MAX_RECORDING_TIME, lector=escucha.lector)
+            else:
+                audio = escuchar_audio(timeout=10, esperar_activacion=True)
             
-            if not archivo_audio:
+            if audio is None:
                 continue
             
             # Transcribir
-            texto = transcribir_audio(archivo_audio)
+            texto = transcribir_audio(audio)
             
             if not texto:
                 continue
@@ -484,8 +425,11 @@ def loop_principal():
            # Mostrar lo que escuchó
             print(f"📝 Escuché: '{texto}'")
             
-            # Detectar activación
+            # Detectar activación (con detector de audio, todo es comando;
+            # se quita "neo" por si Whisper también lo transcribió)
             activado, comando = detectar_activacion(texto)
+            if escucha:
+                activado, comando = True, (comando if activado else texto)
             
             # DEBUG: Mostrar detección
             if activado:
@@ -518,10 +462,6 @@ def loop_principal():
                 intentos_fallidos += 1
                 if intentos_fallidos % 5 == 0:
                     print("💡 Recuerda decir 'NEO' antes de tu comando\n")
-            
-            # Limpiar archivo temporal
-            if os.path.exists(TEMP_AUDIO):
-                os.remove(TEMP_AUDIO)
                 
         except KeyboardInterrupt:
             print("\n\n👋 Apagando NEO...")
@@ -579,44 +519,42 @@ def modo_prueba_texto():
 
 def configurar_microfono():
     """
-    Permite ajustar la sensibilidad del micrófono interactivamente
+    Permite ajustar la detección de voz interactivamente.
+    
+    El umbral ya no se ajusta a mano: neo_vad sigue el ruido de fondo.
+    Se puede elegir el detector y el silencio máximo antes de cortar.
     """
-    global SILENCE_THRESHOLD, SILENCE_DURATION
+    detector = neo_vad.obtener_detector()
     
     print("\n" + "=" * 60)
     print("⚙️ CONFIGURACIÓN DEL MICRÓFONO")
     print("=" * 60)
     
     print(f"\n📊 Configuración actual:")
-    print(f"   - Umbral de silencio: {SILENCE_THRESHOLD}")
-    print(f"   - Duración de silencio: {SILENCE_DURATION}s")
-    
-    print("\n💡 Ajustes recomendados según tu ambiente:")
-    print("\n   🔇 Lugar SILENCIOSO (oficina callada, noche):")
-    print("      - Umbral: 300-400")
-    print("      - Duración: 2.0s")
+    print(f"   - Detector de voz: {detector.backend.nombre}")
+    if detector.ruido_db is not None:
+        print(f"   - Ruido de fondo medido: {detector.ruido_db:.0f} dBFS")
+    print(f"   - Silencio para cortar: {detector.hangover_min}-{detector.hangover_max}s "
+          f"(ahora {detector.hangover():.1f}s)")
     
-    print("\n   🔊 Lugar con RUIDO MODERADO (casa, día):")
-    print("      - Umbral: 500-600")
-    print("      - Duración: 2.5s")
-    
-    print("\n   📢 Lugar RUIDOSO (calle, música de fondo):")
-    print("      - Umbral: 700-900")
-    print("      - Duración: 3.0s")
+    print("\n💡 Detectores: 'energia' (sin dependencias), 'webrtc' (pip install webrtcvad),")
+    print("   'silero' (pip install silero-vad, mejor en lugares ruidosos)")
+    print("💡 Si NEO te corta a mitad de frase, sube el silencio máximo (ej: 2.0s)")
     
     cambiar = input("\n¿Quieres cambiar la configuración? (si/no): ").strip().lower()
     
     if cambiar == 'si':
         try:
-            nuevo_umbral = input(f"\nNuevo umbral de silencio [{SILENCE_THRESHOLD}]: ").strip()
-            if nuevo_umbral:
-                SILENCE_THRESHOLD = int(nuevo_umbral)
-                print(f"✓ Umbral actualizado a {SILENCE_THRESHOLD}")
+            nuevo_backend = input(f"\nDetector [{detector.backend.nombre}]: ").strip().lower()
+            if nuevo_backend:
+                neo_vad.configurar_backend(nuevo_backend)
+                detector = neo_vad.obtener_detector()
+                print(f"✓ Detector: {detector.backend.nombre}")
             
-            nueva_duracion = input(f"Nueva duración de silencio [{SILENCE_DURATION}s]: ").strip()
+            nueva_duracion = input(f"Silencio máximo para cortar [{detector.hangover_max}s]: ").strip()
             if nueva_duracion:
-                SILENCE_DURATION = float(nueva_duracion)
-                print(f"✓ Duración actualizada a {SILENCE_DURATION}s")
+                detector.hangover_max = max(detector.hangover_min, float(nueva_duracion))
+                print(f"✓ Silencio máximo actualizado a {detector.hangover_max}s")
             
             print("\n✅ Configuración guardada")
         except ValueError:
@@ -644,6 +582,11 @@ if __name__ == "__main__":
     modo = input("\n¿Qué modo? (1/2/3/4): ").strip()
     
     if modo == "1":
+        # Whisper se carga mientras configuras el micrófono
+        if neo_stt.precargar(modelo=MODELO_WHISPER) is None:
+            print("❌ No hay ningún motor de transcripción instalado (pip install faster-whisper)")
+            raise SystemExit(1)
+        
         print("\n⚠️ Asegúrate de que tu micrófono esté conectado")
         
         # Opción de configurar antes
@@ -667,6 +610,7 @@ if __name__ == "__main__":
     modo = input("\n¿Qué modo? (1/2/3): ").strip()
     
     if modo == "1":
+        neo_stt.precargar(modelo=MODELO_WHISPER)
         print("\n⚠️ Asegúrate de que tu micrófono esté conectado")
         input("Presiona Enter cuando estés listo...")
         loop_principal()
@@ -677,8 +621,10 @@ if __name__ == "__main__":
     else:
         print("\n👋 ¡Hasta luego!")
     
+    neo_audio.detener_captura()
+    
     # Limpiar archivos temporales
-    for archivo in [TEMP_AUDIO, "temp_neo_screen.png"]:
+    for archivo in ["temp_neo_screen.png"]:
         if os.path.exists(archivo):
             os.remove(archivo)
     
@@ -0,0 +1,745 @@
+# benchmark_vision.py - Mediciones de rendimiento del sistema de visión
+"""
+Mide cuánto tarda (y cuánta memoria asigna) cada parte de neo_vision.
+
+USO:
+    python benchmark_vision.py captura --capturas 100
+    python benchmark_vision.py captura --json
+    python benchmark_vision.py codificacion --repeticiones 10
+    python benchmark_vision.py cliente              (servidor falso, sin Ollama)
+    python benchmark_vision.py cliente --real       (Ollama de verdad + llava:7b)
+    python benchmark_vision.py etapas --salida base.json   (cada etapa de ver_pantalla)
+    python benchmark_vision.py etapas --resoluciones 1080p --tipos texto vacio
+    python benchmark_vision.py mosaicos             (tokens/tiempo: mosaicos vs pantalla completa)
+    python benchmark_vision.py firmas               (detección de cambios: bordes y regiones pequeñas)
+
+En Linux sin monitor se puede correr con una pantalla virtual:
+    xvfb-run -s "-screen 0 1920x1080x24" python benchmark_vision.py captura
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+# ==========================================
+# UTILIDADES DE MEDICIÓN
+# ==========================================
+
+def medir(nombre, funcion, repeticiones, calentamiento=3):
+    """
+    Ejecuta `funcion` varias veces y mide tiempo y memoria.
+
+    La memoria es el pico asignado (vía tracemalloc) durante cada llamada,
+    es decir, los bytes que hay que reservar por iteración.
+
+    Args:
+        nombre (str): Nombre de la prueba
+        funcion (callable): Función sin argumentos a medir
+        repeticiones (int): Número de llamadas medidas
+        calentamiento (int): Llamadas previas sin medir
+
+    Returns:
+        dict: {'nombre', 'repeticiones', 'ms_promedio', 'ms_min',
+               'por_segundo', 'bytes_por_llamada'}
+    """
+    for _ in range(calentamiento):
+        funcion()
+
+    # Tiempo (sin tracemalloc, que ralentiza)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    # Memoria (pasada aparte)
+    picos = []
+    tracemalloc.start()
+    try:
+        for _ in range(min(repeticiones, 10)):
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            funcion()
+            picos.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+
+    total = sum(tiempos)
+    return {
+        'nombre': nombre,
+        'repeticiones': repeticiones,
+        'ms_promedio': total / repeticiones * 1000,
+        'ms_min': min(tiempos) * 1000,
+        'por_segundo': repeticiones / total if total else 0.0,
+        'bytes_por_llamada': int(sum(picos) / len(picos)) if picos else 0,
+    }
+
+
+def importar_sin_banner(nombre):
+    """Importa un módulo de NEO sin que su banner ensucie la salida JSON"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return importlib.import_module(nombre)
+
+
+def mostrar_resultados(titulo, resultados):
+    """Imprime una tabla simple con los resultados"""
+    print("\n" + "=" * 81)
+    print(titulo)
+    print("=" * 81)
+    print(f"{'Prueba':28} {'ms/op':>9} {'op/s':>9} {'KB asignados':>14} {'KB salida':>10}")
+    print("-" * 81)
+    for r in resultados:
+        salida = f"{r['bytes_salida'] / 1024:10.1f}" if 'bytes_salida' in r else f"{'-':>10}"
+        print(f"{r['nombre']:28} {r['ms_promedio']:9.2f} {r['por_segundo']:9.1f} "
+              f"{r['bytes_por_llamada'] / 1024:14.1f} {salida}")
+    print("=" * 81)
+
+
+# ==========================================
+# PANTALLAS SINTÉTICAS
+# ==========================================
+
+RESOLUCIONES = {
+    '1080p': (1920, 1080),
+    '1440p': (2560, 1440),
+    '4K': (3840, 2160),
+}
+
+
+def generar_escritorio_sintetico(ancho, alto, tipo='texto', semilla=0):
+    """
+    Genera una captura de escritorio falsa (no necesita pantalla).
+
+    Args:
+        ancho (int): Ancho en píxeles
+        alto (int): Alto en píxeles
+        tipo (str): 'texto' (editor lleno de líneas), 'foto' (imagen con
+                    ruido y degradados) o 'vacio' (fondo casi liso)
+        semilla (int): Para generar siempre la misma imagen
+
+    Returns:
+        PIL.Image: Imagen RGB
+    """
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    rng = np.random.default_rng(semilla)
+
+    if tipo == 'foto':
+        y, x = np.mgrid[0:alto, 0:ancho].astype(np.float32)
+        base = np.stack([
+            128 + 100 * np.sin(x / 97.0),
+            128 + 100 * np.cos(y / 61.0),
+            128 + 100 * np.sin((x + y) / 143.0)
+        ], axis=-1)
+        base += rng.normal(0, 18, size=base.shape)
+        imagen = Image.fromarray(np.clip(base, 0, 255).astype(np.uint8), 'RGB')
+    else:
+        imagen = Image.new('RGB', (ancho, alto), (30, 30, 30) if tipo == 'texto' else (0, 90, 160))
+
+    dibujo = ImageDraw.Draw(imagen)
+
+    # Barra de tareas
+    dibujo.rectangle([0, alto - 48, ancho, alto], fill=(20, 20, 20))
+    for i in range(8):
+        dibujo.rectangle([10 + i * 56, alto - 42, 50 + i * 56, alto - 6], fill=(70, 70, 90))
+
+    if tipo == 'texto':
+        # Líneas de "código" en varias columnas de color
+        colores = [(220, 220, 220), (86, 156, 214), (206, 145, 120), (106, 153, 85)]
+        palabras = ["def", "return", "import", "for", "in", "if", "neo_vision", "imagen", "=", "(", ")"]
+        linea = 0
+        for y in range(40, alto - 60, 18):
+            x = 60 + 24 * int(rng.integers(0, 4))
+            for _ in range(int(rng.integers(2, 10))):
+                palabra = palabras[int(rng.integers(0, len(palabras)))]
+                dibujo.text((x, y), palabra, fill=colores[int(rng.integers(0, len(colores)))])
+                x += 8 * len(palabra) + 8
+                if x > ancho - 80:
+                    break
+            dibujo.text((8, y), str(linea), fill=(120, 120, 120))
+            linea += 1
+
+    return imagen
+
+
+# ==========================================
+# BENCHMARK: CAPTURA
+# ==========================================
+
+def benchmark_captura(capturas=50):
+    """
+    Compara la captura antigua (MSS nuevo + screenshot.rgb en cada llamada)
+    con la sesión persistente de neo_vision.
+
+    Returns:
+        list: Resultados de medir()
+    """
+    import mss
+    from PIL import Image
+    neo_vision = importar_sin_banner("neo_vision")
+
+    def captura_antigua():
+        sct = mss.mss()
+        screenshot = sct.grab(sct.monitors[1])
+        return Image.frombytes('RGB', screenshot.size, screenshot.rgb)
+
+    sesion = neo_vision.SesionCaptura()
+
+    try:
+        resultados = [
+            medir("antes: mss nuevo + .rgb", captura_antigua, capturas),
+            medir("sesión: vista BGRA", sesion.capturar, capturas),
+            medir("sesión: BGRA → RGB numpy", lambda: sesion.a_rgb(sesion.capturar()), capturas),
+            medir("sesión: BGRA → PIL", lambda: sesion.a_imagen(sesion.capturar()), capturas),
+            medir("capturar_pantalla_rapida()", neo_vision.capturar_pantalla_rapida, capturas),
+        ]
+    finally:
+        sesion.cerrar()
+        neo_vision.cerrar_sesion_captura()
+
+    return resultados
+
+
+# ==========================================
+# BENCHMARK: REDUCCIÓN Y CODIFICACIÓN
+# ==========================================
+
+def benchmark_codificacion(repeticiones=10):
+    """
+    Compara el pipeline antiguo (LANCZOS a resolución completa + JPEG
+    optimize=True + base64 + .decode) con el nuevo (reduce + bilineal,
+    formato según presupuesto, base64 escrito en el buffer) para
+    1080p, 1440p y 4K.
+
+    Returns:
+        list: Resultados de medir() con 'bytes_salida' y 'formato' agregados
+    """
+    import base64
+    from io import BytesIO
+    from PIL import Image
+    import neo_ollama
+    neo_vision = importar_sin_banner("neo_vision")
+
+    def pipeline_antiguo(imagen):
+        ancho, alto = imagen.size
+        reducida = imagen.resize((1280, int(alto * 1280 / ancho)), Image.Resampling.LANCZOS)
+        buffer = BytesIO()
+        reducida.save(buffer, format='JPEG', quality=85, optimize=True)
+        return base64.b64encode(buffer.getvalue()).decode('utf-8'), 'JPEG'
+
+    def pipeline_nuevo(imagen):
+        reducida = neo_vision.reducir_imagen(imagen, neo_vision.MAX_ANCHO)
+        datos, formato = neo_vision.codificar_imagen(reducida)
+        cuerpo = BytesIO()
+        neo_ollama.escribir_base64(datos, cuerpo)
+        return cuerpo.getbuffer(), formato
+
+    resultados = []
+    for nombre_res, (ancho, alto) in RESOLUCIONES.items():
+        for tipo in ('texto', 'foto'):
+            imagen = generar_escritorio_sintetico(ancho, alto, tipo)
+
+            for etiqueta, pipeline in (('antes', pipeline_antiguo), ('nuevo', pipeline_nuevo)):
+                resultado = medir(f"{etiqueta} {nombre_res} {tipo}",
+                                  lambda: pipeline(imagen), repeticiones, calentamiento=1)
+                salida, formato = pipeline(imagen)
+                resultado['bytes_salida'] = len(salida)
+                resultado['formato'] = formato
+                resultados.append(resultado)
+
+    return resultados
+
+
+# ==========================================
+# BENCHMARK: CLIENTE DE OLLAMA (extremo a extremo)
+# ==========================================
+
+ANCHOS_CLIENTE = (640, 1280, 1920, 3840)
+
+
+def benchmark_cliente(repeticiones=5, real=False):
+    """
+    Latencia de extremo a extremo por tamaño de imagen: codificar,
+    enviar por la API (campo "images") y recibir la respuesta en streaming.
+
+    Sin --real usa ServidorOllamaFalso, así que mide solo el transporte
+    (lo que NEO agrega por encima de la inferencia).
+
+    Returns:
+        list: Resultados de medir() con 'bytes_salida' (imagen codificada)
+              y 'ms_primer_token'
+    """
+    import neo_ollama
+    neo_vision = importar_sin_banner("neo_vision")
+
+    servidor = None
+    if real:
+        cliente = neo_ollama.ClienteOllama()
+    else:
+        servidor = neo_ollama.ServidorOllamaFalso("Veo un editor de código con texto.").iniciar()
+        cliente = neo_ollama.ClienteOllama(servidor.url)
+
+    pantalla = generar_escritorio_sintetico(3840, 2160, 'texto')
+    resultados = []
+
+    try:
+        for ancho in ANCHOS_CLIENTE:
+            imagen = neo_vision.reducir_imagen(pantalla, ancho)
+            primeros = []
+
+            def consulta():
+                inicio = time.perf_counter()
+                marcas = []
+                datos, _ = neo_vision.codificar_imagen(imagen)
+                cliente.generar(neo_vision.MODELO_VISION, "Describe la pantalla",
+                                imagenes=[datos],
+                                al_recibir=lambda _: marcas.append(time.perf_counter()))
+                if marcas:
+                    primeros.append(marcas[0] - inicio)
+
+            resultado = medir(f"{ancho}px ({imagen.size[1]} alto)", consulta,
+                              repeticiones, calentamiento=1)
+            resultado['bytes_salida'] = len(neo_vision.codificar_imagen(imagen)[0])
+            resultado['ms_primer_token'] = (sum(primeros) / len(primeros) * 1000) if primeros else None
+            resultados.append(resultado)
+    finally:
+        cliente.cerrar()
+        if servidor:
+            servidor.detener()
+
+    return resultados
+
+
+# ==========================================
+# BENCHMARK: ETAPAS DE ver_pantalla (modelo falso)
+# ==========================================
+
+TIPOS_ESCRITORIO = ('texto', 'foto', 'vacio')
+
+
+def frame_bgra(imagen):
+    """PIL RGB → frame BGRA contiguo, como el que entrega SesionCaptura"""
+    import numpy as np
+
+    rgb = np.asarray(imagen.convert('RGB'))
+    bgra = np.empty(rgb.shape[:2] + (4,), dtype=np.uint8)
+    bgra[:, :, :3] = rgb[:, :, ::-1]
+    bgra[:, :, 3] = 255
+    return bgra
+
+
+def crear_sesion_sintetica(neo_vision, bgra):
+    """
+    SesionCaptura que "captura" siempre el mismo escritorio sintético.
+    Copia el frame en cada captura, igual que MSS reserva uno nuevo.
+    """
+    alto, ancho = bgra.shape[:2]
+    monitor = {'left': 0, 'top': 0, 'width': ancho, 'height': alto}
+
+    class SesionSintetica(neo_vision.SesionCaptura):
+        def monitores(self):
+            return [monitor, monitor]
+
+        def capturar(self, monitor=None):
+            if isinstance(monitor, dict):
+                y, x = monitor['top'], monitor['left']
+                return bgra[y:y + monitor['height'], x:x + monitor['width']].copy()
+            return bgra.copy()
+
+    return SesionSintetica()
+
+
+def entorno():
+    """Versiones y plataforma, para poder comparar resultados entre máquinas"""
+    import platform
+    import numpy as np
+    import PIL
+
+    return {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'numpy': np.__version__,
+        'pillow': PIL.__version__,
+    }
+
+
+def benchmark_etapas(repeticiones=5, resoluciones=None, tipos=TIPOS_ESCRITORIO):
+    """
+    Tiempo y memoria de cada etapa de ver_pantalla sobre escritorios
+    sintéticos, con Llava reemplazado por ServidorOllamaFalso.
+
+    Etapas medidas por separado: captura, firma (detección de cambios),
+    conversión BGRA → PIL, reducción, codificación, base64 y modelo
+    (transporte HTTP + respuesta falsa). Además se mide ver_pantalla()
+    completo (forzar=True, sin cache) con su desglose por etapa.
+
+    Returns:
+        list: Un dict por (resolución, tipo) con 'etapas' (resultados de
+              medir()), 'ver_pantalla' y el formato/tamaño codificado
+    """
+    from io import BytesIO
+    import neo_ollama
+    neo_vision = importar_sin_banner("neo_vision")
+
+    resoluciones = resoluciones or list(RESOLUCIONES)
+    servidor = neo_ollama.ServidorOllamaFalso("Veo un escritorio con varias ventanas.").iniciar()
+    cliente_anterior = neo_ollama._cliente
+    neo_ollama.configurar_cliente(servidor.url)
+    sesion_anterior = neo_vision._sesion_captura
+
+    resultados = []
+    try:
+        for nombre_res in resoluciones:
+            ancho, alto = RESOLUCIONES[nombre_res]
+            for tipo in tipos:
+                bgra = frame_bgra(generar_escritorio_sintetico(ancho, alto, tipo))
+                sesion = crear_sesion_sintetica(neo_vision, bgra)
+                neo_vision._sesion_captura = sesion
+
+                # Entradas fijas de cada etapa (cada una se mide aislada)
+                imagen = sesion.a_imagen(bgra)
+                reducida = neo_vision.reducir_imagen(imagen, neo_vision.MAX_ANCHO)
+                datos, formato = neo_vision.codificar_imagen(reducida)
+
+                def base64_cuerpo():
+                    neo_ollama.escribir_base64(datos, BytesIO())
+
+                def modelo():
+                    neo_ollama.obtener_cliente().generar(neo_vision.MODELO_VISION,
+                                                         "Describe la pantalla", imagenes=[datos])
+
+                etapas = [
+                    medir("captura", sesion.capturar, repeticiones, calentamiento=1),
+                    medir("firma", lambda: neo_vision.firma_frame(bgra), repeticiones, calentamiento=1),
+                    medir("conversion", lambda: sesion.a_imagen(bgra), repeticiones, calentamiento=1),
+                    medir("reduccion", lambda: neo_vision.reducir_imagen(imagen, neo_vision.MAX_ANCHO),
+                          repeticiones, calentamiento=1),
+                    medir("codificacion", lambda: neo_vision.codificar_imagen(reducida),
+                          repeticiones, calentamiento=1),
+                    medir("base64", base64_cuerpo, repeticiones, calentamiento=1),
+                    medir("modelo (falso)", modelo, repeticiones, calentamiento=1),
+                ]
+
+                # ver_pantalla completo, con el desglose que devuelve
+                desgloses = []
+
+                def completo():
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        resultado = neo_vision.ver_pantalla("Describe la pantalla", forzar=True)
+                    desgloses.append(resultado.get('tiempos', {}))
+
+                total = medir("ver_pantalla()", completo, repeticiones, calentamiento=1)
+                etapas_vp = {}
+                for desglose in desgloses[-repeticiones:]:
+                    for etapa, segundos in desglose.items():
+                        etapas_vp.setdefault(etapa, []).append(segundos * 1000)
+                total['ms_por_etapa'] = {e: sum(v) / len(v) for e, v in etapas_vp.items()}
+
+                resultados.append({
+                    'resolucion': nombre_res,
+                    'tamano': [ancho, alto],
+                    'tipo': tipo,
+                    'formato': formato,
+                    'bytes_imagen': len(datos),
+                    'etapas': etapas + [total],
+                })
+    finally:
+        neo_vision._sesion_captura = sesion_anterior
+        neo_ollama._cliente = cliente_anterior
+        servidor.detener()
+
+    return resultados
+
+
+def mostrar_etapas(resultados):
+    """Una tabla por escritorio + el desglose de ver_pantalla()"""
+    for r in resultados:
+        titulo = (f"ETAPAS {r['resolucion']} {r['tipo']} "
+                  f"→ {r['formato']} {r['bytes_imagen'] / 1024:.0f} KB")
+        mostrar_resultados(titulo, r['etapas'])
+        desglose = r['etapas'][-1].get('ms_por_etapa', {})
+        if desglose:
+            print("ver_pantalla por etapa: " +
+                  " | ".join(f"{etapa} {ms:.1f} ms" for etapa, ms in desglose.items()))
+
+
+# ==========================================
+# BENCHMARK: MOSAICOS vs PANTALLA COMPLETA
+# ==========================================
+
+PREGUNTA_MOSAICOS = "¿Qué hace la función calcular_total?"
+
+
+def benchmark_mosaicos(repeticiones=3, real=False, resoluciones=('1440p', '4K')):
+    """
+    Compara una pasada de pantalla completa (reducida a MAX_ANCHO) con
+    ver_pantalla_mosaico() en escritorios de texto sintéticos:
+
+    - 'zoom':  sin OCR; la vista general pide mosaicos ("ZOOM: B2, C2")
+    - 'texto': OCR falso que encuentra la palabra de la pregunta
+    - 'texto (repetida)': misma pantalla otra vez, mosaicos del cache
+
+    Returns:
+        list: Por escenario: ms, llamadas, imágenes, tokens de entrada y
+              salida (según Ollama; aproximados con el servidor falso)
+    """
+    import neo_ollama
+    neo_vision = importar_sin_banner("neo_vision")
+
+    def respuesta_falsa(datos):
+        if 'ZOOM:' in datos.get('prompt', '') and len(datos.get('images', [])) == 1:
+            return "ZOOM: B2, C2"
+        return "La función calcular_total suma los importes de la lista y devuelve el total."
+
+    servidor = None
+    cliente_anterior = neo_ollama._cliente
+    if real:
+        neo_ollama.configurar_cliente()
+    else:
+        servidor = neo_ollama.ServidorOllamaFalso(respuesta_falsa).iniciar()
+        neo_ollama.configurar_cliente(servidor.url)
+    sesion_anterior = neo_vision._sesion_captura
+
+    def fila(nombre, llamada, limpiar_cache=True):
+        tiempos, ultimas = [], None
+        for _ in range(repeticiones):
+            if limpiar_cache:
+                neo_vision._cache_mosaicos = neo_vision.CacheMosaicos()
+            peticiones = len(servidor.peticiones) if servidor else 0
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                metricas = llamada()
+            tiempos.append(time.perf_counter() - inicio)
+            if servidor:
+                metricas['bytes_enviados'] = sum(sum(p['bytes_imagenes'])
+                                                 for p in servidor.peticiones[peticiones:])
+            ultimas = metricas
+        return dict(ultimas, nombre=nombre, ms_promedio=sum(tiempos) / len(tiempos) * 1000)
+
+    def completa():
+        neo_vision.ver_pantalla(PREGUNTA_MOSAICOS, forzar=True)
+        datos = neo_ollama.obtener_cliente().ultimas_metricas()
+        return {'llamadas': 1, 'imagenes': 1,
+                'tokens_entrada': datos.get('prompt_eval_count', 0),
+                'tokens_salida': datos.get('eval_count', 0)}
+
+    def mosaico():
+        return neo_vision.ver_pantalla_mosaico(PREGUNTA_MOSAICOS).get('metricas', {})
+
+    resultados = []
+    try:
+        for nombre_res in resoluciones:
+            ancho, alto = RESOLUCIONES[nombre_res]
+            bgra = frame_bgra(generar_escritorio_sintetico(ancho, alto, 'texto'))
+            neo_vision._sesion_captura = crear_sesion_sintetica(neo_vision, bgra)
+
+            # La palabra buscada, en el centro del mosaico B2
+            mosaicos = neo_vision.dividir_en_mosaicos(ancho, alto)
+            izq, arriba, der, abajo = next(m['caja'] for m in mosaicos if m['nombre'] == 'B2')
+            palabra = {'texto': 'calcular_total', 'caja': ((izq + der) // 2, (arriba + abajo) // 2, 110, 14),
+                       'confianza': 0.95, 'linea': 0}
+
+            neo_vision.configurar_motor_ocr(neo_vision.MotorOCR())
+            resultados.append(fila(f"{nombre_res} completa", completa))
+            resultados.append(fila(f"{nombre_res} mosaicos: zoom", mosaico))
+
+            neo_vision.configurar_motor_ocr(neo_vision.MotorOCRFalso([palabra]))
+            resultados.append(fila(f"{nombre_res} mosaicos: texto", mosaico))
+            resultados.append(fila(f"{nombre_res} mosaicos: texto (repetida)", mosaico, limpiar_cache=False))
+    finally:
+        neo_vision.configurar_motor_ocr(None)
+        neo_vision._sesion_captura = sesion_anterior
+        neo_ollama._cliente = cliente_anterior
+        if servidor:
+            servidor.detener()
+
+    return resultados
+
+
+def mostrar_mosaicos(resultados):
+    print("\n" + "=" * 92)
+    print("MOSAICOS vs PANTALLA COMPLETA (tokens según Ollama)")
+    print("=" * 92)
+    print(f"{'Prueba':34} {'ms':>8} {'llamadas':>9} {'imágenes':>9} {'tokens ent.':>12} "
+          f"{'tokens sal.':>12} {'KB env.':>8}")
+    print("-" * 92)
+    for r in resultados:
+        enviados = f"{r['bytes_enviados'] / 1024:8.0f}" if 'bytes_enviados' in r else f"{'-':>8}"
+        print(f"{r['nombre']:34} {r['ms_promedio']:8.1f} {r.get('llamadas', 0):9} {r.get('imagenes', 0):9} "
+              f"{r.get('tokens_entrada', 0):12} {r.get('tokens_salida', 0):12} {enviados}")
+    print("=" * 92)
+
+
+# ==========================================
+# VERIFICACIÓN: DETECCIÓN DE CAMBIOS
+# ==========================================
+
+def verificar_firmas():
+    """
+    Comprueba que firma_frame/comparar_firmas ven cambios en cualquier
+    parte del frame (también en los bordes derecho e inferior) y que
+    funcionan con regiones pequeñas, incluido ver_pantalla(region=...)
+    con Llava reemplazado por ServidorOllamaFalso.
+
+    Returns:
+        list: [{'nombre', 'ok', 'detalle'}, ...]
+    """
+    import neo_ollama
+    neo_vision = importar_sin_banner("neo_vision")
+    resultados = []
+
+    def cambio(ancho, alto, zona, nombre):
+        """zona = (izq, arriba, der, abajo) que se invierte; la región devuelta tiene que cubrirla"""
+        antes = frame_bgra(generar_escritorio_sintetico(ancho, alto, 'texto'))
+        despues = antes.copy()
+        izq, arriba, der, abajo = zona
+        despues[arriba:abajo, izq:der, :3] = 255 - despues[arriba:abajo, izq:der, :3]
+        try:
+            comparacion = neo_vision.comparar_firmas(neo_vision.firma_frame(antes),
+                                                     neo_vision.firma_frame(despues))
+        except Exception as e:
+            resultados.append({'nombre': nombre, 'ok': False, 'detalle': str(e)})
+            return
+        tipo = neo_vision.clasificar_cambio(comparacion)
+        region = comparacion['region']
+        cubre = region is not None and (region[0] <= izq and region[1] <= arriba
+                                        and region[2] >= der and region[3] >= abajo)
+        resultados.append({'nombre': nombre, 'ok': tipo != 'sin_cambio' and (tipo == 'completa' or cubre),
+                           'detalle': f"{tipo}, región {region}"})
+
+    cambio(1920, 1080, (1740, 700, 1920, 1080), "1080p: solo el borde derecho")
+    cambio(1920, 1080, (0, 1040, 1920, 1080), "1080p: solo el borde inferior")
+    cambio(1920, 1080, (800, 300, 1000, 500), "1080p: zona central")
+    cambio(1366, 768, (1300, 700, 1366, 768), "1366x768: esquina inferior derecha")
+    cambio(100, 100, (80, 80, 100, 100), "100x100: esquina")
+    cambio(30, 500, (0, 450, 30, 500), "30x500: franja")
+
+    for ancho, alto in ((1, 1), (50, 20), (90, 90)):
+        try:
+            firma = neo_vision.firma_frame(frame_bgra(generar_escritorio_sintetico(ancho, alto, 'vacio')))
+            forma = firma['miniatura'].shape
+            resultados.append({'nombre': f"firma de {ancho}x{alto}",
+                               'ok': forma == (neo_vision.MINIATURA_ALTO, neo_vision.MINIATURA_ANCHO),
+                               'detalle': f"miniatura {forma}"})
+        except Exception as e:
+            resultados.append({'nombre': f"firma de {ancho}x{alto}", 'ok': False, 'detalle': str(e)})
+
+    # Región pequeña por el camino completo
+    servidor = neo_ollama.ServidorOllamaFalso("Un botón.").iniciar()
+    cliente_anterior = neo_ollama._cliente
+    sesion_anterior = neo_vision._sesion_captura
+    try:
+        neo_ollama.configurar_cliente(servidor.url)
+        neo_vision._sesion_captura = crear_sesion_sintetica(
+            neo_vision, frame_bgra(generar_escritorio_sintetico(1920, 1080, 'texto')))
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado = neo_vision.ver_pantalla("¿Qué dice?", region=(10, 10, 100, 100), forzar=True)
+        resultados.append({'nombre': "ver_pantalla(region=(10, 10, 100, 100))", 'ok': resultado['exito'],
+                           'detalle': resultado.get('error') or resultado.get('origen')})
+    finally:
+        neo_vision._sesion_captura = sesion_anterior
+        neo_ollama._cliente = cliente_anterior
+        servidor.detener()
+
+    return resultados
+
+
+def mostrar_firmas(resultados):
+    print("\n" + "=" * 80)
+    print("DETECCIÓN DE CAMBIOS (firma_frame / comparar_firmas)")
+    print("=" * 80)
+    for r in resultados:
+        print(f"{'✓' if r['ok'] else '✗'} {r['nombre']:42} {r['detalle']}")
+    print("=" * 80)
+
+
+# ==========================================
+# PROGRAMA PRINCIPAL
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del sistema de visión de NEO")
+    sub = parser.add_subparsers(dest="prueba", required=True)
+
+    p_captura = sub.add_parser("captura", help="Capturas por segundo y memoria por captura")
+    p_captura.add_argument("--capturas", type=int, default=50)
+    p_captura.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    p_codif = sub.add_parser("codificacion", help="ms/frame y tamaño de salida a 1080p, 1440p y 4K")
+    p_codif.add_argument("--repeticiones", type=int, default=10)
+    p_codif.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    p_cliente = sub.add_parser("cliente", help="Latencia por tamaño de imagen vía API de Ollama")
+    p_cliente.add_argument("--repeticiones", type=int, default=5)
+    p_cliente.add_argument("--real", action="store_true", help="Usar Ollama real en vez del servidor falso")
+    p_cliente.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    p_etapas = sub.add_parser("etapas", help="Cada etapa de ver_pantalla con escritorios sintéticos")
+    p_etapas.add_argument("--repeticiones", type=int, default=5)
+    p_etapas.add_argument("--resoluciones", nargs="+", choices=list(RESOLUCIONES),
+                          help="Por defecto: todas")
+    p_etapas.add_argument("--tipos", nargs="+", choices=TIPOS_ESCRITORIO, default=list(TIPOS_ESCRITORIO))
+    p_etapas.add_argument("--json", action="store_true", help="Salida en JSON")
+    p_etapas.add_argument("--salida", help="Guardar el JSON en este archivo (para comparar después)")
+
+    p_mosaicos = sub.add_parser("mosaicos", help="Tokens y tiempo: mosaicos vs pantalla completa")
+    p_mosaicos.add_argument("--repeticiones", type=int, default=3)
+    p_mosaicos.add_argument("--real", action="store_true", help="Usar Ollama real en vez del servidor falso")
+    p_mosaicos.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    p_firmas = sub.add_parser("firmas", help="Verificar la detección de cambios (bordes, regiones pequeñas)")
+    p_firmas.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    args = parser.parse_args(argv)
+
+    if args.prueba == "firmas":
+        resultados = verificar_firmas()
+        if args.json:
+            print(json.dumps({'prueba': 'firmas', 'resultados': resultados}, indent=2, ensure_ascii=False))
+        else:
+            mostrar_firmas(resultados)
+        return 0 if all(r['ok'] for r in resultados) else 1
+
+    if args.prueba == "captura":
+        resultados = benchmark_captura(args.capturas)
+        titulo = "CAPTURA DE PANTALLA"
+    elif args.prueba == "codificacion":
+        resultados = benchmark_codificacion(args.repeticiones)
+        titulo = "REDUCCIÓN + CODIFICACIÓN (base64 incluido)"
+    elif args.prueba == "cliente":
+        resultados = benchmark_cliente(args.repeticiones, args.real)
+        titulo = "CLIENTE OLLAMA: codificar + enviar + respuesta en streaming"
+    elif args.prueba == "etapas":
+        resultados = benchmark_etapas(args.repeticiones, args.resoluciones, args.tipos)
+    elif args.prueba == "mosaicos":
+        resultados = benchmark_mosaicos(args.repeticiones, args.real)
+
+    if args.prueba == "etapas":
+        informe = {'prueba': 'etapas', 'entorno': entorno(),
+                   'fecha': time.strftime('%Y-%m-%d %H:%M:%S'), 'resultados': resultados}
+        if args.salida:
+            with open(args.salida, 'w', encoding='utf-8') as f:
+                json.dump(informe, f, indent=2)
+        if args.json:
+            print(json.dumps(informe, indent=2))
+        else:
+            mostrar_etapas(resultados)
+    elif args.json:
+        print(json.dumps({'prueba': args.prueba, 'resultados': resultados}, indent=2))
+    elif args.prueba == "mosaicos":
+        mostrar_mosaicos(resultados)
+    else:
+        mostrar_resultados(titulo, resultados)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1115 @@
+# benchmark_voz.py - Mediciones de rendimiento del sistema de voz
+"""
+Mide cuánto cuesta cada parte del camino micrófono → texto.
+
+USO:
+    python benchmark_voz.py entrega                 (WAV temporal + ffmpeg vs array en memoria)
+    python benchmark_voz.py entrega --duraciones 2 5 --json
+    python benchmark_voz.py vad                     (corpus sintético: original vs backends)
+    python benchmark_voz.py vad --corpus corpus_vad/ --guardar-corpus corpus_vad/
+    python benchmark_voz.py activacion              (palabra de activación: recall, falsas/h, CPU)
+    python benchmark_voz.py stt --corpus corpus_stt/ (motores STT: RTF y WER)
+    python benchmark_voz.py stt --generar-corpus corpus_stt/   (comandos leídos con pyttsx3)
+    python benchmark_voz.py stt --corpus corpus_stt/ --selectivo   (WER y latencia extra de re-transcribir)
+    python benchmark_voz.py pipeline                (captura → activación → VAD → STT, corpus sintético)
+    python benchmark_voz.py pipeline --grabar corpus_voz/ --hablante ana
+    python benchmark_voz.py pipeline --corpus corpus_voz/ --mezclar-ruido corpus_ruido/ --snr 20 10 5
+    python benchmark_voz.py pipeline --corpus corpus_ruido/ --vad webrtc --json > webrtc.json
+
+No necesita micrófono: el audio es sintético salvo que se pase (o se grabe) un corpus.
+"""
+
+import argparse
+import contextlib
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from benchmark_vision import entorno, importar_sin_banner, medir, mostrar_resultados
+
+RATE = 16000
+CHUNK = 1024
+
+
+# ==========================================
+# AUDIO SINTÉTICO
+# ==========================================
+
+def generar_frase_sintetica(segundos, semilla=0):
+    """
+    Audio int16 parecido a una frase: tono con armónicos modulado en
+    "sílabas" (~4 por segundo) más un poco de ruido de fondo.
+    """
+    generador = np.random.default_rng(semilla)
+    t = np.arange(int(segundos * RATE)) / RATE
+    voz = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((180, 360, 720, 1440)))
+    silabas = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    ruido = generador.normal(0, 0.02, len(t))
+    return (np.clip(voz * silabas * 0.4 + ruido, -1, 1) * 32767).astype(np.int16)
+
+
+def _palabra(segundos, volumen, generador):
+    """Una "palabra" sintética: armónicos con tono variable y ataque suave"""
+    t = np.arange(int(segundos * RATE)) / RATE
+    f0 = generador.uniform(110, 220) * (1 + 0.1 * np.sin(2 * np.pi * 3 * t))
+    fase = 2 * np.pi * np.cumsum(f0) / RATE
+    voz = sum(np.sin(fase * (i + 1)) / (i + 1) for i in range(6))
+    envolvente = np.sin(np.pi * t / segundos) ** 0.5
+    return voz * envolvente * volumen / 2
+
+
+def _ruido_fondo(segundos, tipo, nivel, generador):
+    """Ruido de habitación: 'blanco' (siseo), 'ventilador' (grave) o 'teclado' (clics)"""
+    n = int(segundos * RATE)
+    if tipo == 'ventilador':
+        ruido = np.cumsum(generador.normal(0, 1, n))
+        ruido -= np.convolve(ruido, np.ones(400) / 400, mode='same')
+        return ruido / (np.abs(ruido).max() + 1e-9) * nivel
+    if tipo == 'teclado':
+        ruido = generador.normal(0, nivel * 0.05, n)
+        for posicion in generador.integers(0, n - 400, size=int(segundos * 4)):
+            ruido[posicion:posicion + 400] += generador.normal(0, nivel, 400) * np.exp(-np.arange(400) / 60)
+        return ruido
+    return generador.normal(0, nivel, n)
+
+
+def generar_corpus_vad(semilla=0):
+    """
+    Corpus sintético etiquetado para el VAD: comandos ("neo ... abre
+    chrome") con pausas entre palabras, en habitaciones silenciosas y
+    ruidosas, más archivos con solo ruido (cualquier detección ahí es
+    un disparo falso).
+
+    Returns:
+        list: [(nombre, muestras int16, [(inicio_s, fin_s), ...]), ...]
+    """
+    generador = np.random.default_rng(semilla)
+    escenarios = [
+        ('silencio', 'blanco', 0.002, 0.3),
+        ('ventilador', 'ventilador', 0.1, 0.3),
+        ('teclado', 'teclado', 0.15, 0.3),
+        ('suave', 'blanco', 0.002, 0.04),
+    ]
+    corpus = []
+
+    for nombre, tipo, nivel, volumen in escenarios:
+        for indice in range(3):
+            segundos = 20.0
+            audio = _ruido_fondo(segundos, tipo, nivel, generador)
+            etiquetas = []
+            momento = generador.uniform(1.0, 2.0)
+
+            while momento < segundos - 5:
+                inicio = momento
+                for _ in range(generador.integers(2, 5)):
+                    largo = generador.uniform(0.25, 0.6)
+                    desde = int(momento * RATE)
+                    palabra = _palabra(largo, volumen * generador.uniform(0.7, 1.0), generador)
+                    audio[desde:desde + len(palabra)] += palabra
+                    momento += largo + generador.uniform(0.08, 0.35)
+                etiquetas.append((round(inicio, 3), round(momento - 0.08, 3)))
+                momento += generador.uniform(3.0, 5.0)
+
+            muestras = (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+            corpus.append((f"{nombre}_{indice}", muestras, etiquetas))
+
+        # Solo ruido
+        muestras = (np.clip(_ruido_fondo(30.0, tipo, nivel, generador), -1, 1) * 32767).astype(np.int16)
+        corpus.append((f"{nombre}_solo_ruido", muestras, []))
+
+    return corpus
+
+
+def guardar_corpus(corpus, carpeta, clave='voz'):
+    """Escribe el corpus como .wav + .json (formato de neo_vad.cargar_etiquetas)"""
+    neo_audio = importar_sin_banner("neo_audio")
+    os.makedirs(carpeta, exist_ok=True)
+    for nombre, muestras, etiquetas in corpus:
+        neo_audio.guardar_wav(muestras, os.path.join(carpeta, nombre + '.wav'))
+        with open(os.path.join(carpeta, nombre + '.json'), 'w', encoding='utf-8') as f:
+            json.dump({clave: etiquetas} if etiquetas is not None else {}, f)
+    return carpeta
+
+
+def palabra_clave_sintetica(generador, volumen=0.3):
+    """
+    La palabra de activación sintética ("ne-o"): dos sílabas con tono
+    y timbre fijos, con pequeñas variaciones de velocidad y tono.
+    """
+    velocidad = generador.uniform(0.9, 1.1)
+    tono = generador.uniform(0.92, 1.08)
+    silabas = []
+    for segundos, (f_inicio, f_fin), pesos in ((0.18, (150, 190), (0.3, 1.0, 0.8, 0.2)),
+                                                (0.26, (190, 120), (1.0, 0.5, 0.1, 0.05))):
+        t = np.arange(int(segundos * velocidad * RATE)) / RATE
+        f0 = np.linspace(f_inicio, f_fin, len(t)) * tono
+        fase = 2 * np.pi * np.cumsum(f0) / RATE
+        voz = sum(peso * np.sin(fase * (i + 1)) for i, peso in enumerate(pesos))
+        silabas.append(voz * np.clip(np.sin(np.pi * t / t[-1]), 0, None) ** 0.5)
+    return np.concatenate(silabas) * volumen / 2
+
+
+def generar_corpus_activacion(semilla=1):
+    """
+    Corpus sintético para la palabra de activación:
+    - positivos: palabra clave + comando en habitaciones con distinto ruido
+    - negativos: un minuto de "conversación de fondo" sin la palabra
+
+    Returns:
+        tuple: (plantillas int16, corpus [(nombre, muestras, etiquetas|None)])
+    """
+    generador = np.random.default_rng(semilla)
+
+    def a_int16(audio):
+        return (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+
+    plantillas = [a_int16(np.concatenate((np.zeros(1600), palabra_clave_sintetica(generador), np.zeros(1600))))
+                  for _ in range(3)]
+    corpus = []
+
+    for indice in range(8):
+        audio = _ruido_fondo(10.0, ('blanco', 'ventilador')[indice % 2], 0.003 + 0.01 * (indice % 2), generador)
+        momento = generador.uniform(1.0, 3.0)
+        clave = palabra_clave_sintetica(generador)
+        desde = int(momento * RATE)
+        audio[desde:desde + len(clave)] += clave
+        etiquetas = [(round(momento, 3), round(momento + len(clave) / RATE, 3))]
+        momento += len(clave) / RATE + generador.uniform(0.15, 0.4)
+        for _ in range(3):
+            palabra = _palabra(generador.uniform(0.25, 0.5), 0.3, generador)
+            desde = int(momento * RATE)
+            audio[desde:desde + len(palabra)] += palabra
+            momento += len(palabra) / RATE + generador.uniform(0.08, 0.3)
+        corpus.append((f"activacion_{indice}", a_int16(audio), etiquetas))
+
+    for indice in range(4):
+        segundos = 60.0
+        audio = _ruido_fondo(segundos, 'blanco', 0.003, generador)
+        momento = 0.5
+        while momento < segundos - 1:
+            palabra = _palabra(generador.uniform(0.2, 0.6), generador.uniform(0.1, 0.3), generador)
+            desde = int(momento * RATE)
+            audio[desde:desde + len(palabra)] += palabra
+            momento += len(palabra) / RATE + generador.uniform(0.05, 1.0)
+        corpus.append((f"conversacion_{indice}", a_int16(audio), None))
+
+    return plantillas, corpus
+
+
+# ==========================================
+# ENTREGA DEL AUDIO A WHISPER
+# ==========================================
+
+def cargar_como_whisper(archivo):
+    """
+    Lo que hace Whisper cuando recibe una ruta: lanzar ffmpeg para
+    decodificar a PCM 16 kHz mono y convertir a float32.
+    """
+    try:
+        import whisper
+        return whisper.load_audio(archivo)
+    except ImportError:
+        pass
+
+    if shutil.which("ffmpeg"):
+        comando = ["ffmpeg", "-nostdin", "-threads", "0", "-i", archivo,
+                   "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(RATE), "-"]
+        salida = subprocess.run(comando, capture_output=True, check=True).stdout
+        return np.frombuffer(salida, np.int16).flatten().astype(np.float32) / 32768.0
+
+    # Sin ffmpeg: solo se mide la lectura del WAV (se subestima el costo)
+    with wave.open(archivo, 'rb') as wf:
+        return np.frombuffer(wf.readframes(wf.getnframes()), np.int16).astype(np.float32) / 32768.0
+
+
+def benchmark_entrega(repeticiones=10, duraciones=(1, 3, 5, 10)):
+    """
+    Camino antiguo (frames → b''.join → WAV en disco → ffmpeg → float32)
+    contra el nuevo (buffer circular → float32 en memoria), por frase.
+    """
+    neo_audio = importar_sin_banner("neo_audio")
+    decodificador = "whisper.load_audio" if _whisper_instalado() else \
+        ("ffmpeg" if shutil.which("ffmpeg") else "wave (sin ffmpeg)")
+
+    resultados = []
+    carpeta = tempfile.mkdtemp(prefix="neo_bench_voz_")
+    archivo = os.path.join(carpeta, "temp_audio.wav")
+
+    try:
+        for segundos in duraciones:
+            muestras = generar_frase_sintetica(segundos)
+            frames = [muestras[i:i + CHUNK].tobytes() for i in range(0, len(muestras), CHUNK)]
+
+            buffer = neo_audio.BufferAudio(max(segundos * 2, 5), RATE, CHUNK)
+            for frame in frames:
+                buffer.escribir(np.frombuffer(frame, np.int16))
+            fin = buffer.escritas
+
+            def antiguo():
+                with wave.open(archivo, 'wb') as wf:
+                    wf.setnchannels(1)
+                    wf.setsampwidth(2)
+                    wf.setframerate(RATE)
+                    wf.writeframes(b''.join(frames))
+                return cargar_como_whisper(archivo)
+
+            def nuevo():
+                return neo_audio.a_float32(buffer.copiar(fin - len(muestras), fin))
+
+            viejo = medir(f"{segundos:g} s - WAV + {decodificador}", antiguo, repeticiones)
+            memoria = medir(f"{segundos:g} s - array en memoria", nuevo, repeticiones)
+            viejo['segundos_audio'] = memoria['segundos_audio'] = segundos
+            memoria['ms_ahorrados'] = viejo['ms_promedio'] - memoria['ms_promedio']
+
+            # Mismo audio por los dos caminos
+            memoria['max_diferencia'] = float(np.abs(antiguo()[:len(muestras)] - nuevo()).max())
+            resultados += [viejo, memoria]
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    return resultados
+
+
+def _whisper_instalado():
+    try:
+        import whisper  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# ==========================================
+# DETECCIÓN DE VOZ (VAD)
+# ==========================================
+
+def benchmark_vad(corpus=None, backends=None):
+    """
+    Evalúa la detección original y cada backend VAD instalado sobre un
+    corpus etiquetado (sintético si no se pasa carpeta).
+    """
+    neo_vad = importar_sin_banner("neo_vad")
+
+    carpeta_temporal = None
+    if corpus is None:
+        carpeta_temporal = tempfile.mkdtemp(prefix="neo_corpus_vad_")
+        corpus = guardar_corpus(generar_corpus_vad(), carpeta_temporal)
+
+    configuraciones = [('original (umbral 400, 2.5 s)', neo_vad.detector_original)]
+    for nombre in backends or ['energia', 'webrtc', 'silero']:
+        backend = neo_vad.BACKENDS_VAD[nombre]()
+        if not backend.disponible():
+            configuraciones.append((nombre, None))
+            continue
+        configuraciones.append((nombre, lambda clase=type(backend): neo_vad.DetectorVoz(clase())))
+
+    resultados = []
+    try:
+        for nombre, crear in configuraciones:
+            if crear is None:
+                resultados.append({'nombre': nombre, 'disponible': False})
+                continue
+            inicio = time.process_time()
+            resumen = neo_vad.evaluar_corpus(corpus, crear)
+            if resumen is None:
+                raise SystemExit(f"No hay WAV etiquetados en {corpus}")
+            resumen['nombre'] = nombre
+            resumen['disponible'] = True
+            resumen['cpu_por_segundo_audio'] = (time.process_time() - inicio) / resumen['segundos_audio']
+            resultados.append(resumen)
+    finally:
+        if carpeta_temporal:
+            shutil.rmtree(carpeta_temporal, ignore_errors=True)
+
+    return resultados
+
+
+def mostrar_vad(resultados):
+    def seg(valor):
+        return f"{valor:8.2f}" if valor is not None else f"{'-':>8}"
+
+    print("\n" + "=" * 92)
+    print("DETECCIÓN DE VOZ: latencia de corte y disparos falsos")
+    print("=" * 92)
+    print(f"{'Detector':30} {'frases':>7} {'perdidas':>9} {'falsos/h':>9} "
+          f"{'fin s':>8} {'fin p90':>8} {'recorte':>8} {'CPU %':>6}")
+    print("-" * 92)
+    for r in resultados:
+        if not r['disponible']:
+            print(f"{r['nombre']:30} (no instalado)")
+            continue
+        print(f"{r['nombre']:30} {r['frases']:7d} {r['perdidas']:9d} {r['falsos_por_hora']:9.1f} "
+              f"{seg(r['latencia_fin_media'])} {seg(r['latencia_fin_p90'])} "
+              f"{seg(r['recorte_inicio_medio'])} {r['cpu_por_segundo_audio'] * 100:6.2f}")
+    print("=" * 92)
+    print("fin s = espera tras la última palabra hasta cortar | recorte = voz perdida al inicio")
+
+
+# ==========================================
+# PALABRA DE ACTIVACIÓN
+# ==========================================
+
+def benchmark_activacion(sensibilidades=(0.3, 0.5, 0.7)):
+    """
+    Recall, falsas activaciones por hora, latencia y CPU del detector
+    de plantillas (MFCC + DTW) con un corpus sintético, para varias
+    sensibilidades.
+    """
+    neo_activacion = importar_sin_banner("neo_activacion")
+    plantillas, corpus = generar_corpus_activacion()
+
+    carpeta = tempfile.mkdtemp(prefix="neo_corpus_activacion_")
+    try:
+        guardar_corpus(corpus, carpeta, clave='activacion')
+
+        def crear():
+            return neo_activacion.DetectorPlantillas(plantillas)
+
+        resultados = []
+        for sensibilidad in sensibilidades:
+            resumen = neo_activacion.evaluar_activacion(carpeta, crear, sensibilidad)
+            resumen['nombre'] = f"plantillas (sensibilidad {sensibilidad:g})"
+            resultados.append(resumen)
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    return resultados
+
+
+def mostrar_activacion(resultados):
+    print("\n" + "=" * 86)
+    print("PALABRA DE ACTIVACIÓN (antes de Whisper)")
+    print("=" * 86)
+    print(f"{'Detector':32} {'recall':>7} {'falsas/h':>9} {'latencia s':>11} {'p90 s':>7} {'CPU %':>7}")
+    print("-" * 86)
+    for r in resultados:
+        latencia = f"{r['latencia_media']:11.2f}" if r['latencia_media'] is not None else f"{'-':>11}"
+        p90 = f"{r['latencia_p90']:7.2f}" if r['latencia_p90'] is not None else f"{'-':>7}"
+        print(f"{r['nombre']:32} {r['recall']:7.2f} {r['falsas_por_hora']:9.1f} {latencia} {p90} "
+              f"{r['cpu_porcentaje']:7.2f}")
+    print("=" * 86)
+    print("latencia = desde el fin de la palabra hasta la activación | CPU = % de un núcleo en tiempo real")
+
+
+# ==========================================
+# TRANSCRIPCIÓN (STT)
+# ==========================================
+
+# Comandos típicos de NEO para el corpus generado con TTS
+COMANDOS_PRUEBA = [
+    "abre chrome",
+    "cierra el bloc de notas",
+    "sube el volumen",
+    "baja el volumen al veinte por ciento",
+    "qué hora es",
+    "busca en google recetas de tortilla",
+    "abre la calculadora",
+    "toma una captura de pantalla",
+    "qué hay en mi pantalla",
+    "escribe hola mundo",
+    "minimiza todas las ventanas",
+    "reproduce música en spotify",
+]
+
+
+def generar_corpus_stt(carpeta, comandos=COMANDOS_PRUEBA):
+    """
+    Lee cada comando con pyttsx3 y lo guarda como WAV + .json {"texto"}.
+    Sirve para comparar motores entre sí; para medir el WER real hace
+    falta grabar voces de verdad con el mismo formato.
+    """
+    # NEOVoice ya busca la voz en español y ajusta velocidad y volumen
+    motor = importar_sin_banner("neo_voz_tts").NEOVoice().engine
+    if motor is None:
+        raise RuntimeError("pyttsx3 no pudo inicializarse")
+
+    os.makedirs(carpeta, exist_ok=True)
+
+    for numero, texto in enumerate(comandos):
+        base = os.path.join(carpeta, f"comando_{numero:02d}")
+        motor.save_to_file(texto, base + '.wav')
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'texto': texto}, f, ensure_ascii=False)
+    motor.runAndWait()
+    return carpeta
+
+
+def benchmark_stt(corpus=None, motores=None, modelo=None):
+    """
+    RTF y WER de cada motor STT instalado sobre un corpus de comandos
+    (.wav + .json {"texto"}). Sin corpus se genera uno con pyttsx3.
+    """
+    neo_stt = importar_sin_banner("neo_stt")
+
+    carpeta_temporal = None
+    if corpus is None:
+        carpeta_temporal = tempfile.mkdtemp(prefix="neo_corpus_stt_")
+        try:
+            corpus = generar_corpus_stt(carpeta_temporal)
+        except Exception as e:
+            shutil.rmtree(carpeta_temporal, ignore_errors=True)
+            raise SystemExit(f"No se pudo generar el corpus con pyttsx3 ({e}); usa --corpus")
+
+    resultados = []
+    try:
+        if not neo_stt.cargar_corpus_stt(corpus):
+            raise SystemExit(f"No hay WAV con .json {{\"texto\": ...}} en {corpus}")
+
+        for nombre in motores or list(neo_stt.MOTORES_STT):
+            motor = neo_stt.MOTORES_STT[nombre](modelo)
+            if not motor.disponible():
+                resultados.append({'nombre': nombre, 'disponible': False})
+                continue
+            resumen = neo_stt.evaluar_stt(corpus, motor)
+            resumen['nombre'] = nombre
+            resumen['disponible'] = True
+            resultados.append(resumen)
+            motor.descargar()
+    finally:
+        if carpeta_temporal:
+            shutil.rmtree(carpeta_temporal, ignore_errors=True)
+
+    return resultados
+
+
+def benchmark_selectivo(corpus=None, motor=None, modelo=None, modelo_preciso=None):
+    """
+    Re-transcripción selectiva frente a solo el modelo rápido: WER de
+    cada uno y latencia extra por comando (media, p90 y máximo, con la
+    carga del modelo preciso aparte).
+    """
+    neo_stt = importar_sin_banner("neo_stt")
+    neo_audio = importar_sin_banner("neo_audio")
+
+    carpeta_temporal = None
+    if corpus is None:
+        carpeta_temporal = tempfile.mkdtemp(prefix="neo_corpus_stt_")
+        try:
+            corpus = generar_corpus_stt(carpeta_temporal)
+        except Exception as e:
+            shutil.rmtree(carpeta_temporal, ignore_errors=True)
+            raise SystemExit(f"No se pudo generar el corpus con pyttsx3 ({e}); usa --corpus")
+
+    try:
+        frases = neo_stt.cargar_corpus_stt(corpus)
+        if not frases:
+            raise SystemExit(f"No hay WAV con .json {{\"texto\": ...}} en {corpus}")
+        rapido = neo_stt.crear_motor(motor, modelo)
+        if rapido is None:
+            raise SystemExit("No hay ningún motor STT instalado")
+        modelo_preciso = modelo_preciso or neo_stt.MODELO_STT_PRECISO
+        preciso = neo_stt.obtener_motor(rapido.nombre, modelo_preciso)
+        with contextlib.redirect_stdout(sys.stderr):
+            rapido.cargar()
+            preciso.cargar()
+
+        errores_rapido = errores_selectivo = palabras = 0
+        extras = []
+        redecodificadas = 0
+        for archivo, referencia in frases:
+            audio = neo_audio.a_float32(neo_audio.cargar_wav(archivo))
+            ref = neo_stt.normalizar_texto(referencia)
+            base = rapido.transcribir(audio)
+            selectivo = neo_stt.transcribir_selectivo(audio, rapido, modelo_preciso)
+            errores_rapido += neo_stt.errores_palabras(ref, neo_stt.normalizar_texto(base['texto']))
+            errores_selectivo += neo_stt.errores_palabras(ref, neo_stt.normalizar_texto(selectivo['texto']))
+            palabras += len(ref)
+            extras.append(selectivo['segundos_extra'])
+            redecodificadas += bool(selectivo['redecodificados'])
+    finally:
+        if carpeta_temporal:
+            shutil.rmtree(carpeta_temporal, ignore_errors=True)
+
+    return {
+        'motor': rapido.nombre,
+        'modelo': rapido.modelo,
+        'modelo_preciso': modelo_preciso,
+        'archivos': len(frases),
+        'wer_rapido': errores_rapido / palabras if palabras else 0.0,
+        'wer_selectivo': errores_selectivo / palabras if palabras else 0.0,
+        'redecodificadas': redecodificadas,
+        'extra_medio': float(np.mean(extras)),
+        'extra_p90': float(np.percentile(extras, 90)),
+        'extra_max': float(np.max(extras)),
+        'segundos_carga_preciso': preciso.segundos_carga,
+    }
+
+
+def mostrar_selectivo(r):
+    print("\n" + "=" * 80)
+    print(f"RE-TRANSCRIPCIÓN SELECTIVA: {r['motor']} {r['modelo']} → {r['modelo_preciso']} en tramos dudosos")
+    print("=" * 80)
+    print(f"Frases: {r['archivos']} ({r['redecodificadas']} con tramos re-transcritos)")
+    print(f"WER solo rápido: {r['wer_rapido'] * 100:.1f} % | con re-transcripción: {r['wer_selectivo'] * 100:.1f} %")
+    print(f"Latencia extra por comando: media {r['extra_medio']:.3f}s, p90 {r['extra_p90']:.3f}s, "
+          f"máx {r['extra_max']:.3f}s (carga de {r['modelo_preciso']}: {r['segundos_carga_preciso']:.1f}s, "
+          f"una vez)")
+    print("=" * 80)
+
+
+def mostrar_stt(resultados):
+    print("\n" + "=" * 80)
+    print("TRANSCRIPCIÓN: velocidad (RTF) y errores (WER) por motor")
+    print("=" * 80)
+    print(f"{'Motor':16} {'modelo':>8} {'frases':>7} {'audio s':>8} {'carga s':>8} {'RTF':>7} {'WER %':>7}")
+    print("-" * 80)
+    for r in resultados:
+        if not r['disponible']:
+            print(f"{r['nombre']:16} (no instalado)")
+            continue
+        print(f"{r['nombre']:16} {r['modelo']:>8} {r['archivos']:7d} {r['segundos_audio']:8.1f} "
+              f"{r['segundos_carga']:8.2f} {r['rtf']:7.3f} {r['wer'] * 100:7.1f}")
+    print("=" * 80)
+    print("RTF = segundos de proceso / segundos de audio (sin la carga) | WER sin tildes ni puntuación")
+
+
+# ==========================================
+# CAMINO COMPLETO: captura → activación → VAD → STT
+# ==========================================
+# Corpus: archivo.wav + archivo.json con lo que se sepa de la grabación:
+#   {"texto": "abre chrome",          comando dicho (sin la palabra de activación)
+#    "activacion": [[0.4, 0.8]],      dónde se dijo "neo" ([] = no se dijo)
+#    "voz": [[0.4, 0.8], [1.1, 2.3]], segmentos de voz (el fin del último = fin del comando)
+#    "hablante": "ana", "ruido": "ventilador 10 dB"}
+# Todas las claves son opcionales: sin "activacion" no se evalúa la
+# palabra, sin "texto" no hay WER y sin "voz" el fin del comando se
+# estima mirando el archivo entero (ver estimar_fin_voz).
+
+PALABRAS_ACTIVACION_TEXTO = {'neo', 'nio', 'neon'}   # Lo que Whisper escribe al oír "neo"
+ESPERA_ACTIVACION = 1.0      # Timeout de cada escucha.esperar() en el bucle de neo_gui_integrado
+
+
+def memoria_mb():
+    """RSS actual (con psutil) y pico del proceso en MB; None si no se puede medir"""
+    actual = pico = None
+    try:
+        import psutil
+        actual = psutil.Process().memory_info().rss / 1e6
+    except ImportError:
+        pass
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        pico = pico / 1e6 if sys.platform == 'darwin' else pico / 1e3   # macOS: bytes, Linux: KB
+    except ImportError:
+        # Windows no tiene resource: el pico lo da psutil
+        try:
+            import psutil
+            pico = psutil.Process().memory_info().peak_wset / 1e6
+        except (ImportError, AttributeError):
+            pass
+    return {'rss_mb': actual, 'rss_pico_mb': pico}
+
+
+def estimar_fin_voz(muestras, bloque=160):
+    """
+    Fin de la última voz mirando el archivo completo (no causal): fin
+    del último tramo de al menos 50 ms con energía claramente por encima
+    del ruido de fondo (los chasquidos sueltos no cuentan). Solo para
+    corpus sin etiquetas "voz".
+    """
+    neo_vad = importar_sin_banner("neo_vad")
+    tramos = len(muestras) // bloque
+    if not tramos:
+        return None
+    energias = np.array([neo_vad.energia_db(muestras[i * bloque:(i + 1) * bloque]) for i in range(tramos)])
+    umbral = max(np.percentile(energias, 10) + 12.0, energias.max() - 40.0)
+    seguidos = 0
+    for indice in range(tramos - 1, -1, -1):
+        seguidos = seguidos + 1 if energias[indice] > umbral else 0
+        if seguidos == 5:
+            return (indice + seguidos) * bloque / RATE
+    return None
+
+
+def _leer_etiquetas(archivo):
+    base = os.path.splitext(archivo)[0]
+    if not os.path.exists(base + '.json'):
+        return {}
+    with open(base + '.json', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _quitar_activacion(palabras):
+    """Quita "neo" del principio de la transcripción (el detector ya la oyó)"""
+    while palabras and palabras[0] in PALABRAS_ACTIVACION_TEXTO:
+        palabras = palabras[1:]
+    return palabras
+
+
+def pipeline_archivo(archivo, etiquetas, crear_activacion=None, sensibilidad=None, vad=None,
+                     motor=None, velocidad=0, tolerancia=0.5):
+    """
+    Un archivo por el mismo camino que el micrófono: FuenteWAV → buffer →
+    EscuchaActivacion → neo_vad.grabar_frase (con el mismo cursor) → STT.
+
+    Si el detector no oye la palabra en un archivo que la tiene, el
+    comando se evalúa igual desde donde termina la palabra etiquetada
+    (para no mezclar los fallos de la activación con los del VAD/STT).
+
+    Returns:
+        dict: Resultados del archivo (ver benchmark_pipeline)
+    """
+    neo_audio = importar_sin_banner("neo_audio")
+    neo_vad = importar_sin_banner("neo_vad")
+    neo_activacion = importar_sin_banner("neo_activacion")
+    neo_stt = importar_sin_banner("neo_stt")
+
+    muestras = neo_audio.cargar_wav(archivo)
+    segundos = neo_audio.duracion(muestras)
+    captura = neo_audio.CapturaAudio(archivo, segundos=segundos + neo_audio.SILENCIO_FINAL_WAV + 5,
+                                     velocidad=velocidad)
+    buffer = captura.buffer
+    lector = captura.lector()   # antes de iniciar: empieza en la muestra 0
+
+    fila = {
+        'archivo': os.path.basename(archivo),
+        'hablante': etiquetas.get('hablante', 'desconocido'),
+        'ruido': etiquetas.get('ruido', 'limpio'),
+        'segundos_audio': segundos,
+        'activacion': None,           # 'acierto', 'fallo' o None (no evaluada)
+        'falsas': 0,
+        'latencia_activacion': None,
+        'latencia_corte': None,
+        'segundos_frase': None,
+        'segundos_stt': None,
+        'texto': etiquetas.get('texto'),
+        'hipotesis': None,
+        'errores': None,
+        'palabras': None,
+    }
+
+    inicio_cpu = time.process_time()
+    captura.iniciar()
+    # Con velocidad 0 el archivo entero entra en el buffer casi de golpe:
+    # los cursores no esperan, pero el tiempo de lectura tampoco es real
+    espera = segundos / velocidad + 2.0 if velocidad else 2.0
+
+    def fin_del_archivo():
+        return captura.fuente.terminado.is_set() and lector.pendientes() < buffer.bloque
+
+    palabras_activacion = etiquetas.get('activacion')
+    detector = crear_activacion() if crear_activacion and palabras_activacion is not None else None
+    evaluar_comando = palabras_activacion is None or bool(palabras_activacion) or 'texto' in etiquetas
+
+    if detector is not None:
+        escucha = neo_activacion.EscuchaActivacion(detector, sensibilidad, lector)
+        escucha.reiniciar(al_final=False)   # El cursor empieza en la muestra 0 a propósito
+        ventanas = [(ini * RATE, (fin + tolerancia) * RATE) for ini, fin in palabras_activacion]
+        deteccion = None
+        # El mismo bucle que el GUI: esperar() con un timeout corto, una y
+        # otra vez (ESPERA_ACTIVACION segundos de audio por llamada)
+        timeout = ESPERA_ACTIVACION / velocidad if velocidad else 0.01
+        while not fin_del_archivo():
+            momento = escucha.esperar(timeout=timeout, detener=fin_del_archivo)
+            if momento is None:
+                continue
+            if any(ini <= momento <= fin for ini, fin in ventanas):
+                deteccion = momento
+                break
+            fila['falsas'] += 1
+
+        if palabras_activacion:
+            fila['activacion'] = 'acierto' if deteccion is not None else 'fallo'
+            fin_palabra = palabras_activacion[0][1]
+            if deteccion is not None:
+                fila['latencia_activacion'] = deteccion / RATE - fin_palabra
+            else:
+                lector = neo_audio.LectorAudio(buffer)
+                lector.posicion = int(fin_palabra * RATE) - int(fin_palabra * RATE) % buffer.bloque
+        elif 'texto' in etiquetas:
+            lector = neo_audio.LectorAudio(buffer)
+            lector.posicion = 0
+
+    if evaluar_comando:
+        fin_voz = [fin for _, fin in etiquetas['voz']][-1] if etiquetas.get('voz') else estimar_fin_voz(muestras)
+        detector_voz = neo_vad.DetectorVoz(neo_vad.crear_backend(vad))
+        frase = neo_vad.grabar_frase(timeout=espera, lector=lector, detector=detector_voz)
+        if frase is not None:
+            fila['segundos_frase'] = neo_audio.duracion(frase)
+            if fin_voz is not None:
+                fila['latencia_corte'] = lector.posicion / RATE - fin_voz
+
+            if motor is not None:
+                resultado = motor.transcribir(frase)
+                fila['segundos_stt'] = resultado['segundos_proceso']
+                fila['hipotesis'] = resultado['texto']
+                if fila['texto'] is not None:
+                    referencia = neo_stt.normalizar_texto(fila['texto'])
+                    hipotesis = _quitar_activacion(neo_stt.normalizar_texto(resultado['texto']))
+                    fila['errores'] = neo_stt.errores_palabras(referencia, hipotesis)
+                    fila['palabras'] = len(referencia)
+        elif fila['texto'] is not None:
+            # Comando no detectado: cuenta como todas las palabras borradas
+            fila['palabras'] = fila['errores'] = len(neo_stt.normalizar_texto(fila['texto']))
+
+    captura.detener()
+    fila['segundos_cpu'] = time.process_time() - inicio_cpu
+    return fila
+
+
+def resumir_pipeline(filas, nombre):
+    """Métricas agregadas de un grupo de archivos"""
+    def media(valores):
+        valores = [v for v in valores if v is not None]
+        return float(np.mean(valores)) if valores else None
+
+    def p90(valores):
+        valores = [v for v in valores if v is not None]
+        return float(np.percentile(valores, 90)) if valores else None
+
+    evaluadas = [f for f in filas if f['activacion'] is not None]
+    aciertos = sum(f['activacion'] == 'acierto' for f in filas)
+    falsas = sum(f['falsas'] for f in filas)
+    segundos_audio = sum(f['segundos_audio'] for f in filas)
+    con_stt = [f for f in filas if f['segundos_stt'] is not None]
+    segundos_frases = sum(f['segundos_frase'] for f in con_stt)
+    con_wer = [f for f in filas if f['errores'] is not None]
+    palabras = sum(f['palabras'] for f in con_wer)
+
+    return {
+        'nombre': nombre,
+        'archivos': len(filas),
+        'segundos_audio': segundos_audio,
+        'palabras_activacion': len(evaluadas),
+        'activaciones_detectadas': aciertos,
+        'activaciones_falsas': falsas,
+        'precision_activacion': aciertos / (aciertos + falsas) if aciertos + falsas else None,
+        'recall_activacion': aciertos / len(evaluadas) if evaluadas else None,
+        'latencia_activacion': media(f['latencia_activacion'] for f in filas),
+        'latencia_corte': media(f['latencia_corte'] for f in filas),
+        'latencia_corte_p90': p90(f['latencia_corte'] for f in filas),
+        'frases_perdidas': sum(f['segundos_frase'] is None and f['palabras'] is not None for f in filas),
+        'rtf': sum(f['segundos_stt'] for f in con_stt) / segundos_frases if segundos_frases else None,
+        'wer': sum(f['errores'] for f in con_wer) / palabras if palabras else None,
+        # Lo que espera el usuario desde que deja de hablar hasta tener el texto
+        'latencia_texto': media(f['latencia_corte'] + f['segundos_stt'] for f in con_stt
+                                if f['latencia_corte'] is not None),
+        'cpu_porcentaje': sum(f['segundos_cpu'] for f in filas) / segundos_audio * 100 if segundos_audio else 0.0,
+    }
+
+
+def benchmark_pipeline(corpus=None, motor=None, modelo=None, vad=None, activacion=None,
+                       sensibilidad=None, velocidad=0, detalle=False):
+    """
+    Camino completo sobre un corpus (ver arriba), agrupado por hablante y
+    por ruido. Sin corpus usa el sintético de la palabra de activación
+    (sin "texto": mide activación, corte y RTF, pero no WER).
+
+    Args:
+        motor (str): Motor STT (None = neo_stt.MOTOR_STT; 'ninguno' = sin STT)
+        vad (str): Backend del VAD (None = neo_vad.BACKEND_VAD)
+        activacion (str): Detector (None = neo_activacion.MOTOR_ACTIVACION)
+        velocidad (float): 0 = lo más rápido posible, 1 = tiempo real
+        detalle (bool): Incluir los resultados de cada archivo
+
+    Returns:
+        list: Resúmenes (total, por hablante y por ruido)
+    """
+    neo_activacion = importar_sin_banner("neo_activacion")
+    neo_stt = importar_sin_banner("neo_stt")
+    memoria_inicial = memoria_mb()
+
+    carpeta_temporal = None
+    if corpus is None:
+        plantillas, sintetico = generar_corpus_activacion()
+        carpeta_temporal = corpus = guardar_corpus(sintetico, tempfile.mkdtemp(prefix="neo_corpus_pipeline_"),
+                                                   clave='activacion')
+        for nombre, _, etiquetas in sintetico:
+            if etiquetas is None:
+                with open(os.path.join(corpus, nombre + '.json'), 'w', encoding='utf-8') as f:
+                    json.dump({'activacion': []}, f)
+
+        def crear_activacion():
+            return neo_activacion.DetectorPlantillas(plantillas)
+    else:
+        def crear_activacion():
+            return neo_activacion.crear_detector(activacion)
+
+    if crear_activacion() is None:
+        print("⚠️ Sin detector de palabra de activación: no se evalúa", file=sys.stderr)
+        crear_activacion = None
+
+    motor_stt = None
+    segundos_carga = None
+    if motor != 'ninguno':
+        motor_stt = neo_stt.crear_motor(motor, modelo)
+        if motor_stt is None:
+            print("⚠️ Sin motor STT instalado: no se mide RTF ni WER", file=sys.stderr)
+        else:
+            # Los mensajes de carga a stderr para no romper --json
+            with contextlib.redirect_stdout(sys.stderr):
+                motor_stt.cargar()
+            segundos_carga = motor_stt.segundos_carga
+
+    filas = []
+    try:
+        archivos = sorted(glob.glob(os.path.join(corpus, '*.wav')))
+        if not archivos:
+            raise SystemExit(f"No hay WAV en {corpus}")
+        for archivo in archivos:
+            filas.append(pipeline_archivo(archivo, _leer_etiquetas(archivo), crear_activacion, sensibilidad,
+                                          vad, motor_stt, velocidad))
+    finally:
+        if carpeta_temporal:
+            shutil.rmtree(carpeta_temporal, ignore_errors=True)
+
+    total = resumir_pipeline(filas, "total")
+    total.update({
+        'motor': motor_stt.nombre if motor_stt else None,
+        'modelo': motor_stt.modelo if motor_stt else None,
+        'segundos_carga': segundos_carga,
+        'vad': vad or importar_sin_banner("neo_vad").BACKEND_VAD,
+        'activacion': activacion or neo_activacion.MOTOR_ACTIVACION,
+        'rss_inicial_mb': memoria_inicial['rss_mb'],
+    })
+    total.update(memoria_mb())
+    if detalle:
+        total['archivos_detalle'] = filas
+    if motor_stt:
+        motor_stt.descargar()
+
+    resultados = [total]
+    for clave in ('hablante', 'ruido'):
+        grupos = sorted({f[clave] for f in filas})
+        if len(grupos) > 1:
+            resultados += [resumir_pipeline([f for f in filas if f[clave] == grupo], f"{clave}: {grupo}")
+                           for grupo in grupos]
+    return resultados
+
+
+def mostrar_pipeline(resultados):
+    def valor(numero, formato, factor=1):
+        return "-" if numero is None else format(numero * factor, formato)
+
+    total = resultados[0]
+    print("\n" + "=" * 96)
+    print("CAMINO COMPLETO: captura → activación → VAD → STT")
+    print(f"motor {total['motor'] or '-'} ({total['modelo'] or '-'}), VAD {total['vad']}, "
+          f"activación {total['activacion']}")
+    print("=" * 96)
+    print(f"{'Grupo':24} {'arch':>5} {'prec %':>7} {'recall %':>8} {'corte s':>8} {'p90 s':>7} "
+          f"{'texto s':>8} {'RTF':>6} {'WER %':>6} {'CPU %':>6}")
+    print("-" * 96)
+    for r in resultados:
+        print(f"{r['nombre'][:24]:24} {r['archivos']:5d} {valor(r['precision_activacion'], '7.1f', 100):>7} "
+              f"{valor(r['recall_activacion'], '8.1f', 100):>8} {valor(r['latencia_corte'], '8.2f'):>8} "
+              f"{valor(r['latencia_corte_p90'], '7.2f'):>7} {valor(r['latencia_texto'], '8.2f'):>8} "
+              f"{valor(r['rtf'], '6.3f'):>6} {valor(r['wer'], '6.1f', 100):>6} {r['cpu_porcentaje']:6.1f}")
+    print("=" * 96)
+    print("corte = fin de la voz → fin de frase decidido | texto = corte + transcripción | "
+          "CPU = tiempo de CPU / audio")
+    print(f"Carga del modelo: {valor(total['segundos_carga'], '.2f')} s | "
+          f"RSS: {valor(total['rss_inicial_mb'], '.0f')} → {valor(total['rss_mb'], '.0f')} MB "
+          f"(pico {valor(total['rss_pico_mb'], '.0f')} MB) | frases perdidas: {total['frases_perdidas']}")
+
+
+def grabar_corpus(carpeta, hablante, comandos=COMANDOS_PRUEBA, segundos=5.0, palabra="neo"):
+    """
+    Graba al usuario diciendo cada comando dos veces: con la palabra de
+    activación ("neo ... abre chrome") y sin ella (negativo). Etiqueta
+    "voz" y "activacion" con el VAD; conviene revisarlas en Audacity.
+    """
+    neo_audio = importar_sin_banner("neo_audio")
+    neo_vad = importar_sin_banner("neo_vad")
+    captura = neo_audio.obtener_captura()
+    os.makedirs(carpeta, exist_ok=True)
+    print(f"\nSe graban {segundos:g} s por frase. Deja una pausa corta después de '{palabra}'.\n")
+
+    guardadas = 0
+    for numero, texto in enumerate(comandos):
+        for con_palabra in (True, False):
+            frase = f"{palabra}... {texto}" if con_palabra else texto
+            input(f"[{numero + 1}/{len(comandos)}] Presiona Enter y di: «{frase}»")
+            lector = captura.lector()
+            bloques = []
+            while sum(len(b) for b in bloques) < segundos * RATE:
+                leido = lector.siguiente(timeout=1.0)
+                if leido is not None:
+                    bloques.append(leido[1])
+            muestras = np.concatenate(bloques)
+
+            segmentos = neo_vad.detectar_segmentos(muestras, neo_vad.DetectorVoz())
+            if not segmentos:
+                print("⚠️ No se oyó nada, se omite")
+                continue
+            etiquetas = {'texto': texto, 'hablante': hablante, 'ruido': 'limpio',
+                         'voz': [[round(s['inicio'], 3), round(s['fin'], 3)] for s in segmentos]}
+            if not con_palabra:
+                etiquetas['activacion'] = []
+            elif len(segmentos) > 1:
+                etiquetas['activacion'] = [etiquetas['voz'][0]]
+            else:
+                print(f"⚠️ No se separó '{palabra}' del comando: etiqueta 'activacion' a mano")
+
+            base = os.path.join(carpeta, f"{hablante}_{numero:02d}_{'activacion' if con_palabra else 'comando'}")
+            neo_audio.guardar_wav(muestras, base + '.wav')
+            with open(base + '.json', 'w', encoding='utf-8') as f:
+                json.dump(etiquetas, f, ensure_ascii=False)
+            guardadas += 1
+
+    neo_audio.detener_captura()
+    print(f"\n✓ {guardadas} grabaciones en {carpeta}/")
+    return carpeta
+
+
+def mezclar_ruido(carpeta, destino, ruidos=('ventilador', 'teclado'), snrs=(20, 10, 5), semilla=0):
+    """
+    Copia el corpus con ruido de fondo añadido a varias relaciones señal/
+    ruido. `ruidos` son tipos sintéticos (ver _ruido_fondo) o WAVs de
+    ruido grabado. Las etiquetas se copian con "ruido": "<tipo> <snr> dB".
+    """
+    neo_audio = importar_sin_banner("neo_audio")
+    generador = np.random.default_rng(semilla)
+    os.makedirs(destino, exist_ok=True)
+
+    creados = 0
+    for archivo in sorted(glob.glob(os.path.join(carpeta, '*.wav'))):
+        etiquetas = _leer_etiquetas(archivo)
+        muestras = neo_audio.cargar_wav(archivo).astype(np.float64) / 32768
+        segmentos = [(int(ini * RATE), int(fin * RATE)) for ini, fin in etiquetas.get('voz', [])]
+        voz = np.concatenate([muestras[a:b] for a, b in segmentos]) if segmentos else muestras
+        potencia_voz = float(np.mean(voz ** 2)) + 1e-12
+
+        for ruido in ruidos:
+            if os.path.exists(ruido):
+                fondo = neo_audio.cargar_wav(ruido).astype(np.float64) / 32768
+                fondo = np.resize(fondo, len(muestras))
+                tipo = os.path.splitext(os.path.basename(ruido))[0]
+            else:
+                fondo = _ruido_fondo(len(muestras) / RATE, ruido, 1.0, generador)[:len(muestras)]
+                tipo = ruido
+            potencia_ruido = float(np.mean(fondo ** 2)) + 1e-12
+
+            for snr in snrs:
+                escala = np.sqrt(potencia_voz / (potencia_ruido * 10 ** (snr / 10)))
+                mezcla = np.clip(muestras + fondo * escala, -1, 1)
+                base = os.path.join(destino, f"{os.path.splitext(os.path.basename(archivo))[0]}_{tipo}_{snr:g}db")
+                neo_audio.guardar_wav((mezcla * 32767).astype(np.int16), base + '.wav')
+                with open(base + '.json', 'w', encoding='utf-8') as f:
+                    json.dump(dict(etiquetas, ruido=f"{tipo} {snr:g} dB"), f, ensure_ascii=False)
+                creados += 1
+
+    print(f"✓ {creados} archivos con ruido en {destino}/")
+    return destino
+
+
+def mostrar_entrega(resultados):
+    mostrar_resultados("ENTREGA A WHISPER: WAV temporal vs array en memoria (por frase)", resultados)
+    for r in resultados:
+        if 'ms_ahorrados' in r:
+            print(f"  {r['segundos_audio']:>4g} s de audio: {r['ms_ahorrados']:7.2f} ms menos por frase "
+                  f"(diferencia máxima de muestras: {r['max_diferencia']:.1e})")
+
+
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del sistema de voz de NEO")
+    sub = parser.add_subparsers(dest="prueba", required=True)
+
+    p_entrega = sub.add_parser("entrega", help="Costo de guardar/leer el WAV temporal por frase")
+    p_entrega.add_argument("--repeticiones", type=int, default=10)
+    p_entrega.add_argument("--duraciones", type=float, nargs="+", default=[1, 3, 5, 10],
+                           help="Segundos de cada frase")
+    p_entrega.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    p_vad = sub.add_parser("vad", help="Latencia de corte y disparos falsos con un corpus etiquetado")
+    p_vad.add_argument("--corpus", help="Carpeta con .wav + .json/.txt (por defecto: corpus sintético)")
+    p_vad.add_argument("--backends", nargs="+", choices=['energia', 'webrtc', 'silero'])
+    p_vad.add_argument("--guardar-corpus", help="Escribir el corpus sintético en esta carpeta y salir")
+    p_vad.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    p_activacion = sub.add_parser("activacion", help="Palabra de activación: recall, falsas/h, latencia, CPU")
+    p_activacion.add_argument("--sensibilidades", type=float, nargs="+", default=[0.3, 0.5, 0.7])
+    p_activacion.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    p_stt = sub.add_parser("stt", help="Motores de transcripción: RTF y WER con comandos en español")
+    p_stt.add_argument("--corpus", help="Carpeta con .wav + .json {\"texto\"} (por defecto: generado con pyttsx3)")
+    p_stt.add_argument("--motores", nargs="+", choices=['faster-whisper', 'whisper.cpp', 'whisper'])
+    p_stt.add_argument("--modelo", help="Modelo Whisper (por defecto: neo_stt.MODELO_STT)")
+    p_stt.add_argument("--selectivo", action="store_true",
+                       help="Comparar con la re-transcripción selectiva de los tramos dudosos")
+    p_stt.add_argument("--modelo-preciso", help="Con --selectivo (por defecto: neo_stt.MODELO_STT_PRECISO)")
+    p_stt.add_argument("--generar-corpus", help="Escribir el corpus de comandos (pyttsx3) en esta carpeta y salir")
+    p_stt.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    p_pipeline = sub.add_parser("pipeline", help="Camino completo: activación, corte, RTF, WER, CPU y RSS")
+    p_pipeline.add_argument("--corpus", help="Carpeta con .wav + .json (por defecto: corpus sintético, sin WER)")
+    p_pipeline.add_argument("--motor", choices=['auto', 'faster-whisper', 'whisper.cpp', 'whisper', 'ninguno'])
+    p_pipeline.add_argument("--modelo", help="Modelo Whisper (por defecto: neo_stt.MODELO_STT)")
+    p_pipeline.add_argument("--vad", choices=['auto', 'energia', 'webrtc', 'silero'])
+    p_pipeline.add_argument("--activacion", choices=['auto', 'plantillas', 'openwakeword', 'ninguno'])
+    p_pipeline.add_argument("--sensibilidad", type=float, help="Palabra de activación, 0-1")
+    p_pipeline.add_argument("--velocidad", type=float, default=0,
+                            help="Lectura de los WAV: 0 = lo más rápido posible, 1 = tiempo real")
+    p_pipeline.add_argument("--detalle", action="store_true", help="Con --json: incluir cada archivo")
+    p_pipeline.add_argument("--grabar", metavar="CARPETA", help="Grabar un corpus con el micrófono y salir")
+    p_pipeline.add_argument("--hablante", default="yo", help="Nombre del hablante para --grabar")
+    p_pipeline.add_argument("--mezclar-ruido", metavar="DESTINO",
+                            help="Copiar --corpus con ruido añadido en DESTINO y salir")
+    p_pipeline.add_argument("--ruidos", nargs="+", default=['ventilador', 'teclado'],
+                            help="blanco, ventilador, teclado o WAVs de ruido")
+    p_pipeline.add_argument("--snr", type=float, nargs="+", default=[20, 10, 5], help="dB")
+    p_pipeline.add_argument("--json", action="store_true", help="Salida en JSON")
+
+    args = parser.parse_args(argv)
+
+    if args.prueba == "entrega":
+        resultados = benchmark_entrega(args.repeticiones, args.duraciones)
+    elif args.prueba == "vad":
+        if args.guardar_corpus:
+            print(f"Corpus guardado en {guardar_corpus(generar_corpus_vad(), args.guardar_corpus)}")
+            return 0
+        resultados = benchmark_vad(args.corpus, args.backends)
+    elif args.prueba == "activacion":
+        resultados = benchmark_activacion(args.sensibilidades)
+    elif args.prueba == "stt":
+        if args.generar_corpus:
+            print(f"Corpus guardado en {generar_corpus_stt(args.generar_corpus)}")
+            return 0
+        if args.selectivo:
+            motor = args.motores[0] if args.motores else None
+            resultados = benchmark_selectivo(args.corpus, motor, args.modelo, args.modelo_preciso)
+        else:
+            resultados = benchmark_stt(args.corpus, args.motores, args.modelo)
+    elif args.prueba == "pipeline":
+        if args.grabar:
+            grabar_corpus(args.grabar, args.hablante)
+            return 0
+        if args.mezclar_ruido:
+            if not args.corpus:
+                parser.error("--mezclar-ruido necesita --corpus")
+            mezclar_ruido(args.corpus, args.mezclar_ruido, args.ruidos, args.snr)
+            return 0
+        resultados = benchmark_pipeline(args.corpus, args.motor, args.modelo, args.vad, args.activacion,
+                                        args.sensibilidad, args.velocidad, args.detalle)
+
+    if args.json:
+        print(json.dumps({'prueba': args.prueba, 'entorno': entorno(),
+                          'fecha': time.strftime('%Y-%m-%d %H:%M:%S'), 'resultados': resultados}, indent=2))
+    elif args.prueba == "entrega":
+        mostrar_entrega(resultados)
+    elif args.prueba == "vad":
+        mostrar_vad(resultados)
+    elif args.prueba == "activacion":
+        mostrar_activacion(resultados)
+    elif args.prueba == "stt" and args.selectivo:
+        mostrar_selectivo(resultados)
+    elif args.prueba == "stt":
+        mostrar_stt(resultados)
+    elif args.prueba == "pipeline":
+        mostrar_pipeline(resultados)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
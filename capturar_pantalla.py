@@ -1,54 +1,276 @@
 # capturar_pantalla.py - Sistema de captura y análisis de pantalla
+"""
+Captura continua de la pantalla en memoria.
+
+Un hilo guarda los últimos N frames (arrays NumPy con su hora) en un
+buffer circular de tamaño fijo: no se escribe nada en disco y la
+memoria no crece. Solo se codifica (JPEG/PNG) o se guarda un frame
+cuando alguien lo pide, lo que permite preguntar "¿qué había en
+pantalla hace 10 segundos?".
+
+Ejemplo:
+    captura = CapturaContinua(intervalo=1.0, capacidad=60).iniciar()
+    ...
+    momento, frame = captura.frame_hace(10)
+    jpeg = codificar_frame(frame)
+    captura.detener()
+"""
+
 import mss
-import mss.tools
+import numpy as np
 from PIL import Image
-import subprocess
-import os
+import threading
 import time
+from io import BytesIO
+
+from neo_ollama import ErrorOllama, obtener_cliente
 
 print("=" * 60)
 print("Sistema de Captura y Análisis de Pantalla")
 print("=" * 60)
 
-def capturar_pantalla():
-    print("\n[1/3] Capturando pantalla...")
-    
-    sct = mss.mss()
-    monitor = sct.monitors[1]
-    screenshot = sct.grab(monitor)
-    
-    archivo = "captura_pantalla.png"
-    mss.tools.to_png(screenshot.rgb, screenshot.size, output=archivo)
-    
-    print(f"Captura guardada: {archivo}")
-    return archivo
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+
+INTERVALO_CAPTURA = 1.0    # Segundos entre frames
+CAPACIDAD_BUFFER = 60      # Frames guardados (60 x 1 s = último minuto)
+ANCHO_BUFFER = 1280        # Los frames se guardan reducidos a este ancho (aprox.)
+CALIDAD_JPEG = 85
+
+
+# ==========================================
+# BUFFER CIRCULAR DE FRAMES
+# ==========================================
+
+class BufferFrames:
+    """
+    Buffer circular de frames de tamaño fijo.
+
+    Toda la memoria se reserva con el primer frame (capacidad x alto x
+    ancho x 3 bytes) y después solo se sobrescriben posiciones.
+    Los frames se guardan en BGR (el orden que entrega MSS).
+
+    Args:
+        capacidad (int): Número máximo de frames
+    """
+
+    def __init__(self, capacidad=CAPACIDAD_BUFFER):
+        self.capacidad = capacidad
+        self._frames = None                  # np.ndarray (capacidad, alto, ancho, 3)
+        self._tiempos = np.zeros(capacidad)  # time.time() de cada posición
+        self._siguiente = 0                  # Posición donde va el próximo frame
+        self._cantidad = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._cantidad
+
+    def agregar(self, bgr, momento=None):
+        """
+        Copia un frame al buffer (sobrescribe el más viejo si está lleno).
+
+        Args:
+            bgr (np.ndarray): (alto, ancho, 3) o BGRA (alto, ancho, 4)
+            momento (float): time.time() de la captura (None = ahora)
+        """
+        momento = time.time() if momento is None else momento
+        bgr = bgr[:, :, :3]
+
+        with self._lock:
+            if self._frames is None or self._frames.shape[1:3] != bgr.shape[:2]:
+                # Primer frame o cambió la resolución: reservar de nuevo
+                self._frames = np.empty((self.capacidad,) + bgr.shape[:2] + (3,), dtype=np.uint8)
+                self._siguiente = 0
+                self._cantidad = 0
+
+            np.copyto(self._frames[self._siguiente], bgr)
+            self._tiempos[self._siguiente] = momento
+            self._siguiente = (self._siguiente + 1) % self.capacidad
+            self._cantidad = min(self._cantidad + 1, self.capacidad)
+
+    def _orden(self):
+        """Posiciones del más viejo al más nuevo"""
+        inicio = (self._siguiente - self._cantidad) % self.capacidad
+        return [(inicio + i) % self.capacidad for i in range(self._cantidad)]
+
+    def rango(self):
+        """(momento más viejo, momento más nuevo) o None si está vacío"""
+        with self._lock:
+            orden = self._orden()
+            if not orden:
+                return None
+            return float(self._tiempos[orden[0]]), float(self._tiempos[orden[-1]])
+
+    def ultimo(self):
+        """(momento, frame) del frame más nuevo, o None"""
+        with self._lock:
+            if not self._cantidad:
+                return None
+            posicion = (self._siguiente - 1) % self.capacidad
+            return float(self._tiempos[posicion]), self._frames[posicion].copy()
+
+    def frame_en(self, momento):
+        """
+        Frame que estaba en pantalla en `momento`: el último capturado
+        en ese instante o antes (o el más viejo si es anterior a todos).
+
+        Returns:
+            tuple: (momento real, frame copiado) o None si está vacío
+        """
+        with self._lock:
+            orden = self._orden()
+            if not orden:
+                return None
+            elegido = orden[0]
+            for posicion in orden:
+                if self._tiempos[posicion] > momento:
+                    break
+                elegido = posicion
+            return float(self._tiempos[elegido]), self._frames[elegido].copy()
+
+    def frames_desde(self, momento):
+        """
+        Todos los frames capturados después de `momento` (del más viejo
+        al más nuevo).
+
+        Returns:
+            list: [(momento, frame copiado), ...]
+        """
+        with self._lock:
+            return [(float(self._tiempos[p]), self._frames[p].copy())
+                    for p in self._orden() if self._tiempos[p] > momento]
+
+    def bytes_reservados(self):
+        return self._frames.nbytes if self._frames is not None else 0
+
+
+# ==========================================
+# CAPTURA CONTINUA
+# ==========================================
+
+class CapturaContinua:
+    """
+    Hilo que captura la pantalla cada `intervalo` segundos y guarda
+    los frames en un BufferFrames.
+
+    Args:
+        intervalo (float): Segundos entre capturas
+        capacidad (int): Frames guardados
+        ancho_max (int): Ancho aproximado de los frames guardados (se
+                         reduce tomando 1 de cada N píxeles, sin copias extra)
+        monitor (int): Monitor de MSS (1 = principal)
+    """
+
+    def __init__(self, intervalo=INTERVALO_CAPTURA, capacidad=CAPACIDAD_BUFFER,
+                 ancho_max=ANCHO_BUFFER, monitor=1):
+        self.intervalo = intervalo
+        self.ancho_max = ancho_max
+        self.monitor = monitor
+        self.buffer = BufferFrames(capacidad)
+
+        self._detener = threading.Event()
+        self._hilo = None
+        self.capturas = 0
+        self.errores = 0
+
+    def iniciar(self):
+        if self._hilo and self._hilo.is_alive():
+            return self
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="NEO-captura-continua", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(timeout=self.intervalo * 2 + 1)
+            self._hilo = None
+
+    def activa(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def _ciclo(self):
+        # MSS se crea dentro del hilo que lo usa
+        with mss.mss() as sct:
+            monitor = sct.monitors[self.monitor]
+            while not self._detener.is_set():
+                inicio = time.time()
+                try:
+                    screenshot = sct.grab(monitor)
+                    ancho, alto = screenshot.size
+                    bgra = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(alto, ancho, 4)
+
+                    paso = max(1, -(-ancho // self.ancho_max))
+                    self.buffer.agregar(bgra[::paso, ::paso], inicio)
+                    self.capturas += 1
+                except Exception as e:
+                    self.errores += 1
+                    print(f"⚠️ Error en captura continua: {e}")
 
-def optimizar_imagen(archivo):
-    print("[2/3] Optimizando imagen...")
-    
-    img = Image.open(archivo)
-    print(f"  Tamaño original: {img.size[0]}x{img.size[1]} px")
-    
-    if img.size[0] > 1280:
-        ratio = 1280 / img.size[0]
-        nuevo_ancho = 1280
-        nuevo_alto = int(img.size[1] * ratio)
-        
-        img = img.resize((nuevo_ancho, nuevo_alto), Image.Resampling.LANCZOS)
-        img.save(archivo, optimize=True, quality=85)
-        
-        print(f"  Tamaño optimizado: {nuevo_ancho}x{nuevo_alto} px")
+                self._detener.wait(max(0.0, self.intervalo - (time.time() - inicio)))
+
+    # ---------- Consultas ----------
+
+    def frame_en(self, momento):
+        """(momento, frame BGR) que había en pantalla en `momento` (time.time())"""
+        return self.buffer.frame_en(momento)
+
+    def frame_hace(self, segundos):
+        """(momento, frame BGR) de hace `segundos` segundos"""
+        return self.buffer.frame_en(time.time() - segundos)
+
+    def frames_desde(self, momento):
+        """[(momento, frame BGR), ...] capturados después de `momento`"""
+        return self.buffer.frames_desde(momento)
+
+    def ultimo(self):
+        return self.buffer.ultimo()
+
+    def esperar_primer_frame(self, timeout=5.0):
+        """Espera a que haya al menos un frame (True si llegó)"""
+        limite = time.time() + timeout
+        while not len(self.buffer) and time.time() < limite:
+            time.sleep(0.05)
+        return len(self.buffer) > 0
+
+
+# ==========================================
+# CODIFICAR / GUARDAR (solo cuando se pide)
+# ==========================================
+
+def frame_a_imagen(frame):
+    """Frame BGR del buffer → PIL.Image RGB"""
+    alto, ancho = frame.shape[:2]
+    return Image.frombuffer('RGB', (ancho, alto), np.ascontiguousarray(frame), 'raw', 'BGR', 0, 1)
+
+
+def codificar_frame(frame, formato='JPEG', calidad=CALIDAD_JPEG):
+    """Frame BGR → bytes JPEG/PNG en memoria"""
+    buffer = BytesIO()
+    if formato == 'PNG':
+        frame_a_imagen(frame).save(buffer, format='PNG', compress_level=1)
     else:
-        print(f"  Tamaño ya es bueno, no se optimizó")
-    
-    print("Imagen lista")
+        frame_a_imagen(frame).save(buffer, format=formato, quality=calidad)
+    return buffer.getvalue()
+
+
+def guardar_frame(frame, archivo):
+    """Guarda un frame en disco (formato según la extensión)"""
+    frame_a_imagen(frame).save(archivo)
     return archivo
 
-def describir_pantalla(archivo):
-    print("[3/3] Analizando con IA...")
+
+# ==========================================
+# ANÁLISIS CON LLAVA
+# ==========================================
+
+def describir_pantalla(imagen, pregunta=None):
+    print("Analizando con IA...")
     print("  (Esto tomará 20-30 segundos)\n")
-    
-    prompt = """Describe en español lo que ves en esta captura de pantalla.
+
+    prompt = pregunta or """Describe en español lo que ves en esta captura de pantalla.
 
 Menciona:
 1. ¿Qué aplicaciones o programas están abiertos?
@@ -56,60 +278,99 @@ Menciona:
 3. ¿Qué está haciendo el usuario probablemente?
 
 Sé específico pero conciso."""
-    
-    comando = f'ollama run llava:7b "Analiza esta imagen: {archivo}. {prompt}"'
-    
+
+    # Acepta bytes ya codificados o la ruta de un archivo
+    if isinstance(imagen, str):
+        with open(imagen, 'rb') as f:
+            imagen = f.read()
+
+    # La imagen va en el campo "images" de la API (Llava ve los píxeles)
     try:
-        resultado = subprocess.run(
-            comando,
-            shell=True,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            timeout=60
+        descripcion = obtener_cliente().generar(
+            "llava:7b",
+            prompt,
+            imagenes=[imagen],
+            al_recibir=lambda texto: print(texto, end='', flush=True)
         )
-        
-        if resultado.stdout:
-            descripcion = resultado.stdout.strip()
-            return descripcion
+        print()
+
+        if descripcion.strip():
+            return descripcion.strip()
         else:
             return "No se pudo obtener descripción"
-            
-    except subprocess.TimeoutExpired:
-        return "Timeout: La IA tardó demasiado"
+
+    except ErrorOllama as e:
+        return f"Error: {e}"
     except Exception as e:
         return f"Error: {e}"
 
+def describir_momento(captura, segundos_atras=0, pregunta=None):
+    """
+    Describe lo que había en pantalla hace `segundos_atras` segundos.
+
+    Returns:
+        tuple: (momento del frame usado, descripción) o (None, mensaje)
+    """
+    encontrado = captura.frame_hace(segundos_atras)
+    if encontrado is None:
+        return None, "Todavía no hay capturas"
+
+    momento, frame = encontrado
+    return momento, describir_pantalla(codificar_frame(frame), pregunta)
+
 def main():
-    print("\nCambia a la ventana que quieres analizar")
-    print("   y vuelve aquí en 3 segundos...\n")
-    
-    for i in range(3, 0, -1):
-        print(f"   {i}...")
-        time.sleep(1)
-    
-    archivo = capturar_pantalla()
-    archivo = optimizar_imagen(archivo)
-    descripcion = describir_pantalla(archivo)
-    
-    print("\n" + "=" * 60)
-    print("DESCRIPCIÓN DE TU PANTALLA:")
-    print("=" * 60)
-    print(f"\n{descripcion}\n")
-    print("=" * 60)
-    
-    print("\n¿Quieres analizar otra pantalla? (si/no): ", end='')
-    respuesta = input().strip().lower()
-    
-    if respuesta == 'si':
-        print("\n" + "=" * 60)
-        main()
-    else:
+    captura = CapturaContinua().iniciar()
+
+    print(f"\nCapturando cada {INTERVALO_CAPTURA:g} s en memoria "
+          f"(últimos {CAPACIDAD_BUFFER} frames, nada se escribe en disco)")
+
+    if not captura.esperar_primer_frame():
+        print("No se pudo capturar la pantalla")
+        captura.detener()
+        return
+
+    print("\nPuedes preguntar por la pantalla de ahora o de hace unos segundos.")
+
+    try:
+        while True:
+            print("\n¿Qué momento analizar? (Enter = ahora, número = segundos atrás, "
+                  "'guardar N' = guardar PNG, 'no' = salir): ", end='')
+            respuesta = input().strip().lower()
+
+            if respuesta in ('no', 'salir', 'q'):
+                break
+
+            if respuesta.startswith('guardar'):
+                partes = respuesta.split()
+                try:
+                    segundos = float(partes[1]) if len(partes) > 1 else 0.0
+                except ValueError:
+                    print("Uso: guardar N (N = segundos atrás, ej: guardar 5)")
+                    continue
+                encontrado = captura.frame_hace(segundos)
+                if encontrado:
+                    archivo = f"captura_{time.strftime('%H%M%S', time.localtime(encontrado[0]))}.png"
+                    print(f"Guardado: {guardar_frame(encontrado[1], archivo)}")
+                continue
+
+            try:
+                segundos = float(respuesta) if respuesta else 0.0
+            except ValueError:
+                print("Escribe un número de segundos")
+                continue
+
+            momento, descripcion = describir_momento(captura, segundos)
+
+            print("\n" + "=" * 60)
+            if momento:
+                print(f"PANTALLA A LAS {time.strftime('%H:%M:%S', time.localtime(momento))} "
+                      f"(hace {time.time() - momento:.0f} s):")
+            print("=" * 60)
+            print(f"\n{descripcion}\n")
+            print("=" * 60)
+    finally:
+        captura.detener()
         print("\n¡Hasta luego!")
-        
-        if os.path.exists(archivo):
-            os.remove(archivo)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
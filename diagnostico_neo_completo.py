@@ -224,11 +224,12 @@ if respuesta == 'si':
         
         input("\nPresiona Enter para iniciar la grabación...")
         
-        archivo = escuchar_audio(timeout=8, esperar_activacion=True)
+        # Audio en memoria (np.ndarray float32), sin archivo temporal
+        audio = escuchar_audio(timeout=8, esperar_activacion=True)
         
-        if archivo:
+        if audio is not None:
             print("\n⏳ Transcribiendo...")
-            texto = transcribir_audio(archivo)
+            texto = transcribir_audio(audio)
             
             if texto:
                 print(f"\n   ✅ Transcripción exitosa: '{texto}'")
@@ -236,11 +237,6 @@ if respuesta == 'si':
             else:
                 print("   ❌ No se pudo transcribir")
                 resultados['voz'] = False
-            
-            # Limpiar archivo temporal
-            import os
-            if os.path.exists(archivo):
-                os.remove(archivo)
         else:
             print("   ⚠️  No se capturó audio")
             resultados['voz'] = 'sin_audio'
@@ -0,0 +1,621 @@
+# neo_activacion.py - Palabra de activación ("NEO") siempre escuchando
+"""
+Detector ligero de la palabra de activación, ANTES de Whisper.
+
+Antes, cada frase que se oía (la tele, gente hablando) pasaba entera
+por Whisper "base" solo para buscar "neo" en el texto. Ahora un
+detector pequeño lee el buffer circular del micrófono (neo_audio)
+continuamente, a unos pocos % de CPU, y Whisper solo transcribe lo
+que se dice DESPUÉS de que se detecta la palabra.
+
+Detectores (misma interfaz, se elige con MOTOR_ACTIVACION):
+- 'plantillas': MFCC + DTW contra unas grabaciones tuyas diciendo
+  "neo" (sin dependencias; grábalas con `python neo_activacion.py`)
+- 'openwakeword': modelo ONNX de openWakeWord (pip install openwakeword)
+
+La sensibilidad (0-1) se ajusta con SENSIBILIDAD: más alta = detecta
+más fácil, pero con más falsas activaciones.
+
+Ejemplo:
+    escucha = neo_activacion.obtener_escucha()
+    if escucha and escucha.esperar(timeout=60) is not None:
+        comando = neo_vad.grabar_frase(lector=escucha.lector)
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+import neo_audio
+import neo_vad
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+
+MOTOR_ACTIVACION = "auto"                        # 'auto', 'plantillas', 'openwakeword' o 'ninguno'
+SENSIBILIDAD = 0.5                               # 0-1 (más alto = más fácil de activar)
+REFRACTARIO = 1.5                                # Segundos sin volver a detectar tras una activación
+CARPETA_PLANTILLAS_VOZ = "plantillas_voz"        # WAVs con la palabra (mínimo 2)
+MODELO_OPENWAKEWORD = "modelos_voz/hey_neo.onnx" # Modelo entrenado con openWakeWord
+GRABACIONES_PLANTILLA = 4                        # Veces que se pide decir la palabra al registrarla
+
+
+# ==========================================
+# MFCC (solo NumPy)
+# ==========================================
+
+def _banco_mel(filtros, nfft, rate):
+    """Filtros triangulares en escala mel: (filtros, nfft // 2 + 1)"""
+    def a_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def a_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    puntos = a_hz(np.linspace(a_mel(60), a_mel(rate / 2), filtros + 2))
+    bins = np.floor((nfft + 1) * puntos / rate).astype(int)
+    banco = np.zeros((filtros, nfft // 2 + 1), dtype=np.float32)
+    for i in range(filtros):
+        izq, centro, der = bins[i], bins[i + 1], bins[i + 2]
+        if centro > izq:
+            banco[i, izq:centro] = (np.arange(izq, centro) - izq) / (centro - izq)
+        if der > centro:
+            banco[i, centro:der] = (der - np.arange(centro, der)) / (der - centro)
+    return banco
+
+
+class ExtractorMFCC:
+    """
+    MFCC en streaming: recibe bloques de cualquier tamaño y devuelve
+    las tramas completas que se pudieron calcular (guarda el resto).
+
+    Tramas de 25 ms cada 10 ms, 13 coeficientes (sin c0, que es solo
+    volumen: así la distancia no depende de qué tan fuerte se hable).
+    La potencia mel (antes del logaritmo) también se puede pedir por
+    separado, para sumarle el ruido de la habitación (ver cepstro).
+    """
+
+    def __init__(self, rate=neo_audio.RATE, trama=400, paso=160, nfft=512, filtros=26, coeficientes=13):
+        self.trama = trama
+        self.paso = paso
+        self.nfft = nfft
+        self.filtros = filtros
+        self._ventana = np.hamming(trama).astype(np.float32)
+        self._mel = _banco_mel(filtros, nfft, rate)
+        self._resto = np.zeros(0, dtype=np.float32)
+
+    def reiniciar(self):
+        self._resto = np.zeros(0, dtype=np.float32)
+
+    def potencia_mel(self, muestras):
+        """int16 → (tramas, filtros) potencia en cada banda mel"""
+        x = np.concatenate((self._resto, np.asarray(muestras, dtype=np.float32) / 32768.0))
+        if len(x) < self.trama:
+            self._resto = x
+            return np.zeros((0, self.filtros), dtype=np.float32)
+
+        cantidad = 1 + (len(x) - self.trama) // self.paso
+        tramas = np.lib.stride_tricks.sliding_window_view(x, self.trama)[::self.paso][:cantidad]
+        espectro = np.abs(np.fft.rfft(tramas * self._ventana, self.nfft)) ** 2
+        self._resto = x[cantidad * self.paso:]
+        return (espectro @ self._mel.T).astype(np.float32)
+
+    def procesar(self, muestras):
+        """int16 → (tramas, 12) float32"""
+        return cepstro(self.potencia_mel(muestras))
+
+
+_DCT = np.cos(np.pi / 26 * (np.arange(26)[None, :] + 0.5) * np.arange(13)[:, None]).astype(np.float32)
+
+
+def cepstro(potencia_mel):
+    """Potencia mel → MFCC sin c0: (tramas, 12)"""
+    return (np.log(potencia_mel + 1e-8) @ _DCT.T)[:, 1:].astype(np.float32)
+
+
+def mfcc(muestras):
+    """MFCC de un audio completo"""
+    return ExtractorMFCC().procesar(muestras)
+
+
+def recortar_silencio(muestras, margen_db=30.0, rate=neo_audio.RATE):
+    """Quita el silencio de los extremos (tramas 30 dB por debajo del máximo)"""
+    paso = rate // 100
+    niveles = np.array([neo_vad.energia_db(muestras[i:i + paso]) for i in range(0, len(muestras) - paso + 1, paso)])
+    if not len(niveles):
+        return muestras
+    voz = np.flatnonzero(niveles > niveles.max() - margen_db)
+    return muestras[voz[0] * paso:(voz[-1] + 1) * paso]
+
+
+def costos_dtw(plantilla, ventana):
+    """
+    DTW de subsecuencia: la plantilla puede empezar en cualquier trama
+    de la ventana. Pasos (i-1, j-1), (i-1, j-2) y (i-1, j) (este último
+    cuenta doble), lo que permite que se hable entre 0.5x y 2x más
+    rápido que en la plantilla y deja calcular cada fila de una vez.
+
+    Returns:
+        np.ndarray: Costo medio por trama de plantilla si la palabra
+                    termina en cada trama de la ventana
+    """
+    diferencias = plantilla[:, None, :] - ventana[None, :, :]
+    costo = np.sqrt(np.einsum('ijk,ijk->ij', diferencias, diferencias))
+    acumulado = costo[0].copy()
+    infinito = np.full(2, np.inf, dtype=costo.dtype)
+
+    for i in range(1, len(plantilla)):
+        anterior = acumulado
+        diagonal = np.concatenate((infinito[:1], anterior[:-1]))
+        salto = np.concatenate((infinito, anterior[:-2]))
+        acumulado = costo[i] + np.minimum(np.minimum(diagonal, salto), anterior + costo[i])
+
+    return acumulado / len(plantilla)
+
+
+# ==========================================
+# DETECTORES
+# ==========================================
+
+class DetectorActivacion:
+    """
+    Interfaz de un detector de palabra de activación.
+
+    procesar() recibe bloques int16 consecutivos (vistas del buffer, no
+    se deben modificar) y devuelve una puntuación 0-1 para el final de
+    ese bloque. Con puntuación >= 1 - sensibilidad hay activación.
+    """
+
+    nombre = 'ninguno'
+
+    def disponible(self):
+        return False
+
+    def procesar(self, bloque):
+        return 0.0
+
+    def reiniciar(self):
+        pass
+
+
+class DetectorPlantillas(DetectorActivacion):
+    """
+    Compara los MFCC del audio reciente con plantillas grabadas por el
+    usuario (DTW). Para gastar casi nada de CPU, solo compara mientras
+    hay voz (según un DetectorVoz de energía); en silencio solo calcula
+    los MFCC.
+
+    Las plantillas se graban con el mismo micrófono que se usa después,
+    así que no hace falta normalizar el canal. El ruido sí cambia (un
+    ventilador que se enciende): se estima en los tramos sin voz y se
+    suma a la potencia mel de las plantillas antes de compararlas, para
+    que "suenen" como la habitación de ahora.
+
+    Args:
+        plantillas (list): Audios int16 de la palabra (None = leer CARPETA_PLANTILLAS_VOZ)
+    """
+
+    nombre = 'plantillas'
+
+    def __init__(self, plantillas=None, carpeta=CARPETA_PLANTILLAS_VOZ):
+        if plantillas is None:
+            plantillas = [neo_audio.cargar_wav(archivo)
+                          for archivo in sorted(glob.glob(os.path.join(carpeta, '*.wav')))]
+        extractor = ExtractorMFCC()
+        self._potencias = [extractor.potencia_mel(recortar_silencio(audio)) for audio in plantillas]
+        self._potencias = [p for p in self._potencias if len(p) >= 10]
+
+        largo_max = max((len(p) for p in self._potencias), default=0)
+        self._capacidad = largo_max * 2 + 16
+        self._extractor = extractor
+        self._voz = neo_vad.DetectorVoz(neo_vad.BackendEnergia(), pre_roll=0.0, min_voz=0.0)
+        self.comparaciones = 0
+
+        self._ruido_mel = np.zeros(extractor.filtros, dtype=np.float32)
+        self._ruido_usado = None
+        self.plantillas = []
+        self.referencia = None
+        self._adaptar_plantillas()
+        self.reiniciar()
+
+    def _adaptar_plantillas(self):
+        """Plantillas + ruido actual → MFCC"""
+        self.plantillas = [cepstro(p + self._ruido_mel) for p in self._potencias]
+        self._ruido_usado = self._ruido_mel.copy()
+
+        # Escala de la puntuación: distancia típica entre dos grabaciones
+        # tal como se registraron (no cambia con el ruido)
+        if self.referencia is None:
+            distancias = [costos_dtw(a, b).min()
+                          for i, a in enumerate(self.plantillas)
+                          for j, b in enumerate(self.plantillas) if i != j]
+            self.referencia = float(np.mean(distancias)) if distancias else None
+
+    def _actualizar_ruido(self, potencias):
+        """Media móvil del ruido por banda; re-adaptar si cambió más de ~1 dB"""
+        self._ruido_mel += 0.1 * (potencias.mean(axis=0) - self._ruido_mel)
+        cambio = np.abs(np.log((self._ruido_mel + 1e-8) / (self._ruido_usado + 1e-8))).mean()
+        if cambio > 0.25:
+            self._adaptar_plantillas()
+
+    def disponible(self):
+        return len(self.plantillas) >= 2
+
+    def reiniciar(self):
+        self._extractor.reiniciar()
+        self._voz.reiniciar()
+        self._tramas = np.zeros((0, 12), dtype=np.float32)
+        self._nuevas = 0
+        self._posicion = 0
+
+    def procesar(self, bloque):
+        potencias = self._extractor.potencia_mel(bloque)
+        nuevas = cepstro(potencias)
+        self._tramas = np.concatenate((self._tramas, nuevas))[-self._capacidad:]
+        self._nuevas += len(nuevas)
+
+        self._voz.procesar(self._posicion, bloque)
+        self._posicion += len(bloque)
+        if not self._voz.en_voz:
+            if len(potencias):
+                self._actualizar_ruido(potencias)
+            self._nuevas = 0
+            return 0.0
+        if not self._nuevas or not self.referencia:
+            return 0.0
+
+        # Solo interesan los finales de palabra que caen en las tramas nuevas
+        self.comparaciones += 1
+        mejor = np.inf
+        for plantilla in self.plantillas:
+            if len(self._tramas) >= len(plantilla) // 2:
+                mejor = min(mejor, costos_dtw(plantilla, self._tramas)[-self._nuevas:].min())
+        self._nuevas = 0
+
+        # 1.0 = tan parecido como dos plantillas entre sí; baja al alejarse
+        proporcion = mejor / self.referencia
+        return float(np.exp(-3.0 * max(0.0, proporcion - 1.0)))
+
+
+class DetectorOpenWakeWord(DetectorActivacion):
+    """
+    openWakeWord (pip install openwakeword) con un modelo ONNX propio.
+    Procesa tramas de 80 ms (1280 muestras a 16 kHz).
+    """
+
+    nombre = 'openwakeword'
+    TRAMA = 1280
+
+    def __init__(self, modelo=MODELO_OPENWAKEWORD):
+        self.ruta_modelo = modelo
+        self._modelo = None
+        self._pendiente = np.zeros(0, dtype=np.int16)
+        self._ultima = 0.0
+
+    def disponible(self):
+        try:
+            import openwakeword  # noqa: F401
+        except ImportError:
+            return False
+        return os.path.exists(self.ruta_modelo)
+
+    def reiniciar(self):
+        self._pendiente = np.zeros(0, dtype=np.int16)
+        if self._modelo is not None:
+            self._modelo.reset()
+
+    def procesar(self, bloque):
+        if self._modelo is None:
+            from openwakeword.model import Model
+            self._modelo = Model(wakeword_models=[self.ruta_modelo], inference_framework='onnx')
+
+        self._pendiente = np.concatenate((self._pendiente, bloque))
+        while len(self._pendiente) >= self.TRAMA:
+            puntuaciones = self._modelo.predict(self._pendiente[:self.TRAMA])
+            self._ultima = max(puntuaciones.values()) if puntuaciones else 0.0
+            self._pendiente = self._pendiente[self.TRAMA:]
+        return float(self._ultima)
+
+
+MOTORES_ACTIVACION = {
+    'openwakeword': DetectorOpenWakeWord,
+    'plantillas': DetectorPlantillas,
+}
+
+
+def crear_detector(nombre=None):
+    """
+    Detector según `nombre` (None = MOTOR_ACTIVACION). 'auto' usa el
+    primero disponible: openwakeword (si hay modelo) → plantillas.
+
+    Returns:
+        DetectorActivacion o None si no hay ninguno listo
+    """
+    nombre = nombre or MOTOR_ACTIVACION
+    if nombre == 'ninguno':
+        return None
+
+    candidatos = ['openwakeword', 'plantillas'] if nombre == 'auto' else [nombre]
+    for candidato in candidatos:
+        clase = MOTORES_ACTIVACION.get(candidato)
+        if clase is None:
+            continue
+        try:
+            detector = clase()
+        except Exception as e:
+            print(f"⚠️ Activación '{candidato}': {e}")
+            continue
+        if detector.disponible():
+            return detector
+    return None
+
+
+# ==========================================
+# ESCUCHA CONTINUA
+# ==========================================
+
+class EscuchaActivacion:
+    """
+    Lee el buffer del micrófono con su propio cursor y pasa cada bloque
+    por el detector hasta que la puntuación supera el umbral.
+
+    Después de una activación, `lector` queda justo después de la
+    palabra: ahí empieza el comando (ver neo_vad.grabar_frase(lector=...)).
+
+    esperar() se puede llamar en bucle con un timeout corto: solo la
+    primera llamada (o la siguiente a reiniciar()) salta al audio actual
+    y reinicia el detector; un timeout no pierde nada, así que un "neo"
+    que cae entre dos llamadas se detecta igual. Tras una activación se
+    reinicia el detector pero no el cursor: lo dicho mientras NEO
+    trabajaba se escucha después.
+
+    Args:
+        detector (DetectorActivacion): Detector a usar
+        sensibilidad (float): 0-1 (None = SENSIBILIDAD)
+        lector (LectorAudio): Cursor (None = uno nuevo del micrófono compartido)
+    """
+
+    def __init__(self, detector, sensibilidad=None, lector=None):
+        self.detector = detector
+        self.sensibilidad = SENSIBILIDAD if sensibilidad is None else sensibilidad
+        self.lector = lector or neo_audio.obtener_captura().lector()
+        self._bloqueado_hasta = 0
+        self._al_final = True          # La próxima esperar() salta al audio actual
+        self._lock = threading.Lock()
+        self._stats = {'bloques': 0, 'segundos_audio': 0.0, 'segundos_cpu': 0.0, 'activaciones': 0}
+
+    def umbral(self):
+        return 1.0 - min(0.99, max(0.01, self.sensibilidad))
+
+    def procesar(self, posicion, bloque):
+        """
+        Un bloque del buffer. Returns: True si con él se completó la palabra
+        """
+        inicio = time.process_time()
+        puntuacion = self.detector.procesar(bloque)
+        activado = puntuacion >= self.umbral() and posicion >= self._bloqueado_hasta
+
+        with self._lock:
+            self._stats['bloques'] += 1
+            self._stats['segundos_audio'] += len(bloque) / self.lector.buffer.rate
+            self._stats['segundos_cpu'] += time.process_time() - inicio
+            if activado:
+                self._stats['activaciones'] += 1
+
+        if activado:
+            self._bloqueado_hasta = posicion + int(REFRACTARIO * self.lector.buffer.rate)
+        return activado
+
+    def reiniciar(self, al_final=True):
+        """
+        Olvida lo que el detector llevaba oído.
+
+        Args:
+            al_final (bool): Mover también el cursor al audio actual
+                             (False = seguir desde donde está el lector)
+        """
+        if al_final:
+            self.lector.saltar_al_final()
+        self.detector.reiniciar()
+        self._al_final = False
+
+    def esperar(self, timeout=None, detener=None):
+        """
+        Espera la palabra de activación.
+
+        Args:
+            timeout (float): Segundos máximos (None = sin límite)
+            detener (callable): Si devuelve True se deja de esperar
+
+        Returns:
+            int: Posición absoluta donde terminó la palabra, o None
+        """
+        limite = None if timeout is None else time.time() + timeout
+        if self._al_final:
+            self.reiniciar()
+
+        while detener is None or not detener():
+            if limite is not None and time.time() >= limite:
+                return None
+            leido = self.lector.siguiente(timeout=0.5)
+            if leido is None:
+                continue
+            posicion, bloque = leido
+            if self.procesar(posicion, bloque):
+                self.detector.reiniciar()
+                return posicion + len(bloque)
+        return None
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+        audio = stats['segundos_audio']
+        stats['cpu_porcentaje'] = stats['segundos_cpu'] / audio * 100 if audio else 0.0
+        stats['detector'] = self.detector.nombre
+        stats['sensibilidad'] = self.sensibilidad
+        return stats
+
+
+_escucha = None
+_lock_escucha = threading.Lock()
+
+
+def obtener_escucha():
+    """
+    Escucha de activación compartida, o None si no hay detector listo
+    (sin plantillas ni modelo): en ese caso se sigue buscando "neo" en
+    el texto de Whisper como antes.
+    """
+    global _escucha
+    with _lock_escucha:
+        if _escucha is None:
+            detector = crear_detector()
+            if detector is None:
+                return None
+            _escucha = EscuchaActivacion(detector)
+        return _escucha
+
+
+def activacion_disponible():
+    return obtener_escucha() is not None
+
+
+# ==========================================
+# EVALUACIÓN
+# ==========================================
+# Corpus: archivo.wav + archivo.json con {"activacion": [[inicio_s, fin_s], ...]}
+# (la palabra de activación). Archivos sin esa clave = audio negativo
+# (conversación, tele...): cualquier activación ahí es falsa.
+
+def evaluar_activacion(carpeta, crear=crear_detector, sensibilidad=SENSIBILIDAD, tolerancia=0.5):
+    """
+    Recall, falsas activaciones por hora, latencia de detección y CPU.
+
+    Args:
+        carpeta (str): Corpus (ver arriba)
+        crear (callable): Devuelve un DetectorActivacion nuevo
+        sensibilidad (float): Sensibilidad a evaluar
+        tolerancia (float): Segundos tras el fin de la palabra en que
+                            una detección todavía cuenta como acierto
+
+    Returns:
+        dict o None si no hay archivos
+    """
+    aciertos = falsas = total = 0
+    latencias = []
+    segundos_audio = segundos_cpu = 0.0
+    archivos = 0
+
+    for archivo in sorted(glob.glob(os.path.join(carpeta, '*.wav'))):
+        etiquetas = []
+        base = os.path.splitext(archivo)[0]
+        if os.path.exists(base + '.json'):
+            with open(base + '.json', encoding='utf-8') as f:
+                etiquetas = json.load(f).get('activacion', [])
+
+        muestras = neo_audio.cargar_wav(archivo)
+        buffer = neo_audio.BufferAudio(1, neo_audio.RATE, neo_audio.CHUNK)
+        escucha = EscuchaActivacion(crear(), sensibilidad, neo_audio.LectorAudio(buffer))
+        detecciones = []
+
+        for inicio in range(0, len(muestras) - neo_audio.CHUNK + 1, neo_audio.CHUNK):
+            bloque = muestras[inicio:inicio + neo_audio.CHUNK]
+            if escucha.procesar(inicio, bloque):
+                detecciones.append((inicio + len(bloque)) / neo_audio.RATE)
+
+        stats = escucha.estadisticas()
+        segundos_audio += stats['segundos_audio']
+        segundos_cpu += stats['segundos_cpu']
+        archivos += 1
+        total += len(etiquetas)
+
+        usadas = set()
+        for inicio_palabra, fin_palabra in etiquetas:
+            candidatas = [i for i, momento in enumerate(detecciones)
+                          if inicio_palabra <= momento <= fin_palabra + tolerancia and i not in usadas]
+            if candidatas:
+                usadas.add(candidatas[0])
+                aciertos += 1
+                latencias.append(detecciones[candidatas[0]] - fin_palabra)
+        falsas += len(detecciones) - len(usadas)
+
+    if not archivos:
+        return None
+
+    horas = segundos_audio / 3600
+    return {
+        'archivos': archivos,
+        'segundos_audio': segundos_audio,
+        'sensibilidad': sensibilidad,
+        'palabras': total,
+        'detectadas': aciertos,
+        'recall': aciertos / total if total else None,
+        'falsas': falsas,
+        'falsas_por_hora': falsas / horas if horas else 0.0,
+        'latencia_media': float(np.mean(latencias)) if latencias else None,
+        'latencia_p90': float(np.percentile(latencias, 90)) if latencias else None,
+        'cpu_porcentaje': segundos_cpu / segundos_audio * 100 if segundos_audio else 0.0,
+    }
+
+
+# ==========================================
+# REGISTRAR PLANTILLAS / PROBAR
+# ==========================================
+
+def registrar_plantillas(palabra="neo", veces=GRABACIONES_PLANTILLA, carpeta=CARPETA_PLANTILLAS_VOZ):
+    """Graba al usuario diciendo la palabra varias veces (plantillas para DetectorPlantillas)"""
+    global _escucha
+    os.makedirs(carpeta, exist_ok=True)
+    print(f"\nDi '{palabra.upper()}' {veces} veces, una por grabación.\n")
+
+    guardadas = 0
+    for numero in range(1, veces + 1):
+        input(f"[{numero}/{veces}] Presiona Enter y di '{palabra}'...")
+        muestras = neo_vad.grabar_frase(timeout=5)
+        if muestras is None or neo_audio.duracion(muestras) > 2.0:
+            print("⚠️ No se oyó bien (o fue muy largo), se omite")
+            continue
+        archivo = os.path.join(carpeta, f"{palabra}_{time.strftime('%Y%m%d_%H%M%S')}_{numero}.wav")
+        neo_audio.guardar_wav(muestras, archivo)
+        guardadas += 1
+        print(f"✓ Guardada ({neo_audio.duracion(muestras):.1f}s)")
+
+    with _lock_escucha:
+        _escucha = None
+    print(f"\n✓ {guardadas} plantillas en {carpeta}/")
+    return guardadas
+
+
+def probar_activacion():
+    """Escucha hasta detectar la palabra e imprime CPU y detecciones"""
+    escucha = obtener_escucha()
+    if escucha is None:
+        print("❌ No hay detector: graba plantillas primero")
+        return
+
+    print(f"\n🎧 Escuchando ({escucha.detector.nombre}, sensibilidad {escucha.sensibilidad}). Ctrl+C para salir\n")
+    try:
+        while True:
+            if escucha.esperar() is not None:
+                stats = escucha.estadisticas()
+                print(f"✓ ¡Activación! (CPU {stats['cpu_porcentaje']:.1f}%, "
+                      f"{stats['activaciones']} en {stats['segundos_audio']:.0f}s)")
+    except KeyboardInterrupt:
+        print("\n👋 Fin de la prueba")
+
+
+if __name__ == "__main__":
+    print("1. Registrar la palabra de activación")
+    print("2. Probar la detección")
+    opcion = input("\nOpción: ").strip()
+
+    if opcion == "1":
+        registrar_plantillas()
+    elif opcion == "2":
+        probar_activacion()
+    neo_audio.detener_captura()
@@ -0,0 +1,486 @@
+# neo_audio.py - Captura de micrófono persistente
+"""
+Servicio de audio compartido por todo NEO.
+
+El micrófono se abre UNA sola vez, en modo callback (no bloqueante), y
+cada bloque que llega se copia a un buffer circular de muestras int16
+con los últimos segundos de audio. Los consumidores (detector de voz,
+palabra de activación, grabadora de frases) leen de ese buffer con su
+propio cursor y reciben vistas NumPy, sin copias.
+
+- Ya no se inicializa el dispositivo en cada frase (ahorra latencia)
+- Lo que se dijo justo antes de empezar a grabar sigue en el buffer
+  (pre-roll), así que no se pierde el principio de la frase
+- Con una FuenteWAV se puede probar todo sin micrófono
+
+Cortar frases (dónde empieza y termina la voz) es trabajo de neo_vad.
+
+Ejemplo:
+    captura = neo_audio.obtener_captura()
+    muestras = neo_vad.grabar_frase(timeout=10)   # np.int16
+    modelo.transcribe(neo_audio.a_float32(muestras), language="es")
+
+Para pruebas sin micrófono:
+    NEO_AUDIO_WAV=prueba.wav python neo_voz.py
+"""
+
+import os
+import threading
+import time
+import wave
+
+import numpy as np
+
+try:
+    import pyaudio
+    PYAUDIO_DISPONIBLE = True
+except ImportError:
+    PYAUDIO_DISPONIBLE = False
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+
+RATE = 16000               # 16 kHz mono (lo que espera Whisper)
+CHANNELS = 1
+CHUNK = 1024               # Muestras por bloque (64 ms)
+SEGUNDOS_BUFFER = 30       # Audio guardado en el buffer circular
+SILENCIO_FINAL_WAV = 2.0   # Silencio añadido tras un WAV de prueba (cierra la última frase)
+
+# Si está definida, se usa este WAV en lugar del micrófono (pruebas sin hardware)
+ARCHIVO_AUDIO_PRUEBA = os.environ.get("NEO_AUDIO_WAV")
+
+# Las frases van a Whisper en memoria; solo se escriben WAV para depurar
+GUARDAR_AUDIO_DEPURACION = os.environ.get("NEO_AUDIO_DEBUG") == "1"
+CARPETA_DEPURACION = "audio_depuracion"
+
+
+# ==========================================
+# BUFFER CIRCULAR DE MUESTRAS
+# ==========================================
+
+class BufferAudio:
+    """
+    Buffer circular de muestras int16: un escritor y varios lectores.
+
+    El escritor copia las muestras y DESPUÉS avanza `escritas` (contador
+    absoluto que nunca vuelve atrás); los lectores solo leen ese contador,
+    así que la ruta de datos no usa locks. La capacidad es múltiplo del
+    bloque, de modo que un bloque alineado nunca queda partido y se puede
+    devolver como vista.
+
+    Args:
+        segundos (float): Audio que se conserva
+        rate (int): Muestras por segundo
+        bloque (int): Tamaño de bloque del escritor
+    """
+
+    def __init__(self, segundos=SEGUNDOS_BUFFER, rate=RATE, bloque=CHUNK):
+        self.rate = rate
+        self.bloque = bloque
+        self.capacidad = max(1, int(np.ceil(segundos * rate / bloque))) * bloque
+        self._muestras = np.zeros(self.capacidad, dtype=np.int16)
+        self.escritas = 0                     # Total de muestras escritas desde el inicio
+        self._avisos = threading.Condition()  # Solo para despertar a lectores que esperan
+
+    def escribir(self, muestras):
+        """Copia muestras al buffer (solo debe llamarlo un escritor)"""
+        muestras = np.asarray(muestras, dtype=np.int16)
+        if len(muestras) > self.capacidad:
+            muestras = muestras[-self.capacidad:]
+
+        cantidad = len(muestras)
+        inicio = self.escritas % self.capacidad
+        primera = min(cantidad, self.capacidad - inicio)
+        self._muestras[inicio:inicio + primera] = muestras[:primera]
+        self._muestras[:cantidad - primera] = muestras[primera:]
+
+        # Publicar después de copiar: un lector nunca ve datos a medias
+        self.escritas += cantidad
+
+        # El escritor no espera nunca: si un lector tiene el lock, ese
+        # lector ya va a revisar `escritas` al despertar por timeout
+        if self._avisos.acquire(blocking=False):
+            try:
+                self._avisos.notify_all()
+            finally:
+                self._avisos.release()
+
+    def esperar(self, posicion, timeout=None):
+        """Espera hasta que haya muestras más allá de `posicion` (True si las hay)"""
+        limite = None if timeout is None else time.time() + timeout
+        while self.escritas <= posicion:
+            restante = self.bloque / self.rate
+            if limite is not None:
+                restante = min(restante, limite - time.time())
+                if restante <= 0:
+                    return False
+            with self._avisos:
+                if self.escritas <= posicion:
+                    self._avisos.wait(restante)
+        return True
+
+    def disponible_desde(self):
+        """Posición absoluta más vieja que todavía está en el buffer"""
+        return max(0, self.escritas - self.capacidad)
+
+    def vista(self, desde, cantidad):
+        """
+        Vista (sin copia) de `cantidad` muestras desde la posición absoluta
+        `desde`. Si el tramo cruza el final del buffer se devuelve una copia.
+
+        Returns:
+            np.ndarray int16 o None si ya se sobrescribió o aún no llegó
+        """
+        if desde < self.disponible_desde() or desde + cantidad > self.escritas:
+            return None
+
+        inicio = desde % self.capacidad
+        if inicio + cantidad <= self.capacidad:
+            return self._muestras[inicio:inicio + cantidad]
+        return np.concatenate((self._muestras[inicio:], self._muestras[:inicio + cantidad - self.capacidad]))
+
+    def copiar(self, desde, hasta):
+        """Copia de las muestras [desde, hasta) (recortado a lo disponible)"""
+        desde = max(desde, self.disponible_desde())
+        hasta = min(hasta, self.escritas)
+        if hasta <= desde:
+            return np.zeros(0, dtype=np.int16)
+        return np.array(self.vista(desde, hasta - desde), dtype=np.int16)
+
+    def segundos_escritos(self):
+        return self.escritas / self.rate
+
+
+class LectorAudio:
+    """
+    Cursor de lectura sobre un BufferAudio. Cada consumidor tiene el suyo
+    y avanza a su ritmo; si se queda atrás más que la capacidad del
+    buffer, salta al audio más viejo disponible y lo cuenta en `perdidas`.
+
+    Args:
+        buffer (BufferAudio): Buffer compartido
+        retroceso (float): Empezar estos segundos antes del audio actual
+    """
+
+    def __init__(self, buffer, retroceso=0.0):
+        self.buffer = buffer
+        self.perdidas = 0
+        actual = buffer.escritas - buffer.escritas % buffer.bloque
+        self.posicion = max(buffer.disponible_desde(), actual - int(retroceso * buffer.rate))
+        self.posicion -= self.posicion % buffer.bloque
+
+    def pendientes(self):
+        """Muestras escritas que este lector todavía no leyó"""
+        return self.buffer.escritas - self.posicion
+
+    def siguiente(self, timeout=None):
+        """
+        Siguiente bloque de audio.
+
+        Returns:
+            tuple: (posición absoluta, vista int16 de `bloque` muestras) o
+                   None si no llegó audio antes del timeout
+        """
+        bloque = self.buffer.bloque
+        if not self.buffer.esperar(self.posicion + bloque - 1, timeout):
+            return None
+
+        viejo = self.buffer.disponible_desde()
+        if self.posicion < viejo:
+            self.perdidas += viejo - self.posicion
+            self.posicion = viejo + (-viejo % bloque)
+
+        posicion = self.posicion
+        datos = self.buffer.vista(posicion, bloque)
+        if datos is None:
+            return None
+        self.posicion += bloque
+        return posicion, datos
+
+    def saltar_al_final(self):
+        """Descarta lo pendiente (ej: después de hablar NEO)"""
+        self.posicion = self.buffer.escritas - self.buffer.escritas % self.buffer.bloque
+
+
+# ==========================================
+# FUENTES DE AUDIO
+# ==========================================
+
+class FuenteMicrofono:
+    """
+    Micrófono abierto una sola vez en modo callback: PortAudio llama a
+    `_callback` con cada bloque y este solo lo copia al buffer.
+
+    Args:
+        buffer (BufferAudio): Destino de las muestras
+        dispositivo (int): Índice del dispositivo de entrada (None = por defecto)
+    """
+
+    def __init__(self, buffer, dispositivo=None):
+        self.buffer = buffer
+        self.dispositivo = dispositivo
+        self.desbordes = 0
+        self._audio = None
+        self._stream = None
+
+    def iniciar(self):
+        if not PYAUDIO_DISPONIBLE:
+            raise RuntimeError("PyAudio no está instalado (pip install pyaudio)")
+        if self._stream is not None:
+            return self
+
+        self._audio = pyaudio.PyAudio()
+        try:
+            self._stream = self._audio.open(
+                format=pyaudio.paInt16,
+                channels=CHANNELS,
+                rate=self.buffer.rate,
+                input=True,
+                frames_per_buffer=self.buffer.bloque,
+                input_device_index=self.dispositivo,
+                stream_callback=self._callback
+            )
+            self._stream.start_stream()
+        except Exception:
+            self._audio.terminate()
+            self._audio = None
+            self._stream = None
+            raise
+        return self
+
+    def _callback(self, datos, cantidad, info, estado):
+        if estado:
+            self.desbordes += 1
+        self.buffer.escribir(np.frombuffer(datos, dtype=np.int16))
+        return (None, pyaudio.paContinue)
+
+    def detener(self):
+        if self._stream is not None:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+        if self._audio is not None:
+            self._audio.terminate()
+            self._audio = None
+
+    def activa(self):
+        return self._stream is not None and self._stream.is_active()
+
+
+class FuenteWAV:
+    """
+    Reproduce un archivo WAV dentro del buffer como si fuera el micrófono
+    (para pruebas sin hardware). Convierte a mono y al rate del buffer.
+
+    Args:
+        buffer (BufferAudio): Destino de las muestras
+        archivo (str): Ruta del WAV (16 bits)
+        velocidad (float): 1.0 = tiempo real, 0 = lo más rápido posible
+        repetir (bool): Volver a empezar al terminar
+        silencio_final (float): Segundos de silencio tras el archivo (cierra frases)
+    """
+
+    def __init__(self, buffer, archivo, velocidad=1.0, repetir=False, silencio_final=SILENCIO_FINAL_WAV):
+        self.buffer = buffer
+        self.archivo = archivo
+        self.velocidad = velocidad
+        self.repetir = repetir
+        self.silencio_final = silencio_final
+        self.terminado = threading.Event()
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def _cargar(self):
+        muestras = cargar_wav(self.archivo, self.buffer.rate)
+        silencio = np.zeros(int(self.silencio_final * self.buffer.rate), dtype=np.int16)
+        return np.concatenate((muestras, silencio))
+
+    def iniciar(self):
+        if self._hilo and self._hilo.is_alive():
+            return self
+        muestras = self._cargar()
+        self._detener.clear()
+        self.terminado.clear()
+        self._hilo = threading.Thread(target=self._ciclo, args=(muestras,), name="NEO-audio-wav", daemon=True)
+        self._hilo.start()
+        return self
+
+    def _ciclo(self, muestras):
+        bloque = self.buffer.bloque
+        duracion = bloque / self.buffer.rate
+        siguiente = time.time()
+
+        while not self._detener.is_set():
+            for inicio in range(0, len(muestras), bloque):
+                if self._detener.is_set():
+                    break
+                datos = muestras[inicio:inicio + bloque]
+                if len(datos) < bloque:
+                    datos = np.concatenate((datos, np.zeros(bloque - len(datos), dtype=np.int16)))
+                self.buffer.escribir(datos)
+
+                if self.velocidad > 0:
+                    siguiente += duracion / self.velocidad
+                    self._detener.wait(max(0.0, siguiente - time.time()))
+            if not self.repetir:
+                break
+
+        self.terminado.set()
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(timeout=2)
+            self._hilo = None
+
+    def activa(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+
+# ==========================================
+# SERVICIO DE CAPTURA
+# ==========================================
+
+class CapturaAudio:
+    """
+    Buffer + fuente (micrófono o WAV) listos para que varios
+    consumidores lean a la vez.
+
+    Args:
+        archivo (str): WAV a usar en lugar del micrófono (None = micrófono)
+        segundos (float): Capacidad del buffer
+        velocidad (float): Solo para WAV (ver FuenteWAV)
+        dispositivo (int): Solo para micrófono
+    """
+
+    def __init__(self, archivo=None, segundos=SEGUNDOS_BUFFER, velocidad=1.0, dispositivo=None):
+        self.buffer = BufferAudio(segundos, RATE, CHUNK)
+        if archivo:
+            self.fuente = FuenteWAV(self.buffer, archivo, velocidad=velocidad)
+        else:
+            self.fuente = FuenteMicrofono(self.buffer, dispositivo)
+        self.inicio = None
+
+    def iniciar(self):
+        self.fuente.iniciar()
+        self.inicio = self.inicio or time.time()
+        return self
+
+    def detener(self):
+        self.fuente.detener()
+
+    def activa(self):
+        return self.fuente.activa()
+
+    def lector(self, retroceso=0.0):
+        """Nuevo cursor de lectura (ver LectorAudio)"""
+        return LectorAudio(self.buffer, retroceso)
+
+    def ultimos(self, segundos):
+        """Copia de los últimos `segundos` de audio"""
+        fin = self.buffer.escritas
+        return self.buffer.copiar(fin - int(segundos * RATE), fin)
+
+    def estadisticas(self):
+        return {
+            'fuente': type(self.fuente).__name__,
+            'segundos_capturados': self.buffer.segundos_escritos(),
+            'capacidad_segundos': self.buffer.capacidad / RATE,
+            'bytes_reservados': self.buffer._muestras.nbytes,
+            'desbordes': getattr(self.fuente, 'desbordes', 0),
+        }
+
+
+_captura = None
+_lock_captura = threading.Lock()
+
+
+def obtener_captura(archivo=None):
+    """
+    Servicio de captura compartido (se abre la primera vez que se pide).
+
+    Args:
+        archivo (str): WAV a usar en lugar del micrófono. Por defecto se
+                       usa la variable de entorno NEO_AUDIO_WAV si existe.
+    """
+    global _captura
+    with _lock_captura:
+        if _captura is None:
+            _captura = CapturaAudio(archivo or ARCHIVO_AUDIO_PRUEBA).iniciar()
+        return _captura
+
+
+def detener_captura():
+    global _captura
+    with _lock_captura:
+        if _captura is not None:
+            _captura.detener()
+            _captura = None
+
+
+# ==========================================
+# CONVERSIONES Y ARCHIVOS
+# ==========================================
+
+def cargar_wav(archivo, rate=RATE):
+    """
+    Lee un WAV de 16 bits como int16 mono a `rate` (mezcla canales y
+    remuestrea con interpolación lineal si hace falta).
+    """
+    with wave.open(archivo, 'rb') as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{archivo}: solo se admiten WAV de 16 bits")
+        canales = wf.getnchannels()
+        rate_archivo = wf.getframerate()
+        muestras = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+
+    if canales > 1:
+        muestras = muestras.reshape(-1, canales).mean(axis=1)
+    if rate_archivo != rate:
+        destino = np.arange(0, len(muestras) * rate / rate_archivo) * rate_archivo / rate
+        muestras = np.interp(destino, np.arange(len(muestras)), muestras)
+    return np.asarray(muestras).astype(np.int16)
+
+
+def a_float32(muestras):
+    """
+    int16 → float32 en [-1, 1], el formato que Whisper usa por dentro.
+    Pasar este array a transcribe() evita escribir un WAV y que Whisper
+    lo vuelva a decodificar con un proceso de ffmpeg.
+    """
+    audio = np.asarray(muestras, dtype=np.float32)
+    audio *= 1.0 / 32768.0
+    return audio
+
+
+def guardar_depuracion(muestras, nombre="frase"):
+    """
+    Guarda la frase en CARPETA_DEPURACION solo si GUARDAR_AUDIO_DEPURACION
+    está activo (NEO_AUDIO_DEBUG=1).
+
+    Returns:
+        str: Ruta del WAV, o None si la depuración está apagada
+    """
+    if not GUARDAR_AUDIO_DEPURACION:
+        return None
+    os.makedirs(CARPETA_DEPURACION, exist_ok=True)
+    archivo = os.path.join(CARPETA_DEPURACION, f"{nombre}_{time.strftime('%Y%m%d_%H%M%S')}.wav")
+    return guardar_wav(muestras, archivo)
+
+
+def guardar_wav(muestras, archivo, rate=RATE):
+    """Guarda muestras int16 mono en un WAV"""
+    with wave.open(archivo, 'wb') as wf:
+        wf.setnchannels(CHANNELS)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(np.asarray(muestras, dtype=np.int16).tobytes())
+    return archivo
+
+
+def duracion(muestras, rate=RATE):
+    return len(muestras) / rate
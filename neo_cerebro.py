@@ -2,8 +2,11 @@
 import subprocess
 import json
 import re
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
-from neo_memoria import obtener_contexto, generar_resumen_contexto, hay_contexto_previo
+from neo_memoria import obtener_contexto, generar_resumen_contexto, hay_contexto_previo, normalizar_comando
 
 # Importar sistema de visión
 try:
@@ -20,6 +23,13 @@ print("=" * 60)
 
 MODELO_CEREBRO = "llama3.2:3b"
 
+# Cache de planes generados por Llama (comando normalizado → plan)
+CACHE_PLANES_MAX = 32            # Máximo de planes guardados
+CACHE_PLANES_TTL = 600           # Segundos que un plan sigue siendo válido
+
+_cache_planes = OrderedDict()    # {comando normalizado: {'plan', 'creado', 'precalculado', 'servido'}}
+_cache_planes_lock = threading.Lock()
+
 FUNCIONES_DISPONIBLES = """
 FUNCIONES QUE PUEDES EJECUTAR:
 
@@ -55,6 +65,9 @@ ESCRITURA:
 - seleccionar_todo()
 - presionar_enter()
 
+INTERFAZ:
+- clic_en('elemento')  (botón o texto visible en pantalla, ej: clic_en('Guardar'))
+
 ARCHIVOS:
 - abrir_carpeta('nombre')
 - crear_nota_rapida('texto')
@@ -143,6 +156,37 @@ def detectar_comando_especial(comando):
     
     return None
 
+# Comandos que se pueden ejecutar con una transcripción parcial (mientras
+# el usuario todavía habla): frases cerradas, que no cambian de sentido
+# aunque después se añada algo. Lo demás espera a la frase completa.
+PROGRAMAS_PARCIAL = ['chrome', 'google chrome', 'notepad', 'bloc de notas', 'calculadora',
+                     'explorador', 'explorador de archivos', 'spotify', 'word', 'excel', 'discord']
+
+COMANDOS_PARCIAL = [
+    r"(?P<comando>(que|qué) hora es)",
+    r"(?P<comando>abre) (el |la )?(?P<programa>" + '|'.join(PROGRAMAS_PARCIAL) + r")( por favor)?",
+]
+
+def plan_parcial(texto):
+    """
+    Plan del camino rápido para una transcripción parcial estable.
+    
+    Args:
+        texto (str): Parte estable de la hipótesis (ver neo_stt.TranscripcionIncremental)
+    
+    Returns:
+        dict: Plan si el comando ya está completo ("abre chrome"), o None
+              si hay que esperar a que termine la frase
+    """
+    comando = normalizar_comando(texto)
+    for patron in COMANDOS_PARCIAL:
+        encontrado = re.fullmatch(patron, comando)
+        if encontrado:
+            # Sin artículos ni "por favor": "abre el chrome" → "abre chrome"
+            programa = encontrado.groupdict().get('programa')
+            return detectar_comando_especial(' '.join(filter(None, [encontrado.group('comando'), programa])))
+    return None
+
 def validar_plan(plan):
     if not isinstance(plan, dict):
         print(" El plan no es un diccionario")
@@ -167,7 +211,7 @@ def validar_plan(plan):
         'maximizar_ventana', 'minimizar_ventana',
         'ventana_izquierda', 'ventana_derecha',
         'escribir_texto', 'copiar', 'pegar', 'guardar', 'deshacer',
-        'seleccionar_todo', 'presionar_enter',
+        'seleccionar_todo', 'presionar_enter', 'clic_en',
         'abrir_carpeta', 'crear_nota_rapida',
         'volumen_subir', 'volumen_bajar', 'volumen_silenciar',
         'tomar_captura', 'esperar'
@@ -296,7 +340,82 @@ def detectar_referencia_contextual(comando):
     # Si no se pudo reformular específicamente
     return False, comando
 
-def procesar_comando(comando_voz, contexto_pantalla=""):
+def obtener_plan_cacheado(comando):
+    """
+    Busca un plan ya generado para este comando.
+    
+    Args:
+        comando (str): Comando del usuario
+    
+    Returns:
+        dict: Entrada del cache {'plan', 'creado', 'precalculado'} o None
+    """
+    clave = normalizar_comando(comando)
+    
+    with _cache_planes_lock:
+        entrada = _cache_planes.get(clave)
+        if entrada is None:
+            return None
+        
+        if time.time() - entrada['creado'] > CACHE_PLANES_TTL:
+            del _cache_planes[clave]
+            return None
+        
+        _cache_planes.move_to_end(clave)
+        return entrada
+
+def guardar_plan_cacheado(comando, plan, precalculado=False):
+    """Guarda un plan válido en el cache (LRU con límite de tamaño)"""
+    clave = normalizar_comando(comando)
+    
+    with _cache_planes_lock:
+        _cache_planes[clave] = {
+            'plan': plan,
+            'creado': time.time(),
+            'precalculado': precalculado,
+            'servido': False
+        }
+        _cache_planes.move_to_end(clave)
+        
+        while len(_cache_planes) > CACHE_PLANES_MAX:
+            _cache_planes.popitem(last=False)
+
+def precalcular_plan(comando):
+    """
+    Genera el plan de un comando por adelantado y lo deja en el cache.
+    NO ejecuta nada, solo consulta a Llama (lo que además deja el
+    modelo cargado en memoria).
+    
+    Args:
+        comando (str): Comando que probablemente dirá el usuario
+    
+    Returns:
+        bool: True si el plan quedó en el cache (los comandos
+              contextuales se planifican pero no se guardan: False)
+    """
+    if detectar_comando_especial(comando):
+        return False  # Ya es instantáneo, no hace falta
+    
+    entrada = obtener_plan_cacheado(comando)
+    if entrada is None:
+        procesar_comando(comando, _precalculo=True)
+        entrada = obtener_plan_cacheado(comando)
+        if entrada is None:
+            return False
+    
+    # Desde ahora cuenta si la predicción se usa (ver precalculado_servido)
+    with _cache_planes_lock:
+        entrada['precalculado'] = True
+        entrada['servido'] = False
+    return True
+
+def precalculado_servido(comando):
+    """True si procesar_comando ya respondió con el plan precalculado de este comando"""
+    with _cache_planes_lock:
+        entrada = _cache_planes.get(normalizar_comando(comando))
+        return bool(entrada and entrada['precalculado'] and entrada['servido'])
+
+def procesar_comando(comando_voz, contexto_pantalla="", _precalculo=False):
     print(f"\nAnalizando comando: '{comando_voz}'")
 
     es_contextual, comando_reformulado = detectar_referencia_contextual(comando_voz)
@@ -317,6 +436,17 @@ def procesar_comando(comando_voz, contexto_pantalla=""):
         print("Comando especial detectado (respuesta rápida)")
         return plan_especial
     
+    # Plan ya generado (o precalculado) para este mismo comando
+    usar_cache = not contexto_pantalla and not es_contextual
+    if usar_cache:
+        entrada = obtener_plan_cacheado(comando_voz)
+        if entrada:
+            origen = "precalculado" if entrada['precalculado'] else "en cache"
+            print(f"Plan {origen} (respuesta rápida)")
+            with _cache_planes_lock:
+                entrada['servido'] = True
+            return entrada['plan']
+    
     print("Comando complejo, consultando a Llama...")
     
     prompt = f"""Eres NEO, un asistente de voz inteligente para Windows.
@@ -391,6 +521,9 @@ Responde SOLO con el JSON:"""
             print("\nPlan de acción generado:")
             print(f"  {explicacion}")
             print(f"{num_acciones} acción(es) a ejecutar")
+            
+            if usar_cache:
+                guardar_plan_cacheado(comando_voz, plan, precalculado=_precalculo)
             return plan
         else:
             print(" No se pudo generar un plan válido")
@@ -254,6 +254,26 @@ def tomar_captura():
     time.sleep(0.5)
     print("Herramienta lista (selecciona área)")
 
+def clic_en(elemento):
+    """Hace clic en un botón/texto visible buscándolo en pantalla (neo_localizador)"""
+    print(f"Buscando '{elemento}' en pantalla...")
+    try:
+        import neo_localizador
+    except ImportError:
+        print("neo_localizador.py no disponible")
+        return False
+
+    encontrado = neo_localizador.localizar(elemento)
+    if encontrado is None:
+        print(f"No encontré '{elemento}' en pantalla")
+        return False
+
+    pyautogui.click(encontrado['x'], encontrado['y'])
+    print(f"Clic en '{elemento}' ({encontrado['x']}, {encontrado['y']})")
+    actualizar_contexto('elemento', elemento)
+    actualizar_contexto('accion', 'clic_en')
+    return True
+
 def esperar(segundos):
     if segundos >= 1:
         print(f"Esperando {segundos}s...")
@@ -43,17 +43,41 @@ except ImportError:
     print("⚠️ neo_memoria.py no encontrado - Sin memoria")
     MEMORIA_DISPONIBLE = False
 
+try:
+    import neo_prediccion
+    PREDICCION_DISPONIBLE = True
+except ImportError:
+    print("⚠️ neo_prediccion.py no encontrado - Sin precarga de comandos")
+    PREDICCION_DISPONIBLE = False
+
+try:
+    import neo_vigilante
+    VIGILANTE_DISPONIBLE = True
+except ImportError:
+    print("⚠️ neo_vigilante.py no disponible - Sin contexto de pantalla")
+    VIGILANTE_DISPONIBLE = False
+
 # Para modo voz
 try:
-    import whisper
-    import pyaudio
-    import wave
-    import numpy as np
-    VOZ_DISPONIBLE = True
+    import neo_audio
+    import neo_vad
+    import neo_activacion
+    import neo_stt
+    import neo_tuberia
+    VOZ_DISPONIBLE = neo_audio.PYAUDIO_DISPONIBLE or bool(neo_audio.ARCHIVO_AUDIO_PRUEBA)
+    if not neo_stt.stt_disponible():
+        print("⚠️ Sin motor de transcripción (faster-whisper / whisper) - Solo modo texto")
+        VOZ_DISPONIBLE = False
 except ImportError:
     print("⚠️ Módulos de voz no disponibles - Solo modo texto")
     VOZ_DISPONIBLE = False
 
+# Vigilar la pantalla en segundo plano para tener el contexto listo
+# (desactivado por defecto: captura cada pocos segundos y gasta Llava;
+# sin él, los comandos se planifican sin contexto de pantalla)
+USAR_VIGILANTE_PANTALLA = False
+MAX_ANTIGUEDAD_CONTEXTO = 20   # Segundos; más viejo = se vuelve a mirar
+
 # Configurar tema
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
@@ -67,24 +91,13 @@ print("=" * 60)
 # ==========================================
 
 if VOZ_DISPONIBLE:
-    CHUNK = 1024
-    FORMAT = pyaudio.paInt16
-    CHANNELS = 1
-    RATE = 16000
-    SILENCE_THRESHOLD = 400
-    SILENCE_DURATION = 2.5
-    TEMP_AUDIO = "temp_neo_gui_audio.wav"
+    TIMEOUT_ESCUCHA = 30          # Segundos máximos por frase (vuelve a escuchar después)
+    TIMEOUT_COMANDO = 8           # Segundos para empezar a hablar tras decir "NEO"
     
     PALABRAS_ACTIVACION = ['neo', 'neó', 'nio']
     
-    # Cargar Whisper
-    print("\n[*] Cargando Whisper...")
-    try:
-        modelo_whisper = whisper.load_model("base")
-        print("✓ Whisper cargado")
-    except:
-        VOZ_DISPONIBLE = False
-        print("❌ Error al cargar Whisper")
+    # Whisper no se carga aquí: se precarga en segundo plano al activar el
+    # modo voz y se libera tras un rato sin usarse fuera de él (neo_stt)
 
 # Inicializar TTS
 if TTS_DISPONIBLE:
@@ -120,6 +133,7 @@ class NEOAppIntegrado(ctk.CTk):
         
         # Threads
         self.voz_thread = None
+        self.tuberia_voz = None          # neo_tuberia.TuberiaVoz mientras el modo voz está activo
         
         # Crear interfaz
         self.create_widgets()
@@ -133,6 +147,10 @@ class NEOAppIntegrado(ctk.CTk):
         # Reportar módulos disponibles
         self.reportar_modulos()
         
+        # Contexto de pantalla siempre listo
+        if VIGILANTE_DISPONIBLE and USAR_VIGILANTE_PANTALLA:
+            neo_vigilante.iniciar_vigilante()
+        
         # Saludo inicial
         if TTS_DISPONIBLE:
             self.after(1000, lambda: neo_habla("Hola, soy Neo. Interfaz gráfica lista"))
@@ -152,7 +170,9 @@ class NEOAppIntegrado(ctk.CTk):
             "Reconocimiento de Voz": VOZ_DISPONIBLE,
             "Sistema TTS": TTS_DISPONIBLE,
             "Cerebro IA": CEREBRO_DISPONIBLE,
-            "Memoria": MEMORIA_DISPONIBLE
+            "Memoria": MEMORIA_DISPONIBLE,
+            "Predicción": PREDICCION_DISPONIBLE,
+            "Contexto de pantalla": VIGILANTE_DISPONIBLE and USAR_VIGILANTE_PANTALLA
         }
         
         for nombre, disponible in modulos.items():
@@ -414,6 +434,10 @@ class NEOAppIntegrado(ctk.CTk):
         
         self.input_frame.grid_remove()
         
+        # Cargar Whisper sin bloquear la interfaz (y no liberarlo mientras dure el modo voz)
+        neo_stt.mantener_cargado()
+        neo_stt.precargar()
+        
         # Iniciar thread
         self.voz_thread = threading.Thread(target=self.run_modo_voz, daemon=True)
         self.voz_thread.start()
@@ -431,6 +455,10 @@ class NEOAppIntegrado(ctk.CTk):
         
         self.status_label.configure(text="⚫ Inactivo")
         self.add_log("Sistema", "Modo VOZ desactivado", "info")
+        
+        # Sin modo voz, Whisper se libera si pasa un rato sin usarse
+        if VOZ_DISPONIBLE:
+            neo_stt.descargar_si_inactivo()
     
     def toggle_modo_texto(self):
         """Toggle modo texto"""
@@ -498,105 +526,167 @@ class NEOAppIntegrado(ctk.CTk):
     # ==========================================
     
     def run_modo_voz(self):
-        """Thread de modo voz - INTEGRACIÓN REAL"""
-        self.add_log("Sistema", "Iniciando reconocimiento de voz", "info")
+        """
+        Thread de modo voz - INTEGRACIÓN REAL
         
-        while self.neo_running and self.modo_activo == "voz":
-            try:
-                # Escuchar audio
-                self.add_log("Sistema", "🎤 Escuchando...", "info")
-                archivo = self.escuchar_audio()
-                
-                if not archivo:
-                    continue
-                
-                # Transcribir
-                texto = self.transcribir_audio(archivo)
-                
-                if not texto:
-                    continue
-                
-                self.add_log("Whisper", f"'{texto}'", "info")
-                
-                # Detectar activación
-                activado, comando = self.detectar_activacion(texto)
-                
-                if activado and comando:
-                    self.add_log("Usuario", comando, "command")
-                    self.procesar_comando(comando)
-                
-                # Limpiar
-                if os.path.exists(archivo):
-                    os.remove(archivo)
-                    
-            except Exception as e:
-                self.add_log("Error", str(e), "error")
-                time.sleep(1)
-    
-    def escuchar_audio(self):
-        """Escucha audio del micrófono"""
-        audio = pyaudio.PyAudio()
+        Captura, transcripción y procesamiento corren en hilos separados
+        (neo_tuberia): mientras Llama planifica un comando, el micrófono
+        sigue escuchando el siguiente.
+        """
+        self.add_log("Sistema", "Iniciando reconocimiento de voz", "info")
         
+        # El micrófono se abre una vez y queda abierto hasta cerrar la app
         try:
-            stream = audio.open(
-                format=FORMAT,
-                channels=CHANNELS,
-                rate=RATE,
-                input=True,
-                frames_per_buffer=CHUNK
-            )
-            
-            frames = []
-            silent_chunks = 0
-            max_silent_chunks = int(SILENCE_DURATION * RATE / CHUNK)
-            recording = False
-            
-            while True:
-                data = stream.read(CHUNK, exception_on_overflow=False)
-                audio_data = np.frombuffer(data, dtype=np.int16)
-                volume = np.abs(audio_data).mean()
-                
-                if volume > SILENCE_THRESHOLD:
-                    if not recording:
-                        recording = True
-                    silent_chunks = 0
-                    frames.append(data)
-                else:
-                    if recording:
-                        silent_chunks += 1
-                        frames.append(data)
-                        
-                        if silent_chunks > max_silent_chunks:
-                            break
-            
-            stream.stop_stream()
-            stream.close()
-            audio.terminate()
-            
-            if len(frames) == 0:
-                return None
-            
-            # Guardar
-            wf = wave.open(TEMP_AUDIO, 'wb')
-            wf.setnchannels(CHANNELS)
-            wf.setsampwidth(audio.get_sample_size(FORMAT))
-            wf.setframerate(RATE)
-            wf.writeframes(b''.join(frames))
-            wf.close()
-            
-            return TEMP_AUDIO
-            
+            captura = neo_audio.obtener_captura()
         except Exception as e:
-            audio.terminate()
+            self.add_log("Error", f"No se pudo abrir el micrófono: {e}", "error")
+            return
+        
+        # Detector de "NEO" sobre el audio: Whisper solo corre tras la activación
+        escucha = neo_activacion.obtener_escucha()
+        if escucha:
+            escucha.reiniciar()   # No procesar lo que se dijo con el modo voz apagado
+            self.add_log("Sistema", f"Palabra de activación: {escucha.detector.nombre}", "info")
+        
+        # Cursor propio: lo que se dice mientras NEO trabaja sigue en el buffer
+        lector = escucha.lector if escucha else captura.lector()
+        
+        def sigue_en_voz():
+            return self.neo_running and self.modo_activo == "voz"
+        
+        def capturar(detener):
+            if escucha:
+                # Esperar "NEO" sin gastar Whisper
+                if escucha.esperar(timeout=1.0, detener=lambda: detener() or not sigue_en_voz()) is None:
+                    return None
+                self.add_log("Sistema", "🎤 ¡Te escucho!", "info")
+                return self.escuchar_frase(tuberia, lector, TIMEOUT_COMANDO, True)
+            
+            self.add_log("Sistema", "🎤 Escuchando...", "info")
+            return self.escuchar_frase(tuberia, lector, TIMEOUT_ESCUCHA, False)
+        
+        tuberia = neo_tuberia.TuberiaVoz(
+            capturar, self.transcribir_frase, self.procesar_comando,
+            al_evento=lambda tipo, mensaje: self.add_log("Voz", mensaje, "warning"),
+            al_descartar_frase=lambda frase: frase['incremental'].cancelar()
+        )
+        self.tuberia_voz = tuberia.iniciar()
+        
+        motor = neo_stt.obtener_motor()
+        carga_avisada = False
+        while sigue_en_voz():
+            if not carga_avisada and motor.cargado():
+                self.add_log("Sistema", f"Whisper listo ({motor.nombre}, {motor.modelo}): "
+                                        f"{motor.segundos_carga:.1f}s de carga", "info")
+                carga_avisada = True
+            time.sleep(0.5)
+        
+        tuberia.detener()
+        self.add_log("Métricas", tuberia.resumen(), "info")
+    
+    def escuchar_frase(self, tuberia, lector, timeout, con_detector=False):
+        """
+        Etapa de captura: graba una frase del micrófono compartido y la va
+        transcribiendo mientras se habla (neo_stt). Si una hipótesis
+        parcial estable ya es un comando rápido completo ("abre chrome") y
+        el VAD lleva al menos HANGOVER_MIN de silencio tras ella, se encola
+        sin esperar a que termine la frase.
+        
+        Sin detector de activación no hay parciales: cualquier voz de fondo
+        abre una frase y Whisper correría cada medio segundo sobre ella.
+        
+        Returns:
+            dict: {'muestras', 'incremental', 'adelantado', 'con_detector'} o None
+        """
+        adelantado = []
+        
+        def al_parcial(parcial):
+            if adelantado or not parcial['cerrado'] or not CEREBRO_DISPONIBLE:
+                return
+            # Una pausa corta entre palabras no es el final del comando
+            if parcial['silencio'] < neo_vad.HANGOVER_MIN:
+                return
+            activado, comando = self.extraer_comando(parcial['estable'], con_detector)
+            if activado and comando and neo_cerebro.plan_parcial(comando):
+                adelantado.append(comando)
+                self.add_log("Usuario", f"{comando} (parcial, {parcial['segundos_audio']:.1f}s)", "command")
+                tuberia.enviar_comando(comando, adelantado=True)
+        
+        muestras, incremental = neo_stt.grabar_transcribiendo(
+            timeout=timeout, lector=lector, idioma="es",
+            al_parcial=al_parcial if con_detector else None, parciales=con_detector
+        )
+        
+        if muestras is None:
             return None
+        
+        # WAV solo si NEO_AUDIO_DEBUG=1; Whisper recibe el array
+        neo_audio.guardar_depuracion(muestras, "neo_gui")
+        return {'muestras': muestras, 'incremental': incremental,
+                'adelantado': adelantado, 'con_detector': con_detector}
     
-    def transcribir_audio(self, archivo):
-        """Transcribe audio con Whisper"""
-        try:
-            result = modelo_whisper.transcribe(archivo, language="es")
-            return result['text'].strip()
-        except:
+    def transcribir_frase(self, frase):
+        """
+        Etapa de transcripción: texto final de la frase y comando que
+        contiene (None si no hay comando o ya se encoló con un parcial).
+        Si la frase siguió después del comando adelantado ("abre chrome
+        y busca gatos"), solo se encola lo que faltaba.
+        """
+        texto = frase['incremental'].finalizar()['texto']
+        if not texto:
+            return None
+        
+        self.add_log("Whisper", f"'{texto}'", "info")
+        
+        activado, comando = self.extraer_comando(texto, frase['con_detector'])
+        if not (activado and comando):
             return None
+        
+        # Ya se encoló con la transcripción parcial: quedarse con el resto
+        for adelantado in frase['adelantado']:
+            comando = self.quitar_adelantado(comando, adelantado)
+            if not comando:
+                return None
+        
+        self.add_log("Usuario", comando, "command")
+        return comando
+    
+    def quitar_adelantado(self, comando, adelantado):
+        """
+        Lo que queda de `comando` tras el comando ya encolado (se compara
+        palabra a palabra normalizada). "" si es el mismo comando; el
+        comando entero si no empieza por él.
+        """
+        palabras = [(p, neo_stt.normalizar_texto(p)) for p in comando.split()]
+        palabras = [(p, n) for p, n in palabras if n]
+        previas = neo_stt.normalizar_texto(adelantado)
+        
+        normalizadas = [palabra for _, n in palabras for palabra in n]
+        if normalizadas[:len(previas)] != previas:
+            return comando
+        
+        # Saltar las palabras originales que cubren el comando adelantado
+        cubiertas, i = 0, 0
+        while i < len(palabras) and cubiertas < len(previas):
+            cubiertas += len(palabras[i][1])
+            i += 1
+        resto = [p for p, _ in palabras[i:]]
+        
+        # "abre chrome | y busca gatos" → "busca gatos"
+        while resto and neo_stt.normalizar_texto(resto[0]) in (['y'], ['e'], ['luego'], ['despues']):
+            resto.pop(0)
+        return ' '.join(resto)
+    
+    def extraer_comando(self, texto, con_detector=False):
+        """
+        Comando dentro del texto transcrito. Con detector de audio todo es
+        comando (se quita "neo" por si Whisper también lo transcribió); sin
+        él, el texto tiene que incluir la palabra de activación.
+        """
+        activado, comando = self.detectar_activacion(texto)
+        if con_detector:
+            return True, (comando if activado else texto)
+        return activado, comando
     
     def detectar_activacion(self, texto):
         """Detecta palabra de activación"""
@@ -609,14 +699,42 @@ class NEOAppIntegrado(ctk.CTk):
         
         return False, texto
     
-    def procesar_comando(self, comando):
-        """Procesa comando - INTEGRACIÓN REAL"""
+    def procesar_comando(self, comando, cancelado=None):
+        """
+        Procesa comando - INTEGRACIÓN REAL
+        
+        Args:
+            comando (str): Lo que pidió el usuario
+            cancelado (threading.Event): Si se activa mientras Llama
+                                         planifica, el plan no se ejecuta
+        """
         self.add_log("NEO", "Procesando...", "processing")
         
+        # Aprender el hábito (al guardarlo en memoria se marca como ya aprendido)
+        if PREDICCION_DISPONIBLE:
+            neo_prediccion.registrar_comando(comando)
+        
+        # Que el vigilante no gaste Llava mientras NEO actúa
+        if VIGILANTE_DISPONIBLE:
+            neo_vigilante.pausar()
+        
         try:
             # Usar cerebro real si está disponible
             if CEREBRO_DISPONIBLE:
-                plan = neo_cerebro.procesar_comando(comando)
+                # Solo con el vigilante en marcha: sin él, pedir el resumen
+                # bloquearía 5-10 s en Llava y desactivaría la caché de planes
+                contexto = ""
+                if VIGILANTE_DISPONIBLE and neo_vigilante.vigilante_activo() and \
+                        neo_vigilante.necesita_contexto_visual(comando):
+                    contexto = neo_vigilante.obtener_resumen(MAX_ANTIGUEDAD_CONTEXTO) or ""
+                    if contexto:
+                        self.add_log("Visión", contexto[:100], "info")
+                
+                plan = neo_cerebro.procesar_comando(comando, contexto)
+                
+                if cancelado is not None and cancelado.is_set():
+                    self.add_log("NEO", f"Cancelado: '{comando}'", "warning")
+                    return
                 
                 if plan:
                     explicacion = plan.get('explicacion', 'Ejecutando')
@@ -643,7 +761,15 @@ class NEOAppIntegrado(ctk.CTk):
                         
                         # Guardar en memoria
                         if MEMORIA_DISPONIBLE:
-                            neo_memoria.guardar_comando(comando, plan, exito)
+                            entrada = neo_memoria.guardar_comando(comando, plan, exito)
+                            if PREDICCION_DISPONIBLE:
+                                neo_prediccion.marcar_en_memoria(entrada['timestamp'])
+                        
+                        # Adelantar el siguiente comando probable
+                        if PREDICCION_DISPONIBLE:
+                            siguiente = neo_prediccion.precargar_siguiente()
+                            if siguiente:
+                                self.add_log("Predicción", f"Preparando '{siguiente}'", "info")
                     else:
                         self.add_log("Error", "Fallo en ejecución", "error")
                 else:
@@ -656,6 +782,9 @@ class NEOAppIntegrado(ctk.CTk):
                 
         except Exception as e:
             self.add_log("Error", str(e), "error")
+        finally:
+            if VIGILANTE_DISPONIBLE:
+                neo_vigilante.reanudar()
     
     # ==========================================
     # UTILIDADES
@@ -684,6 +813,10 @@ class NEOAppIntegrado(ctk.CTk):
         
         time.sleep(0.5)
         self.neo_running = False
+        if VIGILANTE_DISPONIBLE:
+            neo_vigilante.detener_vigilante()
+        if VOZ_DISPONIBLE:
+            neo_audio.detener_captura()
         self.destroy()
     
     def add_log(self, fuente, mensaje, tipo="info"):
@@ -0,0 +1,600 @@
+# neo_localizador.py - Localizador de elementos de interfaz para NEO
+"""
+Encuentra botones, iconos y textos en la pantalla para poder hacer
+clic en ellos (neo_control.clic_en), en lugar de depender de largas
+secuencias de teclado.
+
+Dos formas de encontrar un elemento:
+1. Plantillas: imágenes recortadas del elemento (carpeta plantillas_ui/),
+   buscadas a varias escalas (distintos DPI/zoom) con correlación
+   normalizada. Usa OpenCV si está instalado; si no, NumPy (FFT).
+2. Texto: si no hay plantilla o no aparece, busca el texto con el OCR
+   de neo_vision (ej: el botón "Guardar").
+
+Las posiciones encontradas se guardan por ventana (título + posición).
+La siguiente vez solo se comprueba un recorte pequeño de la pantalla
+en esa posición, así que repetir un clic es casi instantáneo.
+
+Plantillas:
+    plantillas_ui/guardar.png          → elemento "guardar"
+    plantillas_ui/guardar/*.png        → variantes (tema claro/oscuro...)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+import neo_vision
+
+try:
+    import cv2
+    OPENCV_DISPONIBLE = True
+except ImportError:
+    OPENCV_DISPONIBLE = False
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+
+CARPETA_PLANTILLAS = "plantillas_ui"
+ESCALAS_PLANTILLA = (0.75, 0.9, 1.0, 1.1, 1.25, 1.5)   # Tamaños probados de cada plantilla
+UMBRAL_COINCIDENCIA = 0.8        # Correlación mínima (0-1) para aceptar una plantilla
+REDUCCION_BUSQUEDA = 2           # Búsqueda gruesa a 1/2 de resolución, luego se afina
+LADO_MIN_REDUCIDO = 8            # Plantillas más chicas que esto no se reducen
+VARIANZA_MIN = 1.0               # Ventanas más lisas que esto (por píxel) se ignoran
+
+CACHE_POSICIONES_MAX = 128       # Elementos recordados
+CACHE_POSICIONES_TTL = 10 * 60   # Segundos que una posición sigue siendo válida
+UMBRAL_PARCHE = 10.0             # Diferencia media de brillo (0-255) tolerada al revalidar
+
+# Palabras que se ignoran al nombrar un elemento ("el botón Guardar" → "guardar")
+PALABRAS_RELLENO = {'el', 'la', 'los', 'las', 'un', 'una', 'boton', 'icono', 'opcion',
+                    'menu', 'enlace', 'pestana', 'en'}
+
+
+# ==========================================
+# UTILIDADES
+# ==========================================
+
+def a_gris(imagen):
+    """PIL.Image o frame BGRA/RGB de NumPy → gris float32 (alto, ancho)"""
+    if isinstance(imagen, Image.Image):
+        return np.asarray(imagen.convert('L'), dtype=np.float32)
+    if imagen.ndim == 2:
+        return imagen.astype(np.float32)
+    # Frames de SesionCaptura vienen en BGRA
+    return imagen[:, :, :3].astype(np.float32) @ np.array([0.114, 0.587, 0.299], dtype=np.float32)
+
+
+def _escalar(gris, factor):
+    """Redimensiona una imagen gris por un factor"""
+    alto, ancho = gris.shape
+    nuevo = (max(1, int(round(ancho * factor))), max(1, int(round(alto * factor))))
+    if nuevo == (ancho, alto):
+        return gris
+    if OPENCV_DISPONIBLE:
+        return cv2.resize(gris, nuevo, interpolation=cv2.INTER_AREA if factor < 1 else cv2.INTER_LINEAR)
+    imagen = Image.fromarray(gris, mode='F').resize(nuevo, Image.Resampling.BILINEAR)
+    return np.asarray(imagen, dtype=np.float32)
+
+
+def nombre_elemento(elemento):
+    """'el botón Guardar' → 'guardar' (nombre de archivo de la plantilla)"""
+    palabras = neo_vision._normalizar_texto(elemento).split()
+    utiles = [p for p in palabras if p not in PALABRAS_RELLENO] or palabras
+    return '_'.join(utiles)
+
+
+def _texto_elemento(elemento):
+    """'el botón Guardar como' → 'Guardar como' (texto a buscar con OCR)"""
+    palabras = elemento.split()
+    utiles = [p for p in palabras if neo_vision._normalizar_texto(p) not in PALABRAS_RELLENO]
+    return ' '.join(utiles or palabras)
+
+
+# ==========================================
+# CORRELACIÓN NORMALIZADA
+# ==========================================
+
+class _ImagenBusqueda:
+    """
+    Imagen gris preparada para buscar varias plantillas (o escalas):
+    la FFT y las sumas acumuladas se calculan una sola vez.
+    """
+
+    def __init__(self, gris):
+        self.gris = gris
+        self.alto, self.ancho = gris.shape
+        self._fft = None
+
+        # Sumas acumuladas (para la media/varianza de cada ventana).
+        # Centradas en la media para no perder precisión en la resta.
+        centrada = gris.astype(np.float64) - float(gris.mean())
+        self._suma = np.pad(centrada.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+        self._suma2 = np.pad((centrada ** 2).cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+
+    def _suma_ventanas(self, tabla, alto, ancho):
+        return (tabla[alto:, ancho:] - tabla[:-alto, ancho:]
+                - tabla[alto:, :-ancho] + tabla[:-alto, :-ancho])
+
+    def correlacion(self, plantilla):
+        """
+        Mapa de correlación normalizada (como TM_CCOEFF_NORMED de OpenCV).
+
+        Returns:
+            np.ndarray: (alto - h + 1, ancho - w + 1), valores en [-1, 1]
+        """
+        alto, ancho = plantilla.shape
+        if alto > self.alto or ancho > self.ancho:
+            return None
+
+        if OPENCV_DISPONIBLE:
+            return cv2.matchTemplate(self.gris, plantilla, cv2.TM_CCOEFF_NORMED)
+
+        centrada = plantilla - plantilla.mean()
+        norma = np.sqrt((centrada.astype(np.float64) ** 2).sum())
+        if norma < 1e-6:
+            return None
+
+        if self._fft is None:
+            self._fft = np.fft.rfft2(self.gris)
+        fft_plantilla = np.fft.rfft2(centrada, s=self.gris.shape)
+        numerador = np.fft.irfft2(self._fft * np.conj(fft_plantilla), s=self.gris.shape)
+        numerador = numerador[:self.alto - alto + 1, :self.ancho - ancho + 1]
+
+        n = alto * ancho
+        suma = self._suma_ventanas(self._suma, alto, ancho)
+        suma2 = self._suma_ventanas(self._suma2, alto, ancho)
+        varianza = np.maximum(suma2 - suma * suma / n, 0.0)
+
+        # Zonas lisas (fondo) no pueden contener la plantilla
+        mapa = np.zeros_like(numerador)
+        validos = varianza > n * VARIANZA_MIN
+        mapa[validos] = numerador[validos] / (np.sqrt(varianza[validos]) * norma)
+        return np.clip(mapa, -1.0, 1.0)
+
+
+def _mejor_posicion(mapa):
+    indice = int(np.argmax(mapa))
+    y, x = divmod(indice, mapa.shape[1])
+    return float(mapa[y, x]), x, y
+
+
+def buscar_plantilla(gris, plantilla, escalas=ESCALAS_PLANTILLA, umbral=UMBRAL_COINCIDENCIA):
+    """
+    Busca una plantilla en una imagen gris a varias escalas.
+
+    Primero busca a resolución reducida (rápido) y después afina la
+    posición a resolución completa alrededor del mejor candidato.
+
+    Args:
+        gris (np.ndarray): Imagen donde buscar (ver a_gris)
+        plantilla (np.ndarray): Plantilla en gris
+        escalas (tuple): Factores de tamaño de la plantilla a probar
+        umbral (float): Correlación mínima
+
+    Returns:
+        dict: {'caja': (izq, arriba, ancho, alto), 'confianza', 'escala'} o None
+    """
+    reduccion = REDUCCION_BUSQUEDA
+    if min(plantilla.shape) * min(escalas) / reduccion < LADO_MIN_REDUCIDO:
+        reduccion = 1
+
+    busqueda = _ImagenBusqueda(_escalar(gris, 1.0 / reduccion) if reduccion > 1 else gris)
+
+    mejor = None
+    for escala in escalas:
+        version = _escalar(plantilla, escala / reduccion)
+        mapa = busqueda.correlacion(version)
+        if mapa is None:
+            continue
+        valor, x, y = _mejor_posicion(mapa)
+        if mejor is None or valor > mejor[0]:
+            mejor = (valor, x, y, escala)
+
+    # En la búsqueda gruesa se tolera un poco menos (se pierde detalle)
+    if mejor is None or mejor[0] < umbral - 0.1 * (reduccion > 1):
+        return None
+
+    valor, x, y, escala = mejor
+    version = _escalar(plantilla, escala)
+    alto_p, ancho_p = version.shape
+
+    if reduccion > 1:
+        # Afinar en una ventana a resolución completa
+        margen = 2 * reduccion
+        izq = max(0, x * reduccion - margen)
+        arriba = max(0, y * reduccion - margen)
+        der = min(gris.shape[1], x * reduccion + ancho_p + margen)
+        abajo = min(gris.shape[0], y * reduccion + alto_p + margen)
+
+        mapa = _ImagenBusqueda(gris[arriba:abajo, izq:der]).correlacion(version)
+        if mapa is None:
+            return None
+        valor, x, y = _mejor_posicion(mapa)
+        x += izq
+        y += arriba
+
+    if valor < umbral:
+        return None
+
+    return {'caja': (x, y, ancho_p, alto_p), 'confianza': valor, 'escala': escala}
+
+
+# ==========================================
+# BIBLIOTECA DE PLANTILLAS
+# ==========================================
+
+class BibliotecaPlantillas:
+    """
+    Plantillas de elementos de interfaz, cargadas de la carpeta al
+    primer uso de cada elemento y guardadas en memoria en gris.
+    """
+
+    def __init__(self, carpeta=CARPETA_PLANTILLAS):
+        self.carpeta = carpeta
+        self._plantillas = {}   # nombre → [np.ndarray]
+        self._lock = threading.Lock()
+
+    def _archivos(self, nombre):
+        archivos = []
+        individual = os.path.join(self.carpeta, f"{nombre}.png")
+        if os.path.exists(individual):
+            archivos.append(individual)
+
+        subcarpeta = os.path.join(self.carpeta, nombre)
+        if os.path.isdir(subcarpeta):
+            archivos.extend(sorted(
+                os.path.join(subcarpeta, archivo)
+                for archivo in os.listdir(subcarpeta)
+                if archivo.lower().endswith('.png')
+            ))
+        return archivos
+
+    def obtener(self, elemento):
+        """Plantillas (en gris) del elemento; lista vacía si no hay"""
+        nombre = nombre_elemento(elemento)
+        with self._lock:
+            if nombre not in self._plantillas:
+                plantillas = []
+                for archivo in self._archivos(nombre):
+                    try:
+                        with Image.open(archivo) as imagen:
+                            plantillas.append(a_gris(imagen))
+                    except Exception as e:
+                        print(f"⚠️ Plantilla no válida {archivo}: {e}")
+                self._plantillas[nombre] = plantillas
+            return self._plantillas[nombre]
+
+    def agregar(self, elemento, imagen, guardar=False):
+        """
+        Agrega una plantilla (ej: un recorte de la pantalla actual).
+
+        Args:
+            elemento (str): Nombre del elemento
+            imagen (PIL.Image | np.ndarray): Recorte del elemento
+            guardar (bool): Guardarla también en la carpeta de plantillas
+        """
+        nombre = nombre_elemento(elemento)
+        gris = a_gris(imagen)
+
+        with self._lock:
+            self._plantillas.setdefault(nombre, []).append(gris)
+
+        if guardar:
+            subcarpeta = os.path.join(self.carpeta, nombre)
+            os.makedirs(subcarpeta, exist_ok=True)
+            archivo = os.path.join(subcarpeta, f"{int(time.time() * 1000)}.png")
+            Image.fromarray(np.clip(gris, 0, 255).astype(np.uint8)).save(archivo)
+
+    def nombres(self):
+        """Elementos con plantilla en la carpeta o en memoria"""
+        nombres = set(n for n, lista in self._plantillas.items() if lista)
+        if os.path.isdir(self.carpeta):
+            for archivo in os.listdir(self.carpeta):
+                ruta = os.path.join(self.carpeta, archivo)
+                if archivo.lower().endswith('.png'):
+                    nombres.add(archivo[:-4])
+                elif os.path.isdir(ruta):
+                    nombres.add(archivo)
+        return sorted(nombres)
+
+
+# ==========================================
+# LOCALIZADOR
+# ==========================================
+
+def localizar_en_frame(elemento, bgra, desplazamiento=(0, 0), biblioteca=None, firma=None):
+    """
+    Busca un elemento en un frame ya capturado (sin cache).
+
+    Args:
+        elemento (str): Nombre del elemento o texto visible
+        bgra (np.ndarray): Frame BGRA (o imagen gris)
+        desplazamiento (tuple): (left, top) del frame en la pantalla
+        biblioteca (BibliotecaPlantillas): None = la compartida
+        firma (dict): firma_frame(bgra), para el cache del OCR
+
+    Returns:
+        dict: {'x', 'y' (centro en pantalla), 'caja', 'confianza',
+               'origen': 'plantilla' | 'texto'} o None
+    """
+    biblioteca = biblioteca or obtener_biblioteca()
+    izq, arriba = desplazamiento
+
+    # 1. Plantillas
+    plantillas = biblioteca.obtener(elemento)
+    if plantillas:
+        gris = a_gris(bgra)
+        mejor = None
+        for plantilla in plantillas:
+            encontrado = buscar_plantilla(gris, plantilla)
+            if encontrado and (mejor is None or encontrado['confianza'] > mejor['confianza']):
+                mejor = encontrado
+
+        if mejor:
+            x, y, ancho, alto = mejor['caja']
+            return {
+                'x': izq + x + ancho // 2,
+                'y': arriba + y + alto // 2,
+                'caja': (izq + x, arriba + y, ancho, alto),
+                'confianza': mejor['confianza'],
+                'origen': 'plantilla'
+            }
+
+    # 2. Texto (OCR)
+    if bgra.ndim == 3 and neo_vision.ocr_disponible():
+        palabras, _ = neo_vision.leer_texto(bgra, firma)
+        coincidencias = neo_vision.buscar_texto(_texto_elemento(elemento), palabras=palabras)
+        if coincidencias:
+            mejor = coincidencias[0]
+            x, y, ancho, alto = mejor['caja']
+            return {
+                'x': izq + mejor['centro'][0],
+                'y': arriba + mejor['centro'][1],
+                'caja': (izq + x, arriba + y, ancho, alto),
+                'confianza': mejor['similitud'],
+                'origen': 'texto'
+            }
+
+    return None
+
+
+class Localizador:
+    """
+    Localizador con cache de posiciones por ventana.
+
+    La clave del cache es (elemento, título y rectángulo de la ventana
+    activa). Antes de reutilizar una posición se captura solo el
+    recorte del elemento y se compara con el guardado: si la interfaz
+    cambió, se vuelve a buscar.
+    """
+
+    def __init__(self, biblioteca=None, max_entradas=CACHE_POSICIONES_MAX, ttl=CACHE_POSICIONES_TTL):
+        self.biblioteca = biblioteca or obtener_biblioteca()
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'consultas': 0, 'aciertos': 0, 'invalidadas': 0,
+                       'plantilla': 0, 'texto': 0, 'no_encontrados': 0}
+
+    @staticmethod
+    def _firma_ventana(region):
+        """(título, izq, arriba, ancho, alto) de lo que se va a buscar"""
+        if region == 'ventana' or region is None:
+            ventana = neo_vision.obtener_proveedor_ventanas().ventana_activa()
+            if ventana:
+                return (ventana.get('titulo', ''), ventana['left'], ventana['top'],
+                        ventana['width'], ventana['height'])
+        return ('', repr(region))
+
+    def _parche_vigente(self, sesion, entrada):
+        """Captura solo la caja del elemento y la compara con la guardada"""
+        izq, arriba, ancho, alto = entrada['caja']
+        try:
+            actual = a_gris(sesion.capturar({'left': izq, 'top': arriba, 'width': ancho, 'height': alto}))
+        except Exception:
+            return False
+        if actual.shape != entrada['parche'].shape:
+            return False
+        return float(np.abs(actual - entrada['parche']).mean()) <= UMBRAL_PARCHE
+
+    def localizar(self, elemento, region='ventana', usar_cache=True):
+        """
+        Busca un elemento en la pantalla.
+
+        Args:
+            elemento (str): Nombre del elemento o texto visible ("Guardar")
+            region: Dónde buscar (ver neo_vision.resolver_region).
+                    'ventana' = ventana activa (si no se puede, pantalla)
+            usar_cache (bool): Reutilizar posiciones ya encontradas
+
+        Returns:
+            dict: {'x', 'y', 'caja', 'confianza', 'origen'} o None.
+                  'origen' es 'cache', 'plantilla' o 'texto'.
+        """
+        sesion = neo_vision.obtener_sesion_captura()
+        clave = (nombre_elemento(elemento), self._firma_ventana(region))
+        ahora = time.time()
+
+        with self._lock:
+            self._stats['consultas'] += 1
+            entrada = self._cache.get(clave) if usar_cache else None
+            if entrada and ahora - entrada['creado'] > self.ttl:
+                del self._cache[clave]
+                entrada = None
+
+        if entrada:
+            if self._parche_vigente(sesion, entrada):
+                with self._lock:
+                    self._cache.move_to_end(clave)
+                    self._stats['aciertos'] += 1
+                return dict(entrada['resultado'], origen='cache')
+            with self._lock:
+                self._cache.pop(clave, None)
+                self._stats['invalidadas'] += 1
+
+        # Búsqueda completa
+        try:
+            zona = neo_vision.resolver_region(region, sesion.monitores())
+        except ValueError:
+            zona = neo_vision.resolver_region(None, sesion.monitores())
+        bgra = sesion.capturar(zona)
+
+        resultado = localizar_en_frame(elemento, bgra, (zona['left'], zona['top']), self.biblioteca)
+
+        with self._lock:
+            if resultado is None:
+                self._stats['no_encontrados'] += 1
+                return None
+            self._stats[resultado['origen']] += 1
+
+        # Guardar la posición y el aspecto del elemento para revalidar
+        izq, arriba, ancho, alto = resultado['caja']
+        x0, y0 = izq - zona['left'], arriba - zona['top']
+        parche = a_gris(bgra[y0:y0 + alto, x0:x0 + ancho])
+
+        with self._lock:
+            self._cache[clave] = {
+                'resultado': resultado,
+                'caja': resultado['caja'],
+                'parche': parche,
+                'creado': ahora
+            }
+            self._cache.move_to_end(clave)
+            while len(self._cache) > self.max_entradas:
+                self._cache.popitem(last=False)
+
+        return resultado
+
+    def olvidar(self, elemento=None):
+        """Borra las posiciones guardadas (de un elemento o todas)"""
+        with self._lock:
+            if elemento is None:
+                self._cache.clear()
+                return
+            nombre = nombre_elemento(elemento)
+            for clave in [c for c in self._cache if c[0] == nombre]:
+                del self._cache[clave]
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entradas'] = len(self._cache)
+        consultas = stats['consultas']
+        stats['tasa_aciertos'] = stats['aciertos'] / consultas if consultas else 0.0
+        return stats
+
+
+# ==========================================
+# INSTANCIAS COMPARTIDAS
+# ==========================================
+
+_biblioteca = None
+_localizador = None
+
+
+def obtener_biblioteca():
+    global _biblioteca
+    if _biblioteca is None:
+        _biblioteca = BibliotecaPlantillas()
+    return _biblioteca
+
+
+def obtener_localizador():
+    global _localizador
+    if _localizador is None:
+        _localizador = Localizador()
+    return _localizador
+
+
+def localizar(elemento, region='ventana', usar_cache=True):
+    """Atajo a obtener_localizador().localizar()"""
+    return obtener_localizador().localizar(elemento, region, usar_cache)
+
+
+# ==========================================
+# PRUEBA CON PANTALLAS SINTÉTICAS
+# ==========================================
+
+def _boton_sintetico(texto_ancho, alto=28, semilla=0):
+    """Botón falso: borde, fondo degradado y 'letras' en bloques"""
+    rng = np.random.default_rng(semilla)
+    ancho = texto_ancho + 24
+    boton = np.full((alto, ancho), 225, dtype=np.float32)
+    boton[:, :] -= np.linspace(0, 30, alto, dtype=np.float32)[:, None]
+    boton[0, :] = boton[-1, :] = boton[:, 0] = boton[:, -1] = 90
+    x = 12
+    while x < 12 + texto_ancho - 4:
+        ancho_letra = int(rng.integers(3, 7))
+        boton[9:alto - 9, x:x + ancho_letra] = 40
+        x += ancho_letra + 2
+    return boton
+
+
+def probar_localizador():
+    """
+    Comprueba el localizador sobre escritorios sintéticos:
+    un botón pegado a distintas escalas y posiciones debe encontrarse
+    con un error de pocos píxeles, y no debe confundirse con otro botón.
+    """
+    print("\n" + "=" * 60)
+    print("PRUEBA - Localizador de elementos (pantallas sintéticas)")
+    print("=" * 60)
+    print(f"Motor: {'OpenCV' if OPENCV_DISPONIBLE else 'NumPy (FFT)'}\n")
+
+    rng = np.random.default_rng(1)
+    biblioteca = BibliotecaPlantillas(carpeta=os.devnull)
+    guardar = _boton_sintetico(60, semilla=1)
+    cancelar = _boton_sintetico(70, semilla=2)
+    biblioteca.agregar('guardar', guardar)
+
+    casos = [((1920, 1080), 1.0), ((1920, 1080), 1.25), ((2560, 1440), 1.5), ((1280, 720), 0.9)]
+    correctos = 0
+
+    for (ancho, alto), escala in casos:
+        # Escritorio: fondo con ruido suave + el botón buscado + un distractor
+        escritorio = np.full((alto, ancho), 245, dtype=np.float32)
+        escritorio += rng.normal(0, 2, (alto, ancho)).astype(np.float32)
+
+        boton = _escalar(guardar, escala)
+        distractor = _escalar(cancelar, escala)
+        x = int(rng.integers(0, ancho - boton.shape[1]))
+        y = int(rng.integers(0, alto - boton.shape[0]))
+        escritorio[y:y + boton.shape[0], x:x + boton.shape[1]] = boton
+        dy = (y + 200) % (alto - distractor.shape[0])
+        escritorio[dy:dy + distractor.shape[0], 50:50 + distractor.shape[1]] = distractor
+
+        inicio = time.perf_counter()
+        resultado = localizar_en_frame('el botón Guardar', escritorio, biblioteca=biblioteca)
+        ms = (time.perf_counter() - inicio) * 1000
+
+        esperado = (x + boton.shape[1] // 2, y + boton.shape[0] // 2)
+        if resultado:
+            error = abs(resultado['x'] - esperado[0]) + abs(resultado['y'] - esperado[1])
+            ok = error <= 4
+            detalle = f"({resultado['x']}, {resultado['y']}) conf {resultado['confianza']:.2f}"
+        else:
+            ok = False
+            detalle = "no encontrado"
+
+        correctos += ok
+        estado = "✅" if ok else "❌"
+        print(f"{estado} {ancho}x{alto} escala {escala}: esperado {esperado} → {detalle} [{ms:.0f} ms]")
+
+    ausente = localizar_en_frame('aceptar', np.full((720, 1280), 245, dtype=np.float32), biblioteca=biblioteca)
+    print(f"{'✅' if ausente is None else '❌'} Elemento sin plantilla ni texto → no encontrado")
+    correctos += ausente is None
+
+    print(f"\n{correctos}/{len(casos) + 1} pruebas correctas")
+    return correctos == len(casos) + 1
+
+
+if __name__ == "__main__":
+    probar_localizador()
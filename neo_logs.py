@@ -0,0 +1,495 @@
+# neo_logs.py - Consulta rápida de neo_logs.txt (sin cargarlo entero)
+"""
+Herramienta para consultar los logs de NEO aunque pesen varios GB.
+
+- Usa mmap: el archivo NUNCA se lee completo a strings de Python
+- Crea un índice disperso de timestamps la primera vez (neo_logs.txt.idx)
+- Soporta segmentos rotados (neo_logs.txt.1, neo_logs.txt.2, ...)
+- Filtros por rango de tiempo, nivel (INFO, ERROR...) y regex
+- Modo "tail -f" para ver los logs en vivo
+- Salida en texto plano o JSON
+
+USO:
+    python neo_logs.py --desde "2025-11-18" --nivel ERROR
+    python neo_logs.py --buscar "notepad" --json
+    python neo_logs.py --ultimas 20 --seguir
+"""
+
+import argparse
+import bisect
+import collections
+import json
+import mmap
+import os
+import re
+import sys
+import time
+
+from neo_memoria import ARCHIVO_LOGS
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+
+PASO_INDICE = 64 * 1024      # Bytes entre entradas del índice disperso
+EXTENSION_INDICE = ".idx"    # neo_logs.txt → neo_logs.txt.idx
+INTERVALO_SEGUIR = 0.5       # Segundos entre revisiones en modo --seguir
+
+# Formato de guardar_log(): "[2025-11-16 19:19:06] [INFO] mensaje"
+PATRON_LINEA = re.compile(rb'\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] \[([^\]]*)\] ?')
+
+# ==========================================
+# SEGMENTOS E ÍNDICE
+# ==========================================
+
+def listar_segmentos(archivo=ARCHIVO_LOGS):
+    """
+    Lista el log y sus segmentos rotados, del más antiguo al más nuevo.
+
+    Args:
+        archivo (str): Ruta del log activo
+
+    Returns:
+        list: Rutas existentes (neo_logs.txt.3, ..., neo_logs.txt.1, neo_logs.txt)
+    """
+    rotados = []
+    carpeta = os.path.dirname(archivo) or "."
+    base = os.path.basename(archivo)
+
+    if os.path.isdir(carpeta):
+        for nombre in os.listdir(carpeta):
+            sufijo = nombre[len(base) + 1:]
+            if nombre.startswith(base + ".") and sufijo.isdigit():
+                rotados.append((int(sufijo), os.path.join(carpeta, nombre)))
+
+    # Número más alto = más antiguo
+    segmentos = [ruta for _, ruta in sorted(rotados, reverse=True)]
+
+    if os.path.exists(archivo):
+        segmentos.append(archivo)
+
+    return segmentos
+
+
+def _abrir_mmap(ruta):
+    """Mapea un archivo en memoria (solo lectura). None si está vacío."""
+    with open(ruta, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _timestamp_en(mm, inicio):
+    """
+    Busca el primer timestamp válido a partir de `inicio`
+    (saltando líneas sin formato, p. ej. trazas de error).
+
+    Returns:
+        tuple: (offset_de_la_linea, timestamp_bytes) o (None, None)
+    """
+    pos = inicio
+    tamano = len(mm)
+
+    while pos < tamano:
+        fin = mm.find(b'\n', pos)
+        if fin == -1:
+            fin = tamano
+
+        match = PATRON_LINEA.match(mm, pos, fin)
+        if match:
+            return pos, match.group(1)
+
+        pos = fin + 1
+
+    return None, None
+
+
+def construir_indice(ruta, paso=PASO_INDICE):
+    """
+    Crea (o extiende) el índice disperso de un segmento de log.
+
+    El índice guarda un par (offset, timestamp) cada `paso` bytes,
+    así que para un log de 4 GB solo se leen ~65.000 líneas.
+    Se guarda en disco junto al log y solo se extiende con lo
+    que se haya agregado desde la última vez.
+
+    Args:
+        ruta (str): Segmento de log
+        paso (int): Bytes entre entradas
+
+    Returns:
+        list: [[offset, "YYYY-MM-DD HH:MM:SS"], ...] ordenada por offset
+    """
+    ruta_indice = ruta + EXTENSION_INDICE
+    tamano = os.path.getsize(ruta)
+
+    entradas = []
+    escaneado = 0
+
+    # Reusar índice previo si el log solo creció (append)
+    if os.path.exists(ruta_indice):
+        try:
+            with open(ruta_indice, 'r', encoding='utf-8') as f:
+                guardado = json.load(f)
+            if guardado.get('paso') == paso and guardado.get('tamano', 0) <= tamano:
+                entradas = guardado['entradas']
+                escaneado = guardado['tamano']
+        except:
+            entradas = []
+            escaneado = 0
+
+    if escaneado == tamano:
+        return entradas
+
+    mm = _abrir_mmap(ruta)
+    if mm is None:
+        return []
+
+    try:
+        # Continuar justo después de la última entrada conocida
+        pos = entradas[-1][0] + paso if entradas else 0
+
+        while pos < tamano:
+            # Alinear al inicio de la siguiente línea
+            if pos > 0:
+                salto = mm.find(b'\n', pos - 1)
+                if salto == -1:
+                    break
+                pos = salto + 1
+
+            offset, ts = _timestamp_en(mm, pos)
+            if offset is None:
+                break
+
+            if not entradas or offset > entradas[-1][0]:
+                entradas.append([offset, ts.decode('ascii')])
+
+            pos = offset + paso
+    finally:
+        mm.close()
+
+    try:
+        with open(ruta_indice, 'w', encoding='utf-8') as f:
+            json.dump({'paso': paso, 'tamano': tamano, 'entradas': entradas}, f)
+    except:
+        pass
+
+    return entradas
+
+
+# ==========================================
+# CONSULTAS
+# ==========================================
+
+def _normalizar_limite(valor):
+    """'2025-11-18' o '2025-11-18 19:03' → bytes comparables con el timestamp"""
+    if valor is None:
+        return None
+    return valor.strip().encode('ascii')
+
+
+def _offset_inicial(indice, desde):
+    """Offset de la última entrada del índice anterior a `desde`"""
+    if not desde or not indice:
+        return 0
+
+    claves = [ts for _, ts in indice]
+    i = bisect.bisect_left(claves, desde.decode('ascii'))
+    return indice[i - 1][0] if i > 0 else 0
+
+
+def _parsear_linea(linea, anterior):
+    """
+    Divide una línea en (timestamp, tipo, mensaje).
+    Las líneas sin formato heredan timestamp y tipo de la anterior.
+    """
+    match = PATRON_LINEA.match(linea)
+    if match:
+        return match.group(1), match.group(2), linea[match.end():]
+
+    ts, tipo = anterior if anterior else (b'', b'')
+    return ts, tipo, linea
+
+
+def consultar_segmento(ruta, desde=None, hasta=None, niveles=None, patron=None):
+    """
+    Recorre un segmento devolviendo solo las líneas que pasan los filtros.
+
+    Args:
+        ruta (str): Segmento de log
+        desde (bytes): Timestamp mínimo (prefijo, ya normalizado)
+        hasta (bytes): Timestamp máximo (prefijo, ya normalizado)
+        niveles (set): Tipos aceptados en bytes ({b'ERROR', b'INFO'})
+        patron (re.Pattern): Regex compilada sobre bytes
+
+    Yields:
+        dict: {'timestamp', 'tipo', 'mensaje', 'archivo', 'offset'}
+    """
+    indice = construir_indice(ruta)
+    mm = _abrir_mmap(ruta)
+    if mm is None:
+        return
+
+    try:
+        pos = _offset_inicial(indice, desde)
+        tamano = len(mm)
+        anterior = None
+
+        while pos < tamano:
+            fin = mm.find(b'\n', pos)
+            if fin == -1:
+                fin = tamano
+
+            linea = mm[pos:fin].rstrip(b'\r')
+            offset = pos
+            pos = fin + 1
+
+            if not linea:
+                continue
+
+            ts, tipo, mensaje = _parsear_linea(linea, anterior)
+            anterior = (ts, tipo)
+
+            if desde and ts < desde:
+                continue
+
+            # El log es cronológico: pasado el límite no hay nada más
+            if hasta and ts[:len(hasta)] > hasta:
+                break
+
+            if niveles and tipo not in niveles:
+                continue
+
+            if patron and not patron.search(linea):
+                continue
+
+            yield {
+                'timestamp': ts.decode('ascii', errors='replace'),
+                'tipo': tipo.decode('utf-8', errors='replace'),
+                'mensaje': mensaje.decode('utf-8', errors='replace'),
+                'archivo': ruta,
+                'offset': offset
+            }
+    finally:
+        mm.close()
+
+
+def consultar_logs(desde=None, hasta=None, niveles=None, buscar=None, archivo=ARCHIVO_LOGS):
+    """
+    Consulta todos los segmentos del log en orden cronológico.
+
+    Args:
+        desde (str): "YYYY-MM-DD[ HH:MM:SS]" inicio del rango (incluido)
+        hasta (str): "YYYY-MM-DD[ HH:MM:SS]" fin del rango (incluido)
+        niveles (list): ['ERROR', 'WARNING'] o None para todos
+        buscar (str): Expresión regular a buscar en la línea
+        archivo (str): Log activo
+
+    Yields:
+        dict: Una entrada por línea que pasa los filtros
+
+    Ejemplo:
+        for entrada in consultar_logs(desde="2025-11-18", niveles=["ERROR"]):
+            print(entrada['mensaje'])
+    """
+    desde_b = _normalizar_limite(desde)
+    hasta_b = _normalizar_limite(hasta)
+    niveles_b = {n.upper().encode('utf-8') for n in niveles} if niveles else None
+    patron = re.compile(buscar.encode('utf-8'), re.IGNORECASE) if buscar else None
+
+    for ruta in listar_segmentos(archivo):
+        # Saltar segmentos enteros que terminan antes de `desde`
+        if desde_b:
+            ultimo = _ultimo_timestamp(ruta)
+            if ultimo and ultimo < desde_b:
+                continue
+
+        yield from consultar_segmento(ruta, desde_b, hasta_b, niveles_b, patron)
+
+
+def _ultimo_timestamp(ruta):
+    """Timestamp de la última línea con formato (leyendo desde el final)"""
+    mm = _abrir_mmap(ruta)
+    if mm is None:
+        return None
+
+    try:
+        fin = len(mm)
+        while fin > 0:
+            inicio = mm.rfind(b'\n', 0, fin - 1) + 1
+            match = PATRON_LINEA.match(mm, inicio, fin)
+            if match:
+                return match.group(1)
+            fin = inicio
+        return None
+    finally:
+        mm.close()
+
+
+def ultimas_lineas(cantidad=20, archivo=ARCHIVO_LOGS, desde=None, hasta=None, niveles=None, buscar=None):
+    """
+    Devuelve las últimas N líneas leyendo desde el final (como `tail`).
+    Con filtros, son las últimas N líneas que los pasan.
+
+    Args:
+        cantidad (int): Número de líneas
+        archivo (str): Log activo
+        desde, hasta, niveles, buscar: Filtros, igual que en consultar_logs()
+
+    Returns:
+        list: Entradas (dict) en orden cronológico
+    """
+    if desde or hasta or niveles or buscar:
+        # Las líneas sin formato heredan el timestamp de la anterior, así que
+        # los filtros se aplican hacia delante y solo se guardan las N últimas
+        return list(collections.deque(consultar_logs(desde, hasta, niveles, buscar, archivo),
+                                      maxlen=cantidad))
+
+    resultado = []
+
+    for ruta in reversed(listar_segmentos(archivo)):
+        mm = _abrir_mmap(ruta)
+        if mm is None:
+            continue
+
+        try:
+            fin = len(mm)
+            if mm[fin - 1:fin] == b'\n':
+                fin -= 1
+
+            while fin > 0 and len(resultado) < cantidad:
+                inicio = mm.rfind(b'\n', 0, fin) + 1
+                linea = mm[inicio:fin].rstrip(b'\r')
+                if linea:
+                    ts, tipo, mensaje = _parsear_linea(linea, None)
+                    resultado.append({
+                        'timestamp': ts.decode('ascii', errors='replace'),
+                        'tipo': tipo.decode('utf-8', errors='replace'),
+                        'mensaje': mensaje.decode('utf-8', errors='replace'),
+                        'archivo': ruta,
+                        'offset': inicio
+                    })
+                fin = inicio - 1
+        finally:
+            mm.close()
+
+        if len(resultado) >= cantidad:
+            break
+
+    resultado.reverse()
+    return resultado
+
+
+def seguir_logs(niveles=None, buscar=None, archivo=ARCHIVO_LOGS, intervalo=INTERVALO_SEGUIR):
+    """
+    Modo "tail -f": espera líneas nuevas y las devuelve al llegar.
+    Si el log se rota (el archivo se achica), vuelve a empezar desde 0.
+
+    Yields:
+        dict: Entradas nuevas que pasan los filtros
+    """
+    niveles_b = {n.upper().encode('utf-8') for n in niveles} if niveles else None
+    patron = re.compile(buscar.encode('utf-8'), re.IGNORECASE) if buscar else None
+
+    posicion = os.path.getsize(archivo) if os.path.exists(archivo) else 0
+    pendiente = b''
+
+    while True:
+        if not os.path.exists(archivo):
+            time.sleep(intervalo)
+            continue
+
+        tamano = os.path.getsize(archivo)
+
+        if tamano < posicion:
+            # Rotación o limpieza del log
+            posicion = 0
+            pendiente = b''
+
+        if tamano == posicion:
+            time.sleep(intervalo)
+            continue
+
+        with open(archivo, 'rb') as f:
+            f.seek(posicion)
+            nuevo = f.read(tamano - posicion)
+        posicion = tamano
+
+        bloque = pendiente + nuevo
+        lineas = bloque.split(b'\n')
+        pendiente = lineas.pop()  # Línea incompleta (sin \n todavía)
+
+        for linea in lineas:
+            linea = linea.rstrip(b'\r')
+            if not linea:
+                continue
+
+            ts, tipo, mensaje = _parsear_linea(linea, None)
+
+            if niveles_b and tipo not in niveles_b:
+                continue
+            if patron and not patron.search(linea):
+                continue
+
+            yield {
+                'timestamp': ts.decode('ascii', errors='replace'),
+                'tipo': tipo.decode('utf-8', errors='replace'),
+                'mensaje': mensaje.decode('utf-8', errors='replace'),
+                'archivo': archivo,
+                'offset': None
+            }
+
+
+# ==========================================
+# SALIDA
+# ==========================================
+
+def formatear_entrada(entrada, como_json=False):
+    """Convierte una entrada a línea de texto o JSON"""
+    if como_json:
+        return json.dumps(entrada, ensure_ascii=False)
+
+    if entrada['timestamp']:
+        return f"[{entrada['timestamp']}] [{entrada['tipo']}] {entrada['mensaje']}"
+    return entrada['mensaje']
+
+
+# ==========================================
+# PROGRAMA PRINCIPAL
+# ==========================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta los logs de NEO")
+    parser.add_argument('--archivo', default=ARCHIVO_LOGS, help="Log a consultar")
+    parser.add_argument('--desde', help='Inicio, ej: "2025-11-18" o "2025-11-18 19:00"')
+    parser.add_argument('--hasta', help='Fin (incluido), mismo formato que --desde')
+    parser.add_argument('--nivel', action='append', help="INFO, ERROR, WARNING, CONTEXTO (repetible)")
+    parser.add_argument('--buscar', help="Expresión regular a buscar")
+    parser.add_argument('--ultimas', type=int, help="Mostrar solo las últimas N líneas")
+    parser.add_argument('--seguir', action='store_true', help="Seguir el log en vivo (tail -f)")
+    parser.add_argument('--json', action='store_true', help="Salida en JSON (una entrada por línea)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.ultimas:
+            for entrada in ultimas_lineas(args.ultimas, args.archivo, args.desde, args.hasta,
+                                          args.nivel, args.buscar):
+                print(formatear_entrada(entrada, args.json))
+        elif not args.seguir:
+            for entrada in consultar_logs(args.desde, args.hasta, args.nivel, args.buscar, args.archivo):
+                print(formatear_entrada(entrada, args.json))
+
+        if args.seguir:
+            for entrada in seguir_logs(args.nivel, args.buscar, args.archivo):
+                print(formatear_entrada(entrada, args.json), flush=True)
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        # Salida cortada por `head`, `less`, etc.
+        sys.stderr.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
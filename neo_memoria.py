@@ -1,11 +1,27 @@
 # neo_memoria.py - Sistema de memoria para NEO
 import json
 import os
+import unicodedata
 from datetime import datetime
 
 ARCHIVO_MEMORIA = "neo_memoria.json"
 ARCHIVO_LOGS = "neo_logs.txt"
 
+def normalizar_comando(comando):
+    """
+    Normaliza un comando para que variaciones mínimas cuenten igual.
+    Es la clave común del cache de planes (neo_cerebro) y de la
+    predicción de comandos (neo_prediccion).
+
+    Ejemplo:
+        "Abre  Notepad." → "abre notepad"
+        "¿Qué hora es?"  → "que hora es"
+    """
+    texto = unicodedata.normalize('NFKD', comando.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = ''.join(c if c.isalnum() or c.isspace() else ' ' for c in texto)
+    return ' '.join(texto.split())
+
 def guardar_comando(comando, plan, exito):
     """
     Guarda un comando ejecutado en la memoria
@@ -14,6 +30,9 @@ def guardar_comando(comando, plan, exito):
         comando (str): Comando del usuario
         plan (dict): Plan generado
         exito (bool): Si se ejecutó correctamente
+    
+    Returns:
+        dict: La entrada guardada (con su timestamp)
     """
     memoria = cargar_memoria()
     
@@ -36,6 +55,8 @@ def guardar_comando(comando, plan, exito):
             json.dump(memoria, f, indent=2, ensure_ascii=False)
     except:
         pass
+    
+    return entrada
 
 def cargar_memoria():
     """Carga la memoria completa"""
@@ -0,0 +1,425 @@
+# neo_ollama.py - Cliente HTTP de Ollama para NEO
+"""
+Habla con Ollama por su API HTTP (http://localhost:11434) en lugar de
+lanzar `ollama run` en cada consulta.
+
+- Una conexión persistente (keep-alive) por hilo
+- Las imágenes van en el campo "images" de /api/generate, así el
+  modelo de visión SÍ recibe los píxeles (no un texto con la ruta)
+- El base64 se escribe directamente en el cuerpo de la petición
+- La respuesta llega en streaming y se procesa token a token
+- Incluye un servidor falso (ServidorOllamaFalso) para pruebas sin Ollama
+
+Ejemplo:
+    from neo_ollama import obtener_cliente
+    texto = obtener_cliente().generar("llava:7b", "¿Qué ves?", imagenes=[jpeg_bytes])
+"""
+
+import base64
+import http.client
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import urlparse
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+
+# Misma variable que usa el propio Ollama
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434")
+TIMEOUT_OLLAMA = 60              # Segundos máximos esperando respuesta
+BLOQUE_BASE64 = 3 * 64 * 1024    # Bytes por bloque al escribir imágenes
+TOKENS_IMAGEN_FALSO = 576        # Tokens por imagen que informa el servidor falso (llava 336px)
+
+# Métricas que Ollama manda en el último fragmento de la respuesta
+CLAVES_METRICAS = ('prompt_eval_count', 'eval_count', 'total_duration',
+                   'load_duration', 'prompt_eval_duration', 'eval_duration')
+
+
+class ErrorOllama(Exception):
+    """Ollama no respondió o devolvió un error"""
+
+
+# ==========================================
+# CLIENTE
+# ==========================================
+
+def escribir_base64(datos, destino, bloque=BLOQUE_BASE64):
+    """
+    Escribe `datos` en base64 directamente en un buffer (ej: el cuerpo
+    de la petición HTTP), por bloques, sin crear el string completo.
+
+    Args:
+        datos (bytes): Bytes de la imagen
+        destino: Objeto con .write(bytes) (BytesIO, archivo...)
+        bloque (int): Bytes de entrada por bloque (múltiplo de 3)
+
+    Returns:
+        int: Bytes escritos en base64
+    """
+    vista = memoryview(datos)
+    escritos = 0
+    for inicio in range(0, len(vista), bloque):
+        codificado = base64.b64encode(vista[inicio:inicio + bloque])
+        destino.write(codificado)
+        escritos += len(codificado)
+    return escritos
+
+
+class ClienteOllama:
+    """
+    Cliente de la API de Ollama con conexión persistente por hilo.
+
+    Args:
+        host (str): URL base, ej: "http://127.0.0.1:11434"
+        timeout (float): Segundos máximos por petición
+    """
+
+    def __init__(self, host=OLLAMA_HOST, timeout=TIMEOUT_OLLAMA):
+        if '://' not in host:
+            host = 'http://' + host
+        url = urlparse(host)
+        self.servidor = url.hostname or '127.0.0.1'
+        self.puerto = url.port or 11434
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conexion(self, nueva=False):
+        """Conexión HTTP del hilo actual (se reutiliza entre peticiones)"""
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None or nueva:
+            if conexion is not None:
+                conexion.close()
+            conexion = http.client.HTTPConnection(self.servidor, self.puerto, timeout=self.timeout)
+            self._local.conexion = conexion
+        return conexion
+
+    def cerrar(self):
+        """Cierra la conexión del hilo actual"""
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is not None:
+            conexion.close()
+            self._local.conexion = None
+
+    @staticmethod
+    def construir_cuerpo(modelo, prompt, imagenes=None, stream=True, opciones=None):
+        """
+        Arma el JSON de /api/generate escribiendo las imágenes en base64
+        directamente en el buffer (sin strings intermedios).
+
+        Args:
+            imagenes (list): bytes de imagen (se codifican aquí) o
+                             str ya en base64
+
+        Returns:
+            bytes: Cuerpo de la petición
+        """
+        datos = {'model': modelo, 'prompt': prompt, 'stream': stream}
+        if opciones:
+            datos['options'] = opciones
+
+        cuerpo = BytesIO()
+        encabezado = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+        cuerpo.write(encabezado[:-1])  # Sin la "}" final
+
+        if imagenes:
+            cuerpo.write(b', "images": [')
+            for i, imagen in enumerate(imagenes):
+                if i:
+                    cuerpo.write(b', ')
+                cuerpo.write(b'"')
+                if isinstance(imagen, str):
+                    cuerpo.write(imagen.encode('ascii'))
+                else:
+                    escribir_base64(imagen, cuerpo)
+                cuerpo.write(b'"')
+            cuerpo.write(b']')
+
+        cuerpo.write(b'}')
+        return cuerpo.getvalue()
+
+    def _enviar(self, ruta, cuerpo):
+        """
+        POST con un reintento si la conexión persistente se cerró.
+
+        Solo se reintenta ante errores de conexión (el servidor cerró la
+        conexión reutilizada): tras un timeout Ollama puede seguir
+        generando, y repetir el POST duplicaría el trabajo.
+        """
+        for intento in range(2):
+            conexion = self._conexion(nueva=intento > 0)
+            try:
+                conexion.request('POST', ruta, body=cuerpo,
+                                 headers={'Content-Type': 'application/json'})
+                return conexion.getresponse()
+            except ConnectionError as e:
+                if intento:
+                    raise ErrorOllama(f"No se pudo conectar con Ollama en "
+                                      f"{self.servidor}:{self.puerto}: {e}")
+            except (http.client.HTTPException, OSError) as e:
+                # Timeout u otro fallo: la conexión queda a medias, no se reutiliza
+                self.cerrar()
+                raise ErrorOllama(f"Ollama no respondió en "
+                                  f"{self.servidor}:{self.puerto}: {e}")
+
+    def generar(self, modelo, prompt, imagenes=None, al_recibir=None, opciones=None):
+        """
+        Genera una respuesta (con imágenes opcionales) en streaming.
+
+        Args:
+            modelo (str): ej: "llava:7b"
+            prompt (str): Texto/pregunta
+            imagenes (list): Imágenes (bytes JPEG/PNG o str base64)
+            al_recibir (callable): Se llama con cada fragmento de texto
+                                   según va llegando
+            opciones (dict): Opciones del modelo (temperature, num_predict...)
+
+        Returns:
+            str: Respuesta completa
+
+        Raises:
+            ErrorOllama: Si Ollama no responde o devuelve error
+        """
+        cuerpo = self.construir_cuerpo(modelo, prompt, imagenes, True, opciones)
+        self._local.metricas = {}
+        respuesta = self._enviar('/api/generate', cuerpo)
+
+        try:
+            if respuesta.status != 200:
+                detalle = respuesta.read().decode('utf-8', errors='replace')[:200]
+                raise ErrorOllama(f"Ollama respondió {respuesta.status}: {detalle}")
+
+            partes = []
+            # Una línea JSON por fragmento: {"response": "...", "done": false}
+            while True:
+                linea = respuesta.readline()
+                if not linea:
+                    break
+                linea = linea.strip()
+                if not linea:
+                    continue
+
+                try:
+                    fragmento = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue
+
+                if 'error' in fragmento:
+                    raise ErrorOllama(fragmento['error'])
+
+                texto = fragmento.get('response', '')
+                if texto:
+                    partes.append(texto)
+                    if al_recibir:
+                        al_recibir(texto)
+
+                if fragmento.get('done'):
+                    # El último fragmento trae los conteos de tokens y tiempos
+                    self._local.metricas = {
+                        clave: fragmento[clave] for clave in CLAVES_METRICAS if clave in fragmento
+                    }
+                    break
+
+            # Vaciar lo que quede para poder reutilizar la conexión
+            respuesta.read()
+            return ''.join(partes)
+
+        except (ConnectionError, http.client.HTTPException, OSError) as e:
+            self.cerrar()
+            raise ErrorOllama(f"Conexión con Ollama interrumpida: {e}")
+
+    def ultimas_metricas(self):
+        """
+        Métricas de la última respuesta de este hilo, según Ollama:
+        prompt_eval_count (tokens de entrada, imágenes incluidas),
+        eval_count (tokens generados) y duraciones en nanosegundos.
+
+        Returns:
+            dict: Vacío si la última petición no terminó bien
+        """
+        return dict(getattr(self._local, 'metricas', None) or {})
+
+    def disponible(self):
+        """True si el servidor de Ollama responde"""
+        try:
+            conexion = self._conexion()
+            conexion.request('GET', '/api/tags')
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            return respuesta.status == 200
+        except (ConnectionError, http.client.HTTPException, OSError):
+            self.cerrar()
+            return False
+
+
+_cliente = None
+
+
+def obtener_cliente():
+    """Cliente compartido del módulo (se crea la primera vez)"""
+    global _cliente
+    if _cliente is None:
+        _cliente = ClienteOllama()
+    return _cliente
+
+
+def configurar_cliente(host=OLLAMA_HOST, timeout=TIMEOUT_OLLAMA):
+    """Cambia el servidor al que se conecta el cliente compartido"""
+    global _cliente
+    _cliente = ClienteOllama(host, timeout)
+    return _cliente
+
+
+# ==========================================
+# SERVIDOR FALSO (para pruebas y benchmarks)
+# ==========================================
+
+class ServidorOllamaFalso:
+    """
+    Imita /api/generate y /api/tags de Ollama en un hilo local.
+
+    Responde con `respuesta` partida en tokens (palabras), esperando
+    `retraso_token` segundos entre cada una. `respuesta` también puede
+    ser una función que recibe el JSON de la petición y devuelve el
+    texto. Guarda cada petición recibida (con el tamaño de las imágenes
+    ya decodificadas) y, como Ollama, informa conteos de tokens
+    aproximados al final (`tokens_imagen` por imagen).
+
+    Ejemplo:
+        servidor = ServidorOllamaFalso("Veo un editor de código").iniciar()
+        cliente = ClienteOllama(servidor.url)
+        ...
+        servidor.detener()
+    """
+
+    def __init__(self, respuesta="Veo una pantalla de prueba.", retraso_token=0.0,
+                 retraso_imagen=0.0, tokens_imagen=TOKENS_IMAGEN_FALSO):
+        self.respuesta = respuesta
+        self.retraso_token = retraso_token
+        self.retraso_imagen = retraso_imagen  # Segundos extra por MB de imagen
+        self.tokens_imagen = tokens_imagen
+        self.peticiones = []
+        self._servidor = None
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self._servidor.server_address[:2]
+        return f"http://{host}:{puerto}"
+
+    def _crear_manejador(self):
+        falso = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True  # Sin esperas de 40 ms entre tokens
+
+            def log_message(self, *args):
+                pass
+
+            def _enviar_json(self, datos, codigo=200):
+                cuerpo = json.dumps(datos).encode('utf-8')
+                self.send_response(codigo)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def do_GET(self):
+                if self.path == '/api/tags':
+                    self._enviar_json({'models': [{'name': 'llava:7b'}, {'name': 'llama3.2:3b'}]})
+                else:
+                    self._enviar_json({'error': 'not found'}, 404)
+
+            def do_POST(self):
+                largo = int(self.headers.get('Content-Length', 0))
+                datos = json.loads(self.rfile.read(largo))
+
+                if self.path != '/api/generate':
+                    self._enviar_json({'error': 'not found'}, 404)
+                    return
+
+                try:
+                    imagenes = [base64.b64decode(i, validate=True) for i in datos.get('images', [])]
+                except ValueError:
+                    self._enviar_json({'error': 'invalid image'}, 400)
+                    return
+
+                falso.peticiones.append({
+                    'model': datos.get('model'),
+                    'prompt': datos.get('prompt'),
+                    'bytes_imagenes': [len(i) for i in imagenes]
+                })
+
+                megas = sum(len(i) for i in imagenes) / (1024 * 1024)
+                if falso.retraso_imagen and megas:
+                    time.sleep(falso.retraso_imagen * megas)
+
+                # Respuesta en streaming (chunked, una línea JSON por token)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+
+                texto = falso.respuesta(datos) if callable(falso.respuesta) else falso.respuesta
+                tokens = [p + ' ' for p in texto.split(' ')]
+                tokens[-1] = tokens[-1].rstrip()
+                for token in tokens:
+                    self._chunk({'model': datos.get('model'), 'response': token, 'done': False})
+                    if falso.retraso_token:
+                        time.sleep(falso.retraso_token)
+                self._chunk({
+                    'model': datos.get('model'), 'response': '', 'done': True,
+                    'prompt_eval_count': len(datos.get('prompt', '')) // 4 + falso.tokens_imagen * len(imagenes),
+                    'eval_count': len(tokens)
+                })
+                self.wfile.write(b'0\r\n\r\n')
+
+            def _chunk(self, datos):
+                linea = json.dumps(datos).encode('utf-8') + b'\n'
+                self.wfile.write(f"{len(linea):X}\r\n".encode('ascii') + linea + b'\r\n')
+                self.wfile.flush()
+
+        return Manejador
+
+    def iniciar(self, puerto=0):
+        """Arranca el servidor (puerto 0 = uno libre cualquiera)"""
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', puerto), self._crear_manejador())
+        self._servidor.daemon_threads = True
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+            self._servidor = None
+
+
+# ==========================================
+# PRUEBA RÁPIDA
+# ==========================================
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("NEO - Cliente de Ollama")
+    print("=" * 60)
+
+    cliente = obtener_cliente()
+    if cliente.disponible():
+        print(f"\n✅ Ollama responde en {OLLAMA_HOST}")
+    else:
+        print(f"\n❌ Ollama no responde en {OLLAMA_HOST}")
+        print("   Usando servidor falso para la prueba...")
+        servidor = ServidorOllamaFalso("Hola, soy una respuesta de prueba.", retraso_token=0.05).iniciar()
+        cliente = ClienteOllama(servidor.url)
+
+    print("\nRespuesta: ", end='', flush=True)
+    cliente.generar("llama3.2:3b", "Di hola en una frase",
+                    al_recibir=lambda t: print(t, end='', flush=True))
+    print()
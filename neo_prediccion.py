@@ -0,0 +1,432 @@
+# neo_prediccion.py - Predicción del siguiente comando y precarga
+"""
+NEO aprende tus hábitos (ej: después de abrir el explorador casi
+siempre abres notepad) y se adelanta:
+
+- Modelo de Markov (bigramas + trigramas) sobre comandos normalizados
+- Preferencias por franja horaria (mañana, tarde, noche...)
+- Se entrena con el historial de neo_memoria.json y se actualiza
+  con cada comando nuevo (sin reentrenar todo)
+- Precarga en segundo plano el plan del comando más probable
+  (queda en el cache de planes de neo_cerebro)
+- Reporta precisión de las predicciones y % de precargas desperdiciadas
+"""
+
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+from neo_memoria import cargar_memoria, normalizar_comando
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+
+ARCHIVO_MODELO = "neo_prediccion.json"   # Conteos aprendidos (persisten entre sesiones)
+
+PAUSA_MAX_SESION = 30 * 60    # Más de 30 min entre comandos = no están relacionados
+PESO_TRIGRAMA = 0.5           # Peso de P(siguiente | 2 anteriores)
+PESO_BIGRAMA = 0.35           # Peso de P(siguiente | anterior)
+PESO_FRANJA = 0.15            # Peso de P(siguiente | hora del día)
+PROBABILIDAD_MIN_PRECARGA = 0.4   # Solo precargar si la predicción es bastante segura
+TOP_K = 3                     # Predicciones que cuentan como "acierto en top-k"
+
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+# ==========================================
+# Variables de estado
+# ==========================================
+
+_trigramas = defaultdict(lambda: defaultdict(int))   # "a|b" → {c: n}
+_bigramas = defaultdict(lambda: defaultdict(int))    # a → {b: n}
+_franjas = defaultdict(lambda: defaultdict(int))     # franja → {cmd: n}
+
+_historial = []              # Últimos comandos normalizados de la sesión
+_ultimo_momento = None       # datetime del último comando registrado
+_ultimo_entrenado = ""       # Timestamp de la última entrada de memoria usada
+_cargado = False
+
+_prediccion_pendiente = []   # Top-k predicho para el próximo comando
+_precargas_pendientes = set()   # Planes precargados para el próximo comando
+_precargas_en_juego = set()     # Los del comando que se está procesando ahora
+
+_estadisticas = {
+    'predicciones': 0,
+    'aciertos_top1': 0,
+    'aciertos_topk': 0,
+    'precargas': 0,
+    'precargas_usadas': 0,
+    'precargas_desperdiciadas': 0,
+}
+
+_lock = threading.Lock()
+
+def _franja_horaria(momento):
+    """0 = madrugada, 1 = mañana, 2 = tarde, 3 = noche"""
+    return str(momento.hour // 6)
+
+
+# ==========================================
+# ENTRENAMIENTO
+# ==========================================
+
+def _aprender(comando, momento):
+    """Actualiza los conteos con un comando (requiere _lock)"""
+    global _ultimo_momento
+
+    if _ultimo_momento and (momento - _ultimo_momento).total_seconds() > PAUSA_MAX_SESION:
+        _historial.clear()
+
+    if len(_historial) >= 2:
+        _trigramas[f"{_historial[-2]}|{_historial[-1]}"][comando] += 1
+    if _historial:
+        _bigramas[_historial[-1]][comando] += 1
+    _franjas[_franja_horaria(momento)][comando] += 1
+
+    _historial.append(comando)
+    del _historial[:-2]
+    _ultimo_momento = momento
+
+
+def _cargar_modelo():
+    """Carga los conteos guardados y los completa con neo_memoria.json"""
+    global _cargado, _ultimo_entrenado
+
+    if _cargado:
+        return
+    _cargado = True
+
+    if os.path.exists(ARCHIVO_MODELO):
+        try:
+            with open(ARCHIVO_MODELO, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            for tabla, destino in (('trigramas', _trigramas),
+                                   ('bigramas', _bigramas),
+                                   ('franjas', _franjas)):
+                for origen, siguientes in datos.get(tabla, {}).items():
+                    for cmd, n in siguientes.items():
+                        destino[origen][cmd] += n
+            _ultimo_entrenado = datos.get('ultimo_entrenado', "")
+        except:
+            pass
+
+    # Entrenamiento incremental: solo lo que no se había visto
+    for item in cargar_memoria():
+        timestamp = item.get('timestamp', "")
+        if timestamp <= _ultimo_entrenado or not item.get('comando'):
+            continue
+        try:
+            momento = datetime.strptime(timestamp, FORMATO_FECHA)
+        except ValueError:
+            continue
+        _aprender(normalizar_comando(item['comando']), momento)
+        _ultimo_entrenado = timestamp
+
+
+def guardar_modelo():
+    """Guarda los conteos en disco"""
+    with _lock:
+        datos = {
+            'ultimo_entrenado': _ultimo_entrenado,
+            'trigramas': {k: dict(v) for k, v in _trigramas.items()},
+            'bigramas': {k: dict(v) for k, v in _bigramas.items()},
+            'franjas': {k: dict(v) for k, v in _franjas.items()},
+        }
+
+    try:
+        with open(ARCHIVO_MODELO, 'w', encoding='utf-8') as f:
+            json.dump(datos, f, ensure_ascii=False)
+    except:
+        pass
+
+
+def registrar_comando(comando, momento=None, guardar=True):
+    """
+    Registra un comando que el usuario acaba de dar.
+    Actualiza el modelo y evalúa la predicción/precarga anterior.
+    Si después se guarda en neo_memoria, avisar con marcar_en_memoria()
+    para que no se vuelva a aprender al arrancar.
+
+    Args:
+        comando (str): Comando tal como lo dijo el usuario
+        momento (datetime): Cuándo se dio (None = ahora)
+        guardar (bool): Guardar el modelo en disco
+    """
+    momento = momento or datetime.now()
+    normalizado = normalizar_comando(comando)
+
+    if not normalizado:
+        return
+
+    with _lock:
+        _cargar_modelo()
+
+        # Evaluar lo que habíamos predicho para este paso
+        if _prediccion_pendiente:
+            _estadisticas['predicciones'] += 1
+            if _prediccion_pendiente[0] == normalizado:
+                _estadisticas['aciertos_top1'] += 1
+            if normalizado in _prediccion_pendiente:
+                _estadisticas['aciertos_topk'] += 1
+            _prediccion_pendiente.clear()
+
+        # Las precargas del comando anterior ya tuvieron su oportunidad
+        _resolver_precargas(final=True)
+        _precargas_en_juego.update(_precargas_pendientes)
+        _precargas_pendientes.clear()
+
+        _aprender(normalizado, momento)
+
+    if guardar:
+        guardar_modelo()
+
+
+def marcar_en_memoria(timestamp, guardar=True):
+    """
+    El comando ya registrado se guardó en neo_memoria con este timestamp
+    (posterior al de registrar_comando: va después de Llama y de
+    ejecutarlo). Las entradas hasta aquí ya están aprendidas.
+
+    Args:
+        timestamp (str): 'timestamp' de la entrada de memoria
+        guardar (bool): Guardar el modelo en disco
+    """
+    global _ultimo_entrenado
+
+    with _lock:
+        _cargar_modelo()
+        _ultimo_entrenado = max(_ultimo_entrenado, timestamp)
+
+    if guardar:
+        guardar_modelo()
+
+
+def _resolver_precargas(final):
+    """
+    Cuenta como usada cada precarga cuyo plan sirvió neo_cerebro (no
+    basta con que el comando coincida: tiene que haber salido del cache).
+    Con final=True las que no se sirvieron cuentan como desperdiciadas.
+    Requiere _lock.
+    """
+    if not _precargas_en_juego:
+        return
+    try:
+        import neo_cerebro
+    except ImportError:
+        servido = lambda comando: False
+    else:
+        servido = neo_cerebro.precalculado_servido
+
+    for comando in list(_precargas_en_juego):
+        if servido(comando):
+            _estadisticas['precargas_usadas'] += 1
+        elif final:
+            _estadisticas['precargas_desperdiciadas'] += 1
+        else:
+            continue
+        _precargas_en_juego.discard(comando)
+
+
+# ==========================================
+# PREDICCIÓN
+# ==========================================
+
+def _distribucion(conteos):
+    total = sum(conteos.values())
+    if not total:
+        return {}
+    return {cmd: n / total for cmd, n in conteos.items()}
+
+
+def predecir_siguiente(momento=None, cantidad=TOP_K):
+    """
+    Predice los comandos más probables a continuación.
+
+    Args:
+        momento (datetime): Momento de la predicción (None = ahora)
+        cantidad (int): Cuántas predicciones devolver
+
+    Returns:
+        list: [(comando_normalizado, probabilidad), ...] de mayor a menor
+    """
+    momento = momento or datetime.now()
+
+    with _lock:
+        _cargar_modelo()
+
+        historial = list(_historial)
+        if _ultimo_momento and (momento - _ultimo_momento).total_seconds() > PAUSA_MAX_SESION:
+            historial = []
+
+        fuentes = []
+        if len(historial) >= 2:
+            fuentes.append((PESO_TRIGRAMA, _distribucion(_trigramas.get(f"{historial[-2]}|{historial[-1]}", {}))))
+        if historial:
+            fuentes.append((PESO_BIGRAMA, _distribucion(_bigramas.get(historial[-1], {}))))
+        fuentes.append((PESO_FRANJA, _distribucion(_franjas.get(_franja_horaria(momento), {}))))
+
+    # Interpolación: repartir el peso solo entre fuentes con datos
+    fuentes = [(peso, dist) for peso, dist in fuentes if dist]
+    peso_total = sum(peso for peso, _ in fuentes)
+    if not peso_total:
+        return []
+
+    puntajes = defaultdict(float)
+    for peso, dist in fuentes:
+        for cmd, p in dist.items():
+            puntajes[cmd] += p * peso / peso_total
+
+    ordenados = sorted(puntajes.items(), key=lambda x: x[1], reverse=True)
+    return ordenados[:cantidad]
+
+
+def precargar_siguiente(momento=None, esperar=False):
+    """
+    Predice el siguiente comando y prepara lo que necesita en segundo plano
+    (genera su plan con Llama y lo deja en el cache de neo_cerebro).
+
+    Args:
+        momento (datetime): Momento de la predicción (None = ahora)
+        esperar (bool): Esperar a que termine la precarga
+
+    Returns:
+        str: Comando precargado, o None si no hubo predicción segura
+    """
+    predicciones = predecir_siguiente(momento)
+
+    with _lock:
+        _prediccion_pendiente[:] = [cmd for cmd, _ in predicciones]
+        # Antes de volver a precargar (y reiniciar su marca de servido)
+        _resolver_precargas(final=False)
+
+    if not predicciones:
+        return None
+
+    comando, probabilidad = predicciones[0]
+    if probabilidad < PROBABILIDAD_MIN_PRECARGA:
+        return None
+
+    try:
+        import neo_cerebro
+    except ImportError:
+        return None
+
+    def _precargar():
+        try:
+            if neo_cerebro.precalcular_plan(comando):
+                with _lock:
+                    _estadisticas['precargas'] += 1
+                    _precargas_pendientes.add(comando)
+        except Exception as e:
+            print(f"⚠️ Error en precarga: {e}")
+
+    hilo = threading.Thread(target=_precargar, daemon=True)
+    hilo.start()
+    if esperar:
+        hilo.join()
+
+    return comando
+
+
+# ==========================================
+# ESTADÍSTICAS
+# ==========================================
+
+def obtener_estadisticas():
+    """
+    Devuelve precisión de las predicciones y eficiencia de las precargas.
+
+    Returns:
+        dict: Conteos + 'precision_top1', 'precision_topk', 'tasa_desperdicio'
+    """
+    with _lock:
+        _resolver_precargas(final=False)
+        stats = dict(_estadisticas)
+
+    evaluadas = stats['predicciones']
+    resueltas = stats['precargas_usadas'] + stats['precargas_desperdiciadas']
+
+    stats['precision_top1'] = stats['aciertos_top1'] / evaluadas if evaluadas else 0.0
+    stats['precision_topk'] = stats['aciertos_topk'] / evaluadas if evaluadas else 0.0
+    stats['tasa_desperdicio'] = stats['precargas_desperdiciadas'] / resueltas if resueltas else 0.0
+    return stats
+
+
+def evaluar_historial(memoria=None):
+    """
+    Evalúa el predictor "hacia atrás" sobre un historial: para cada
+    comando predice con lo aprendido hasta ese momento y compara.
+
+    Args:
+        memoria (list): Entradas como las de neo_memoria.json (None = cargar)
+
+    Returns:
+        dict: {'evaluados', 'precision_top1', 'precision_topk'}
+    """
+    global _ultimo_momento, _cargado
+
+    memoria = cargar_memoria() if memoria is None else memoria
+
+    # Evaluar con un modelo vacío sin tocar el modelo real
+    tablas = (_trigramas, _bigramas, _franjas)
+    with _lock:
+        respaldo = [dict(tabla) for tabla in tablas]
+        respaldo_estado = (list(_historial), _ultimo_momento, _cargado)
+        for tabla in tablas:
+            tabla.clear()
+        _historial.clear()
+        _ultimo_momento = None
+        _cargado = True
+
+    evaluados = top1 = topk = 0
+
+    try:
+        for item in memoria:
+            try:
+                momento = datetime.strptime(item['timestamp'], FORMATO_FECHA)
+            except (KeyError, ValueError):
+                continue
+
+            real = normalizar_comando(item.get('comando', ""))
+            predicciones = [cmd for cmd, _ in predecir_siguiente(momento)]
+
+            if predicciones:
+                evaluados += 1
+                top1 += predicciones[0] == real
+                topk += real in predicciones
+
+            with _lock:
+                _aprender(real, momento)
+    finally:
+        with _lock:
+            for tabla, guardada in zip(tablas, respaldo):
+                tabla.clear()
+                tabla.update(guardada)
+            _historial[:], _ultimo_momento, _cargado = respaldo_estado
+
+    return {
+        'evaluados': evaluados,
+        'precision_top1': top1 / evaluados if evaluados else 0.0,
+        'precision_topk': topk / evaluados if evaluados else 0.0,
+    }
+
+
+# ==========================================
+# PRUEBA RÁPIDA
+# ==========================================
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("NEO - Predicción de comandos")
+    print("=" * 60)
+
+    resultado = evaluar_historial()
+    print(f"\nEvaluado sobre {resultado['evaluados']} comandos del historial:")
+    print(f"   Acierto top-1: {resultado['precision_top1']:.0%}")
+    print(f"   Acierto top-{TOP_K}: {resultado['precision_topk']:.0%}")
+
+    print("\nPróximos comandos más probables ahora:")
+    for cmd, p in predecir_siguiente():
+        print(f"   {p:5.0%}  {cmd}")
@@ -0,0 +1,978 @@
+# neo_stt.py - Reconocimiento de voz (voz → texto) con motores intercambiables
+"""
+Un solo punto de entrada para transcribir, con el motor elegido por
+configuración:
+
+- 'faster-whisper': CTranslate2 con pesos int8 en CPU (pip install faster-whisper).
+                    Mismo modelo Whisper, varias veces más rápido y con
+                    menos memoria que FP32.
+- 'whisper.cpp':    bindings de whisper.cpp (pip install pywhispercpp)
+- 'whisper':        openai-whisper en FP32 (lo que se usaba hasta ahora)
+
+Todos comparten la misma llamada:
+    motor = neo_stt.obtener_motor()
+    resultado = motor.transcribir(audio, idioma="es", prompt_inicial=None)
+    resultado['texto']       # str
+    resultado['segmentos']   # [{'inicio', 'fin', 'texto', 'avg_logprob', 'no_speech_prob'}, ...]
+
+`audio` es float32 a 16 kHz (neo_audio.a_float32), int16 o la ruta de
+un archivo. El motor se elige con MOTOR_STT o la variable de entorno
+NEO_STT; el modelo con MODELO_STT / NEO_STT_MODELO.
+
+Importar este módulo no carga nada. Cada modelo se carga una sola vez
+por proceso: en la primera transcripción, o antes y sin bloquear con
+precargar(). En modo solo texto, descargar_si_inactivo() libera la
+memoria si no se transcribe nada durante un rato:
+    neo_stt.precargar()                 # al activar el modo voz
+    neo_stt.descargar_si_inactivo()     # al pasar a modo texto
+
+Transcribir mientras se habla (hipótesis parciales + texto final):
+    muestras, final = neo_stt.transcribir_mientras_habla(al_parcial=print)
+
+Re-transcribir solo los segmentos con poca confianza con un modelo más
+grande (que se carga la primera vez que hace falta):
+    resultado = neo_stt.transcribir_selectivo(audio)
+    resultado['redecodificados'], resultado['segundos_extra']
+
+Comparar motores (RTF y WER con un corpus de comandos en español):
+    python benchmark_voz.py stt --corpus corpus_stt/
+"""
+
+import gc
+import glob
+import importlib.util
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+
+import numpy as np
+
+import neo_audio
+import neo_vad
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+
+MOTOR_STT = os.environ.get("NEO_STT", "auto")          # 'auto', 'faster-whisper', 'whisper.cpp' o 'whisper'
+MODELO_STT = os.environ.get("NEO_STT_MODELO", "base")  # tiny, base, small... (o ruta a un modelo convertido)
+IDIOMA_STT = "es"
+TIPO_COMPUTO_CT2 = "int8"    # faster-whisper en CPU: 'int8', 'int8_float32' o 'float32'
+HILOS_STT = 0                # Hilos de CPU (0 = lo que decida cada motor)
+BEAM_STT = 1                 # 1 = búsqueda voraz (lo que hace openai-whisper por defecto)
+
+# Orden de preferencia con 'auto' (el más rápido en CPU primero)
+ORDEN_AUTO = ['faster-whisper', 'whisper.cpp', 'whisper']
+
+# Memoria
+DESCARGA_INACTIVO = 300      # Segundos sin transcribir para liberar el modelo en modo texto
+
+# Transcripción mientras se habla (TranscripcionIncremental)
+MIN_PARCIAL = 0.6            # Segundos de frase antes de la primera hipótesis
+PASO_PARCIAL = 0.5           # Audio nuevo mínimo entre dos hipótesis parciales
+VENTANA_PARCIAL = 10.0       # Ventana máxima; al pasarla se confirma el texto y se avanza
+
+# Re-transcripción selectiva (transcribir_selectivo)
+MODELO_STT_PRECISO = os.environ.get("NEO_STT_PRECISO", "small")  # Modelo para los tramos dudosos
+BEAM_PRECISO = 5             # Búsqueda en haz al re-transcribir
+MIN_LOGPROB = -0.8           # avg_logprob por debajo de esto = segmento dudoso
+MAX_NO_VOZ = 0.5             # no_speech_prob por encima de esto = segmento dudoso
+MARGEN_TRAMO = 0.2           # Segundos de audio a cada lado de un tramo dudoso
+
+
+def _segmento(inicio, fin, texto, avg_logprob=None, no_speech_prob=None):
+    return {'inicio': float(inicio), 'fin': float(fin), 'texto': texto.strip(),
+            'avg_logprob': avg_logprob, 'no_speech_prob': no_speech_prob}
+
+
+def _preparar_audio(audio):
+    """Ruta → tal cual; int16 → float32; float32 → tal cual"""
+    if isinstance(audio, str):
+        return audio
+    audio = np.asarray(audio)
+    if audio.dtype == np.int16:
+        return neo_audio.a_float32(audio)
+    return audio.astype(np.float32, copy=False)
+
+
+# ==========================================
+# MOTORES
+# ==========================================
+
+class MotorSTT:
+    """
+    Interfaz de un motor de transcripción.
+
+    El modelo se carga en la primera transcripción (o con cargar());
+    cargar(), transcribir() y descargar() comparten un lock, así que un
+    mismo motor se puede usar desde varios hilos: quien transcribe
+    mientras otro hilo carga el modelo simplemente espera.
+
+    Args:
+        modelo (str): Nombre del modelo Whisper (tiny, base, small...) o ruta
+    """
+
+    nombre = 'ninguno'
+    modulo = None       # Paquete que necesita (para stt_disponible sin importarlo)
+
+    def __init__(self, modelo=None):
+        self.modelo = modelo or MODELO_STT
+        self._modelo = None
+        self._lock = threading.RLock()
+        self.segundos_carga = None      # Lo que tardó la última carga
+        self.cargas = 0
+        self.ultimo_uso = None          # time.time() de la última transcripción (o carga)
+
+    def disponible(self):
+        """True si la librería del motor está instalada"""
+        return False
+
+    def cargado(self):
+        return self._modelo is not None
+
+    def cargar(self):
+        """Carga el modelo si todavía no está en memoria"""
+        with self._lock:
+            if self._modelo is None:
+                inicio = time.perf_counter()
+                self._modelo = self._cargar()
+                self.segundos_carga = time.perf_counter() - inicio
+                self.cargas += 1
+                self.ultimo_uso = time.time()
+                print(f"✓ Whisper cargado ({self.nombre}, {self.modelo}) en {self.segundos_carga:.1f}s")
+        return self
+
+    def _cargar(self):
+        """Carga y devuelve el modelo (la interfaz no tiene ninguno)"""
+        return None
+
+    def transcribir(self, audio, idioma=IDIOMA_STT, prompt_inicial=None, **opciones):
+        """
+        Transcribe `audio`.
+
+        Args:
+            audio: np.ndarray float32/int16 a 16 kHz o ruta de un archivo
+            idioma (str): Código del idioma ('es'); None = detectar
+            prompt_inicial (str): Texto que orienta al modelo (vocabulario,
+                                  nombres de programas...)
+            **opciones: Opciones de decodificación con los nombres de
+                        openai-whisper (temperature, logprob_threshold,
+                        no_speech_threshold, beam_size...); cada motor
+                        traduce las que entiende e ignora el resto
+
+        Returns:
+            dict: {'texto', 'segmentos', 'motor', 'modelo', 'segundos_proceso'}
+        """
+        audio = _preparar_audio(audio)
+        with self._lock:
+            self.cargar()
+            inicio = time.perf_counter()
+            segmentos = self._transcribir(audio, idioma, prompt_inicial, opciones)
+            segundos = time.perf_counter() - inicio
+            self.ultimo_uso = time.time()
+
+        return {
+            'texto': ' '.join(s['texto'] for s in segmentos if s['texto']).strip(),
+            'segmentos': segmentos,
+            'motor': self.nombre,
+            'modelo': self.modelo,
+            'segundos_proceso': segundos,
+        }
+
+    def _transcribir(self, audio, idioma, prompt_inicial, opciones):
+        """Lista de segmentos (ver _segmento); la interfaz no reconoce nada"""
+        return []
+
+    def descargar(self, inactivo=None):
+        """
+        Libera el modelo (se vuelve a cargar en la próxima transcripción).
+
+        Args:
+            inactivo (float): Solo si lleva al menos estos segundos sin usarse
+
+        Returns:
+            bool: True si se liberó
+        """
+        with self._lock:
+            if self._modelo is None:
+                return False
+            if inactivo is not None and time.time() - (self.ultimo_uso or 0) < inactivo:
+                return False
+            self._modelo = None
+        gc.collect()
+        return True
+
+    def estado(self):
+        return {
+            'motor': self.nombre,
+            'modelo': self.modelo,
+            'cargado': self.cargado(),
+            'cargas': self.cargas,
+            'segundos_carga': self.segundos_carga,
+            'inactivo': time.time() - self.ultimo_uso if self.ultimo_uso else None,
+        }
+
+
+class MotorWhisper(MotorSTT):
+    """openai-whisper en CPU (FP32)"""
+
+    nombre = 'whisper'
+    modulo = 'whisper'
+
+    def disponible(self):
+        try:
+            import whisper  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _cargar(self):
+        import whisper
+        return whisper.load_model(self.modelo, device="cpu")
+
+    def _transcribir(self, audio, idioma, prompt_inicial, opciones):
+        opciones = dict(opciones)
+        if opciones.get('beam_size') == 1:
+            opciones.pop('beam_size')          # 1 haz = voraz, que es lo que hace sin beam_size
+        resultado = self._modelo.transcribe(audio, language=idioma, initial_prompt=prompt_inicial,
+                                            fp16=False, **opciones)
+        return [_segmento(s['start'], s['end'], s['text'], s.get('avg_logprob'), s.get('no_speech_prob'))
+                for s in resultado['segments']]
+
+
+class MotorFasterWhisper(MotorSTT):
+    """faster-whisper (CTranslate2) con cuantización int8 en CPU"""
+
+    nombre = 'faster-whisper'
+    modulo = 'faster_whisper'
+
+    # Nombres de openai-whisper → faster-whisper
+    OPCIONES = {
+        'temperature': 'temperature',
+        'beam_size': 'beam_size',
+        'best_of': 'best_of',
+        'compression_ratio_threshold': 'compression_ratio_threshold',
+        'logprob_threshold': 'log_prob_threshold',
+        'no_speech_threshold': 'no_speech_threshold',
+        'condition_on_previous_text': 'condition_on_previous_text',
+    }
+
+    def disponible(self):
+        try:
+            import faster_whisper  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _cargar(self):
+        from faster_whisper import WhisperModel
+        return WhisperModel(self.modelo, device="cpu", compute_type=TIPO_COMPUTO_CT2,
+                            cpu_threads=HILOS_STT)
+
+    def _transcribir(self, audio, idioma, prompt_inicial, opciones):
+        parametros = {'beam_size': BEAM_STT}
+        parametros.update({self.OPCIONES[k]: v for k, v in opciones.items() if k in self.OPCIONES})
+
+        # El VAD interno de faster-whisper no hace falta: neo_vad ya recortó la frase
+        segmentos, _ = self._modelo.transcribe(audio, language=idioma, initial_prompt=prompt_inicial,
+                                               vad_filter=False, **parametros)
+        # segmentos es un generador: la decodificación ocurre al recorrerlo
+        return [_segmento(s.start, s.end, s.text, s.avg_logprob, s.no_speech_prob) for s in segmentos]
+
+
+class MotorWhisperCpp(MotorSTT):
+    """whisper.cpp mediante pywhispercpp (descarga el modelo ggml la primera vez)"""
+
+    nombre = 'whisper.cpp'
+    modulo = 'pywhispercpp'
+
+    OPCIONES = {
+        'temperature': 'temperature',
+        'logprob_threshold': 'logprob_thold',
+        'no_speech_threshold': 'no_speech_thold',
+    }
+
+    def disponible(self):
+        try:
+            import pywhispercpp.model  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _cargar(self):
+        from pywhispercpp.model import Model
+        parametros = {'print_progress': False, 'print_realtime': False}
+        if HILOS_STT:
+            parametros['n_threads'] = HILOS_STT
+        return Model(self.modelo, **parametros)
+
+    def _transcribir(self, audio, idioma, prompt_inicial, opciones):
+        parametros = {self.OPCIONES[k]: v for k, v in opciones.items() if k in self.OPCIONES}
+        if idioma:
+            parametros['language'] = idioma
+        if prompt_inicial:
+            parametros['initial_prompt'] = prompt_inicial
+
+        segmentos = self._modelo.transcribe(audio, **parametros)
+        # t0/t1 vienen en centésimas de segundo; whisper.cpp no expone logprob por segmento
+        return [_segmento(s.t0 / 100.0, s.t1 / 100.0, s.text) for s in segmentos]
+
+
+MOTORES_STT = {
+    'faster-whisper': MotorFasterWhisper,
+    'whisper.cpp': MotorWhisperCpp,
+    'whisper': MotorWhisper,
+}
+
+
+def crear_motor(nombre=None, modelo=None):
+    """
+    Motor según `nombre` (None = MOTOR_STT). 'auto' usa el primero
+    instalado en orden faster-whisper → whisper.cpp → whisper.
+
+    Returns:
+        MotorSTT (sin cargar) o None si no hay ninguno instalado
+    """
+    nombre = nombre or MOTOR_STT
+    candidatos = ORDEN_AUTO if nombre == 'auto' else [nombre]
+
+    for candidato in candidatos:
+        clase = MOTORES_STT.get(candidato)
+        if clase is None:
+            continue
+        motor = clase(modelo)
+        if motor.disponible():
+            return motor
+
+    if nombre != 'auto':
+        print(f"⚠️ Motor STT '{nombre}' no disponible")
+        return crear_motor('auto', modelo)
+    return None
+
+
+_motores = {}
+_lock_motores = threading.Lock()
+
+
+def obtener_motor(nombre=None, modelo=None):
+    """
+    Motor compartido por (nombre, modelo): cada modelo se carga una
+    sola vez por proceso aunque lo pidan varios módulos.
+
+    Returns:
+        MotorSTT o None si no hay ningún motor instalado
+    """
+    clave = (nombre or MOTOR_STT, modelo or MODELO_STT)
+    with _lock_motores:
+        if clave not in _motores:
+            motor = crear_motor(*clave)
+            if motor is None:
+                return None
+            _motores[clave] = motor
+        return _motores[clave]
+
+
+def precargar(nombre=None, modelo=None):
+    """
+    Empieza a cargar el modelo en un hilo y vuelve enseguida. Si alguien
+    transcribe antes de que termine, espera a la carga en curso (no se
+    carga dos veces).
+
+    Returns:
+        MotorSTT o None si no hay ningún motor instalado
+    """
+    motor = obtener_motor(nombre, modelo)
+    if motor is not None and not motor.cargado():
+        def cargar():
+            try:
+                motor.cargar()
+            except Exception as e:
+                print(f"❌ Error al cargar Whisper: {e}")
+
+        threading.Thread(target=cargar, name="NEO-stt-carga", daemon=True).start()
+    return motor
+
+
+_inactividad = {'segundos': None}      # None = no descargar (modo voz)
+_hilo_inactividad = None
+
+
+def descargar_si_inactivo(segundos=DESCARGA_INACTIVO):
+    """
+    Modo solo texto: libera los modelos que lleven `segundos` sin
+    transcribir. Se desactiva con mantener_cargado().
+    """
+    global _hilo_inactividad
+    with _lock_motores:
+        _inactividad['segundos'] = segundos
+        if _hilo_inactividad is None:
+            _hilo_inactividad = threading.Thread(target=_vigilar_inactividad,
+                                                 name="NEO-stt-inactividad", daemon=True)
+            _hilo_inactividad.start()
+
+
+def mantener_cargado():
+    """Modo voz: los modelos cargados se quedan en memoria"""
+    _inactividad['segundos'] = None
+
+
+def _vigilar_inactividad():
+    while True:
+        segundos = _inactividad['segundos']
+        time.sleep(min(30.0, segundos / 4) if segundos else 5.0)
+        if not _inactividad['segundos']:
+            continue
+        with _lock_motores:
+            motores = list(_motores.values())
+        for motor in motores:
+            segundos = _inactividad['segundos']
+            if segundos and motor.descargar(inactivo=segundos):
+                print(f"💤 Whisper ({motor.nombre}, {motor.modelo}) descargado por inactividad")
+
+
+def estado_motores():
+    """Estado de cada motor compartido (cargado, tiempo de carga, inactividad)"""
+    with _lock_motores:
+        return [motor.estado() for motor in _motores.values()]
+
+
+def stt_disponible():
+    """
+    ¿Hay algún motor instalado? Solo busca los paquetes (importlib.util.find_spec),
+    sin importarlos: sirve para decidir al arrancar sin cargar torch/ctranslate2
+    """
+    return any(clase.modulo and importlib.util.find_spec(clase.modulo) is not None
+               for clase in MOTORES_STT.values())
+
+
+# ==========================================
+# TRANSCRIPCIÓN MIENTRAS SE HABLA
+# ==========================================
+
+def _prefijo_comun(a, b):
+    """Palabras iniciales en las que coinciden dos hipótesis (se comparan normalizadas)"""
+    comun = 0
+    for x, y in zip(a, b):
+        if normalizar_texto(x) != normalizar_texto(y):
+            break
+        comun += 1
+    return comun
+
+
+class TranscripcionIncremental:
+    """
+    Transcribe una frase mientras todavía se está grabando.
+
+    Un hilo decodifica la ventana [ancla, último audio] cada vez que
+    llegan al menos `paso` segundos nuevos (si va atrasado salta
+    directamente al audio más reciente). Cada hipótesis se compara con
+    la anterior: las palabras en las que coinciden dos decodificaciones
+    seguidas son el texto "estable". Si la ventana pasa de `ventana`
+    segundos se confirman todos los segmentos menos el último y la
+    ventana siguiente empieza en ese segmento, que se vuelve a
+    decodificar (solapamiento) con el texto confirmado como contexto.
+
+    al_parcial recibe un dict por hipótesis:
+        texto       - hipótesis completa hasta ahora
+        estable     - parte que no cambió entre dos hipótesis seguidas
+        cerrado     - True si toda la hipótesis es estable
+        silencio    - segundos sin voz al final del audio decodificado
+                      (según el VAD); con cerrado y silencio suficiente
+                      el usuario hizo una pausa real y se puede actuar
+        segundos_audio / segundos_proceso
+
+    Args:
+        motor (MotorSTT): None = obtener_motor()
+        buffer (neo_audio.BufferAudio): De dónde se lee el audio
+        idioma, prompt_inicial: Como en MotorSTT.transcribir()
+        al_parcial (callable): Se llama desde el hilo de transcripción
+    """
+
+    def __init__(self, motor=None, buffer=None, idioma=IDIOMA_STT, prompt_inicial=None,
+                 al_parcial=None, paso=PASO_PARCIAL, ventana=VENTANA_PARCIAL, minimo=MIN_PARCIAL):
+        self.motor = motor or obtener_motor()
+        self.buffer = buffer or neo_audio.obtener_captura().buffer
+        self.idioma = idioma
+        self.prompt_inicial = prompt_inicial
+        self.al_parcial = al_parcial
+        self.rate = self.buffer.rate
+        self.paso = int(paso * self.rate)
+        self.ventana = int(ventana * self.rate)
+        self.minimo = int(minimo * self.rate)
+
+        self.inicio = None
+        self.fin = None
+        self.parciales = 0
+        self._ancla = None              # Inicio de la ventana actual
+        self._confirmado = []           # Palabras de ventanas anteriores
+        self._anterior = []             # Palabras de la hipótesis anterior (ventana actual)
+        self._ultimo = None             # (hasta, palabras) de la última decodificación
+        self._hasta = 0
+        self._ultima_voz = None         # Fin del último bloque con voz (lo dice el VAD)
+        self._decodificado = 0
+        self._detener = False
+        self._cond = threading.Condition()
+        self._hilo = None
+
+    def activa(self):
+        return self._hilo is not None
+
+    def empezar(self, inicio, parciales=True):
+        """
+        La frase empieza en la posición absoluta `inicio`. Con
+        parciales=False no se arranca el hilo: solo se decodifica la
+        ventana final en finalizar().
+        """
+        self.inicio = self._ancla = self._hasta = self._decodificado = inicio
+        if parciales:
+            self._hilo = threading.Thread(target=self._ciclo, name="NEO-stt-parcial", daemon=True)
+            self._hilo.start()
+        return self
+
+    def avanzar(self, posicion, ultima_voz=None):
+        """Hay audio grabado hasta `posicion` (se llama por cada bloque)"""
+        with self._cond:
+            self._hasta = posicion
+            if ultima_voz is not None:
+                self._ultima_voz = ultima_voz
+            self._cond.notify()
+
+    def _ciclo(self):
+        while True:
+            with self._cond:
+                while not self._detener and (self._hasta - self._decodificado < self.paso or
+                                             self._hasta - self.inicio < self.minimo):
+                    self._cond.wait()
+                if self._detener:
+                    return
+                hasta = self._hasta
+                ultima_voz = self._ultima_voz
+
+            try:
+                resultado = self._decodificar(hasta)
+            except Exception as e:
+                print(f"⚠️ Error en transcripción parcial: {e}")
+                return
+
+            palabras = resultado['texto'].split()
+            comun = _prefijo_comun(self._anterior, palabras)
+            self._anterior = palabras
+            self.parciales += 1
+            if self.al_parcial:
+                self.al_parcial({
+                    'texto': ' '.join(self._confirmado + palabras),
+                    'estable': ' '.join(self._confirmado + palabras[:comun]),
+                    'cerrado': bool(palabras) and comun == len(palabras),
+                    'silencio': max(0, hasta - ultima_voz) / self.rate if ultima_voz is not None else 0.0,
+                    'final': False,
+                    'segundos_audio': (hasta - self.inicio) / self.rate,
+                    'segundos_proceso': resultado['segundos_proceso'],
+                })
+
+    def _decodificar(self, hasta):
+        """Transcribe [ancla, hasta) y, si la ventana es larga, confirma y avanza el ancla"""
+        contexto = ' '.join(([self.prompt_inicial] if self.prompt_inicial else []) + self._confirmado)
+        audio = neo_audio.a_float32(self.buffer.copiar(self._ancla, hasta))
+        resultado = self.motor.transcribir(audio, self.idioma, contexto[-200:] or None)
+
+        self._decodificado = hasta
+        self._ultimo = (hasta, resultado['texto'].split())
+
+        segmentos = [seg for seg in resultado['segmentos'] if seg['texto']]
+        if hasta - self._ancla > self.ventana and len(segmentos) > 1:
+            for seg in segmentos[:-1]:
+                self._confirmado += seg['texto'].split()
+            self._ancla += int(segmentos[-1]['inicio'] * self.rate)
+            ultimo = segmentos[-1]['texto']
+            resultado = dict(resultado, texto=ultimo)
+            self._ultimo = (hasta, ultimo.split())
+            self._anterior = []
+        return resultado
+
+    def finalizar(self, fin=None):
+        """
+        La frase terminó en `fin` (None = self.fin, lo que fijó
+        grabar_transcribiendo): espera la hipótesis en curso y, si ya
+        cubría todo el audio, la usa como final; si no, decodifica solo la
+        última ventana.
+
+        Returns:
+            dict: {'texto', 'final': True, 'reutilizado', 'parciales',
+                   'segundos_audio', 'segundos_finales'}
+        """
+        self._parar()
+        fin = self.fin if fin is None else fin
+        inicio = time.perf_counter()
+
+        reutilizado = self._ultimo is not None and self._ultimo[0] >= fin
+        if reutilizado:
+            palabras = self._ultimo[1]
+        else:
+            palabras = self._decodificar(fin)['texto'].split()
+
+        return {
+            'texto': ' '.join(self._confirmado + palabras),
+            'final': True,
+            'reutilizado': reutilizado,
+            'parciales': self.parciales,
+            'segundos_audio': (fin - self.inicio) / self.rate,
+            'segundos_finales': time.perf_counter() - inicio,
+        }
+
+    def cancelar(self):
+        self._parar()
+
+    def _parar(self):
+        with self._cond:
+            self._detener = True
+            self._cond.notify()
+        if self._hilo:
+            self._hilo.join()
+            self._hilo = None
+
+
+def grabar_transcribiendo(timeout=30, lector=None, motor=None, al_parcial=None, al_empezar=None,
+                          idioma=IDIOMA_STT, prompt_inicial=None, parciales=True):
+    """
+    Graba una frase con neo_vad.grabar_frase mientras un
+    TranscripcionIncremental la va transcribiendo. El texto final se pide
+    aparte con incremental.finalizar() (puede hacerlo otro hilo mientras
+    este ya graba la frase siguiente).
+
+    Con parciales=False no se decodifica nada mientras se graba (ej: sin
+    detector de activación, donde cualquier conversación de fondo abriría
+    frases): finalizar() transcribe solo la ventana final.
+
+    Returns:
+        tuple: (muestras int16, TranscripcionIncremental) o (None, None)
+    """
+    if lector is None:
+        lector = neo_audio.obtener_captura().lector()
+    incremental = TranscripcionIncremental(motor, lector.buffer, idioma, prompt_inicial, al_parcial)
+
+    def avanzar(inicio, posicion, ultima_voz):
+        if not incremental.activa():
+            incremental.empezar(inicio)
+        incremental.avanzar(posicion, ultima_voz)
+
+    try:
+        muestras = neo_vad.grabar_frase(timeout=timeout, lector=lector, al_empezar=al_empezar,
+                                        al_avanzar=avanzar if parciales else None)
+    except Exception:
+        incremental.cancelar()
+        raise
+
+    if muestras is None or not len(muestras):
+        incremental.cancelar()
+        return None, None
+
+    if not incremental.activa():
+        incremental.empezar(lector.posicion - len(muestras), parciales=False)
+    incremental.fin = incremental.inicio + len(muestras)
+    return muestras, incremental
+
+
+def transcribir_mientras_habla(timeout=30, lector=None, motor=None, al_parcial=None, al_empezar=None,
+                               idioma=IDIOMA_STT, prompt_inicial=None):
+    """
+    Graba una frase y la va transcribiendo mientras se habla. El texto
+    final sale justo después del corte (muchas veces sin decodificar nada
+    más: ver TranscripcionIncremental).
+
+    Returns:
+        tuple: (muestras int16, dict final) o (None, None) si no hubo frase
+    """
+    muestras, incremental = grabar_transcribiendo(timeout, lector, motor, al_parcial, al_empezar,
+                                                  idioma, prompt_inicial)
+    if muestras is None:
+        return None, None
+    return muestras, incremental.finalizar()
+
+
+# ==========================================
+# RE-TRANSCRIPCIÓN SELECTIVA
+# ==========================================
+# Whisper da con cada segmento su confianza: avg_logprob (probabilidad
+# media de los tokens) y no_speech_prob (probabilidad de que no haya
+# voz). En lugar de repetir toda la frase con un modelo más grande, solo
+# se vuelven a decodificar los segmentos dudosos. whisper.cpp no da
+# avg_logprob: con él solo se repiten las frases vacías.
+
+_selectivo = {'frases': 0, 'redecodificadas': 0, 'tramos': 0, 'segundos_extra': 0.0, 'max_extra': 0.0}
+_lock_selectivo = threading.Lock()
+
+
+def es_dudoso(segmento, min_logprob=MIN_LOGPROB, max_no_voz=MAX_NO_VOZ):
+    """True si el segmento tiene poca confianza (o quizá no es voz)"""
+    logprob = segmento.get('avg_logprob')
+    no_voz = segmento.get('no_speech_prob')
+    return ((logprob is not None and logprob < min_logprob)
+            or (no_voz is not None and no_voz > max_no_voz))
+
+
+def _logprob_medio(segmentos):
+    valores = [s['avg_logprob'] for s in segmentos if s.get('avg_logprob') is not None]
+    return float(np.mean(valores)) if valores else None
+
+
+def _tramos_dudosos(segmentos, segundos, min_logprob, max_no_voz, margen=MARGEN_TRAMO):
+    """[(inicio_s, fin_s, [índices]), ...] con los segmentos dudosos seguidos unidos en un tramo"""
+    tramos = []
+    for indice, segmento in enumerate(segmentos):
+        if not es_dudoso(segmento, min_logprob, max_no_voz):
+            continue
+        inicio = max(0.0, segmento['inicio'] - margen)
+        fin = min(segundos, segmento['fin'] + margen)
+        if tramos and tramos[-1][2][-1] == indice - 1:
+            tramos[-1] = (tramos[-1][0], fin, tramos[-1][2] + [indice])
+        else:
+            tramos.append((inicio, fin, [indice]))
+    return tramos
+
+
+def _sin_solapamiento(anterior, texto, siguiente, maximo=2):
+    """
+    El margen de un tramo puede volver a incluir palabras de los
+    segmentos vecinos: se quitan si repiten el final del anterior o el
+    principio del siguiente.
+    """
+    palabras = texto.split()
+    previas = normalizar_texto(anterior)
+    posteriores = normalizar_texto(siguiente)
+    for n in range(min(maximo, len(previas), len(palabras)), 0, -1):
+        if normalizar_texto(' '.join(palabras[:n])) == previas[-n:]:
+            palabras = palabras[n:]
+            break
+    for n in range(min(maximo, len(posteriores), len(palabras)), 0, -1):
+        if normalizar_texto(' '.join(palabras[-n:])) == posteriores[:n]:
+            palabras = palabras[:-n]
+            break
+    return ' '.join(palabras)
+
+
+def _motor_preciso(motor, modelo_preciso):
+    """Motor para los tramos dudosos: el modelo grande compartido (se carga al primer uso) o el mismo"""
+    if not modelo_preciso or modelo_preciso == motor.modelo:
+        return motor
+    return obtener_motor(motor.nombre, modelo_preciso) or motor
+
+
+def transcribir_selectivo(audio, motor=None, modelo_preciso=None, idioma=IDIOMA_STT, prompt_inicial=None,
+                          min_logprob=MIN_LOGPROB, max_no_voz=MAX_NO_VOZ, beam_preciso=BEAM_PRECISO,
+                          **opciones):
+    """
+    Transcribe con el motor rápido y vuelve a decodificar solo los
+    segmentos dudosos con el modelo preciso y búsqueda en haz. Si la
+    frase sale vacía (o el motor rápido falla) se repite entera. La
+    siguiente frase vuelve a empezar por el motor rápido.
+
+    Args:
+        audio: Como en MotorSTT.transcribir
+        motor (MotorSTT): Motor rápido (None = obtener_motor())
+        modelo_preciso (str): Modelo para los tramos dudosos (None =
+                              MODELO_STT_PRECISO; el mismo que `motor` =
+                              solo búsqueda en haz)
+        min_logprob / max_no_voz (float): Umbrales de segmento dudoso
+        beam_preciso (int): beam_size al re-transcribir
+        **opciones: Opciones de decodificación (para los dos motores)
+
+    Returns:
+        dict: El de MotorSTT.transcribir más 'redecodificados' (tramos),
+              'modelo_preciso' y 'segundos_extra' (re-transcripción,
+              incluida la carga del modelo preciso si hizo falta);
+              None si no hay motor
+    """
+    motor = motor or obtener_motor()
+    if motor is None:
+        return None
+    audio = _preparar_audio(audio)
+    if isinstance(audio, str):
+        audio = neo_audio.a_float32(neo_audio.cargar_wav(audio))
+    segundos = len(audio) / neo_audio.RATE
+
+    try:
+        resultado = motor.transcribir(audio, idioma, prompt_inicial, **opciones)
+        segmentos = list(resultado['segmentos'])
+        tramos = _tramos_dudosos(segmentos, segundos, min_logprob, max_no_voz)
+        if not resultado['texto']:
+            tramos = [(0.0, segundos, list(range(len(segmentos))))]
+    except Exception as e:
+        print(f"❌ Error en transcripción ({motor.nombre}, {motor.modelo}): {e}")
+        resultado = {'texto': '', 'segmentos': [], 'motor': motor.nombre, 'modelo': motor.modelo,
+                     'segundos_proceso': 0.0}
+        segmentos = []
+        tramos = [(0.0, segundos, [])]
+
+    inicio = time.perf_counter()
+    preciso = _motor_preciso(motor, modelo_preciso or MODELO_STT_PRECISO) if tramos else None
+    reemplazos = {}
+
+    for desde, hasta, indices in tramos:
+        previos = ' '.join(s['texto'] for s in segmentos[:indices[0]]) if indices else ''
+        siguientes = ' '.join(s['texto'] for s in segmentos[indices[-1] + 1:]) if indices else ''
+        trozo = audio[int(desde * neo_audio.RATE):int(hasta * neo_audio.RATE)]
+        contexto = ' '.join(t for t in (prompt_inicial, previos[-200:]) if t) or None
+        opciones_precisas = dict(opciones, beam_size=beam_preciso)
+
+        try:
+            nuevo = preciso.transcribir(trozo, idioma, contexto, **opciones_precisas)
+        except Exception as e:
+            if preciso is motor:
+                print(f"❌ Error al re-transcribir: {e}")
+                continue
+            # El modelo grande no carga (memoria, descarga...): el rápido con búsqueda en haz
+            print(f"⚠️ Modelo preciso no disponible ({e}), se usa {motor.modelo} con beam {beam_preciso}")
+            preciso = motor
+            try:
+                nuevo = preciso.transcribir(trozo, idioma, contexto, **opciones_precisas)
+            except Exception as e:
+                print(f"❌ Error al re-transcribir: {e}")
+                continue
+
+        viejos = [segmentos[i] for i in indices]
+        nuevos = [dict(s, inicio=s['inicio'] + desde, fin=s['fin'] + desde) for s in nuevo['segmentos']]
+        if nuevos:
+            texto = _sin_solapamiento(previos, ' '.join(s['texto'] for s in nuevos), siguientes)
+            nuevos = [dict(nuevos[0], fin=nuevos[-1]['fin'], texto=texto,
+                           avg_logprob=_logprob_medio(nuevos))] if texto else []
+
+        confianza_vieja, confianza_nueva = _logprob_medio(viejos), _logprob_medio(nuevos)
+        if (not any(s['texto'] for s in viejos) or confianza_vieja is None
+                or (confianza_nueva is not None and confianza_nueva > confianza_vieja)):
+            reemplazos[indices[0] if indices else 0] = (indices, nuevos)
+        elif not nuevos and all(s.get('no_speech_prob') and s['no_speech_prob'] > max_no_voz for s in viejos):
+            # El modelo grande tampoco oye nada: era ruido
+            reemplazos[indices[0]] = (indices, [])
+
+    if tramos and not segmentos and 0 in reemplazos:
+        segmentos = reemplazos[0][1]
+    else:
+        quitados = {i for indices, _ in reemplazos.values() for i in indices}
+        finales = []
+        for indice, segmento in enumerate(segmentos):
+            if indice in reemplazos:
+                finales.extend(reemplazos[indice][1])
+            elif indice not in quitados:
+                finales.append(segmento)
+        segmentos = finales
+
+    extra = time.perf_counter() - inicio if tramos else 0.0
+    with _lock_selectivo:
+        _selectivo['frases'] += 1
+        _selectivo['redecodificadas'] += bool(tramos)
+        _selectivo['tramos'] += len(tramos)
+        _selectivo['segundos_extra'] += extra
+        _selectivo['max_extra'] = max(_selectivo['max_extra'], extra)
+
+    return dict(resultado,
+                texto=' '.join(s['texto'] for s in segmentos if s['texto']).strip(),
+                segmentos=segmentos,
+                redecodificados=len(tramos),
+                modelo_preciso=preciso.modelo if preciso else None,
+                segundos_extra=extra)
+
+
+def estadisticas_selectivo():
+    """Cuántas frases necesitaron re-transcripción y cuánta latencia añadió"""
+    with _lock_selectivo:
+        stats = dict(_selectivo)
+    stats['fraccion_redecodificada'] = stats['redecodificadas'] / stats['frases'] if stats['frases'] else 0.0
+    stats['extra_por_frase'] = stats['segundos_extra'] / stats['frases'] if stats['frases'] else 0.0
+    stats['extra_por_redecodificada'] = (stats['segundos_extra'] / stats['redecodificadas']
+                                         if stats['redecodificadas'] else 0.0)
+    return stats
+
+
+# ==========================================
+# EVALUACIÓN: RTF Y WER
+# ==========================================
+# Corpus: archivo.wav + archivo.json con {"texto": "abre chrome"}
+
+def normalizar_texto(texto):
+    """Minúsculas, sin tildes ni puntuación (para comparar palabras)"""
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return re.sub(r"[^\w\s]", " ", texto).split()
+
+
+def errores_palabras(referencia, hipotesis):
+    """
+    Distancia de edición por palabras (sustituciones + borrados +
+    inserciones) entre dos textos ya normalizados como listas.
+    """
+    anterior = list(range(len(hipotesis) + 1))
+    for i, palabra in enumerate(referencia, 1):
+        actual = [i] + [0] * len(hipotesis)
+        for j, otra in enumerate(hipotesis, 1):
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + (palabra != otra))
+        anterior = actual
+    return anterior[-1]
+
+
+def tasa_error_palabras(referencia, hipotesis):
+    """WER de una frase: errores / palabras de la referencia"""
+    referencia, hipotesis = normalizar_texto(referencia), normalizar_texto(hipotesis)
+    return errores_palabras(referencia, hipotesis) / max(1, len(referencia))
+
+
+def cargar_corpus_stt(carpeta):
+    """[(archivo.wav, texto de referencia), ...] de los WAV con .json {"texto": ...}"""
+    corpus = []
+    for archivo in sorted(glob.glob(os.path.join(carpeta, '*.wav'))):
+        base = os.path.splitext(archivo)[0]
+        if not os.path.exists(base + '.json'):
+            continue
+        with open(base + '.json', encoding='utf-8') as f:
+            texto = json.load(f).get('texto')
+        if texto is not None:
+            corpus.append((archivo, texto))
+    return corpus
+
+
+def evaluar_stt(carpeta, motor, idioma=IDIOMA_STT, prompt_inicial=None):
+    """
+    Transcribe todo el corpus con `motor` y mide velocidad y errores.
+
+    Métricas:
+        rtf  - segundos de proceso / segundos de audio (< 1 = más rápido
+               que tiempo real); no incluye la carga del modelo
+        wer  - errores de palabras / palabras de referencia (todo el corpus)
+
+    Returns:
+        dict: Resumen (ver claves), o None si no hay archivos con texto
+    """
+    corpus = cargar_corpus_stt(carpeta)
+    if not corpus:
+        return None
+
+    motor.cargar()
+    errores = palabras = 0
+    segundos_audio = segundos_proceso = 0.0
+    frases = []
+
+    for archivo, referencia in corpus:
+        muestras = neo_audio.cargar_wav(archivo)
+        resultado = motor.transcribir(neo_audio.a_float32(muestras), idioma, prompt_inicial)
+
+        ref, hip = normalizar_texto(referencia), normalizar_texto(resultado['texto'])
+        errores += errores_palabras(ref, hip)
+        palabras += len(ref)
+        segundos_audio += neo_audio.duracion(muestras)
+        segundos_proceso += resultado['segundos_proceso']
+        frases.append({'archivo': os.path.basename(archivo), 'referencia': referencia,
+                       'texto': resultado['texto'], 'segundos_proceso': resultado['segundos_proceso']})
+
+    return {
+        'motor': motor.nombre,
+        'modelo': motor.modelo,
+        'archivos': len(corpus),
+        'segundos_audio': segundos_audio,
+        'segundos_proceso': segundos_proceso,
+        'segundos_carga': motor.segundos_carga,
+        'rtf': segundos_proceso / segundos_audio if segundos_audio else None,
+        'wer': errores / palabras if palabras else 0.0,
+        'frases': frases,
+    }
@@ -0,0 +1,381 @@
+# neo_tuberia.py - Tubería del modo voz (captura → transcripción → comandos)
+"""
+El modo voz era estrictamente en serie: escuchar → transcribir →
+planificar → ejecutar → volver a escuchar. Lo que se decía durante los
+10-15 s de Llama se perdía.
+
+Ahora cada etapa tiene su hilo y entre etapas hay colas acotadas:
+
+    captura ──cola_frases──▶ transcripción ──cola_comandos──▶ procesador
+
+- La captura vuelve a escuchar en cuanto termina una frase: el
+  micrófono nunca queda sordo mientras NEO trabaja.
+- Reglas de contrapresión:
+    * cola llena            → se descarta lo más viejo (lo más reciente
+                              es lo que el usuario espera)
+    * comando repetido      → se fusiona con el que ya estaba esperando
+    * "cancela" / "olvídalo" → se vacía la cola y se cancela el comando
+                              en curso (no se ejecuta su plan)
+    * comando viejo         → si esperó más de MAX_ESPERA_COMANDO no se
+                              ejecuta
+- estadisticas() da la profundidad de cada cola (actual, máxima, media),
+  descartes, fusiones y tiempos de espera.
+
+Las etapas son funciones que pasa quien usa la tubería (ver
+NEOAppIntegrado.run_modo_voz), así que este módulo no depende de la GUI.
+"""
+
+import collections
+import threading
+import time
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+
+TAM_COLA_FRASES = 3          # Frases grabadas esperando transcripción
+TAM_COLA_COMANDOS = 2        # Comandos esperando a Llama / ejecución
+MAX_ESPERA_COMANDO = 30.0    # Segundos; un comando más viejo ya no se ejecuta
+
+# Frases que cancelan lo pendiente (comparadas sin tildes ni puntuación)
+PALABRAS_CANCELAR = ['cancela', 'cancelar', 'cancelalo', 'olvidalo', 'dejalo', 'detente', 'para ya']
+
+
+# ==========================================
+# COLA ACOTADA CON MÉTRICAS
+# ==========================================
+
+class ColaAcotada:
+    """
+    Cola FIFO con capacidad fija que nunca bloquea al productor.
+
+    Args:
+        nombre (str): Para las métricas
+        capacidad (int): Elementos máximos esperando
+        fusionar (callable): fusionar(pendiente, nuevo) → True si `nuevo`
+                             ya está representado por `pendiente` (no se encola)
+        al_descartar (callable): Se llama con cada elemento que se tira
+                                 (para liberar recursos)
+    """
+
+    def __init__(self, nombre, capacidad, fusionar=None, al_descartar=None):
+        self.nombre = nombre
+        self.capacidad = capacidad
+        self.fusionar = fusionar
+        self.al_descartar = al_descartar
+
+        self._elementos = collections.deque()   # (momento de entrada, elemento)
+        self._cond = threading.Condition()
+
+        self.entradas = 0
+        self.salidas = 0
+        self.descartadas = 0
+        self.fusionadas = 0
+        self.maxima = 0
+        self._suma_profundidad = 0
+        self._espera_total = 0.0
+        self._espera_maxima = 0.0
+
+    def __len__(self):
+        return len(self._elementos)
+
+    def poner(self, elemento):
+        """
+        Encola sin bloquear.
+
+        Returns:
+            str: 'encolado', 'fusionado' o 'descartado_viejo' (se tiró el
+                 más antiguo para hacer lugar)
+        """
+        descartado = None
+        with self._cond:
+            if self.fusionar and any(self.fusionar(pendiente, elemento) for _, pendiente in self._elementos):
+                self.fusionadas += 1
+                return 'fusionado'
+
+            resultado = 'encolado'
+            if len(self._elementos) >= self.capacidad:
+                descartado = self._elementos.popleft()[1]
+                self.descartadas += 1
+                resultado = 'descartado_viejo'
+
+            self._elementos.append((time.time(), elemento))
+            self.entradas += 1
+            self.maxima = max(self.maxima, len(self._elementos))
+            self._suma_profundidad += len(self._elementos)
+            self._cond.notify()
+
+        if descartado is not None and self.al_descartar:
+            self.al_descartar(descartado)
+        return resultado
+
+    def sacar(self, timeout=None):
+        """Siguiente elemento o None si no llegó nada antes del timeout"""
+        with self._cond:
+            if not self._elementos and not self._cond.wait_for(lambda: self._elementos, timeout):
+                return None
+            momento, elemento = self._elementos.popleft()
+            espera = time.time() - momento
+            self.salidas += 1
+            self._espera_total += espera
+            self._espera_maxima = max(self._espera_maxima, espera)
+            return elemento
+
+    def vaciar(self):
+        """Saca todo lo pendiente (sin contarlo como salida)"""
+        with self._cond:
+            elementos = [elemento for _, elemento in self._elementos]
+            self._elementos.clear()
+
+        if self.al_descartar:
+            for elemento in elementos:
+                self.al_descartar(elemento)
+        return elementos
+
+    def estadisticas(self):
+        return {
+            'capacidad': self.capacidad,
+            'profundidad': len(self._elementos),
+            'profundidad_maxima': self.maxima,
+            'profundidad_media': self._suma_profundidad / self.entradas if self.entradas else 0.0,
+            'entradas': self.entradas,
+            'salidas': self.salidas,
+            'descartadas': self.descartadas,
+            'fusionadas': self.fusionadas,
+            'espera_media': self._espera_total / self.salidas if self.salidas else 0.0,
+            'espera_maxima': self._espera_maxima,
+        }
+
+
+# ==========================================
+# TUBERÍA DEL MODO VOZ
+# ==========================================
+
+def _normalizar(texto):
+    # Import diferido: neo_stt es opcional para usar solo ColaAcotada
+    import neo_stt
+    return ' '.join(neo_stt.normalizar_texto(texto))
+
+
+def es_cancelacion(texto):
+    """True si el comando es "cancela", "olvídalo"..."""
+    normalizado = _normalizar(texto)
+    return any(normalizado == palabra or normalizado.startswith(palabra + ' ')
+               for palabra in PALABRAS_CANCELAR)
+
+
+def _mismo_comando(pendiente, nuevo):
+    return _normalizar(pendiente['comando']) == _normalizar(nuevo['comando'])
+
+
+class TuberiaVoz:
+    """
+    Tres hilos (captura, transcripción, procesador) unidos por colas
+    acotadas.
+
+    Args:
+        capturar (callable): capturar(detener) → frase o None. Bloquea
+                             hasta grabar una frase (detener() = True
+                             para salir cuanto antes)
+        transcribir (callable): transcribir(frase) → comando (str) o None.
+                                Aquí se quita la palabra de activación
+        procesar (callable): procesar(comando, cancelado) planifica y
+                             ejecuta; `cancelado` es un threading.Event
+                             que se activa si el usuario cancela
+        al_evento (callable): al_evento(tipo, mensaje) para avisos
+                              ('descartado', 'fusionado', 'cancelado', 'caducado')
+        al_descartar_frase (callable): Libera una frase que se tiró
+    """
+
+    def __init__(self, capturar, transcribir, procesar, al_evento=None, al_descartar_frase=None,
+                 tam_frases=TAM_COLA_FRASES, tam_comandos=TAM_COLA_COMANDOS,
+                 max_espera=MAX_ESPERA_COMANDO):
+        self.capturar = capturar
+        self.transcribir = transcribir
+        self.procesar = procesar
+        self.al_evento = al_evento or (lambda tipo, mensaje: None)
+        self.max_espera = max_espera
+
+        self.cola_frases = ColaAcotada("frases", tam_frases, al_descartar=al_descartar_frase)
+        self.cola_comandos = ColaAcotada("comandos", tam_comandos, fusionar=_mismo_comando)
+
+        self._detener = threading.Event()
+        self._hilos = []
+        self._cancelado = threading.Event()
+        self._en_curso = None
+        # Cada cancelación sube la generación; un comando encolado antes
+        # ya no se ejecuta aunque el procesador lo hubiera sacado de la cola
+        self._lock_cancelacion = threading.Lock()
+        self._generacion = 0
+
+        self.frases = 0
+        self.comandos = 0
+        self.ejecutados = 0
+        self.cancelados = 0
+        self.caducados = 0
+        self.errores = 0
+        self._tiempo_ocupado = {'transcripcion': 0.0, 'procesador': 0.0}
+        self._inicio = None
+
+    # ---------- Control ----------
+
+    def iniciar(self):
+        if self._hilos:
+            return self
+        self._detener.clear()
+        self._inicio = time.time()
+        for nombre, objetivo in (('captura', self._ciclo_captura),
+                                 ('transcripcion', self._ciclo_transcripcion),
+                                 ('procesador', self._ciclo_procesador)):
+            hilo = threading.Thread(target=objetivo, name=f"NEO-voz-{nombre}", daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+        return self
+
+    def detener(self, timeout=2.0):
+        """Para los tres hilos (el comando en curso termina solo; se cancela)"""
+        self._detener.set()
+        self._cancelado.set()
+        for hilo in self._hilos:
+            hilo.join(timeout=timeout)
+        self._hilos = []
+        self.cola_frases.vaciar()
+        self.cola_comandos.vaciar()
+
+    def activa(self):
+        return any(hilo.is_alive() for hilo in self._hilos)
+
+    def detenida(self):
+        return self._detener.is_set()
+
+    def enviar_comando(self, comando, adelantado=False):
+        """
+        Encola un comando directamente (ej: uno adelantado con una
+        transcripción parcial desde la etapa de captura).
+        """
+        self.comandos += 1
+        resultado = self.cola_comandos.poner({'comando': comando, 'creado': time.time(),
+                                              'adelantado': adelantado,
+                                              'generacion': self._generacion})
+        if resultado == 'fusionado':
+            self.al_evento('fusionado', f"'{comando}' ya estaba en cola")
+        elif resultado == 'descartado_viejo':
+            self.al_evento('descartado', "Cola de comandos llena: se descartó el más viejo")
+        return resultado
+
+    def cancelar(self):
+        """Vacía los comandos pendientes y cancela el que se está procesando"""
+        with self._lock_cancelacion:
+            self._generacion += 1
+            cancelados = len(self.cola_comandos.vaciar())
+            if self._en_curso is not None:
+                self._cancelado.set()
+                cancelados += 1
+            self.cancelados += cancelados
+        return cancelados
+
+    # ---------- Etapas ----------
+
+    def _medir(self, etapa, funcion, *args):
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args)
+        finally:
+            self._tiempo_ocupado[etapa] += time.perf_counter() - inicio
+
+    def _ciclo_captura(self):
+        while not self._detener.is_set():
+            try:
+                frase = self.capturar(self._detener.is_set)
+            except Exception as e:
+                self.errores += 1
+                self.al_evento('error', f"Captura: {e}")
+                self._detener.wait(1.0)
+                continue
+
+            if frase is None:
+                continue
+            self.frases += 1
+            if self.cola_frases.poner(frase) == 'descartado_viejo':
+                self.al_evento('descartado', "Transcripción atrasada: se descartó la frase más vieja")
+
+    def _ciclo_transcripcion(self):
+        while not self._detener.is_set():
+            frase = self.cola_frases.sacar(timeout=0.5)
+            if frase is None:
+                continue
+            try:
+                comando = self._medir('transcripcion', self.transcribir, frase)
+            except Exception as e:
+                self.errores += 1
+                self.al_evento('error', f"Transcripción: {e}")
+                continue
+
+            if not comando:
+                continue
+            if es_cancelacion(comando):
+                cancelados = self.cancelar()
+                self.al_evento('cancelado', f"Cancelado ({cancelados} comando(s))")
+                continue
+            self.enviar_comando(comando)
+
+    def _ciclo_procesador(self):
+        while not self._detener.is_set():
+            item = self.cola_comandos.sacar(timeout=0.5)
+            if item is None:
+                continue
+
+            if time.time() - item['creado'] > self.max_espera:
+                self.caducados += 1
+                self.al_evento('caducado', f"'{item['comando']}' esperó demasiado, no se ejecuta")
+                continue
+
+            # Entrega bajo el mismo lock que cancelar(): si la cancelación
+            # llegó entre sacar() y aquí, el comando ya no se ejecuta
+            with self._lock_cancelacion:
+                if item['generacion'] != self._generacion or self._detener.is_set():
+                    self.cancelados += 1
+                    continue
+                self._cancelado = threading.Event()
+                self._en_curso = item
+            try:
+                self._medir('procesador', self.procesar, item['comando'], self._cancelado)
+                if not self._cancelado.is_set():
+                    self.ejecutados += 1
+            except Exception as e:
+                self.errores += 1
+                self.al_evento('error', f"Procesador: {e}")
+            finally:
+                with self._lock_cancelacion:
+                    self._en_curso = None
+
+    # ---------- Métricas ----------
+
+    def estadisticas(self):
+        """Profundidad de colas, descartes y ocupación (fracción del tiempo trabajando) de cada etapa"""
+        segundos = time.time() - self._inicio if self._inicio else 0.0
+        return {
+            'segundos': segundos,
+            'frases': self.frases,
+            'comandos': self.comandos,
+            'ejecutados': self.ejecutados,
+            'cancelados': self.cancelados,
+            'caducados': self.caducados,
+            'errores': self.errores,
+            'en_curso': self._en_curso['comando'] if self._en_curso else None,
+            'ocupacion': {etapa: (tiempo / segundos if segundos else 0.0)
+                          for etapa, tiempo in self._tiempo_ocupado.items()},
+            'colas': {cola.nombre: cola.estadisticas() for cola in (self.cola_frases, self.cola_comandos)},
+        }
+
+    def resumen(self):
+        """Una línea con las métricas principales (para el log)"""
+        stats = self.estadisticas()
+        frases, comandos = stats['colas']['frases'], stats['colas']['comandos']
+        return (f"{stats['frases']} frases, {stats['ejecutados']} ejecutados, "
+                f"{stats['cancelados']} cancelados, {stats['caducados']} caducados | "
+                f"cola frases máx {frases['profundidad_maxima']}/{frases['capacidad']} "
+                f"({frases['descartadas']} descartadas) | "
+                f"cola comandos máx {comandos['profundidad_maxima']}/{comandos['capacidad']} "
+                f"({comandos['descartadas']} descartados, {comandos['fusionadas']} fusionados, "
+                f"espera media {comandos['espera_media']:.1f}s)")
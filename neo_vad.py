@@ -0,0 +1,573 @@
+# neo_vad.py - Detección de voz (VAD) adaptativa
+"""
+Decide dónde empieza y dónde termina cada frase dentro del audio del
+micrófono compartido (neo_audio).
+
+Antes: volumen medio > 400 por bloque y 2.5 s fijos de silencio para
+cortar. Eso recortaba la primera sílaba, se disparaba en cuartos
+ruidosos y añadía 2.5 s muertos a cada comando. Ahora:
+
+- Piso de ruido adaptativo: el umbral sigue al ruido de la habitación
+- Pre-roll: la frase empieza unos cientos de ms ANTES del primer bloque
+  con voz (el buffer circular ya los tiene)
+- Hangover adaptativo: el silencio para cortar empieza corto y crece
+  solo si el que habla hace pausas largas entre palabras
+- Backends intercambiables: energía + cruces por cero (sin
+  dependencias), WebRTC VAD o Silero (CPU)
+
+Ejemplo:
+    muestras = neo_vad.grabar_frase(timeout=10)     # np.int16 o None
+
+Evaluación con un corpus etiquetado (ver evaluar_corpus):
+    python benchmark_voz.py vad --corpus corpus_vad/
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+import neo_audio
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+
+BACKEND_VAD = "auto"         # 'auto', 'silero', 'webrtc' o 'energia'
+UMBRAL_VOZ = 0.5             # Probabilidad de voz a partir de la cual un bloque es voz
+MIN_VOZ = 0.12               # Segundos de voz seguidos para confirmar que empezó una frase
+PRE_ROLL = 0.3               # Segundos previos al primer bloque con voz
+HANGOVER_MIN = 0.5           # Silencio mínimo para cerrar una frase
+HANGOVER_MAX = 1.5           # Silencio máximo (hablantes con pausas largas)
+HANGOVER_INICIAL = 0.8       # Punto de partida antes de conocer las pausas del hablante
+FACTOR_PAUSA = 1.5           # Hangover = pausas típicas del hablante x este factor
+COLA_FINAL = 0.15            # Audio que se conserva después de la última voz
+MAX_FRASE = 20.0             # Segundos máximos de una frase
+
+# Piso de ruido (dBFS)
+RUIDO_MIN_DB = -60.0         # No bajar de aquí (silencio digital)
+MARGEN_VOZ_DB = 10.0         # Voz = este margen por encima del ruido
+SUBIDA_RUIDO = 0.02          # Qué tan rápido sube el piso (por bloque sin voz)
+BAJADA_RUIDO = 0.3           # Qué tan rápido baja
+
+
+def energia_db(bloque):
+    """Energía RMS del bloque en dBFS"""
+    x = bloque.astype(np.float32)
+    rms = np.sqrt(np.mean(x * x)) / 32768.0 if len(x) else 0.0
+    return float(20 * np.log10(rms + 1e-10))
+
+
+def cruces_por_cero(bloque):
+    """Fracción de muestras en las que la señal cambia de signo"""
+    if len(bloque) < 2:
+        return 0.0
+    signos = np.signbit(bloque)
+    return float(np.count_nonzero(signos[1:] != signos[:-1])) / (len(bloque) - 1)
+
+
+# ==========================================
+# BACKENDS
+# ==========================================
+
+class BackendVAD:
+    """
+    Interfaz de un backend VAD.
+
+    probabilidad() recibe un bloque int16 (vista del buffer, no se debe
+    modificar) y el piso de ruido actual en dBFS, y devuelve 0-1.
+    """
+
+    nombre = 'ninguno'
+
+    def disponible(self):
+        return False
+
+    def probabilidad(self, bloque, ruido_db):
+        return 0.0
+
+    def reiniciar(self):
+        """Olvidar el estado interno (entre frases)"""
+        pass
+
+
+class BackendEnergia(BackendVAD):
+    """
+    Energía por encima del piso de ruido + cruces por cero. Sin
+    dependencias y casi sin CPU. Los cruces por cero descartan siseos
+    (ventiladores, ruido blanco), que tienen energía pero no son voz.
+    """
+
+    nombre = 'energia'
+
+    def __init__(self, margen_db=MARGEN_VOZ_DB, escala_db=3.0, zcr_max=0.35):
+        self.margen_db = margen_db
+        self.escala_db = escala_db
+        self.zcr_max = zcr_max
+
+    def disponible(self):
+        return True
+
+    def probabilidad(self, bloque, ruido_db):
+        exceso = energia_db(bloque) - ruido_db - self.margen_db
+        probabilidad = 1.0 / (1.0 + np.exp(-exceso / self.escala_db))
+        if cruces_por_cero(bloque) > self.zcr_max:
+            probabilidad *= 0.5
+        return float(probabilidad)
+
+
+class BackendUmbralFijo(BackendVAD):
+    """
+    La detección original (volumen medio > umbral). Solo se usa como
+    referencia al evaluar los demás backends.
+    """
+
+    nombre = 'umbral_fijo'
+
+    def __init__(self, umbral=400):
+        self.umbral = umbral
+
+    def disponible(self):
+        return True
+
+    def probabilidad(self, bloque, ruido_db):
+        return 1.0 if np.abs(bloque.astype(np.int32)).mean() > self.umbral else 0.0
+
+
+class BackendWebRTC(BackendVAD):
+    """WebRTC VAD (pip install webrtcvad) sobre tramas de 20 ms"""
+
+    nombre = 'webrtc'
+
+    def __init__(self, agresividad=2, rate=neo_audio.RATE):
+        self.agresividad = agresividad
+        self.rate = rate
+        self.trama = rate * 20 // 1000
+        self._vad = None
+
+    def disponible(self):
+        try:
+            import webrtcvad  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def probabilidad(self, bloque, ruido_db):
+        if self._vad is None:
+            import webrtcvad
+            self._vad = webrtcvad.Vad(self.agresividad)
+
+        tramas = len(bloque) // self.trama
+        if not tramas:
+            return 0.0
+        datos = bloque[:tramas * self.trama].tobytes()
+        tamano = self.trama * 2
+        voz = sum(self._vad.is_speech(datos[i * tamano:(i + 1) * tamano], self.rate) for i in range(tramas))
+        return voz / tramas
+
+
+class BackendSilero(BackendVAD):
+    """
+    Silero VAD en CPU (pip install silero-vad). Trabaja con ventanas de
+    512 muestras a 16 kHz; el bloque cuenta como voz si alguna de sus
+    ventanas lo es.
+    """
+
+    nombre = 'silero'
+    VENTANA = 512
+
+    def __init__(self, rate=neo_audio.RATE):
+        self.rate = rate
+        self._modelo = None
+        self._disponible = None
+
+    def disponible(self):
+        if self._disponible is None:
+            try:
+                import silero_vad  # noqa: F401
+                self._disponible = True
+            except ImportError:
+                self._disponible = False
+        return self._disponible
+
+    def _cargar(self):
+        from silero_vad import load_silero_vad
+        self._modelo = load_silero_vad()
+
+    def probabilidad(self, bloque, ruido_db):
+        import torch
+
+        if self._modelo is None:
+            self._cargar()
+
+        audio = torch.from_numpy(neo_audio.a_float32(bloque))
+        ventanas = len(audio) // self.VENTANA
+        with torch.no_grad():
+            return max((float(self._modelo(audio[i * self.VENTANA:(i + 1) * self.VENTANA], self.rate))
+                        for i in range(ventanas)), default=0.0)
+
+    def reiniciar(self):
+        if self._modelo is not None and hasattr(self._modelo, 'reset_states'):
+            self._modelo.reset_states()
+
+
+BACKENDS_VAD = {
+    'silero': BackendSilero,
+    'webrtc': BackendWebRTC,
+    'energia': BackendEnergia,
+    'umbral_fijo': BackendUmbralFijo,
+}
+
+
+def crear_backend(nombre=None):
+    """
+    Backend según `nombre` (None = BACKEND_VAD). 'auto' usa el primero
+    instalado en orden silero → webrtc → energía.
+    """
+    nombre = nombre or BACKEND_VAD
+    candidatos = ['silero', 'webrtc', 'energia'] if nombre == 'auto' else [nombre]
+
+    for candidato in candidatos:
+        clase = BACKENDS_VAD.get(candidato)
+        if clase is None:
+            continue
+        backend = clase()
+        if backend.disponible():
+            return backend
+
+    if nombre != 'auto':
+        print(f"⚠️ VAD '{nombre}' no disponible, usando energía")
+    return BackendEnergia()
+
+
+# ==========================================
+# DETECTOR DE FRASES
+# ==========================================
+
+class DetectorVoz:
+    """
+    Máquina de estados silencio ↔ voz sobre bloques consecutivos.
+
+    procesar() devuelve un evento cuando cambia el estado:
+        ('inicio', posición)  - posición absoluta donde empieza la frase
+                                (ya incluye el pre-roll)
+        ('fin', posición)     - posición absoluta donde termina
+
+    El piso de ruido y las pausas típicas del hablante se conservan
+    entre frases; reiniciar() solo olvida la frase en curso.
+
+    Args:
+        backend (BackendVAD): None = crear_backend()
+        umbral (float): Probabilidad mínima de voz
+        pre_roll (float): Segundos previos a conservar
+        hangover_min / hangover_max (float): Límites del silencio de corte
+        adaptativo (bool): False = piso de ruido fijo y hangover = hangover_max
+                           (como la detección original)
+        rate (int): Muestras por segundo
+    """
+
+    def __init__(self, backend=None, umbral=UMBRAL_VOZ, pre_roll=PRE_ROLL,
+                 hangover_min=HANGOVER_MIN, hangover_max=HANGOVER_MAX, min_voz=MIN_VOZ,
+                 adaptativo=True, rate=neo_audio.RATE):
+        self.backend = backend or crear_backend()
+        self.umbral = umbral
+        self.pre_roll = int(pre_roll * rate)
+        self.hangover_min = hangover_min
+        self.hangover_max = hangover_max
+        self.min_voz = int(min_voz * rate)
+        self.adaptativo = adaptativo
+        self.rate = rate
+
+        self.ruido_db = None
+        self.pausa_tipica = None      # Pausa más larga entre palabras (media móvil entre frases)
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Empezar una frase nueva (conserva ruido y pausas aprendidas)"""
+        self.en_voz = False
+        self._candidato = None        # Posición del primer bloque con voz sin confirmar
+        self._ultima_voz = None       # Fin del último bloque con voz
+        self._pausa_max = 0.0         # Pausa más larga dentro de la frase actual
+        self.backend.reiniciar()
+
+    def calibrar(self, muestras):
+        """Estimar el piso de ruido con audio sin voz (ej: el último medio segundo)"""
+        if len(muestras):
+            self.ruido_db = max(RUIDO_MIN_DB, energia_db(muestras))
+
+    def hangover(self):
+        """Segundos de silencio que cierran la frase"""
+        if not self.adaptativo:
+            return self.hangover_max
+        base = HANGOVER_INICIAL
+        if self.pausa_tipica is not None:
+            base = self.pausa_tipica * FACTOR_PAUSA
+        base = max(base, self._pausa_max * FACTOR_PAUSA)
+        return min(self.hangover_max, max(self.hangover_min, base))
+
+    def _actualizar_ruido(self, nivel):
+        if self.ruido_db is None:
+            self.ruido_db = max(RUIDO_MIN_DB, nivel)
+        elif self.adaptativo:
+            factor = BAJADA_RUIDO if nivel < self.ruido_db else SUBIDA_RUIDO
+            self.ruido_db = max(RUIDO_MIN_DB, self.ruido_db + factor * (nivel - self.ruido_db))
+
+    def procesar(self, posicion, bloque):
+        """
+        Procesa un bloque (vista int16) que empieza en `posicion`.
+
+        Returns:
+            tuple o None: ('inicio', posición) / ('fin', posición)
+        """
+        nivel = energia_db(bloque)
+        if self.ruido_db is None:
+            self._actualizar_ruido(nivel)
+
+        voz = self.backend.probabilidad(bloque, self.ruido_db) >= self.umbral
+        fin_bloque = posicion + len(bloque)
+
+        if not self.en_voz:
+            if not voz:
+                self._candidato = None
+                self._actualizar_ruido(nivel)
+                return None
+
+            if self._candidato is None:
+                self._candidato = posicion
+            self._ultima_voz = fin_bloque
+            if fin_bloque - self._candidato < self.min_voz:
+                return None
+
+            self.en_voz = True
+            return ('inicio', max(0, self._candidato - self.pre_roll))
+
+        if voz:
+            pausa = (posicion - self._ultima_voz) / self.rate
+            self._pausa_max = max(self._pausa_max, pausa)
+            self._ultima_voz = fin_bloque
+            return None
+
+        if (fin_bloque - self._ultima_voz) / self.rate < self.hangover():
+            return None
+
+        # Fin de frase: recordar cómo hace pausas este hablante
+        if self._pausa_max > 0:
+            self.pausa_tipica = self._pausa_max if self.pausa_tipica is None else \
+                0.7 * self.pausa_tipica + 0.3 * self._pausa_max
+        fin = min(fin_bloque, self._ultima_voz + int(COLA_FINAL * self.rate))
+        self.reiniciar()
+        return ('fin', fin)
+
+
+_detector = None
+_lock_detector = threading.Lock()
+
+
+def obtener_detector():
+    """Detector compartido (así el piso de ruido se aprende una vez)"""
+    global _detector
+    with _lock_detector:
+        if _detector is None:
+            _detector = DetectorVoz()
+        return _detector
+
+
+def configurar_backend(nombre):
+    """Cambia el backend del detector compartido ('silero', 'webrtc', 'energia', 'auto')"""
+    global BACKEND_VAD, _detector
+    with _lock_detector:
+        BACKEND_VAD = nombre
+        _detector = None
+
+
+# ==========================================
+# GRABAR UNA FRASE
+# ==========================================
+
+def grabar_frase(timeout=30, lector=None, detector=None, al_empezar=None, max_duracion=MAX_FRASE,
+                 al_avanzar=None):
+    """
+    Lee del micrófono compartido hasta capturar una frase completa.
+
+    Args:
+        timeout (float): Segundos máximos esperando (si se está hablando
+                         al vencer, se devuelve lo grabado hasta ahí)
+        lector (LectorAudio): Cursor a usar (None = uno nuevo desde ahora)
+        detector (DetectorVoz): None = el compartido
+        al_empezar (callable): Se llama una vez al detectar voz
+        max_duracion (float): Cortar frases más largas que esto
+        al_avanzar (callable): al_avanzar(inicio, posición, última_voz) tras
+                               cada bloque mientras la frase está abierta
+                               (para transcribir mientras se habla, ver
+                               neo_stt); última_voz = fin del último bloque con voz
+
+    Returns:
+        np.ndarray: Muestras int16 de la frase (con pre-roll), o None
+    """
+    if lector is None:
+        lector = neo_audio.obtener_captura().lector()
+    buffer = lector.buffer
+
+    detector = detector or obtener_detector()
+    detector.reiniciar()
+    if detector.ruido_db is None:
+        detector.calibrar(buffer.copiar(lector.posicion - buffer.rate // 2, lector.posicion))
+
+    limite = time.time() + timeout
+    inicio = None
+
+    while True:
+        restante = limite - time.time()
+        leido = lector.siguiente(timeout=max(0.0, restante)) if restante > 0 else None
+        if leido is None:
+            break
+        posicion, datos = leido
+
+        evento = detector.procesar(posicion, datos)
+        if evento and evento[0] == 'inicio':
+            inicio = evento[1]
+            if al_empezar:
+                al_empezar()
+        elif evento and evento[0] == 'fin':
+            return buffer.copiar(inicio, evento[1])
+        elif inicio is not None and lector.posicion - inicio > max_duracion * buffer.rate:
+            break
+
+        if inicio is not None and al_avanzar:
+            al_avanzar(inicio, lector.posicion, detector._ultima_voz)
+
+    detector.reiniciar()
+    if inicio is None:
+        return None
+    return buffer.copiar(inicio, lector.posicion)
+
+
+# ==========================================
+# EVALUACIÓN CON UN CORPUS ETIQUETADO
+# ==========================================
+# Cada archivo.wav va acompañado de sus etiquetas de voz:
+#   archivo.json  →  {"voz": [[inicio_s, fin_s], ...]}   ([] = solo ruido)
+#   archivo.txt   →  etiquetas de Audacity (inicio<TAB>fin<TAB>texto)
+
+def cargar_etiquetas(archivo_wav):
+    """Segmentos de voz [(inicio_s, fin_s), ...] o None si no hay etiquetas"""
+    base = os.path.splitext(archivo_wav)[0]
+
+    if os.path.exists(base + '.json'):
+        with open(base + '.json', encoding='utf-8') as f:
+            return [tuple(segmento) for segmento in json.load(f).get('voz', [])]
+
+    if os.path.exists(base + '.txt'):
+        segmentos = []
+        with open(base + '.txt', encoding='utf-8') as f:
+            for linea in f:
+                partes = linea.strip().split('\t')
+                if len(partes) >= 2:
+                    segmentos.append((float(partes[0]), float(partes[1])))
+        return segmentos
+
+    return None
+
+
+def detectar_segmentos(muestras, detector, bloque=neo_audio.CHUNK):
+    """
+    Pasa un audio completo por el detector, bloque a bloque, como si
+    llegara del micrófono.
+
+    Returns:
+        list: [{'inicio': s, 'fin': s, 'decision': s}, ...] donde
+              'decision' es el momento en que se decidió el fin
+    """
+    rate = detector.rate
+    detector.reiniciar()
+    segmentos = []
+    inicio = None
+
+    for posicion in range(0, len(muestras) - bloque + 1, bloque):
+        evento = detector.procesar(posicion, muestras[posicion:posicion + bloque])
+        if evento and evento[0] == 'inicio':
+            inicio = evento[1]
+        elif evento and evento[0] == 'fin':
+            segmentos.append({'inicio': inicio / rate, 'fin': evento[1] / rate,
+                              'decision': (posicion + bloque) / rate})
+            inicio = None
+
+    if inicio is not None:
+        segmentos.append({'inicio': inicio / rate, 'fin': len(muestras) / rate, 'decision': None})
+    return segmentos
+
+
+def evaluar_corpus(carpeta, crear_detector=DetectorVoz):
+    """
+    Evalúa un detector sobre todos los WAV etiquetados de `carpeta`.
+
+    Métricas:
+        latencia_fin   - segundos entre el fin real de la voz y la decisión
+                         de cortar (lo que el usuario espera callado)
+        recorte_inicio - segundos de voz perdidos al principio
+        falsos         - frases detectadas donde no había voz
+        perdidas       - frases reales que no se detectaron
+
+    Args:
+        carpeta (str): Carpeta con .wav + .json/.txt
+        crear_detector (callable): Devuelve un DetectorVoz nuevo por archivo
+
+    Returns:
+        dict: Resumen (ver claves), o None si no hay archivos etiquetados
+    """
+    latencias, recortes = [], []
+    falsos = perdidas = total = 0
+    segundos_audio = 0.0
+    archivos = 0
+
+    for archivo in sorted(glob.glob(os.path.join(carpeta, '*.wav'))):
+        etiquetas = cargar_etiquetas(archivo)
+        if etiquetas is None:
+            continue
+
+        muestras = neo_audio.cargar_wav(archivo)
+        detector = crear_detector()
+        detectados = detectar_segmentos(muestras, detector)
+        archivos += 1
+        segundos_audio += len(muestras) / detector.rate
+        total += len(etiquetas)
+
+        usados = set()
+        for inicio_real, fin_real in etiquetas:
+            coincide = [i for i, d in enumerate(detectados)
+                        if d['inicio'] < fin_real and d['fin'] > inicio_real]
+            if not coincide:
+                perdidas += 1
+                continue
+            usados.update(coincide)
+            primero, ultimo = detectados[coincide[0]], detectados[coincide[-1]]
+            recortes.append(max(0.0, primero['inicio'] - inicio_real))
+            if ultimo['decision'] is not None:
+                latencias.append(ultimo['decision'] - fin_real)
+
+        falsos += len(detectados) - len(usados)
+
+    if not archivos:
+        return None
+
+    horas = segundos_audio / 3600
+    return {
+        'archivos': archivos,
+        'segundos_audio': segundos_audio,
+        'frases': total,
+        'perdidas': perdidas,
+        'falsos': falsos,
+        'falsos_por_hora': falsos / horas if horas else 0.0,
+        'latencia_fin_media': float(np.mean(latencias)) if latencias else None,
+        'latencia_fin_p90': float(np.percentile(latencias, 90)) if latencias else None,
+        'recorte_inicio_medio': float(np.mean(recortes)) if recortes else None,
+    }
+
+
+def detector_original():
+    """La detección de antes (umbral 400, 2.5 s de silencio, sin pre-roll), para comparar"""
+    return DetectorVoz(BackendUmbralFijo(400), pre_roll=0.0, hangover_max=2.5,
+                       min_voz=0.0, adaptativo=False)
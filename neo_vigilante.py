@@ -0,0 +1,353 @@
+# neo_vigilante.py - Vigilante de pantalla en segundo plano
+"""
+Mantiene SIEMPRE listo un resumen corto de lo que hay en pantalla,
+para que los comandos que necesitan contexto visual ("cierra esto",
+"qué hay en esta ventana") no esperen 5-10 segundos a Llava.
+
+- Muestrea la pantalla cada pocos segundos (captura + firma, ~ms)
+- Solo cuando hay un cambio importante (y la pantalla se estabiliza)
+  pide un resumen nuevo a Llava, en su propio hilo
+- Cede el paso: no refresca mientras NEO está usando la visión o
+  procesando un comando (pausar / reanudar), y nunca pide más de un
+  resumen en segundo plano cada INTERVALO_MIN_RESUMEN segundos
+- obtener_resumen() devuelve el resumen al instante si es
+  suficientemente reciente, o lo refresca en el momento si no
+
+Ejemplo:
+    import neo_vigilante
+    neo_vigilante.iniciar_vigilante()
+    ...
+    contexto = neo_vigilante.obtener_resumen(max_antiguedad=20)
+"""
+
+import re
+import threading
+import time
+
+import neo_vision
+
+# ==========================================
+# CONFIGURACIÓN
+# ==========================================
+
+INTERVALO_MUESTREO = 2.0     # Segundos entre capturas de control
+ANTIGUEDAD_MAX = 30.0        # Segundos que un resumen se considera "fresco"
+MUESTRAS_ESTABLES = 2        # Capturas iguales seguidas antes de resumir (evita animaciones)
+MAX_TOKENS_RESUMEN = 120     # Resumen corto = menos tiempo de Llava
+INTERVALO_MIN_RESUMEN = 30.0 # Segundos mínimos entre resúmenes en segundo plano (tope de uso de Llava)
+
+# Palabras que indican que el comando se refiere a lo que hay en pantalla
+# (se buscan como palabras completas: 'esta' no coincide con 'está' ni 'estado')
+PALABRAS_VISUALES = [
+    'esto', 'esta', 'eso', 'aquí', 'ahí',
+    'ventana', 'pantalla', 'esto que veo',
+    'lo que está abierto', 'lo que hay'
+]
+
+_PATRON_VISUAL = re.compile(
+    r'\b(?:' + '|'.join(re.escape(palabra) for palabra in PALABRAS_VISUALES) + r')\b'
+)
+
+PREGUNTA_RESUMEN = """Resume en español, en 2 o 3 frases, lo que hay en esta captura de pantalla:
+qué aplicación o ventana está en primer plano y qué contenido importante se ve."""
+
+
+class VigilantePantalla:
+    """
+    Hilo que vigila la pantalla y mantiene un resumen actualizado.
+
+    Args:
+        intervalo (float): Segundos entre muestras
+        antiguedad_max (float): Segundos de validez del resumen
+        region: Modo de captura (ver neo_vision.resolver_region)
+        intervalo_min_resumen (float): Segundos mínimos entre resúmenes en segundo plano
+    """
+
+    def __init__(self, intervalo=INTERVALO_MUESTREO, antiguedad_max=ANTIGUEDAD_MAX, region=None,
+                 intervalo_min_resumen=INTERVALO_MIN_RESUMEN):
+        self.intervalo = intervalo
+        self.antiguedad_max = antiguedad_max
+        self.region = region
+        self.intervalo_min_resumen = intervalo_min_resumen
+
+        self._resumen = None          # Texto del último resumen
+        self._resumen_momento = 0.0   # time.time() de la captura resumida
+        self._resumen_firma = None    # Firma del frame resumido
+        self._ultima_firma = None     # Firma de la última muestra
+        self._estables = 0            # Muestras seguidas sin cambios
+        self._ultimo_intento = None   # time.monotonic() del último resumen en segundo plano
+
+        self._lock = threading.Lock()
+        self._refrescando = threading.Lock()   # Solo un resumen a la vez
+        self._pausas = 0
+        self._detener = threading.Event()
+        self._hilo = None
+
+        self._stats = {
+            'muestras': 0,
+            'cambios': 0,
+            'cambios_aplazados': 0,
+            'resumenes': 0,
+            'resumenes_bajo_demanda': 0,
+            'consultas': 0,
+            'consultas_instantaneas': 0,
+        }
+
+    # ---------- Ciclo de vida ----------
+
+    def iniciar(self):
+        if self._hilo and self._hilo.is_alive():
+            return self
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="NEO-vigilante", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(timeout=self.intervalo * 2)
+            self._hilo = None
+
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def pausar(self):
+        """No refrescar resúmenes (ej: mientras se ejecuta un comando)"""
+        with self._lock:
+            self._pausas += 1
+
+    def reanudar(self):
+        with self._lock:
+            self._pausas = max(0, self._pausas - 1)
+
+    # ---------- Muestreo ----------
+
+    def _capturar(self):
+        """Captura y firma un frame. Returns (bgra, firma) o (None, None)"""
+        sesion = neo_vision.obtener_sesion_captura()
+        try:
+            zona = neo_vision.resolver_region(self.region, sesion.monitores())
+            bgra = sesion.capturar(zona)
+        except Exception:
+            return None, None
+        return bgra, neo_vision.firma_frame(bgra)
+
+    def _cambio_importante(self, firma):
+        """¿El frame es distinto del que está resumido?"""
+        comparacion = neo_vision.comparar_firmas(self._resumen_firma, firma)
+        return neo_vision.clasificar_cambio(comparacion) != 'sin_cambio'
+
+    def _ciclo(self):
+        while not self._detener.wait(self.intervalo):
+            bgra, firma = self._capturar()
+            if firma is None:
+                continue
+
+            with self._lock:
+                self._stats['muestras'] += 1
+                estable = self._ultima_firma is not None and \
+                    neo_vision.clasificar_cambio(neo_vision.comparar_firmas(self._ultima_firma, firma)) == 'sin_cambio'
+                self._estables = self._estables + 1 if estable else 0
+                self._ultima_firma = firma
+                pendiente = self._cambio_importante(firma)
+                pausado = self._pausas > 0
+
+            if not pendiente or pausado or neo_vision.vision_esta_activa():
+                continue
+
+            # Esperar a que la pantalla deje de moverse antes de gastar Llava
+            if self._estables + 1 < MUESTRAS_ESTABLES:
+                continue
+
+            # Tope de resúmenes: si la pantalla cambia sin parar, el cambio
+            # se recoge en la primera muestra tras el intervalo mínimo
+            ahora = time.monotonic()
+            if self._ultimo_intento is not None and ahora - self._ultimo_intento < self.intervalo_min_resumen:
+                with self._lock:
+                    self._stats['cambios_aplazados'] += 1
+                continue
+
+            with self._lock:
+                self._stats['cambios'] += 1
+            self._ultimo_intento = ahora
+            self._refrescar(bgra, firma)
+
+    def _refrescar(self, bgra, firma):
+        """Pide un resumen nuevo a Llava para este frame"""
+        if not self._refrescando.acquire(blocking=False):
+            return False
+
+        try:
+            momento = time.time()
+            sesion = neo_vision.obtener_sesion_captura()
+            imagen = neo_vision.optimizar_imagen(sesion.a_imagen(bgra))
+            datos, _ = neo_vision.codificar_imagen(imagen)
+
+            # ¿Ya se resumió esta misma pantalla antes?
+            resumen = neo_vision._cache_descripciones.buscar(firma, PREGUNTA_RESUMEN)
+            if resumen is None:
+                resumen = neo_vision.obtener_cliente().generar(
+                    neo_vision.MODELO_VISION,
+                    PREGUNTA_RESUMEN,
+                    imagenes=[datos],
+                    opciones={'num_predict': MAX_TOKENS_RESUMEN}
+                ).strip()
+                if not resumen:
+                    return False
+                neo_vision._cache_descripciones.guardar(firma, PREGUNTA_RESUMEN, resumen)
+
+            with self._lock:
+                self._resumen = resumen
+                self._resumen_momento = momento
+                self._resumen_firma = firma
+                self._stats['resumenes'] += 1
+            return True
+
+        except Exception as e:
+            print(f"⚠️ Vigilante: no se pudo resumir la pantalla ({e})")
+            return False
+        finally:
+            self._refrescando.release()
+
+    # ---------- Consultas ----------
+
+    def antiguedad(self):
+        """Segundos desde la captura que se resumió (None si no hay resumen)"""
+        with self._lock:
+            if self._resumen is None:
+                return None
+            return time.time() - self._resumen_momento
+
+    def resumen_fresco(self, max_antiguedad=None):
+        """
+        Devuelve el resumen solo si es reciente Y la pantalla no cambió
+        desde entonces (según la última muestra). Nunca bloquea.
+
+        Returns:
+            str o None
+        """
+        max_antiguedad = self.antiguedad_max if max_antiguedad is None else max_antiguedad
+
+        with self._lock:
+            if self._resumen is None:
+                return None
+            if time.time() - self._resumen_momento > max_antiguedad:
+                return None
+            if self._ultima_firma is not None and self._cambio_importante(self._ultima_firma):
+                return None
+            return self._resumen
+
+    def obtener_resumen(self, max_antiguedad=None, refrescar=True):
+        """
+        Resumen de la pantalla para el planificador.
+
+        Args:
+            max_antiguedad (float): Segundos máximos aceptados (None = antiguedad_max)
+            refrescar (bool): Si el resumen está viejo, capturar y resumir
+                              ahora mismo (bloquea 5-10 s)
+
+        Returns:
+            str: Resumen, o None si no hay uno válido
+        """
+        with self._lock:
+            self._stats['consultas'] += 1
+
+        resumen = self.resumen_fresco(max_antiguedad)
+        if resumen is not None:
+            with self._lock:
+                self._stats['consultas_instantaneas'] += 1
+            return resumen
+
+        if not refrescar:
+            return None
+
+        # Si el hilo ya está resumiendo, esperar a que termine
+        if self._refrescando.locked():
+            with self._refrescando:
+                pass
+            resumen = self.resumen_fresco(max_antiguedad)
+            if resumen is not None:
+                return resumen
+
+        bgra, firma = self._capturar()
+        if firma is None:
+            return None
+
+        with self._lock:
+            self._ultima_firma = firma
+            self._stats['resumenes_bajo_demanda'] += 1
+
+        self._refrescar(bgra, firma)
+        return self.resumen_fresco(max_antiguedad)
+
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['antiguedad'] = self.antiguedad()
+        consultas = stats['consultas']
+        stats['tasa_instantaneas'] = stats['consultas_instantaneas'] / consultas if consultas else 0.0
+        return stats
+
+
+def necesita_contexto_visual(comando):
+    """
+    Determina si el comando necesita ver la pantalla
+
+    Args:
+        comando (str): Comando del usuario
+
+    Returns:
+        bool: True si necesita contexto visual
+    """
+    return _PATRON_VISUAL.search(comando.lower()) is not None
+
+
+# ==========================================
+# INSTANCIA COMPARTIDA
+# ==========================================
+
+_vigilante = None
+
+
+def iniciar_vigilante(intervalo=INTERVALO_MUESTREO, antiguedad_max=ANTIGUEDAD_MAX, region=None,
+                      intervalo_min_resumen=INTERVALO_MIN_RESUMEN):
+    """Arranca el vigilante compartido (si no estaba ya corriendo)"""
+    global _vigilante
+    if _vigilante is None:
+        _vigilante = VigilantePantalla(intervalo, antiguedad_max, region, intervalo_min_resumen)
+    return _vigilante.iniciar()
+
+
+def detener_vigilante():
+    global _vigilante
+    if _vigilante is not None:
+        _vigilante.detener()
+        _vigilante = None
+
+
+def vigilante_activo():
+    return _vigilante is not None and _vigilante.activo()
+
+
+def obtener_resumen(max_antiguedad=None, refrescar=True):
+    """
+    Resumen de pantalla listo para neo_cerebro.procesar_comando(contexto_pantalla=...).
+    Si el vigilante no está corriendo, se comporta como una consulta bajo demanda.
+    """
+    vigilante = _vigilante or VigilantePantalla()
+    return vigilante.obtener_resumen(max_antiguedad, refrescar)
+
+
+def pausar():
+    if _vigilante is not None:
+        _vigilante.pausar()
+
+
+def reanudar():
+    if _vigilante is not None:
+        _vigilante.reanudar()
+
+
+def obtener_estadisticas():
+    return _vigilante.estadisticas() if _vigilante is not None else {}
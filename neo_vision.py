@@ -6,12 +6,25 @@ Usa Llava (modelo de visión) para entender qué hay en pantalla.
 
 import mss
 import mss.tools
+import numpy as np
 from PIL import Image
 import subprocess
 import os
 import base64
+import difflib
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from io import BytesIO
 
+from neo_ollama import ErrorOllama, obtener_cliente
+
 print("=" * 60)
 print("NEO - Sistema de Visión v1.0")
 print("=" * 60)
@@ -27,60 +40,853 @@ MODELO_VISION = "llava:7b"
 MAX_ANCHO = 1280          # Ancho máximo en píxeles (más pequeño = más rápido)
 CALIDAD_COMPRESION = 85   # Calidad JPEG (1-100, más bajo = más rápido)
 
+# Codificación (ver codificar_imagen)
+PRESUPUESTO_BYTES = 350 * 1024    # Tamaño máximo deseado de la imagen codificada
+FORMATOS_IMAGEN = ('JPEG', 'PNG') # Agregar 'WEBP' si tu versión de Ollama lo acepta
+CALIDADES_PRUEBA = (CALIDAD_COMPRESION, 70, 55, 40)
+MAX_COLORES_TEXTO = 4096          # Menos colores que esto = pantalla de texto/interfaz
+
+# Mosaicos: pantallas grandes de texto (ver ver_pantalla_mosaico)
+TAMANO_MOSAICO = 672             # Lado aproximado de cada mosaico, en píxeles nativos
+ANCHO_VISTA_GENERAL = 896        # Vista general de baja resolución que acompaña a los mosaicos
+MAX_MOSAICOS = 4                 # Mosaicos enviados como máximo por pregunta
+CACHE_MOSAICOS_MAX = 128         # Mosaicos codificados guardados (por hash de contenido)
+
+# Visión asíncrona (ver PipelineVision)
+HILOS_CODIFICACION = 2           # Capturas convirtiéndose/codificándose a la vez
+HILOS_ANALISIS = 1               # Peticiones simultáneas a Llava (Ollama atiende una por defecto)
+
 # Archivo temporal (se borra después de usar)
 TEMP_CAPTURA = "temp_neo_vision.png"
 
+# Detección de cambios (evita llamar a Llava si la pantalla no cambió)
+MINIATURA_ANCHO = 72             # Tamaño de la firma (múltiplos de 9 y 8 para el hash)
+MINIATURA_ALTO = 40
+PASO_MUESTREO = 4                # La firma mira una muestra cada tantos píxeles
+UMBRAL_HASH = 4                  # Bits distintos (de 64) tolerados como "misma pantalla"
+UMBRAL_PIXEL = 12.0              # Diferencia de brillo (0-255) para marcar un píxel como cambiado
+FRACCION_SIN_CAMBIO = 0.002      # Menos de esto cambiado = pantalla igual (cursor, reloj)
+FRACCION_MAX_REGION = 0.35       # Si cambió menos de esto, enviar solo la zona cambiada
+MARGEN_REGION = 24               # Píxeles extra alrededor de la zona cambiada
+
+# Cache de descripciones: (firma de imagen, pregunta, modelo) → respuesta
+CACHE_VISION_MAX = 64            # Entradas en memoria
+CACHE_VISION_TTL = 15 * 60       # Segundos que una respuesta sigue siendo válida
+CACHE_VISION_DISCO = False       # Guardar también en disco (sobrevive reinicios)
+CACHE_VISION_DISCO_MAX = 512     # Entradas en disco
+ARCHIVO_CACHE_VISION = "neo_vision_cache.json"
+
+# OCR (texto de la pantalla sin pasar por Llava)
+MOTOR_OCR = "auto"               # 'auto', 'rapidocr', 'tesseract' o 'ninguno'
+IDIOMA_OCR = "spa+eng"           # Idiomas de Tesseract
+CONFIANZA_MIN_OCR = 0.5          # Palabras con menos confianza (0-1) se descartan
+SIMILITUD_MIN_OCR = 0.8          # Parecido mínimo (0-1) al buscar un texto
+CACHE_OCR_MAX = 16               # Frames leídos guardados en memoria
+
 # ==========================================
 # Variables de estado
 # ==========================================
 
 _ultima_captura = None           # Guarda la última imagen capturada
 _ultima_descripcion = None       # Guarda la última descripción
-_vision_activa = False           # Si la visión está actualmente activa
+_visiones_activas = 0            # Análisis en curso (puede haber varios hilos)
+_lock_estado = threading.RLock() # Protege el estado compartido entre hilos
+_sesion_captura = None           # Sesión de captura compartida (ver obtener_sesion_captura)
+_lock_sesion = threading.Lock()  # Que dos hilos no creen dos sesiones a la vez
+_ultima_firma = None             # Firma del frame de la última descripción
+_ultima_pregunta = None          # Pregunta de la última descripción
+_ultima_zona = None              # Rectángulo capturado en la última descripción
+_tiempo_llava_promedio = None    # Segundos promedio de un análisis completo
+
+_estadisticas_cambios = {
+    'consultas': 0,
+    'sin_cambio': 0,             # Respondidas con la descripción anterior
+    'solo_region': 0,            # Solo se envió la zona que cambió
+    'completas': 0,              # Se envió la pantalla entera
+    'segundos_ahorrados': 0.0,
+}
+
+_estadisticas_etapas = {}        # etapa → {'veces', 'total', 'max'} (ver _medir)
+
+# ==========================================
+# SESIÓN DE CAPTURA PERSISTENTE
+# ==========================================
+
+class SesionCaptura:
+    """
+    Mantiene abierto el capturador MSS en lugar de crear uno por captura.
+    
+    - Un handle de MSS por hilo (MSS no se puede compartir entre hilos);
+      los de hilos que ya terminaron se cierran al crear uno nuevo
+    - Los frames se devuelven como vista NumPy BGRA sobre el buffer de
+      MSS (sin copiar)
+    - La conversión a RGB reutiliza un buffer preasignado por hilo y
+      solo se hace si alguien la pide
+    
+    Ejemplo:
+        sesion = SesionCaptura()
+        bgra = sesion.capturar()            # np.ndarray (alto, ancho, 4)
+        img = sesion.a_imagen(bgra)         # PIL.Image RGB
+        sesion.cerrar()
+    """
+    
+    def __init__(self, monitor=1):
+        self.monitor = monitor
+        self._local = threading.local()
+        self._handles = []               # [(hilo, handle MSS)]
+        self._lock = threading.Lock()
+    
+    def _sct(self):
+        """Handle MSS del hilo actual (se crea la primera vez)"""
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+            with self._lock:
+                self._liberar_hilos_terminados()
+                self._handles.append((threading.current_thread(), sct))
+        return sct
+    
+    def _liberar_hilos_terminados(self):
+        """Cierra los handles de hilos que ya terminaron (requiere self._lock)"""
+        vivos = []
+        for hilo, sct in self._handles:
+            if hilo.is_alive():
+                vivos.append((hilo, sct))
+                continue
+            try:
+                sct.close()
+            except Exception:
+                pass
+        self._handles = vivos
+    
+    def monitores(self):
+        """Lista de monitores de MSS (índice 0 = todos juntos)"""
+        return self._sct().monitors
+    
+    def capturar(self, monitor=None):
+        """
+        Captura un monitor o rectángulo.
+        
+        Args:
+            monitor (int | dict): Índice de monitor o dict con
+                                  left/top/width/height (None = self.monitor)
+        
+        Returns:
+            np.ndarray: Vista BGRA (alto, ancho, 4) uint8, sin copia.
+                        Es válida hasta que se libere el frame.
+        """
+        sct = self._sct()
+        
+        if monitor is None:
+            monitor = self.monitor
+        if isinstance(monitor, int):
+            monitor = sct.monitors[monitor]
+        
+        screenshot = sct.grab(monitor)
+        ancho, alto = screenshot.size
+        
+        # Vista directa sobre el bytearray de MSS (cero copias)
+        return np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(alto, ancho, 4)
+    
+    def _buffer(self, nombre, forma):
+        """Buffer preasignado por hilo; se recrea solo si cambia el tamaño"""
+        buffer = getattr(self._local, nombre, None)
+        if buffer is None or buffer.shape != forma:
+            buffer = np.empty(forma, dtype=np.uint8)
+            setattr(self._local, nombre, buffer)
+        return buffer
+    
+    def a_rgb(self, bgra):
+        """
+        Convierte BGRA → RGB en un buffer reutilizado (sin asignar memoria).
+        
+        Returns:
+            np.ndarray: (alto, ancho, 3). Se sobrescribe en la siguiente llamada
+                        del mismo hilo; copiar si hay que guardarlo.
+        """
+        alto, ancho = bgra.shape[:2]
+        rgb = self._buffer('rgb', (alto, ancho, 3))
+        np.copyto(rgb, bgra[:, :, 2::-1])
+        return rgb
+    
+    def a_imagen(self, bgra, max_ancho=None):
+        """
+        Convierte un frame BGRA a PIL.Image RGB (una sola pasada en C).
+        
+        Args:
+            bgra (np.ndarray): Frame devuelto por capturar()
+            max_ancho (int): Si se indica, reduce el ancho a este máximo
+        
+        Returns:
+            PIL.Image: Imagen RGB
+        """
+        alto, ancho = bgra.shape[:2]
+        
+        # Los recortes (bgra[y0:y1, x0:x1]) no son contiguos en memoria
+        if not bgra.flags['C_CONTIGUOUS']:
+            bgra = np.ascontiguousarray(bgra)
+        
+        # PIL decodifica BGRX → RGB directamente, sin pasar por screenshot.rgb
+        imagen = Image.frombuffer('RGB', (ancho, alto), bgra, 'raw', 'BGRX', 0, 1)
+        
+        if max_ancho and ancho > max_ancho:
+            imagen = reducir_imagen(imagen, max_ancho)
+        
+        return imagen
+    
+    def cerrar(self):
+        """Cierra todos los handles MSS creados por esta sesión"""
+        with self._lock:
+            for _, sct in self._handles:
+                try:
+                    sct.close()
+                except Exception:
+                    pass
+            self._handles = []
+        self._local = threading.local()
+
+
+def obtener_sesion_captura():
+    """Devuelve la sesión de captura compartida del módulo (la crea si falta)"""
+    global _sesion_captura
+    with _lock_sesion:
+        if _sesion_captura is None:
+            _sesion_captura = SesionCaptura()
+        return _sesion_captura
+
+
+def cerrar_sesion_captura():
+    """Libera los handles de captura (llamar al cerrar NEO)"""
+    global _sesion_captura
+    with _lock_sesion:
+        if _sesion_captura is not None:
+            _sesion_captura.cerrar()
+            _sesion_captura = None
+
+# ==========================================
+# MODOS DE CAPTURA (ventana, rectángulo, monitor)
+# ==========================================
+
+class ProveedorVentanas:
+    """
+    Interfaz: de dónde sale la geometría de la ventana activa.
+    Cada sistema tiene su implementación; en pruebas se usa
+    ProveedorVentanasFalso.
+    """
+    
+    def ventana_activa(self):
+        """
+        Returns:
+            dict: {'left', 'top', 'width', 'height', 'titulo'} o None
+        """
+        return None
+
+
+class ProveedorVentanasWindows(ProveedorVentanas):
+    """Geometría de la ventana activa con la API de Windows (user32)"""
+    
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        
+        self._user32 = ctypes.windll.user32
+        self._ctypes = ctypes
+        self._wintypes = wintypes
+        
+        # Coordenadas reales en pantallas con escalado (125%, 150%...)
+        try:
+            ctypes.windll.shcore.SetProcessDpiAwareness(2)
+        except Exception:
+            pass
+    
+    def ventana_activa(self):
+        hwnd = self._user32.GetForegroundWindow()
+        if not hwnd:
+            return None
+        
+        rect = self._wintypes.RECT()
+        if not self._user32.GetWindowRect(hwnd, self._ctypes.byref(rect)):
+            return None
+        
+        largo = self._user32.GetWindowTextLengthW(hwnd)
+        titulo = self._ctypes.create_unicode_buffer(largo + 1)
+        self._user32.GetWindowTextW(hwnd, titulo, largo + 1)
+        
+        return {
+            'left': rect.left,
+            'top': rect.top,
+            'width': rect.right - rect.left,
+            'height': rect.bottom - rect.top,
+            'titulo': titulo.value
+        }
+
+
+class ProveedorVentanasX11(ProveedorVentanas):
+    """Geometría de la ventana activa en Linux usando xdotool"""
+    
+    def ventana_activa(self):
+        try:
+            resultado = subprocess.run(
+                ['xdotool', 'getactivewindow', 'getwindowgeometry', '--shell', 'getwindowname'],
+                capture_output=True,
+                text=True,
+                timeout=2
+            )
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            return None
+        
+        if resultado.returncode != 0:
+            return None
+        
+        valores = {}
+        lineas = resultado.stdout.strip().splitlines()
+        for linea in lineas:
+            if '=' in linea:
+                clave, valor = linea.split('=', 1)
+                valores[clave] = valor
+        
+        try:
+            return {
+                'left': int(valores['X']),
+                'top': int(valores['Y']),
+                'width': int(valores['WIDTH']),
+                'height': int(valores['HEIGHT']),
+                'titulo': lineas[-1] if lineas and '=' not in lineas[-1] else ''
+            }
+        except (KeyError, ValueError):
+            return None
+
+
+class ProveedorVentanasFalso(ProveedorVentanas):
+    """Proveedor para pruebas: devuelve la ventana que se le indique"""
+    
+    def __init__(self, ventana=None):
+        self.ventana = ventana
+    
+    def ventana_activa(self):
+        return dict(self.ventana) if self.ventana else None
+
+
+_proveedor_ventanas = None
+
+
+def obtener_proveedor_ventanas():
+    """Proveedor de ventanas según el sistema operativo"""
+    global _proveedor_ventanas
+    if _proveedor_ventanas is None:
+        if sys.platform == 'win32':
+            _proveedor_ventanas = ProveedorVentanasWindows()
+        else:
+            _proveedor_ventanas = ProveedorVentanasX11()
+    return _proveedor_ventanas
+
+
+def configurar_proveedor_ventanas(proveedor):
+    """Cambia el proveedor de ventanas (ej: ProveedorVentanasFalso en pruebas)"""
+    global _proveedor_ventanas
+    _proveedor_ventanas = proveedor
+
+
+# Nombres de monitor aceptados en region="monitor:<nombre>"
+NOMBRES_MONITOR = {
+    'principal': 1,
+    'primario': 1,
+    'secundario': 2,
+    'segundo': 2,
+    'tercero': 3,
+}
+
+
+def resolver_region(region, monitores):
+    """
+    Traduce un modo de captura a un rectángulo de MSS.
+    
+    Args:
+        region: Uno de:
+            None / 'pantalla'       → monitor principal
+            'ventana'               → solo la ventana activa
+            'todos'                 → todos los monitores unidos
+            'monitor:<n o nombre>'  → ej: 'monitor:2', 'monitor:secundario'
+            int                     → índice de monitor de MSS
+            (izq, arriba, ancho, alto) o dict left/top/width/height → rectángulo
+        monitores (list): sct.monitors (índice 0 = escritorio completo)
+    
+    Returns:
+        dict: {'left', 'top', 'width', 'height'} recortado al escritorio
+    
+    Raises:
+        ValueError: Si el modo no existe o el rectángulo queda vacío
+    """
+    escritorio = monitores[0]
+    
+    if region is None or region == 'pantalla':
+        rect = monitores[1]
+    elif region == 'todos':
+        rect = escritorio
+    elif region == 'ventana':
+        rect = obtener_proveedor_ventanas().ventana_activa()
+        if rect is None:
+            raise ValueError("No se pudo obtener la ventana activa")
+    elif isinstance(region, int):
+        if not 0 <= region < len(monitores):
+            raise ValueError(f"No existe el monitor {region}")
+        rect = monitores[region]
+    elif isinstance(region, str) and region.startswith('monitor:'):
+        nombre = region.split(':', 1)[1].strip().lower()
+        indice = int(nombre) if nombre.isdigit() else NOMBRES_MONITOR.get(nombre)
+        if indice is None or not 0 < indice < len(monitores):
+            raise ValueError(f"No existe el monitor '{nombre}'")
+        rect = monitores[indice]
+    elif isinstance(region, dict):
+        rect = region
+    elif isinstance(region, (tuple, list)) and len(region) == 4:
+        rect = dict(zip(('left', 'top', 'width', 'height'), region))
+    else:
+        raise ValueError(f"Modo de captura no válido: {region!r}")
+    
+    # Recortar al área del escritorio (ventanas parcialmente fuera de pantalla)
+    izq = max(rect['left'], escritorio['left'])
+    arriba = max(rect['top'], escritorio['top'])
+    der = min(rect['left'] + rect['width'], escritorio['left'] + escritorio['width'])
+    abajo = min(rect['top'] + rect['height'], escritorio['top'] + escritorio['height'])
+    
+    if der <= izq or abajo <= arriba:
+        raise ValueError("La región a capturar está fuera de la pantalla")
+    
+    return {'left': izq, 'top': arriba, 'width': der - izq, 'height': abajo - arriba}
+
 
 # ==========================================
 # FUNCIÓN 1: Capturar Pantalla
 # ==========================================
 
-def capturar_pantalla_rapida():
+def capturar_pantalla_rapida(region=None):
     """
     Captura la pantalla completa de forma muy rápida.
+    Reutiliza la sesión de captura (no abre MSS en cada llamada).
+    
+    Args:
+        region: Modo de captura (ver resolver_region). None = monitor principal
     
     Returns:
         PIL.Image: Objeto imagen de la pantalla
         None: Si hay error
     """
     try:
-        # Crear capturador MSS (muy rápido)
-        sct = mss.mss()
+        sesion = obtener_sesion_captura()
         
-        # Capturar monitor principal (índice 1)
-        monitor = sct.monitors[1]
-        screenshot = sct.grab(monitor)
+        # Capturar monitor principal (índice 1) o la región pedida
+        bgra = sesion.capturar(resolver_region(region, sesion.monitores()))
         
         # Convertir a PIL Image para poder manipular
-        img = Image.frombytes(
-            'RGB',
-            screenshot.size,
-            screenshot.rgb
-        )
-        
-        return img
+        return sesion.a_imagen(bgra)
         
     except Exception as e:
         print(f"❌ Error al capturar pantalla: {e}")
         return None
 
 
+# ==========================================
+# DETECCIÓN DE CAMBIOS EN PANTALLA
+# ==========================================
+
+def _paso_muestreo(ancho, alto):
+    """PASO_MUESTREO, salvo en regiones pequeñas (no quedarse con menos muestras que celdas)"""
+    return max(1, min(PASO_MUESTREO, ancho // MINIATURA_ANCHO, alto // MINIATURA_ALTO))
+
+
+def _celdas(muestras, celdas):
+    """
+    Índices de muestra donde empieza cada celda (celdas + 1 bordes) y,
+    si hay menos muestras que celdas, qué muestra repite cada celda.
+    """
+    if muestras < celdas:
+        return np.arange(celdas) * muestras // celdas, None
+    return None, np.arange(celdas + 1) * muestras // celdas
+
+
+def _promedio_celdas(gris, eje, celdas):
+    """Promedia `gris` a lo largo de `eje` en exactamente `celdas` celdas, sin descartar el resto"""
+    repetidas, bordes = _celdas(gris.shape[eje], celdas)
+    if bordes is None:
+        # Región más pequeña que la firma: cada muestra ocupa varias celdas
+        return np.take(gris, repetidas, axis=eje)
+    sumas = np.add.reduceat(gris, bordes[:-1], axis=eje)
+    forma = [1, 1]
+    forma[eje] = celdas
+    return sumas / np.diff(bordes).reshape(forma)
+
+
+def _limites_celdas(pixeles, paso, celdas):
+    """(inicio, fin) en píxeles reales de cada celda de la miniatura en un eje"""
+    muestras = -(-pixeles // paso)
+    repetidas, bordes = _celdas(muestras, celdas)
+    if bordes is None:
+        inicios = repetidas * paso
+        fines = inicios + paso
+    else:
+        inicios, fines = bordes[:-1] * paso, bordes[1:] * paso
+    return inicios, np.minimum(fines, pixeles)
+
+
+def firma_frame(bgra):
+    """
+    Calcula una firma barata de un frame para compararlo con otros.
+    
+    Trabaja sobre una miniatura en gris de MINIATURA_ANCHO x MINIATURA_ALTO
+    (promedio por celdas de una muestra cada 4 píxeles, cubriendo el
+    frame entero), así que cuesta pocos milisegundos incluso en 4K. Con
+    regiones más pequeñas que la miniatura cada píxel ocupa varias celdas.
+    
+    Args:
+        bgra (np.ndarray): Frame (alto, ancho, 4) de SesionCaptura.capturar()
+    
+    Returns:
+        dict: {'hash': int de 64 bits (dHash),
+               'miniatura': np.ndarray float32 (alto_mini, ancho_mini),
+               'tamano': (ancho, alto) del frame original}
+    """
+    alto, ancho = bgra.shape[:2]
+    paso = _paso_muestreo(ancho, alto)
+    muestra = bgra[::paso, ::paso, :3]
+    
+    # Brillo (BGR) y promedio por celdas (también las filas/columnas sobrantes)
+    gris = muestra.astype(np.float32) @ np.array([0.114, 0.587, 0.299], dtype=np.float32)
+    miniatura = _promedio_celdas(_promedio_celdas(gris, 0, MINIATURA_ALTO), 1, MINIATURA_ANCHO)
+    miniatura = miniatura.astype(np.float32, copy=False)
+    
+    # dHash 8x8: ¿cada celda es más clara que su vecina derecha?
+    celdas = miniatura.reshape(8, MINIATURA_ALTO // 8, 9, MINIATURA_ANCHO // 9).mean(axis=(1, 3))
+    bits = (celdas[:, 1:] > celdas[:, :-1]).flatten()
+    valor_hash = 0
+    for bit in bits:
+        valor_hash = (valor_hash << 1) | int(bit)
+    
+    return {
+        'hash': valor_hash,
+        'miniatura': miniatura,
+        'tamano': (ancho, alto)
+    }
+
+
+def comparar_firmas(anterior, actual):
+    """
+    Compara dos firmas de frame.
+    
+    Returns:
+        dict: {'distancia': bits distintos del hash,
+               'fraccion': parte de la miniatura que cambió (0-1),
+               'region': (izq, arriba, der, abajo) en píxeles reales o None,
+               'tamano': (ancho, alto) del frame}
+    """
+    if anterior is None or anterior['tamano'] != actual['tamano']:
+        return {'distancia': 64, 'fraccion': 1.0, 'region': None, 'tamano': actual['tamano']}
+    
+    distancia = bin(anterior['hash'] ^ actual['hash']).count('1')
+    cambiados = np.abs(actual['miniatura'] - anterior['miniatura']) > UMBRAL_PIXEL
+    fraccion = float(cambiados.mean())
+    
+    region = None
+    if cambiados.any():
+        filas = np.flatnonzero(cambiados.any(axis=1))
+        columnas = np.flatnonzero(cambiados.any(axis=0))
+        
+        # Las celdas no miden todas lo mismo: límites reales de cada una
+        ancho, alto = actual['tamano']
+        paso = _paso_muestreo(ancho, alto)
+        inicios_x, fines_x = _limites_celdas(ancho, paso, MINIATURA_ANCHO)
+        inicios_y, fines_y = _limites_celdas(alto, paso, MINIATURA_ALTO)
+        
+        region = (
+            max(0, int(inicios_x[columnas[0]]) - MARGEN_REGION),
+            max(0, int(inicios_y[filas[0]]) - MARGEN_REGION),
+            min(ancho, int(fines_x[columnas[-1]]) + MARGEN_REGION),
+            min(alto, int(fines_y[filas[-1]]) + MARGEN_REGION)
+        )
+    
+    return {
+        'distancia': distancia,
+        'fraccion': fraccion,
+        'region': region,
+        'tamano': actual['tamano']
+    }
+
+
+def clasificar_cambio(comparacion):
+    """
+    Decide qué hacer según cuánto cambió la pantalla.
+    
+    Returns:
+        str: 'sin_cambio', 'solo_region' o 'completa'
+    """
+    if comparacion['distancia'] <= UMBRAL_HASH and comparacion['fraccion'] <= FRACCION_SIN_CAMBIO:
+        return 'sin_cambio'
+    
+    region = comparacion['region']
+    if region is not None:
+        izq, arriba, der, abajo = region
+        ancho, alto = comparacion['tamano']
+        area = (der - izq) * (abajo - arriba) / float(ancho * alto)
+        if area <= FRACCION_MAX_REGION:
+            return 'solo_region'
+    
+    return 'completa'
+
+
+# ==========================================
+# CACHE DE DESCRIPCIONES
+# ==========================================
+
+def _normalizar_pregunta(pregunta):
+    """Minúsculas y espacios simples, para que variaciones mínimas coincidan"""
+    return ' '.join(pregunta.lower().strip(' .,;:!¡?¿').split())
+
+
+class CacheDescripciones:
+    """
+    Cache LRU de respuestas de Llava.
+    
+    La clave es (hash perceptual, pregunta normalizada, modelo). Cada
+    entrada guarda también la miniatura del frame, y antes de devolver
+    una respuesta se verifica que la miniatura coincide de verdad
+    (un hash parecido no basta). Así, volver a una pantalla anterior o
+    hacer otra pregunta ya hecha sobre la misma pantalla no llama a Llava.
+    
+    Opcionalmente guarda las entradas en disco (ARCHIVO_CACHE_VISION).
+    """
+    
+    def __init__(self, max_entradas=CACHE_VISION_MAX, ttl=CACHE_VISION_TTL,
+                 disco=CACHE_VISION_DISCO, archivo=ARCHIVO_CACHE_VISION,
+                 max_disco=CACHE_VISION_DISCO_MAX):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.disco = disco
+        self.archivo = archivo
+        self.max_disco = max_disco
+        
+        self._memoria = OrderedDict()   # clave → entrada
+        self._disco = None              # Se carga al primer uso
+        self._lock = threading.Lock()
+        self._stats = {
+            'consultas': 0,
+            'aciertos': 0,
+            'aciertos_disco': 0,
+            'fallos': 0,
+            'expiradas': 0,
+            'descartadas': 0,
+            'rechazadas_verificacion': 0,
+        }
+    
+    # ---------- Disco ----------
+    
+    def _cargar_disco(self):
+        if self._disco is not None:
+            return
+        self._disco = OrderedDict()
+        if not self.disco or not os.path.exists(self.archivo):
+            return
+        try:
+            with open(self.archivo, 'r', encoding='utf-8') as f:
+                for entrada in json.load(f):
+                    entrada['miniatura'] = np.array(entrada['miniatura'], dtype=np.float32)
+                    self._disco[self._clave(entrada)] = entrada
+        except Exception:
+            self._disco = OrderedDict()
+    
+    def _guardar_disco(self):
+        datos = []
+        for entrada in self._disco.values():
+            copia = dict(entrada)
+            copia['miniatura'] = np.round(entrada['miniatura']).astype(np.uint8).tolist()
+            datos.append(copia)
+        try:
+            with open(self.archivo, 'w', encoding='utf-8') as f:
+                json.dump(datos, f, ensure_ascii=False)
+        except Exception:
+            pass
+    
+    # ---------- Consultas ----------
+    
+    @staticmethod
+    def _clave(entrada):
+        return (entrada['hash'], entrada['pregunta'], entrada['modelo'])
+    
+    def _coincide(self, entrada, firma, pregunta, modelo):
+        """¿La entrada responde a esta firma/pregunta/modelo?"""
+        if entrada['pregunta'] != pregunta or entrada['modelo'] != modelo:
+            return False
+        if tuple(entrada['tamano']) != firma['tamano']:
+            return False
+        if bin(entrada['hash'] ^ firma['hash']).count('1') > UMBRAL_HASH:
+            return False
+        
+        # Verificación con la miniatura guardada
+        cambiados = np.abs(entrada['miniatura'] - firma['miniatura']) > UMBRAL_PIXEL
+        if cambiados.mean() > FRACCION_SIN_CAMBIO:
+            self._stats['rechazadas_verificacion'] += 1
+            return False
+        return True
+    
+    def _buscar_en(self, tabla, firma, pregunta, modelo, ahora):
+        for clave in list(tabla.keys()):
+            entrada = tabla[clave]
+            if ahora - entrada['creado'] > self.ttl:
+                del tabla[clave]
+                self._stats['expiradas'] += 1
+                continue
+            if self._coincide(entrada, firma, pregunta, modelo):
+                return clave, entrada
+        return None, None
+    
+    def buscar(self, firma, pregunta, modelo=MODELO_VISION):
+        """
+        Busca una respuesta para este frame y pregunta.
+        
+        Args:
+            firma (dict): Resultado de firma_frame()
+            pregunta (str): Pregunta hecha a Llava
+            modelo (str): Modelo de visión
+        
+        Returns:
+            str: Respuesta guardada, o None si no hay
+        """
+        pregunta = _normalizar_pregunta(pregunta)
+        ahora = time.time()
+        
+        with self._lock:
+            self._stats['consultas'] += 1
+            
+            clave, entrada = self._buscar_en(self._memoria, firma, pregunta, modelo, ahora)
+            if entrada:
+                self._memoria.move_to_end(clave)
+                self._stats['aciertos'] += 1
+                return entrada['respuesta']
+            
+            if self.disco:
+                self._cargar_disco()
+                clave, entrada = self._buscar_en(self._disco, firma, pregunta, modelo, ahora)
+                if entrada:
+                    # Subir a memoria
+                    self._insertar_memoria(clave, entrada)
+                    self._stats['aciertos'] += 1
+                    self._stats['aciertos_disco'] += 1
+                    return entrada['respuesta']
+            
+            self._stats['fallos'] += 1
+            return None
+    
+    def _insertar_memoria(self, clave, entrada):
+        self._memoria[clave] = entrada
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_entradas:
+            self._memoria.popitem(last=False)
+            self._stats['descartadas'] += 1
+    
+    def guardar(self, firma, pregunta, respuesta, modelo=MODELO_VISION):
+        """Guarda la respuesta de Llava para este frame y pregunta"""
+        entrada = {
+            'hash': firma['hash'],
+            'pregunta': _normalizar_pregunta(pregunta),
+            'modelo': modelo,
+            'respuesta': respuesta,
+            'miniatura': firma['miniatura'],
+            'tamano': list(firma['tamano']),
+            'creado': time.time()
+        }
+        clave = self._clave(entrada)
+        
+        with self._lock:
+            self._insertar_memoria(clave, entrada)
+            
+            if self.disco:
+                self._cargar_disco()
+                self._disco[clave] = entrada
+                self._disco.move_to_end(clave)
+                while len(self._disco) > self.max_disco:
+                    self._disco.popitem(last=False)
+                self._guardar_disco()
+    
+    def limpiar(self):
+        """Borra el cache (memoria y disco)"""
+        with self._lock:
+            self._memoria.clear()
+            self._disco = OrderedDict()
+            if self.disco and os.path.exists(self.archivo):
+                os.remove(self.archivo)
+    
+    def estadisticas(self):
+        """Conteos de uso + tasa de aciertos y tamaño actual"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entradas_memoria'] = len(self._memoria)
+            stats['entradas_disco'] = len(self._disco) if self._disco is not None else 0
+        consultas = stats['consultas']
+        stats['tasa_aciertos'] = stats['aciertos'] / consultas if consultas else 0.0
+        return stats
+
+
+_cache_descripciones = CacheDescripciones()
+
+
+def obtener_estadisticas_cambios():
+    """
+    Estadísticas de la detección de cambios.
+    
+    Returns:
+        dict: Conteos + 'tasa_aciertos' (consultas que evitaron el análisis
+              completo) y 'segundos_ahorrados' (estimados)
+    """
+    stats = dict(_estadisticas_cambios)
+    consultas = stats['consultas']
+    evitadas = stats['sin_cambio'] + stats['solo_region']
+    stats['tasa_aciertos'] = evitadas / consultas if consultas else 0.0
+    return stats
+
+
 # ==========================================
 # FUNCIÓN 2: Optimizar Imagen
 # ==========================================
 
+def reducir_imagen(imagen, max_ancho=MAX_ANCHO):
+    """
+    Reduce una imagen al ancho máximo en dos etapas:
+    1. Image.reduce() por un factor entero (promedio por bloques, muy rápido)
+    2. Ajuste fino con filtro bilineal (barato, sobre la imagen ya pequeña)
+    
+    Mucho más rápido que un LANCZOS a resolución completa y sin
+    diferencia visible para Llava.
+    
+    Args:
+        imagen (PIL.Image): Imagen original
+        max_ancho (int): Ancho máximo
+    
+    Returns:
+        PIL.Image: Imagen reducida (o la misma si ya es pequeña)
+    """
+    ancho, alto = imagen.size
+    if ancho <= max_ancho:
+        return imagen
+    
+    nuevo_ancho = max_ancho
+    nuevo_alto = max(1, int(alto * max_ancho / ancho))
+    
+    # Etapa 1: factor entero sin pasar por debajo del tamaño final
+    factor = ancho // nuevo_ancho
+    if factor >= 2:
+        imagen = imagen.reduce(factor)
+    
+    # Etapa 2: ajuste fino
+    if imagen.size != (nuevo_ancho, nuevo_alto):
+        imagen = imagen.resize((nuevo_ancho, nuevo_alto), Image.Resampling.BILINEAR)
+    
+    return imagen
+
+
 def optimizar_imagen(imagen):
     """
     Optimiza la imagen para análisis rápido con IA.
-    - Reduce tamaño si es muy grande
-    - Comprime sin perder mucha calidad
+    - Reduce tamaño si es muy grande (en dos etapas, ver reducir_imagen)
     
     Args:
         imagen (PIL.Image): Imagen original
@@ -93,16 +899,8 @@ def optimizar_imagen(imagen):
         
         # Si la imagen es más ancha que MAX_ANCHO, redimensionar
         if ancho_original > MAX_ANCHO:
-            # Calcular nuevo tamaño manteniendo proporción
-            ratio = MAX_ANCHO / ancho_original
-            nuevo_ancho = MAX_ANCHO
-            nuevo_alto = int(alto_original * ratio)
-            
-            # Redimensionar (LANCZOS = mejor calidad)
-            imagen = imagen.resize(
-                (nuevo_ancho, nuevo_alto),
-                Image.Resampling.LANCZOS
-            )
+            imagen = reducir_imagen(imagen, MAX_ANCHO)
+            nuevo_ancho, nuevo_alto = imagen.size
             
             print(f"   📐 Optimizado: {ancho_original}x{alto_original} → {nuevo_ancho}x{nuevo_alto}")
         else:
@@ -116,52 +914,109 @@ def optimizar_imagen(imagen):
 
 
 # ==========================================
-# FUNCIÓN 3: Convertir a Base64
+# FUNCIÓN 3: Codificar y Convertir a Base64
 # ==========================================
 
-def imagen_a_base64(imagen):
+def es_pantalla_de_texto(imagen):
     """
-    Convierte imagen PIL a string base64.
+    Detecta pantallas con mucho texto/interfaz (editores, hojas de cálculo):
+    tienen pocos colores distintos. En esas PNG conserva mejor las letras.
+    
+    Returns:
+        bool: True si parece una pantalla de texto
+    """
+    muestra = imagen.reduce(4) if min(imagen.size) >= 64 else imagen
+    colores = muestra.convert('RGB').getcolors(maxcolors=MAX_COLORES_TEXTO)
+    return colores is not None
+
+
+def codificar_imagen(imagen, presupuesto=PRESUPUESTO_BYTES, formatos=FORMATOS_IMAGEN):
+    """
+    Codifica la imagen eligiendo formato y calidad según un presupuesto de bytes.
+    
+    - Pantallas de texto: prueba PNG primero (letras nítidas)
+    - Resto: JPEG (o WebP si está permitido), bajando la calidad
+      hasta entrar en el presupuesto
+    - Sin optimize=True (esa pasada extra de Huffman no compensa)
+    
+    Args:
+        imagen (PIL.Image): Imagen ya reducida
+        presupuesto (int): Tamaño máximo deseado en bytes
+        formatos (tuple): Formatos permitidos ('JPEG', 'PNG', 'WEBP')
+    
+    Returns:
+        tuple: (bytes, formato). Si nada entra en el presupuesto,
+               devuelve la versión más pequeña probada.
+    """
+    if imagen.mode not in ('RGB', 'L'):
+        imagen = imagen.convert('RGB')
+    
+    candidatos = []
+    if 'PNG' in formatos and es_pantalla_de_texto(imagen):
+        candidatos.append(('PNG', None))
+    
+    con_perdida = 'WEBP' if 'WEBP' in formatos else 'JPEG'
+    for calidad in CALIDADES_PRUEBA:
+        candidatos.append((con_perdida, calidad))
+    
+    mejor = None
+    for formato, calidad in candidatos:
+        buffer = BytesIO()
+        if formato == 'PNG':
+            imagen.save(buffer, format='PNG', compress_level=1)
+        else:
+            imagen.save(buffer, format=formato, quality=calidad)
+        datos = buffer.getvalue()
+        
+        if mejor is None or len(datos) < len(mejor[0]):
+            mejor = (datos, formato)
+        if len(datos) <= presupuesto:
+            return datos, formato
+    
+    return mejor
+
+
+def imagen_a_base64(imagen, como_bytes=False):
+    """
+    Convierte imagen PIL a base64.
     Ollama necesita las imágenes en formato base64.
     
     Args:
         imagen (PIL.Image): Imagen a convertir
+        como_bytes (bool): Devolver bytes ASCII en vez de str (evita una copia)
         
     Returns:
-        str: Imagen en formato base64
+        str: Imagen en formato base64 (bytes si como_bytes=True)
         None: Si hay error
     """
     try:
-        # Crear buffer en memoria (sin archivo temporal)
-        buffer = BytesIO()
-        
-        # Guardar imagen en buffer como JPEG
-        imagen.save(buffer, format='JPEG', quality=CALIDAD_COMPRESION, optimize=True)
+        # Formato y calidad según presupuesto (sin archivo temporal)
+        img_bytes, _ = codificar_imagen(imagen)
         
-        # Obtener bytes
-        img_bytes = buffer.getvalue()
+        img_base64 = base64.b64encode(img_bytes)
         
-        # Convertir a base64
-        img_base64 = base64.b64encode(img_bytes).decode('utf-8')
-        
-        return img_base64
+        return img_base64 if como_bytes else img_base64.decode('ascii')
         
     except Exception as e:
         print(f"❌ Error al convertir a base64: {e}")
         return None
-# ==========================================|
+
 
 # ==========================================
 # FUNCIÓN 4: Analizar Imagen con Llava
 # ==========================================
 
-def analizar_con_llava(imagen_base64, pregunta="Describe en español lo que ves en esta imagen"):
+def analizar_con_llava(imagen, pregunta="Describe en español lo que ves en esta imagen", al_recibir=None):
     """
     Analiza una imagen usando Llava (modelo de visión de Ollama).
     
+    La imagen se envía por la API HTTP de Ollama en el campo "images"
+    (conexión persistente), y la respuesta llega en streaming.
+    
     Args:
-        imagen_base64 (str): Imagen en formato base64
+        imagen (bytes | str): Imagen codificada (JPEG/PNG) o ya en base64
         pregunta (str): Qué preguntarle a Llava sobre la imagen
+        al_recibir (callable): Opcional, recibe cada fragmento de texto
         
     Returns:
         str: Descripción/respuesta de Llava
@@ -171,46 +1026,23 @@ def analizar_con_llava(imagen_base64, pregunta="Describe en español lo que ves
         print("   🧠 Analizando con Llava...")
         print(f"   ⏱️  Esto tomará 5-10 segundos...")
         
-        # Construir el comando para Ollama
-        # Formato: ollama run llava:7b "prompt con imagen"
-        comando = [
-            'ollama',
-            'run',
+        descripcion = obtener_cliente().generar(
             MODELO_VISION,
-            pregunta
-        ]
-        
-        # Crear el input con la imagen en base64
-        # Llava espera el formato: imagen en stdin + prompt
-        input_data = f"data:image/jpeg;base64,{imagen_base64}"
-        
-        # Ejecutar Ollama
-        resultado = subprocess.run(
-            comando,
-            input=input_data,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace',
-            timeout=60  # Máximo 60 segundos
-        )
+            pregunta,
+            imagenes=[imagen],
+            al_recibir=al_recibir
+        ).strip()
         
-        # Verificar si funcionó
-        if resultado.returncode == 0 and resultado.stdout:
-            descripcion = resultado.stdout.strip()
+        if descripcion:
             print("   ✅ Análisis completado")
             return descripcion
         else:
             print(f"   ❌ Llava no respondió correctamente")
-            if resultado.stderr:
-                print(f"   Error: {resultado.stderr[:200]}")
             return None
             
-    except subprocess.TimeoutExpired:
-        print("   ⏱️  Timeout: Llava tardó demasiado (>60s)")
-        return None
-    except FileNotFoundError:
-        print("   ❌ Ollama no está instalado o no está en PATH")
+    except ErrorOllama as e:
+        print(f"   ❌ {e}")
+        print("   💡 ¿Está Ollama corriendo? (ollama serve)")
         return None
     except Exception as e:
         print(f"   ❌ Error en análisis: {e}")
@@ -221,98 +1053,1172 @@ def analizar_con_llava(imagen_base64, pregunta="Describe en español lo que ves
 # FUNCIÓN 5: Ver Pantalla (TODO EN UNO)
 # ==========================================
 
-def ver_pantalla(pregunta=None):
+PREGUNTA_GENERAL = """Describe en español lo que ves en esta captura de pantalla.
+
+Menciona:
+1. ¿Qué aplicaciones o programas están abiertos?
+2. ¿Qué contenido específico hay visible?
+3. ¿Qué elementos importantes hay en pantalla?
+
+Sé específico pero conciso."""
+
+
+def _pregunta_region(pregunta, descripcion_anterior):
+    """Prompt para cuando solo se envía la zona de la pantalla que cambió"""
+    return f"""Hace un momento, al preguntar "{pregunta}", la respuesta sobre la pantalla fue:
+
+{descripcion_anterior}
+
+Esta imagen muestra SOLO la zona de la pantalla que cambió desde entonces.
+Responde de nuevo a "{pregunta}" en español, actualizando la respuesta anterior
+con lo que ves en esta zona. Sé específico pero conciso."""
+
+
+def _medir(tiempos, etapa, funcion, *args):
+    """Ejecuta una etapa y anota cuánto tardó (en el resultado y en las estadísticas)"""
+    inicio = time.perf_counter()
+    try:
+        return funcion(*args)
+    finally:
+        duracion = time.perf_counter() - inicio
+        tiempos[etapa] = duracion
+        with _lock_estado:
+            acumulado = _estadisticas_etapas.setdefault(etapa, {'veces': 0, 'total': 0.0, 'max': 0.0})
+            acumulado['veces'] += 1
+            acumulado['total'] += duracion
+            acumulado['max'] = max(acumulado['max'], duracion)
+
+
+def _entrar_vision():
+    global _visiones_activas
+    with _lock_estado:
+        _visiones_activas += 1
+
+
+def _salir_vision():
+    global _visiones_activas
+    with _lock_estado:
+        _visiones_activas = max(0, _visiones_activas - 1)
+
+
+def _recordar(descripcion, pregunta, firma, zona):
+    """Guarda la última respuesta (base de la detección de cambios)"""
+    global _ultima_descripcion, _ultima_pregunta, _ultima_firma, _ultima_zona
+    with _lock_estado:
+        _ultima_descripcion = descripcion
+        _ultima_pregunta = pregunta
+        _ultima_firma = firma
+        _ultima_zona = zona
+
+
+def _etapa_captura(pregunta, region, forzar):
+    """
+    ETAPA 1: Captura, cache y detección de cambios.
+    
+    Returns:
+        tuple: (resultado, trabajo). Si la pregunta se resolvió sin Llava
+               (cache, pantalla sin cambios o error) resultado es el dict
+               final y trabajo es None; si no, trabajo lleva lo necesario
+               para las etapas siguientes.
+    """
+    sesion = obtener_sesion_captura()
+    try:
+        zona = resolver_region(region, sesion.monitores())
+        bgra = sesion.capturar(zona)
+    except ValueError as e:
+        return {'exito': False, 'error': str(e)}, None
+    except Exception as e:
+        print(f"❌ Error al capturar pantalla: {e}")
+        return {'exito': False, 'error': 'No se pudo capturar la pantalla'}, None
+    
+    # ¿Ya respondimos esta pregunta sobre esta misma pantalla?
+    firma = firma_frame(bgra)
+    
+    if not forzar:
+        respuesta = _cache_descripciones.buscar(firma, pregunta)
+        if respuesta is not None:
+            print("   ⚡ Respuesta en cache para esta pantalla")
+            _recordar(respuesta, pregunta, firma, zona)
+            return {
+                'exito': True,
+                'descripcion': respuesta,
+                'imagen': None,
+                'origen': 'cache'
+            }, None
+    
+    # ¿Cambió algo desde la última descripción?
+    with _lock_estado:
+        _estadisticas_cambios['consultas'] += 1
+        
+        misma_pregunta = pregunta == _ultima_pregunta and _ultima_descripcion is not None
+        misma_zona = _ultima_zona == zona
+        comparacion = comparar_firmas(_ultima_firma if misma_zona else None, firma)
+        cambio = clasificar_cambio(comparacion) if misma_pregunta and not forzar else 'completa'
+        
+        if cambio == 'sin_cambio':
+            print("   ⚡ La pantalla no cambió, usando descripción anterior")
+            _estadisticas_cambios['sin_cambio'] += 1
+            _estadisticas_cambios['segundos_ahorrados'] += _tiempo_llava_promedio or 0.0
+            return {
+                'exito': True,
+                'descripcion': _ultima_descripcion,
+                'imagen': _ultima_captura,
+                'origen': cambio
+            }, None
+        
+        descripcion_anterior = _ultima_descripcion
+    
+    if cambio == 'solo_region':
+        izq, arriba, der, abajo = comparacion['region']
+        print(f"   ✂️  Solo cambió una zona: ({izq}, {arriba}) → ({der}, {abajo})")
+        bgra = bgra[arriba:abajo, izq:der]
+        prompt = _pregunta_region(pregunta, descripcion_anterior)
+    else:
+        prompt = pregunta
+    
+    return None, {
+        'pregunta': pregunta,
+        'prompt': prompt,
+        'zona': zona,
+        'firma': firma,
+        'cambio': cambio,
+        'bgra': bgra
+    }
+
+
+def _etapa_codificacion(trabajo):
+    """
+    ETAPA 2: Convertir, reducir y codificar la imagen.
+    
+    Returns:
+        dict: Resultado de error, o None si el trabajo quedó listo para Llava
+    """
+    sesion = obtener_sesion_captura()
+    
+    print("   [2/4] Optimizando imagen...")
+    trabajo['imagen'] = optimizar_imagen(sesion.a_imagen(trabajo.pop('bgra')))
+    
+    print("   [3/4] Codificando imagen...")
+    try:
+        trabajo['datos'], trabajo['formato'] = codificar_imagen(trabajo['imagen'])
+    except Exception as e:
+        print(f"❌ Error al codificar imagen: {e}")
+        return {
+            'exito': False,
+            'error': 'No se pudo convertir imagen'
+        }
+    return None
+
+
+def _etapa_analisis(trabajo):
+    """
+    ETAPA 3: Preguntar a Llava y actualizar cache/estado.
+    
+    Returns:
+        dict: Resultado final
+    """
+    global _ultima_captura, _tiempo_llava_promedio
+    
+    print("   [4/4] Analizando con IA...")
+    
+    inicio = time.perf_counter()
+    descripcion = analizar_con_llava(trabajo['datos'], trabajo['prompt'])
+    duracion = time.perf_counter() - inicio
+    
+    if descripcion is None:
+        return {
+            'exito': False,
+            'error': 'Llava no pudo analizar la imagen'
+        }
+    
+    cambio = trabajo['cambio']
+    with _lock_estado:
+        if cambio == 'solo_region':
+            _estadisticas_cambios['solo_region'] += 1
+            if _tiempo_llava_promedio:
+                _estadisticas_cambios['segundos_ahorrados'] += max(0.0, _tiempo_llava_promedio - duracion)
+        else:
+            _estadisticas_cambios['completas'] += 1
+            if _tiempo_llava_promedio is None:
+                _tiempo_llava_promedio = duracion
+            else:
+                _tiempo_llava_promedio = 0.8 * _tiempo_llava_promedio + 0.2 * duracion
+            _ultima_captura = trabajo['imagen']
+    
+    # Guardar en cache
+    _cache_descripciones.guardar(trabajo['firma'], trabajo['pregunta'], descripcion)
+    _recordar(descripcion, trabajo['pregunta'], trabajo['firma'], trabajo['zona'])
+    
+    print("   ✅ Visión completada\n")
+    
+    return {
+        'exito': True,
+        'descripcion': descripcion,
+        'imagen': trabajo['imagen'],
+        'origen': cambio
+    }
+
+
+def ver_pantalla(pregunta=None, region=None, forzar=False):
     """
     Función principal: Captura pantalla y la analiza con IA.
     Esta es la función que NEO usará para "ver".
     
+    Si la pantalla no cambió desde la última vez (misma pregunta),
+    devuelve la descripción anterior sin llamar a Llava. Si solo
+    cambió una zona, envía únicamente esa zona.
+    
+    Se puede llamar desde varios hilos a la vez. Para no bloquear,
+    usar ver_pantalla_async().
+    
     Args:
         pregunta (str): Pregunta específica sobre la pantalla
                        Si es None, hace descripción general
+        region: Qué capturar: None (monitor principal), 'ventana',
+                'todos', 'monitor:2', o un rectángulo (izq, arriba, ancho, alto).
+                Capturar menos píxeles = menos texto borroso y Llava más rápido
+        forzar (bool): Analizar la pantalla completa aunque no haya cambiado
         
     Returns:
         dict: {
             'exito': bool,
             'descripcion': str,
             'imagen': PIL.Image (opcional),
+            'origen': 'cache' | 'sin_cambio' | 'solo_region' | 'completa',
+            'tiempos': dict (segundos por etapa),
             'error': str (si hay error)
         }
     """
-    global _ultima_captura, _ultima_descripcion, _vision_activa
-    
     print("\n👁️  NEO está viendo tu pantalla...")
-    _vision_activa = True
+    
+    # Si no hay pregunta específica, hacer descripción general
+    if pregunta is None:
+        pregunta = PREGUNTA_GENERAL
+    
+    tiempos = {}
+    inicio = time.perf_counter()
+    _entrar_vision()
     
     try:
         # PASO 1: Capturar pantalla
         print("   [1/4] Capturando pantalla...")
-        imagen = capturar_pantalla_rapida()
+        resultado, trabajo = _medir(tiempos, 'captura', _etapa_captura, pregunta, region, forzar)
         
-        if imagen is None:
-            _vision_activa = False
-            return {
-                'exito': False,
-                'error': 'No se pudo capturar la pantalla'
-            }
+        # PASOS 2 y 3: Optimizar y codificar
+        if resultado is None:
+            resultado = _medir(tiempos, 'codificacion', _etapa_codificacion, trabajo)
         
-        # PASO 2: Optimizar imagen
-        print("   [2/4] Optimizando imagen...")
-        imagen_opt = optimizar_imagen(imagen)
+        # PASO 4: Analizar con Llava
+        if resultado is None:
+            resultado = _medir(tiempos, 'analisis', _etapa_analisis, trabajo)
         
-        # PASO 3: Convertir a base64
-        print("   [3/4] Convirtiendo a base64...")
-        img_base64 = imagen_a_base64(imagen_opt)
+        tiempos['total'] = time.perf_counter() - inicio
+        resultado['tiempos'] = tiempos
+        return resultado
         
-        if img_base64 is None:
-            _vision_activa = False
-            return {
-                'exito': False,
-                'error': 'No se pudo convertir imagen'
-            }
+    except Exception as e:
+        print(f"   ❌ Error general: {e}\n")
+        return {
+            'exito': False,
+            'error': str(e)
+        }
+    finally:
+        _salir_vision()
+
+
+# ==========================================
+# VISIÓN ASÍNCRONA (ETAPAS EN PARALELO)
+# ==========================================
+
+class PipelineVision:
+    """
+    Ejecuta ver_pantalla por etapas en hilos separados y devuelve futuros.
+    
+    - Captura (1 hilo) → codificación (HILOS_CODIFICACION) → análisis
+      (HILOS_ANALISIS). Mientras Llava analiza una imagen, la siguiente
+      ya se está capturando y codificando.
+    - Varias peticiones idénticas (misma pregunta, región y forzar) en
+      curso a la vez comparten el mismo futuro: Llava trabaja una sola vez.
+    - Cada resultado incluye 'tiempos' con la espera en cola y la
+      duración de cada etapa.
+    
+    Ejemplo:
+        futuro = ver_pantalla_async("¿Qué programa está abierto?")
+        ...  # seguir con otra cosa
+        resultado = futuro.result(timeout=30)
+    """
+    
+    def __init__(self, hilos_codificacion=HILOS_CODIFICACION, hilos_analisis=HILOS_ANALISIS):
+        self._captura = ThreadPoolExecutor(1, thread_name_prefix='NEO-vision-captura')
+        self._codificacion = ThreadPoolExecutor(hilos_codificacion, thread_name_prefix='NEO-vision-codificacion')
+        self._analisis = ThreadPoolExecutor(hilos_analisis, thread_name_prefix='NEO-vision-analisis')
         
-        # PASO 4: Analizar con Llava
-        print("   [4/4] Analizando con IA...")
+        self._pendientes = {}    # clave → Future en curso
+        self._lock = threading.Lock()
+        self._stats = {'solicitudes': 0, 'deduplicadas': 0}
+    
+    def enviar(self, pregunta=None, region=None, forzar=False):
+        """
+        Pide un análisis sin bloquear.
         
-        # Si no hay pregunta específica, hacer descripción general
+        Returns:
+            concurrent.futures.Future: Se resuelve con el mismo dict que ver_pantalla()
+        """
         if pregunta is None:
-            pregunta = """Describe en español lo que ves en esta captura de pantalla.
+            pregunta = PREGUNTA_GENERAL
+        clave = (_normalizar_pregunta(pregunta), repr(region), forzar)
+        
+        with self._lock:
+            self._stats['solicitudes'] += 1
+            futuro = self._pendientes.get(clave)
+            if futuro is not None:
+                self._stats['deduplicadas'] += 1
+                return futuro
+            
+            futuro = Future()
+            self._pendientes[clave] = futuro
+        
+        self._captura.submit(self._capturar, futuro, clave, pregunta, region, forzar,
+                             time.perf_counter())
+        return futuro
+    
+    def _capturar(self, futuro, clave, pregunta, region, forzar, enviado):
+        if not futuro.set_running_or_notify_cancel():
+            self._olvidar(futuro, clave)
+            return
+        
+        _entrar_vision()
+        tiempos = {'espera_captura': time.perf_counter() - enviado}
+        try:
+            resultado, trabajo = _medir(tiempos, 'captura', _etapa_captura, pregunta, region, forzar)
+            if resultado is not None:
+                return self._terminar(futuro, clave, resultado, tiempos, enviado)
+            self._codificacion.submit(self._codificar, futuro, clave, trabajo, tiempos, enviado,
+                                      time.perf_counter())
+        except Exception as e:
+            self._terminar(futuro, clave, {'exito': False, 'error': str(e)}, tiempos, enviado)
+    
+    def _codificar(self, futuro, clave, trabajo, tiempos, enviado, encolado):
+        tiempos['espera_codificacion'] = time.perf_counter() - encolado
+        try:
+            resultado = _medir(tiempos, 'codificacion', _etapa_codificacion, trabajo)
+            if resultado is not None:
+                return self._terminar(futuro, clave, resultado, tiempos, enviado)
+            self._analisis.submit(self._analizar, futuro, clave, trabajo, tiempos, enviado,
+                                  time.perf_counter())
+        except Exception as e:
+            self._terminar(futuro, clave, {'exito': False, 'error': str(e)}, tiempos, enviado)
+    
+    def _analizar(self, futuro, clave, trabajo, tiempos, enviado, encolado):
+        tiempos['espera_analisis'] = time.perf_counter() - encolado
+        try:
+            resultado = _medir(tiempos, 'analisis', _etapa_analisis, trabajo)
+        except Exception as e:
+            resultado = {'exito': False, 'error': str(e)}
+        self._terminar(futuro, clave, resultado, tiempos, enviado)
+    
+    def _olvidar(self, futuro, clave):
+        with self._lock:
+            if self._pendientes.get(clave) is futuro:
+                del self._pendientes[clave]
+    
+    def _terminar(self, futuro, clave, resultado, tiempos, enviado):
+        tiempos['total'] = time.perf_counter() - enviado
+        resultado['tiempos'] = tiempos
+        self._olvidar(futuro, clave)
+        _salir_vision()
+        futuro.set_result(resultado)
+    
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['en_curso'] = len(self._pendientes)
+        return stats
+    
+    def cerrar(self, esperar=True):
+        """Detiene los hilos (esperar=True: termina lo que está en curso)"""
+        for ejecutor in (self._captura, self._codificacion, self._analisis):
+            ejecutor.shutdown(wait=esperar)
 
-Menciona:
-1. ¿Qué aplicaciones o programas están abiertos?
-2. ¿Qué contenido específico hay visible?
-3. ¿Qué elementos importantes hay en pantalla?
 
-Sé específico pero conciso."""
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def obtener_pipeline_vision():
+    """Pipeline compartido del módulo (se crea al primer uso)"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = PipelineVision()
+        return _pipeline
+
+
+def ver_pantalla_async(pregunta=None, region=None, forzar=False):
+    """
+    Igual que ver_pantalla(), pero devuelve un Future al instante.
+    
+    Returns:
+        concurrent.futures.Future: .result() da el dict de ver_pantalla()
+    """
+    return obtener_pipeline_vision().enviar(pregunta, region, forzar)
+
+
+def cerrar_pipeline_vision():
+    """Detiene los hilos del pipeline (si se creó)"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is not None:
+            _pipeline.cerrar()
+            _pipeline = None
+
+
+def obtener_estadisticas_etapas():
+    """
+    Tiempo por etapa de todas las visiones (síncronas y asíncronas).
+    
+    Returns:
+        dict: {etapa: {'veces', 'total', 'max', 'promedio'}} + 'pipeline'
+    """
+    with _lock_estado:
+        stats = {etapa: dict(valores) for etapa, valores in _estadisticas_etapas.items()}
+    for valores in stats.values():
+        valores['promedio'] = valores['total'] / valores['veces'] if valores['veces'] else 0.0
+    if _pipeline is not None:
+        stats['pipeline'] = _pipeline.estadisticas()
+    return stats
+
+
+# ==========================================
+# CAPA DE TEXTO (OCR)
+# ==========================================
+# Muchas preguntas son en realidad "¿qué dice?" o "¿dónde está el botón
+# Guardar?". Un OCR local las responde en una fracción del tiempo de
+# Llava y con la posición exacta de cada palabra.
+
+class MotorOCR:
+    """
+    Interfaz de un motor OCR.
+    
+    leer() devuelve una lista de palabras:
+        {'texto': str, 'caja': (izq, arriba, ancho, alto), 'confianza': 0-1,
+         'linea': int}
+    con coordenadas relativas a la imagen recibida.
+    """
+    
+    nombre = 'ninguno'
+    
+    def disponible(self):
+        return False
+    
+    def leer(self, imagen):
+        return []
+
+
+class MotorOCRTesseract(MotorOCR):
+    """Tesseract vía pytesseract (necesita el ejecutable tesseract instalado)"""
+    
+    nombre = 'tesseract'
+    
+    def __init__(self, idioma=IDIOMA_OCR):
+        self.idioma = idioma
+        self._disponible = None
+    
+    def disponible(self):
+        if self._disponible is None:
+            try:
+                import pytesseract
+                pytesseract.get_tesseract_version()
+                self._disponible = True
+            except Exception:
+                self._disponible = False
+        return self._disponible
+    
+    def leer(self, imagen):
+        import pytesseract
+        
+        datos = pytesseract.image_to_data(imagen, lang=self.idioma,
+                                          output_type=pytesseract.Output.DICT)
+        palabras = []
+        for i, texto in enumerate(datos['text']):
+            texto = texto.strip()
+            confianza = float(datos['conf'][i])
+            if not texto or confianza < 0:
+                continue
+            palabras.append({
+                'texto': texto,
+                'caja': (datos['left'][i], datos['top'][i], datos['width'][i], datos['height'][i]),
+                'confianza': confianza / 100.0,
+                'linea': (datos['block_num'][i], datos['par_num'][i], datos['line_num'][i])
+            })
+        return palabras
+
+
+class MotorOCRRapid(MotorOCR):
+    """
+    RapidOCR (modelos ONNX de PaddleOCR, sin ejecutables externos).
+    Detecta líneas; cada línea se parte en palabras repartiendo el
+    ancho según el número de letras.
+    """
+    
+    nombre = 'rapidocr'
+    
+    def __init__(self):
+        self._motor = None
+        self._disponible = None
+    
+    def disponible(self):
+        if self._disponible is None:
+            try:
+                from rapidocr_onnxruntime import RapidOCR
+                self._motor = RapidOCR()
+                self._disponible = True
+            except Exception:
+                self._disponible = False
+        return self._disponible
+    
+    def leer(self, imagen):
+        if not self.disponible():
+            return []
+        
+        resultado, _ = self._motor(np.asarray(imagen.convert('RGB')))
+        palabras = []
+        for numero, (puntos, texto, confianza) in enumerate(resultado or []):
+            xs = [p[0] for p in puntos]
+            ys = [p[1] for p in puntos]
+            izq, arriba = int(min(xs)), int(min(ys))
+            ancho, alto = int(max(xs)) - izq, int(max(ys)) - arriba
+            
+            total = max(1, len(texto))
+            posicion = 0
+            for trozo in texto.split(' '):
+                if trozo:
+                    palabras.append({
+                        'texto': trozo,
+                        'caja': (izq + ancho * posicion // total, arriba,
+                                 max(1, ancho * len(trozo) // total), alto),
+                        'confianza': float(confianza),
+                        'linea': numero
+                    })
+                posicion += len(trozo) + 1
+        return palabras
+
+
+class MotorOCRFalso(MotorOCR):
+    """Motor para pruebas: devuelve siempre las palabras que se le indiquen"""
+    
+    nombre = 'falso'
+    
+    def __init__(self, palabras=None):
+        self.palabras = palabras or []
+        self.llamadas = 0
+    
+    def disponible(self):
+        return True
+    
+    def leer(self, imagen):
+        self.llamadas += 1
+        return [dict(p) for p in self.palabras]
+
+
+_motor_ocr = None
+
+
+def obtener_motor_ocr():
+    """Motor OCR según MOTOR_OCR ('auto' = el primero instalado)"""
+    global _motor_ocr
+    if _motor_ocr is None:
+        candidatos = {
+            'rapidocr': [MotorOCRRapid],
+            'tesseract': [MotorOCRTesseract],
+            'auto': [MotorOCRRapid, MotorOCRTesseract],
+        }.get(MOTOR_OCR, [])
         
-        descripcion = analizar_con_llava(img_base64, pregunta)
+        _motor_ocr = MotorOCR()
+        for clase in candidatos:
+            motor = clase()
+            if motor.disponible():
+                _motor_ocr = motor
+                break
+    return _motor_ocr
+
+
+def configurar_motor_ocr(motor):
+    """Cambia el motor OCR (ej: MotorOCRFalso en pruebas)"""
+    global _motor_ocr
+    _motor_ocr = motor
+    _cache_ocr.limpiar()
+
+
+def ocr_disponible():
+    return obtener_motor_ocr().disponible()
+
+
+# Mismo cache verificado por miniatura que las descripciones, en otra tabla
+_cache_ocr = CacheDescripciones(max_entradas=CACHE_OCR_MAX, disco=False)
+_PREGUNTA_OCR = '__ocr__'
+
+
+def leer_texto(bgra, firma=None):
+    """
+    Extrae las palabras de un frame (con cache por firma del frame).
+    
+    Args:
+        bgra (np.ndarray): Frame de SesionCaptura.capturar()
+        firma (dict): firma_frame(bgra), si ya se calculó
+    
+    Returns:
+        tuple: (palabras, desde_cache). Coordenadas relativas al frame.
+    """
+    motor = obtener_motor_ocr()
+    if not motor.disponible():
+        return [], False
+    
+    if firma is None:
+        firma = firma_frame(bgra)
+    
+    palabras = _cache_ocr.buscar(firma, _PREGUNTA_OCR, motor.nombre)
+    if palabras is not None:
+        return palabras, True
+    
+    # OCR a resolución completa: reducir la imagen borra las letras pequeñas
+    imagen = obtener_sesion_captura().a_imagen(bgra)
+    palabras = [p for p in motor.leer(imagen) if p['confianza'] >= CONFIANZA_MIN_OCR]
+    
+    _cache_ocr.guardar(firma, _PREGUNTA_OCR, palabras, motor.nombre)
+    return palabras, False
+
+
+def leer_texto_pantalla(region=None):
+    """
+    Captura y lee el texto de la pantalla.
+    
+    Args:
+        region: Modo de captura (ver resolver_region)
+    
+    Returns:
+        dict: {
+            'exito': bool,
+            'palabras': list (cajas en coordenadas de pantalla),
+            'texto': str (líneas en orden de lectura),
+            'origen': 'cache' | 'ocr',
+            'error': str (si hay error)
+        }
+    """
+    if not ocr_disponible():
+        return {'exito': False, 'error': 'No hay motor OCR instalado (pytesseract o rapidocr)'}
+    
+    try:
+        sesion = obtener_sesion_captura()
+        zona = resolver_region(region, sesion.monitores())
+        palabras, desde_cache = leer_texto(sesion.capturar(zona))
+    except Exception as e:
+        return {'exito': False, 'error': str(e)}
+    
+    # Pasar a coordenadas de pantalla (para poder hacer clic)
+    absolutas = []
+    for palabra in palabras:
+        izq, arriba, ancho, alto = palabra['caja']
+        absolutas.append(dict(palabra, caja=(izq + zona['left'], arriba + zona['top'], ancho, alto)))
+    
+    return {
+        'exito': True,
+        'palabras': absolutas,
+        'texto': _unir_lineas(absolutas),
+        'origen': 'cache' if desde_cache else 'ocr'
+    }
+
+
+def _clave_linea(palabra):
+    linea = palabra.get('linea')
+    return tuple(linea) if isinstance(linea, list) else linea
+
+
+def _unir_lineas(palabras):
+    """Reconstruye el texto agrupando las palabras por línea"""
+    lineas = OrderedDict()
+    for palabra in palabras:
+        lineas.setdefault(_clave_linea(palabra), []).append(palabra['texto'])
+    return '\n'.join(' '.join(textos) for textos in lineas.values())
+
+
+def _normalizar_texto(texto):
+    """Minúsculas, sin tildes ni signos: 'Guardar…' == 'guardar'"""
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ''.join(c for c in texto if c.isalnum() or c.isspace()).strip()
+
+
+def _similitud(a, b):
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def buscar_texto(texto, region=None, palabras=None, similitud_min=SIMILITUD_MIN_OCR):
+    """
+    Busca un texto (una o varias palabras seguidas) en pantalla.
+    Tolera pequeños errores del OCR ("Guardaг" ≈ "Guardar").
+    
+    Args:
+        texto (str): Texto a buscar, ej: "Guardar como"
+        region: Modo de captura (ver resolver_region)
+        palabras (list): Palabras ya leídas (evita capturar de nuevo)
+        similitud_min (float): 0-1, cuánto se deben parecer
+    
+    Returns:
+        list: Coincidencias ordenadas de mejor a peor:
+              {'texto', 'caja', 'centro': (x, y), 'similitud'}
+    """
+    if palabras is None:
+        resultado = leer_texto_pantalla(region)
+        if not resultado['exito']:
+            return []
+        palabras = resultado['palabras']
+    
+    buscado = _normalizar_texto(texto)
+    n = len(buscado.split())
+    if n == 0:
+        return []
+    
+    coincidencias = []
+    for i in range(len(palabras) - n + 1):
+        grupo = palabras[i:i + n]
+        
+        # Las palabras de una frase tienen que estar en la misma línea
+        if len({_clave_linea(p) for p in grupo}) > 1:
+            continue
+        
+        candidato = _normalizar_texto(' '.join(p['texto'] for p in grupo))
+        parecido = _similitud(buscado, candidato)
+        if parecido < similitud_min:
+            continue
+        
+        izq = min(p['caja'][0] for p in grupo)
+        arriba = min(p['caja'][1] for p in grupo)
+        der = max(p['caja'][0] + p['caja'][2] for p in grupo)
+        abajo = max(p['caja'][1] + p['caja'][3] for p in grupo)
         
-        if descripcion is None:
-            _vision_activa = False
+        coincidencias.append({
+            'texto': ' '.join(p['texto'] for p in grupo),
+            'caja': (izq, arriba, der - izq, abajo - arriba),
+            'centro': ((izq + der) // 2, (arriba + abajo) // 2),
+            'similitud': parecido
+        })
+    
+    coincidencias.sort(key=lambda c: c['similitud'], reverse=True)
+    return coincidencias
+
+
+def hay_texto(texto, region=None):
+    """¿Aparece este texto en pantalla?"""
+    return bool(buscar_texto(texto, region))
+
+
+def ubicar_texto(texto, region=None):
+    """
+    Posición en pantalla del texto (la mejor coincidencia).
+    
+    Returns:
+        tuple: (x, y) del centro, o None si no aparece
+    """
+    coincidencias = buscar_texto(texto, region)
+    return coincidencias[0]['centro'] if coincidencias else None
+
+
+# Preguntas que el OCR puede responder sin Llava
+_PATRONES_LEER = ('qué dice', 'que dice', 'lee ', 'léeme', 'leeme', 'qué pone', 'que pone',
+                  'qué texto', 'que texto', 'qué está escrito', 'que esta escrito')
+# Búsqueda explícita: verbo + (artículo) + (botón/opción...) + (de/en...) + objetivo.
+# El objetivo tiene que ir entre comillas o empezar en mayúscula ("Guardar"):
+# "¿hay texto en rojo?" o "¿ves el botón de enviar?" son preguntas para Llava
+_PATRON_BUSCAR = re.compile(
+    r"(?i:d[oó]nde est[aá]|hay|aparece|ves|encuentra|busca)\s+"
+    r"(?:(?i:el|la|los|las|un|una)\s+)?"
+    r"(?:(?i:bot[oó]n|texto|opci[oó]n|men[uú]|enlace|palabra|pesta[nñ]a)\s+)?"
+    r"(?:(?i:de|del|en|con|que dice)\s+)?"
+    r"(?:(?i:el|la|los|las|un|una)\s+)?"
+    r"([\"'«“][^\"'»”]+[\"'»”]|[A-ZÁÉÍÓÚÑ][^?]*?)\s*\??$"
+)
+
+
+def clasificar_pregunta(pregunta):
+    """
+    Decide si una pregunta sobre la pantalla es de texto o semántica.
+    
+    Returns:
+        tuple: ('leer', None)      → "¿qué dice la pantalla?"
+               ('buscar', texto)   → "¿dónde está el botón Guardar?"
+               ('semantica', None) → todo lo demás (Llava)
+    """
+    minusculas = pregunta.lower().strip(' ¿¡')
+    
+    if any(patron in minusculas for patron in _PATRONES_LEER):
+        return 'leer', None
+    
+    encontrado = _PATRON_BUSCAR.search(pregunta.strip(' ¿¡'))
+    if encontrado:
+        objetivo = encontrado.group(1).strip(' "\'«»“”')
+        if objetivo:
+            return 'buscar', objetivo
+    
+    return 'semantica', None
+
+
+def responder_pregunta(pregunta, region=None):
+    """
+    Responde una pregunta sobre la pantalla con el medio más barato:
+    OCR para "qué dice" / "dónde está X", Llava para el resto.
+    
+    Returns:
+        dict: Como ver_pantalla(), con 'origen' = 'ocr' si respondió el OCR
+              y además 'coincidencias' en las búsquedas.
+    """
+    tipo, objetivo = clasificar_pregunta(pregunta)
+    
+    if tipo != 'semantica' and ocr_disponible():
+        lectura = leer_texto_pantalla(region)
+        if lectura['exito']:
+            if tipo == 'leer':
+                texto = lectura['texto'].strip()
+                return {
+                    'exito': True,
+                    'descripcion': texto if texto else "No hay texto visible en pantalla",
+                    'imagen': None,
+                    'origen': 'ocr'
+                }
+            
+            coincidencias = buscar_texto(objetivo, palabras=lectura['palabras'])
+            if coincidencias:
+                x, y = coincidencias[0]['centro']
+                descripcion = f'"{coincidencias[0]["texto"]}" está en pantalla, en ({x}, {y})'
+            else:
+                descripcion = f'No veo "{objetivo}" en pantalla'
             return {
-                'exito': False,
-                'error': 'Llava no pudo analizar la imagen'
+                'exito': True,
+                'descripcion': descripcion,
+                'imagen': None,
+                'origen': 'ocr',
+                'coincidencias': coincidencias
             }
+    
+    return ver_pantalla(pregunta, region)
+
+
+def obtener_estadisticas_ocr():
+    """Motor en uso y estadísticas del cache OCR"""
+    stats = _cache_ocr.estadisticas()
+    stats['motor'] = obtener_motor_ocr().nombre
+    return stats
+
+
+# ==========================================
+# MOSAICOS (PANTALLAS DE TEXTO GRANDES)
+# ==========================================
+# Un editor en 4K reducido a MAX_ANCHO queda ilegible para Llava.
+# En lugar de eso: una vista general pequeña + solo los recortes
+# (mosaicos) que la pregunta necesita, a resolución nativa.
+
+_PALABRAS_VACIAS = {'donde', 'esta', 'estan', 'que', 'dice', 'pone', 'como', 'cual', 'cuales',
+                    'pantalla', 'ventana', 'para', 'este', 'esto', 'hay', 'aparece', 'sobre',
+                    'tiene', 'valor', 'texto', 'linea', 'celda', 'funcion', 'archivo'}
+
+
+def dividir_en_mosaicos(ancho, alto, tamano=TAMANO_MOSAICO):
+    """
+    Divide el frame en una cuadrícula de mosaicos de ~tamano píxeles.
+    Columnas con letras (A, B, ...) y filas con números (1, 2, ...).
+    
+    Returns:
+        list: [{'nombre': 'B2', 'caja': (izq, arriba, der, abajo)}, ...]
+    """
+    columnas = max(1, -(-ancho // tamano))
+    filas = max(1, -(-alto // tamano))
+    ancho_celda = -(-ancho // columnas)
+    alto_celda = -(-alto // filas)
+    
+    mosaicos = []
+    for fila in range(filas):
+        for columna in range(columnas):
+            mosaicos.append({
+                'nombre': f"{chr(ord('A') + columna)}{fila + 1}",
+                'caja': (columna * ancho_celda, fila * alto_celda,
+                         min(ancho, (columna + 1) * ancho_celda), min(alto, (fila + 1) * alto_celda))
+            })
+    return mosaicos
+
+
+def _mosaico_de_punto(mosaicos, x, y):
+    for mosaico in mosaicos:
+        izq, arriba, der, abajo = mosaico['caja']
+        if izq <= x < der and arriba <= y < abajo:
+            return mosaico
+    return None
+
+
+def _mosaicos_por_texto(pregunta, palabras, mosaicos):
+    """Mosaicos donde el OCR vio palabras de la pregunta (más apariciones primero)"""
+    claves = [p for p in _normalizar_texto(pregunta).split()
+              if len(p) >= 4 and p not in _PALABRAS_VACIAS]
+    if not claves or not palabras:
+        return []
+    
+    votos = {}
+    for palabra in palabras:
+        texto = _normalizar_texto(palabra['texto'])
+        if not texto or not any(_similitud(clave, texto) >= SIMILITUD_MIN_OCR for clave in claves):
+            continue
+        izq, arriba, ancho, alto = palabra['caja']
+        mosaico = _mosaico_de_punto(mosaicos, izq + ancho // 2, arriba + alto // 2)
+        if mosaico:
+            votos[mosaico['nombre']] = votos.get(mosaico['nombre'], 0) + 1
+    
+    return [m for m in sorted(mosaicos, key=lambda m: -votos.get(m['nombre'], 0))
+            if m['nombre'] in votos]
+
+
+def _mosaicos_por_cambio(region, mosaicos):
+    """Mosaicos que tocan la zona que cambió"""
+    if region is None:
+        return []
+    izq, arriba, der, abajo = region
+    return [m for m in mosaicos
+            if m['caja'][0] < der and izq < m['caja'][2] and m['caja'][1] < abajo and arriba < m['caja'][3]]
+
+
+def _mosaicos_pedidos(respuesta, mosaicos):
+    """Lee 'ZOOM: B2, C3' de la respuesta de la vista general"""
+    encontrado = re.search(r'ZOOM\s*:\s*([A-Z0-9 ,;y]+)', respuesta or '', re.IGNORECASE)
+    if not encontrado:
+        return []
+    pedidos = re.findall(r'[A-Z]\d+', encontrado.group(1).upper())
+    por_nombre = {m['nombre']: m for m in mosaicos}
+    return [por_nombre[n] for n in dict.fromkeys(pedidos) if n in por_nombre]
+
+
+def _nombre_celdas(mosaicos):
+    columnas = sorted({m['nombre'][0] for m in mosaicos})
+    filas = sorted({int(m['nombre'][1:]) for m in mosaicos})
+    return columnas, filas
+
+
+def _pregunta_vista_general(pregunta, mosaicos, maximo):
+    columnas, filas = _nombre_celdas(mosaicos)
+    return f"""Esta imagen es una vista REDUCIDA de la pantalla, dividida en una cuadrícula de
+{len(columnas)} columnas ({columnas[0]}-{columnas[-1]}, de izquierda a derecha) y {len(filas)} filas
+(1-{filas[-1]}, de arriba a abajo).
+
+Pregunta: {pregunta}
+
+Si puedes responder con seguridad, responde directamente en español.
+Si el texto necesario es demasiado pequeño para leerlo, responde SOLO con
+"ZOOM:" y las celdas que necesitas ver de cerca (máximo {maximo}), por ejemplo: ZOOM: B2, C2"""
+
+
+def _pregunta_mosaicos(pregunta, elegidos):
+    zonas = ', '.join(m['nombre'] for m in elegidos)
+    return f"""La primera imagen es la pantalla completa reducida. Las siguientes son recortes
+a resolución real de las celdas {zonas} (en ese orden; columnas con letras de izquierda
+a derecha, filas con números de arriba a abajo). Usa los recortes para leer el texto.
+
+Responde en español: {pregunta}"""
+
+
+class CacheMosaicos:
+    """
+    Cache por hash de contenido:
+    - hash del mosaico → imagen ya codificada (no se recodifica)
+    - (hashes enviados, pregunta) → respuesta de Llava
+    """
+    
+    def __init__(self, max_entradas=CACHE_MOSAICOS_MAX):
+        self.max_entradas = max_entradas
+        self._codificados = OrderedDict()
+        self._respuestas = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'mosaicos_codificados': 0, 'mosaicos_reutilizados': 0,
+                       'respuestas_reutilizadas': 0}
+    
+    @staticmethod
+    def hash_contenido(bgra):
+        return hashlib.blake2b(np.ascontiguousarray(bgra).data, digest_size=16).hexdigest()
+    
+    def _poner(self, tabla, clave, valor):
+        tabla[clave] = valor
+        tabla.move_to_end(clave)
+        while len(tabla) > self.max_entradas:
+            tabla.popitem(last=False)
+    
+    def codificar(self, bgra, sesion):
+        """Mosaico codificado (del cache si ya se vio este mismo contenido)"""
+        clave = self.hash_contenido(bgra)
+        with self._lock:
+            if clave in self._codificados:
+                self._codificados.move_to_end(clave)
+                self._stats['mosaicos_reutilizados'] += 1
+                return clave, self._codificados[clave]
         
-        # Guardar en cache
-        _ultima_captura = imagen_opt
-        _ultima_descripcion = descripcion
-        _vision_activa = False
+        datos, _ = codificar_imagen(sesion.a_imagen(bgra))
+        with self._lock:
+            self._poner(self._codificados, clave, datos)
+            self._stats['mosaicos_codificados'] += 1
+        return clave, datos
+    
+    def respuesta(self, hashes, pregunta):
+        with self._lock:
+            respuesta = self._respuestas.get((tuple(hashes), _normalizar_pregunta(pregunta)))
+            if respuesta is not None:
+                self._stats['respuestas_reutilizadas'] += 1
+            return respuesta
+    
+    def guardar_respuesta(self, hashes, pregunta, respuesta):
+        with self._lock:
+            self._poner(self._respuestas, (tuple(hashes), _normalizar_pregunta(pregunta)), respuesta)
+    
+    def estadisticas(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entradas'] = len(self._codificados)
+        return stats
+
+
+_cache_mosaicos = CacheMosaicos()
+
+
+def _consultar_llava(imagenes, prompt, metricas):
+    """Una llamada a Llava sumando tokens y tiempo en `metricas`"""
+    cliente = obtener_cliente()
+    inicio = time.perf_counter()
+    try:
+        respuesta = cliente.generar(MODELO_VISION, prompt, imagenes=imagenes).strip()
+    except ErrorOllama as e:
+        print(f"   ❌ {e}")
+        return None
+    finally:
+        metricas['segundos'] += time.perf_counter() - inicio
+    
+    datos = cliente.ultimas_metricas()
+    metricas['llamadas'] += 1
+    metricas['imagenes'] += len(imagenes)
+    metricas['tokens_entrada'] += datos.get('prompt_eval_count', 0)
+    metricas['tokens_salida'] += datos.get('eval_count', 0)
+    return respuesta
+
+
+def ver_pantalla_mosaico(pregunta=None, region=None, max_mosaicos=MAX_MOSAICOS):
+    """
+    Como ver_pantalla(), pero para pantallas grandes llenas de texto.
+    
+    1. Elige los mosaicos que la pregunta necesita: donde el OCR ve
+       palabras de la pregunta, o la zona que cambió desde la última vez
+    2. Si no hay pistas, manda solo una vista general reducida; Llava
+       responde directamente o pide "ZOOM: B2, C2"
+    3. Manda la vista general + esos mosaicos a resolución nativa
+    
+    Args:
+        pregunta (str): Pregunta sobre la pantalla
+        region: Qué capturar (ver resolver_region)
+        max_mosaicos (int): Mosaicos como máximo por pregunta
+    
+    Returns:
+        dict: Como ver_pantalla(), con 'origen' = 'vista_general' o
+              'mosaicos', 'mosaicos' (nombres enviados), 'motivo'
+              ('texto', 'cambio', 'zoom') y 'metricas' (llamadas,
+              imágenes, tokens y segundos de Llava)
+    """
+    if pregunta is None:
+        pregunta = PREGUNTA_GENERAL
+    
+    print("\n👁️  NEO está viendo tu pantalla (mosaicos)...")
+    metricas = {'llamadas': 0, 'imagenes': 0, 'tokens_entrada': 0, 'tokens_salida': 0, 'segundos': 0.0}
+    inicio = time.perf_counter()
+    _entrar_vision()
+    
+    try:
+        sesion = obtener_sesion_captura()
+        try:
+            zona = resolver_region(region, sesion.monitores())
+            bgra = sesion.capturar(zona)
+        except Exception as e:
+            return {'exito': False, 'error': str(e)}
+        
+        alto, ancho = bgra.shape[:2]
+        if ancho <= MAX_ANCHO:
+            # Cabe entera sin perder detalle: no hace falta dividir
+            return ver_pantalla(pregunta, region)
+        
+        firma = firma_frame(bgra)
+        mosaicos = dividir_en_mosaicos(ancho, alto)
+        
+        # Pistas: texto de la pregunta visible en pantalla, o zona que cambió
+        elegidos, motivo = [], None
+        if ocr_disponible():
+            palabras, _ = leer_texto(bgra, firma)
+            elegidos, motivo = _mosaicos_por_texto(pregunta, palabras, mosaicos), 'texto'
+        if not elegidos:
+            with _lock_estado:
+                anterior = _ultima_firma if _ultima_zona == zona else None
+            comparacion = comparar_firmas(anterior, firma)
+            if clasificar_cambio(comparacion) == 'solo_region':
+                elegidos, motivo = _mosaicos_por_cambio(comparacion['region'], mosaicos), 'cambio'
+        
+        vista = sesion.a_imagen(bgra, max_ancho=ANCHO_VISTA_GENERAL)
+        datos_vista, _ = codificar_imagen(vista)
+        
+        # Sin pistas: primero la vista general, que puede pedir zoom
+        if not elegidos:
+            print(f"   🗺️  Vista general ({vista.size[0]}x{vista.size[1]})...")
+            respuesta = _consultar_llava([datos_vista], _pregunta_vista_general(pregunta, mosaicos, max_mosaicos),
+                                         metricas)
+            if respuesta is None:
+                return {'exito': False, 'error': 'Llava no pudo analizar la imagen', 'metricas': metricas}
+            
+            elegidos, motivo = _mosaicos_pedidos(respuesta, mosaicos), 'zoom'
+            if not elegidos:
+                _recordar(respuesta, pregunta, firma, zona)
+                metricas['segundos_total'] = time.perf_counter() - inicio
+                return {'exito': True, 'descripcion': respuesta, 'imagen': vista,
+                        'origen': 'vista_general', 'mosaicos': [], 'motivo': None, 'metricas': metricas}
+        
+        elegidos = elegidos[:max_mosaicos]
+        print(f"   🔍 Mosaicos ({motivo}): {', '.join(m['nombre'] for m in elegidos)}")
+        
+        hashes, imagenes = [CacheMosaicos.hash_contenido(bgra[::8, ::8])], [datos_vista]
+        for mosaico in elegidos:
+            izq, arriba, der, abajo = mosaico['caja']
+            clave, datos = _cache_mosaicos.codificar(bgra[arriba:abajo, izq:der], sesion)
+            hashes.append(clave)
+            imagenes.append(datos)
         
+        respuesta = _cache_mosaicos.respuesta(hashes, pregunta)
+        if respuesta is None:
+            respuesta = _consultar_llava(imagenes, _pregunta_mosaicos(pregunta, elegidos), metricas)
+            if respuesta is None:
+                return {'exito': False, 'error': 'Llava no pudo analizar los mosaicos', 'metricas': metricas}
+            _cache_mosaicos.guardar_respuesta(hashes, pregunta, respuesta)
+        
+        _recordar(respuesta, pregunta, firma, zona)
+        metricas['segundos_total'] = time.perf_counter() - inicio
         print("   ✅ Visión completada\n")
         
         return {
             'exito': True,
-            'descripcion': descripcion,
-            'imagen': imagen_opt
+            'descripcion': respuesta,
+            'imagen': vista,
+            'origen': 'mosaicos',
+            'mosaicos': [m['nombre'] for m in elegidos],
+            'motivo': motivo,
+            'metricas': metricas
         }
-        
+    
     except Exception as e:
-        _vision_activa = False
         print(f"   ❌ Error general: {e}\n")
-        return {
-            'exito': False,
-            'error': str(e)
-        }
+        return {'exito': False, 'error': str(e)}
+    finally:
+        _salir_vision()
+
+
+def obtener_estadisticas_mosaicos():
+    """Mosaicos codificados vs reutilizados del cache"""
+    return _cache_mosaicos.estadisticas()
 
 
 # ==========================================
@@ -330,8 +2236,33 @@ def obtener_ultima_captura():
 
 
 def vision_esta_activa():
-    """Verifica si la visión está procesando"""
-    return _vision_activa
+    """Verifica si la visión está procesando (en cualquier hilo)"""
+    with _lock_estado:
+        return _visiones_activas > 0
+
+
+def obtener_estadisticas_cache():
+    """Estadísticas del cache de descripciones (aciertos, fallos, tamaño...)"""
+    return _cache_descripciones.estadisticas()
+
+
+def limpiar_cache_vision():
+    """Borra todas las descripciones guardadas"""
+    _cache_descripciones.limpiar()
+
+
+def configurar_cache_vision(max_entradas=CACHE_VISION_MAX, ttl=CACHE_VISION_TTL,
+                            disco=CACHE_VISION_DISCO):
+    """
+    Reemplaza el cache de descripciones con otros límites.
+    
+    Args:
+        max_entradas (int): Entradas en memoria
+        ttl (float): Segundos de validez de cada respuesta
+        disco (bool): Activar el nivel en disco (ARCHIVO_CACHE_VISION)
+    """
+    global _cache_descripciones
+    _cache_descripciones = CacheDescripciones(max_entradas, ttl, disco)
 
 
 # ==========================================
@@ -1,11 +1,10 @@
 # neo_voz.py - Sistema de reconocimiento de voz con Whisper [CORREGIDO]
-import whisper
-import pyaudio
-import wave
-import numpy as np
-import os
 import time
 
+import neo_audio
+import neo_vad
+import neo_stt
+
 print("=" * 60)
 print("NEO - Sistema de Reconocimiento de Voz v1.0")
 print("=" * 60)
@@ -13,24 +12,23 @@ print("=" * 60)
 # ==========================================
 # CONFIGURACIÓN
 # ==========================================
-CHUNK = 1024                    # Tamaño de cada fragmento de audio
-FORMAT = pyaudio.paInt16       # Formato de audio (16-bit)
-CHANNELS = 1                    # Mono (1 canal)
-RATE = 16000                   # 16kHz (óptimo para Whisper)
-SILENCE_THRESHOLD = 400        # Umbral para detectar silencio
-SILENCE_DURATION = 2.5         # Segundos de silencio para terminar
-TEMP_AUDIO = "temp_audio.wav"  # Archivo temporal
+RATE = neo_audio.RATE          # 16kHz (óptimo para Whisper)
 
 # ==========================================
-# CARGAR WHISPER
+# WHISPER (se carga en la primera transcripción, ver neo_stt)
 # ==========================================
-print("\n[1/1] Cargando Whisper...")
-try:
-    modelo = whisper.load_model("base")
-    print("✓ Whisper cargado correctamente")
-except Exception as e:
-    print(f"❌ Error al cargar Whisper: {e}")
-    exit(1)
+def obtener_modelo():
+    """
+    Motor de transcripción compartido con el resto de NEO (un solo modelo
+    en memoria por proceso).
+    
+    Returns:
+        neo_stt.MotorSTT, o None si no hay ningún motor instalado
+    """
+    modelo = neo_stt.obtener_motor()
+    if modelo is None:
+        print("❌ No hay ningún motor de transcripción instalado (pip install faster-whisper)")
+    return modelo
 
 # ==========================================
 # FUNCIÓN: escuchar_audio
@@ -39,114 +37,66 @@ def escuchar_audio(timeout=30, esperar_activacion=False):
     """
     Escucha audio del micrófono hasta que detecta silencio.
     
+    El micrófono queda abierto entre frases (neo_audio): aquí solo se
+    lee del buffer compartido, así que no hay que esperar a que se
+    inicialice el dispositivo ni se pierde el principio de la frase.
+    
     Args:
         timeout: Tiempo máximo de grabación en segundos
         esperar_activacion: Si True, muestra mensaje de espera
         
     Returns:
-        str: Ruta al archivo de audio temporal
+        np.ndarray: Audio float32 a 16 kHz, listo para transcribir_audio
         None: Si no se grabó nada
     """
-    audio = pyaudio.PyAudio()
-    
     try:
-        # Abrir stream de audio
-        stream = audio.open(
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=RATE,
-            input=True,
-            frames_per_buffer=CHUNK
-        )
-        
-        # Variables de control
-        frames = []                                      # Lista de fragmentos de audio
-        silent_chunks = 0                               # Contador de chunks silenciosos
-        max_silent_chunks = int(SILENCE_DURATION * RATE / CHUNK)  # ⚠️ LÍNEA CORREGIDA
-        recording = False                               # Si ya empezó a grabar
-        chunks_grabados = 0                            # Total de chunks procesados
-        max_chunks = int(timeout * RATE / CHUNK)       # Máximo de chunks permitidos
+        neo_audio.obtener_captura()
         
         if esperar_activacion:
             print("🎤 Esperando que hables...")
         
-        # Bucle de grabación
-        while chunks_grabados < max_chunks:
-            try:
-                # Leer chunk de audio
-                data = stream.read(CHUNK, exception_on_overflow=False)
-            except IOError:
-                continue
-            
-            # Convertir a numpy para analizar
-            audio_data = np.frombuffer(data, dtype=np.int16)
-            volume = np.abs(audio_data).mean()
-            
-            # Detectar si hay sonido
-            if volume > SILENCE_THRESHOLD:
-                # HAY SONIDO
-                if not recording:
-                    if esperar_activacion:
-                        print("🔴 Grabando...")
-                    recording = True
-                silent_chunks = 0
-                frames.append(data)
-            else:
-                # HAY SILENCIO
-                if recording:
-                    silent_chunks += 1
-                    frames.append(data)
-                    
-                    # Si hay mucho silencio, terminar
-                    if silent_chunks > max_silent_chunks:
-                        break
-            
-            chunks_grabados += 1
-        
-        # Cerrar stream
-        stream.stop_stream()
-        stream.close()
-        audio.terminate()
+        # neo_vad decide dónde empieza y termina la frase (umbral adaptativo)
+        muestras = neo_vad.grabar_frase(
+            timeout=timeout,
+            al_empezar=(lambda: print("🔴 Grabando...")) if esperar_activacion else None
+        )
         
         # Verificar si se grabó algo
-        if len(frames) == 0:
+        if muestras is None:
             return None
         
-        # Guardar audio en archivo WAV
-        wf = wave.open(TEMP_AUDIO, 'wb')
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(audio.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(frames))
-        wf.close()
+        # El audio va a Whisper en memoria (WAV solo con NEO_AUDIO_DEBUG=1)
+        neo_audio.guardar_depuracion(muestras, "neo_voz")
         
-        duracion = len(frames) * CHUNK / RATE
-        print(f"✓ Audio capturado ({duracion:.1f}s)")
-        return TEMP_AUDIO
+        print(f"✓ Audio capturado ({neo_audio.duracion(muestras):.1f}s)")
+        return neo_audio.a_float32(muestras)
         
     except Exception as e:
         print(f"❌ Error en grabación: {e}")
-        audio.terminate()
         return None
 
 # ==========================================
 # FUNCIÓN: transcribir_audio
 # ==========================================
-def transcribir_audio(archivo_audio):
+def transcribir_audio(audio):
     """
-    Transcribe un archivo de audio a texto usando Whisper.
+    Transcribe audio a texto usando Whisper.
     
     Args:
-        archivo_audio: Ruta al archivo .wav
+        audio: np.ndarray float32 a 16 kHz (de escuchar_audio) o ruta a un .wav
         
     Returns:
         str: Texto transcrito
         None: Si hubo error
     """
+    modelo = obtener_modelo()
+    if modelo is None:
+        return None
+    
     try:
         # Transcribir con Whisper
-        result = modelo.transcribe(archivo_audio, language="es")
-        texto = result['text'].strip()
+        result = modelo.transcribir(audio, idioma="es")
+        texto = result['texto']
         return texto
     except Exception as e:
         print(f"❌ Error en transcripción: {e}")
@@ -162,20 +112,30 @@ def probar_voz():
     print("=" * 60)
     print("\nHabla cuando quieras. Pararé cuando te calles.\n")
     
+    # Cargar Whisper mientras se espera el primer Enter
+    modelo = neo_stt.precargar()
+    if modelo is None:
+        print("❌ No hay ningún motor de transcripción instalado (pip install faster-whisper)")
+        return
+    
     while True:
         print("-" * 60)
         input("\nPresiona Enter para grabar...")
         
-        # Escuchar audio
-        archivo = escuchar_audio(timeout=10, esperar_activacion=True)
+        # Escuchar y transcribir a la vez (hipótesis parciales mientras hablas)
+        print("🎤 Esperando que hables...")
+        muestras, final = neo_stt.transcribir_mientras_habla(
+            timeout=10, motor=modelo,
+            al_parcial=lambda parcial: print(f"   … {parcial['texto']}"),
+            al_empezar=lambda: print("🔴 Grabando...")
+        )
         
-        if not archivo:
+        if muestras is None:
             print("⚠️  No se grabó audio")
             continue
         
-        # Transcribir
-        print("⏳ Transcribiendo...")
-        texto = transcribir_audio(archivo)
+        texto = final['texto']
+        print(f"⏱️  Texto final {final['segundos_finales'] * 1000:.0f} ms después del corte")
         
         if texto:
             print("\n" + "=" * 60)
@@ -186,10 +146,6 @@ def probar_voz():
         else:
             print("❌ No se pudo transcribir")
         
-        # Limpiar archivo temporal
-        if os.path.exists(TEMP_AUDIO):
-            os.remove(TEMP_AUDIO)
-        
         # Preguntar si continuar
         print("\n¿Continuar? (si/no): ", end='')
         respuesta = input().strip().lower()